@@ -0,0 +1,16 @@
+"""
+Benchmarks del pipeline de optimización.
+
+* ``benchmarks.synthetic`` genera libros Excel sintéticos con el mismo formato
+  ``Supply_Demand`` / ``Boundary Conditions`` que ``dataset/Hackaton DB Final.xlsx``.
+* ``benchmarks.run`` cronometra carga, preprocesamiento, construcción y
+  resolución de cada familia de modelos y guarda los resultados en JSON.
+* ``benchmarks.compare`` contrasta dos ficheros de resultados.
+* ``benchmarks.presolve`` mide la reducción del modelo (``utils.presolve``)
+  y el tiempo de resolución con y sin ella.
+
+Uso típico (desde la raíz del repositorio)::
+
+    python -m benchmarks.run --skus 3 30 300 --periods 20 --tightness 0.9 --out bench.json
+    python -m benchmarks.compare base.json bench.json
+"""
@@ -0,0 +1,49 @@
+"""
+compare.py
+==========
+
+Compara dos ficheros JSON generados por ``benchmarks.run``:
+
+    python -m benchmarks.compare base.json nuevo.json
+
+Para cada (familia, SKUs, periodos, tightness) muestra la mediana de cada
+tiempo en ambas ejecuciones y el cociente nuevo/base (< 1 = más rápido).
+"""
+
+import argparse
+import json
+from typing import List
+
+import pandas as pd
+
+KEYS: List[str] = ["family", "skus", "periods", "tightness"]
+METRICS: List[str] = ["load_s", "preprocess_s", "build_s", "solve_s", "total_s", "iterations"]
+
+
+def load_results(path: str) -> pd.DataFrame:
+    with open(path, encoding="utf-8") as fh:
+        df = pd.DataFrame(json.load(fh)["results"])
+    return df[df["status"] == "ok"].groupby(KEYS)[METRICS].median()
+
+
+def compare(base_path: str, new_path: str) -> pd.DataFrame:
+    """Tabla con columnas ``<métrica>_base``, ``<métrica>_new`` y ``<métrica>_ratio``."""
+    base, new = load_results(base_path), load_results(new_path)
+    table = base.join(new, lsuffix="_base", rsuffix="_new", how="inner")
+    for m in METRICS:
+        table[f"{m}_ratio"] = table[f"{m}_new"] / table[f"{m}_base"]
+    return table
+
+
+def main(argv: List[str] = None) -> None:
+    parser = argparse.ArgumentParser(description="Compara dos resultados de benchmarks.run.")
+    parser.add_argument("base")
+    parser.add_argument("new")
+    args = parser.parse_args(argv)
+    table = compare(args.base, args.new)
+    cols = [f"{m}_{s}" for m in ("build_s", "solve_s", "total_s") for s in ("base", "new", "ratio")]
+    print(table[cols].to_string(float_format=lambda v: f"{v:.3f}"))
+
+
+if __name__ == "__main__":
+    main()
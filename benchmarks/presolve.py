@@ -0,0 +1,108 @@
+"""
+presolve.py
+===========
+
+Mide el efecto de ``optimization_model.utils.presolve`` sobre libros
+sintéticos: tamaño del modelo (filas, columnas, no nulos) antes y después de
+la reducción y tiempo de construcción + resolución del escenario base con y
+sin ella.
+
+    python -m benchmarks.presolve --skus 50 300 --periods 52 --tightness 0.9 1.0 --out presolve.json
+
+Cada registro del JSON corresponde a (modelo, SKUs, periodos, tightness,
+repetición) e incluye las estadísticas de ``Reduction.stats()``, los tiempos
+de ambas variantes, la aceleración y la diferencia relativa de coste entre
+ellas (debe quedar en el orden de la tolerancia del solver).
+"""
+
+# ---------------------------------------------------------------------------
+# 1. IMPORTACIONES
+# ---------------------------------------------------------------------------
+import argparse
+import json
+import os
+import platform
+import tempfile
+from datetime import datetime, timezone
+from typing import List
+
+import pulp as lp
+
+from optimization_model.utils.presolve import presolve
+from optimization_model.utils.problem import load_problem
+from optimization_model.utils.scenarios import MODELS, solve_scenario
+
+from .run import ALPHA, W_C, W_S, _git_revision
+from .synthetic import generate_workbook
+
+
+# ---------------------------------------------------------------------------
+# 2. BENCHMARK
+# ---------------------------------------------------------------------------
+
+def bench_config(n_skus: int, n_periods: int, tightness: float, models: List[str],
+                 repeat: int, seed: int, workdir: str) -> List[dict]:
+    """Genera un libro sintético y resuelve cada modelo con y sin presolve."""
+    path = os.path.join(workdir, f"synthetic_{n_skus}x{n_periods}_{tightness}.xlsx")
+    generate_workbook(path, n_skus, n_periods, tightness, seed)
+    problem = load_problem(path)
+    stats = presolve(problem).stats()
+
+    records = []
+    for model in models:
+        for r in range(repeat):
+            full, reduced = (solve_scenario(problem, "base", model, ALPHA, W_C, W_S, reduce=flag)
+                             for flag in (False, True))
+            record = {"model": model, "skus": n_skus, "periods": n_periods,
+                      "tightness": tightness, "repeat": r, "presolve": stats,
+                      "status": [full["status"], reduced["status"]],
+                      "full_s": full["seconds"], "reduced_s": reduced["seconds"],
+                      "speedup": full["seconds"] / max(reduced["seconds"], 1e-12)}
+            if full["cost"] is not None and reduced["cost"] is not None:
+                record["cost_rel_diff"] = abs(full["cost"] - reduced["cost"]) / max(1.0, abs(full["cost"]))
+            records.append(record)
+            print(f"{model:<9} skus={n_skus:<5} periods={n_periods:<4} t={tightness:<4} "
+                  f"rows {stats['original']['rows']}→{stats['reduced']['rows']} "
+                  f"cols {stats['original']['columns']}→{stats['reduced']['columns']} "
+                  f"{record['full_s']:.3f}s→{record['reduced_s']:.3f}s (x{record['speedup']:.1f})")
+    return records
+
+
+def main(argv: List[str] = None) -> dict:
+    parser = argparse.ArgumentParser(description="Benchmark del presolve del modelo de planificación.")
+    parser.add_argument("--skus", type=int, nargs="+", default=[30, 100, 300])
+    parser.add_argument("--periods", type=int, nargs="+", default=[52])
+    parser.add_argument("--tightness", type=float, nargs="+", default=[0.9, 1.0])
+    parser.add_argument("--models", nargs="+", default=list(MODELS), choices=MODELS)
+    parser.add_argument("--repeat", type=int, default=1)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--out", default="presolve_results.json")
+    args = parser.parse_args(argv)
+
+    results = []
+    with tempfile.TemporaryDirectory(prefix="bench-") as workdir:
+        for n_skus in args.skus:
+            for n_periods in args.periods:
+                for tightness in args.tightness:
+                    results.extend(bench_config(n_skus, n_periods, tightness, args.models,
+                                                args.repeat, args.seed, workdir))
+
+    report = {
+        "meta": {
+            "created": datetime.now(timezone.utc).isoformat(),
+            "git_revision": _git_revision(),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "pulp": lp.__version__,
+            "args": vars(args),
+        },
+        "results": results,
+    }
+    with open(args.out, "w", encoding="utf-8") as fh:
+        json.dump(report, fh, indent=2)
+    print(f"Resultados guardados en {args.out}")
+    return report
+
+
+if __name__ == "__main__":
+    main()
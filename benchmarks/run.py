@@ -0,0 +1,189 @@
+"""
+run.py
+======
+
+Cronometra ``load_data``, ``preprocess_data``, construcción y resolución de
+cada familia de modelos sobre libros sintéticos y guarda los resultados en JSON.
+
+    python -m benchmarks.run --skus 3 30 300 --periods 12 52 --tightness 0.9 --out bench.json
+
+Cada registro del JSON corresponde a (familia, SKUs, periodos, tightness,
+repetición) e incluye los tiempos por etapa, el tamaño del modelo y el estado
+del solver.  Las familias que no pueden ejecutarse (p. ej. sin ``pyomo``/GLPK)
+quedan registradas con ``status="error"`` y el mensaje correspondiente.
+"""
+
+# ---------------------------------------------------------------------------
+# 1. IMPORTACIONES
+# ---------------------------------------------------------------------------
+import argparse
+import importlib
+import json
+import os
+import platform
+import subprocess
+import tempfile
+import time
+from datetime import datetime, timezone
+from typing import Callable, Dict, List
+
+import pulp as lp
+
+from optimization_model.utils import Bus_lex as lex
+from optimization_model.utils import Suma_ponderada_funciones as wsum
+from optimization_model.utils.costs import CostTable, load_costs, read_cost_sheet
+from optimization_model.utils.telemetry import RunTelemetry
+
+from .synthetic import generate_workbook
+
+
+# ---------------------------------------------------------------------------
+# 2. PARÁMETROS
+# ---------------------------------------------------------------------------
+ALPHA: float = 0.95
+W_C: float = 1.0
+W_S: float = 10.0
+
+FAMILIES: List[str] = ["lexicographic", "weighted", "goal", "functional"]
+
+
+# ---------------------------------------------------------------------------
+# 3. EJECUTORES POR FAMILIA
+# ---------------------------------------------------------------------------
+# Cada ejecutor recibe la ruta del libro, los costos (hoja 'Costs' del libro
+# sintético) y la telemetría, y ejecuta load_data → preprocess_data →
+# construcción + resolución del modelo.
+
+def _run_lexicographic(path: str, costs: CostTable, tel: RunTelemetry) -> None:
+    with tel.stage("load_data"):
+        df_sd, df_bc = lex.load_data(path)
+    with tel.stage("preprocess_data"):
+        data = lex.preprocess_data(df_sd, df_bc)
+    lex.build_lex_model(*data, ALPHA, *costs, telemetry=tel)
+
+
+def _run_weighted(path: str, costs: CostTable, tel: RunTelemetry) -> None:
+    with tel.stage("load_data"):
+        df_sd, df_bc = wsum.load_data(path)
+    with tel.stage("preprocess_data"):
+        data = wsum.preprocess_data(df_sd, df_bc)
+    wsum.build_weighted_model(*data, ALPHA, W_C, W_S, *costs, telemetry=tel)
+
+
+def _pyomo_runner(module_name: str) -> Callable[[str, CostTable, RunTelemetry], None]:
+    """Los modelos Simplex_* dependen de pyomo/GLPK: se importan solo al usarse."""
+    def run(path: str, costs: CostTable, tel: RunTelemetry) -> None:
+        module = importlib.import_module(f"optimization_model.utils.{module_name}")
+        with tel.stage("load_data"):
+            df = module.load_data(path)
+        with tel.stage("preprocess_data"):
+            data = module.preprocess_data(df)
+        module.build_goal_model(*data, telemetry=tel, c_prod=costs.prod, c_hold=costs.hold)
+    return run
+
+
+RUNNERS: Dict[str, Callable[[str, CostTable, RunTelemetry], None]] = {
+    "lexicographic": _run_lexicographic,
+    "weighted": _run_weighted,
+    "goal": _pyomo_runner("Simplex_Goal_programming"),
+    "functional": _pyomo_runner("Simplex_Restriccion_Funcional"),
+}
+
+
+# ---------------------------------------------------------------------------
+# 4. BENCHMARK
+# ---------------------------------------------------------------------------
+
+def summarize(tel: RunTelemetry) -> dict:
+    """Reduce la telemetría a tiempos por etapa y totales del modelo."""
+    info = tel.as_dict()
+    stages = info["stages"]
+    solves = info["solves"]
+    return {
+        "load_s": stages.get("load_data", 0.0),
+        "preprocess_s": stages.get("preprocess_data", 0.0),
+        "build_s": sum(v for k, v in stages.items() if k.startswith("build_")),
+        "solve_s": stages.get("cbc", 0.0) + stages.get("glpk", 0.0),
+        "solver_status": [s["status"] for s in solves],
+        "rows": sum(s["rows"] for s in solves),
+        "columns": sum(s["columns"] for s in solves),
+        "nonzeros": sum(s["nonzeros"] for s in solves),
+        "iterations": sum(s["iterations"] or 0 for s in solves),
+    }
+
+
+def bench_config(n_skus: int, n_periods: int, tightness: float, families: List[str],
+                 repeat: int, seed: int, workdir: str) -> List[dict]:
+    """Genera un libro sintético y ejecuta todas las familias ``repeat`` veces."""
+    path = os.path.join(workdir, f"synthetic_{n_skus}x{n_periods}_{tightness}.xlsx")
+    generate_workbook(path, n_skus, n_periods, tightness, seed)
+    products = lex.preprocess_data(*lex.load_data(path))[0]
+    costs = load_costs(products, read_cost_sheet(path), (lex.c_prod, lex.c_hold, lex.c_exc))
+
+    records = []
+    for family in families:
+        for r in range(repeat):
+            record = {"family": family, "skus": n_skus, "periods": n_periods,
+                      "tightness": tightness, "repeat": r}
+            tel = RunTelemetry()
+            t0 = time.perf_counter()
+            try:
+                RUNNERS[family](path, costs, tel)
+                record["status"] = "ok"
+            except Exception as e:
+                record["status"] = "error"
+                record["error"] = f"{type(e).__name__}: {e}"
+            record["total_s"] = time.perf_counter() - t0
+            record.update(summarize(tel))
+            records.append(record)
+            print(f"{family:<14} skus={n_skus:<5} periods={n_periods:<4} t={tightness:<4} "
+                  f"build={record['build_s']:.3f}s solve={record['solve_s']:.3f}s {record['status']}")
+    return records
+
+
+def _git_revision() -> str:
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True,
+                              text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return "unknown"
+
+
+def main(argv: List[str] = None) -> dict:
+    parser = argparse.ArgumentParser(description="Benchmark de los modelos de optimización.")
+    parser.add_argument("--skus", type=int, nargs="+", default=[3, 30, 100])
+    parser.add_argument("--periods", type=int, nargs="+", default=[20])
+    parser.add_argument("--tightness", type=float, nargs="+", default=[0.9])
+    parser.add_argument("--families", nargs="+", default=FAMILIES, choices=FAMILIES)
+    parser.add_argument("--repeat", type=int, default=1)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--out", default="bench_results.json")
+    args = parser.parse_args(argv)
+
+    results = []
+    with tempfile.TemporaryDirectory(prefix="bench-") as workdir:
+        for n_skus in args.skus:
+            for n_periods in args.periods:
+                for tightness in args.tightness:
+                    results.extend(bench_config(n_skus, n_periods, tightness, args.families,
+                                                args.repeat, args.seed, workdir))
+
+    report = {
+        "meta": {
+            "created": datetime.now(timezone.utc).isoformat(),
+            "git_revision": _git_revision(),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "pulp": lp.__version__,
+            "args": vars(args),
+        },
+        "results": results,
+    }
+    with open(args.out, "w", encoding="utf-8") as fh:
+        json.dump(report, fh, indent=2)
+    print(f"Resultados guardados en {args.out}")
+    return report
+
+
+if __name__ == "__main__":
+    main()
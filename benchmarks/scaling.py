@@ -0,0 +1,124 @@
+"""
+scaling.py
+==========
+
+Mide el efecto de ``optimization_model.utils.scaling`` sobre libros
+sintéticos: iteraciones del simplex y tiempo de CBC de cada escenario base
+con el escalado de filas, columnas y objetivo y sin él.  Por defecto sin el
+``presolve`` del paquete: tras él el escenario base suele quedar óptimo en la
+base inicial (0 iteraciones) y no hay nada que comparar.
+
+    python -m benchmarks.scaling --skus 30 300 --periods 52 --tightness 0.9 1.0 --out scaling.json
+
+Cada registro del JSON corresponde a (modelo, SKUs, periodos, tightness,
+repetición) e incluye, para ambas variantes, la suma de iteraciones y de
+segundos de CBC de todas las resoluciones del escenario, cuántas de ellas se
+escalaron (un modelo con rango de coeficientes pequeño no se escala) y la
+diferencia relativa de coste (debe quedar en el
+orden de la tolerancia del solver).
+"""
+
+# ---------------------------------------------------------------------------
+# 1. IMPORTACIONES
+# ---------------------------------------------------------------------------
+import argparse
+import json
+import os
+import platform
+import tempfile
+from datetime import datetime, timezone
+from typing import List
+
+import pulp as lp
+
+from optimization_model.utils import scaling
+from optimization_model.utils.problem import load_problem
+from optimization_model.utils.scenarios import MODELS, solve_scenario
+from optimization_model.utils.telemetry import RunTelemetry
+
+from .run import ALPHA, W_C, W_S, _git_revision
+from .synthetic import generate_workbook
+
+
+# ---------------------------------------------------------------------------
+# 2. BENCHMARK
+# ---------------------------------------------------------------------------
+
+def _run(problem, model: str, enabled: bool, reduce: bool) -> dict:
+    """Resuelve el escenario base con el escalado activado o no y suma sus resoluciones."""
+    previous, scaling.ENABLED = scaling.ENABLED, enabled
+    tel = RunTelemetry()
+    try:
+        row = solve_scenario(problem, "base", model, ALPHA, W_C, W_S, telemetry=tel, reduce=reduce)
+    finally:
+        scaling.ENABLED = previous
+    return {"status": row["status"], "cost": row["cost"],
+            "iterations": sum(r.get("iterations") or 0 for r in tel.solves),
+            "cbc_s": sum(r["seconds"] for r in tel.solves),
+            "scaled_solves": sum(bool(r.get("scaled")) for r in tel.solves)}
+
+
+def bench_config(n_skus: int, n_periods: int, tightness: float, models: List[str],
+                 repeat: int, seed: int, workdir: str, reduce: bool = False) -> List[dict]:
+    """Genera un libro sintético y resuelve cada modelo con y sin escalado."""
+    path = os.path.join(workdir, f"synthetic_{n_skus}x{n_periods}_{tightness}.xlsx")
+    generate_workbook(path, n_skus, n_periods, tightness, seed)
+    problem = load_problem(path)
+
+    records = []
+    for model in models:
+        for r in range(repeat):
+            plain, scaled = _run(problem, model, False, reduce), _run(problem, model, True, reduce)
+            record = {"model": model, "skus": n_skus, "periods": n_periods,
+                      "tightness": tightness, "repeat": r, "scaled_solves": scaled["scaled_solves"],
+                      "status": [plain["status"], scaled["status"]],
+                      "plain_iterations": plain["iterations"], "scaled_iterations": scaled["iterations"],
+                      "plain_s": plain["cbc_s"], "scaled_s": scaled["cbc_s"]}
+            if plain["cost"] is not None and scaled["cost"] is not None:
+                record["cost_rel_diff"] = abs(plain["cost"] - scaled["cost"]) / max(1.0, abs(plain["cost"]))
+            records.append(record)
+            print(f"{model:<9} skus={n_skus:<5} periods={n_periods:<4} t={tightness:<4} "
+                  f"iter {plain['iterations']}→{scaled['iterations']} "
+                  f"{plain['cbc_s']:.3f}s→{scaled['cbc_s']:.3f}s")
+    return records
+
+
+def main(argv: List[str] = None) -> dict:
+    parser = argparse.ArgumentParser(description="Benchmark del escalado del modelo de planificación.")
+    parser.add_argument("--skus", type=int, nargs="+", default=[30, 100, 300])
+    parser.add_argument("--periods", type=int, nargs="+", default=[52])
+    parser.add_argument("--tightness", type=float, nargs="+", default=[0.9, 1.0])
+    parser.add_argument("--models", nargs="+", default=list(MODELS), choices=MODELS)
+    parser.add_argument("--repeat", type=int, default=1)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--presolve", action="store_true", help="aplica el presolve del paquete")
+    parser.add_argument("--out", default="scaling_results.json")
+    args = parser.parse_args(argv)
+
+    results = []
+    with tempfile.TemporaryDirectory(prefix="bench-") as workdir:
+        for n_skus in args.skus:
+            for n_periods in args.periods:
+                for tightness in args.tightness:
+                    results.extend(bench_config(n_skus, n_periods, tightness, args.models,
+                                                args.repeat, args.seed, workdir, args.presolve))
+
+    report = {
+        "meta": {
+            "created": datetime.now(timezone.utc).isoformat(),
+            "git_revision": _git_revision(),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "pulp": lp.__version__,
+            "args": vars(args),
+        },
+        "results": results,
+    }
+    with open(args.out, "w", encoding="utf-8") as fh:
+        json.dump(report, fh, indent=2)
+    print(f"Resultados guardados en {args.out}")
+    return report
+
+
+if __name__ == "__main__":
+    main()
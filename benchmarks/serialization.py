@@ -0,0 +1,158 @@
+"""
+serialization.py
+================
+
+Cronometra la serialización de la respuesta de ``optimizeScript`` con cada
+codificación de ``optimization_model.utils.encoding`` sobre planes sintéticos.
+
+    python -m benchmarks.serialization --rows 10000 100000 500000 --out serialization.json
+
+Cada registro del JSON corresponde a (codificación, filas, repetición) e
+incluye el tiempo de serialización, el tamaño del cuerpo y la razón respecto
+de ``default`` (JSONRenderer de DRF, lo que devuelve hoy el endpoint).  Las
+codificaciones que no pueden ejecutarse (p. ej. ``arrow`` sin pyarrow)
+quedan registradas con ``status="error"``.
+"""
+
+# ---------------------------------------------------------------------------
+# 1. IMPORTACIONES
+# ---------------------------------------------------------------------------
+import argparse
+import json
+import os
+import platform
+import time
+from datetime import datetime, timezone
+from typing import Callable, List, Tuple
+
+import numpy as np
+import pandas as pd
+
+from optimization_model.utils import encoding
+
+from .run import _git_revision
+
+
+# ---------------------------------------------------------------------------
+# 2. PARÁMETROS
+# ---------------------------------------------------------------------------
+PERIODS: int = 52
+
+# (codificación, gzip)
+VARIANTS: List[Tuple[str, bool]] = [
+    ("default", False),
+    ("json", False),
+    ("json", True),
+    ("columnar", False),
+    ("columnar", True),
+    ("arrow", False),
+    ("arrow", True),
+]
+
+
+# ---------------------------------------------------------------------------
+# 3. DATOS SINTÉTICOS
+# ---------------------------------------------------------------------------
+
+def synthetic_plan(rows: int, n_periods: int = PERIODS, seed: int = 0) -> Tuple[pd.DataFrame, pd.DataFrame]:
+    """Plan con ``rows`` entradas no nulas (SKU × periodo) y una frontera de Pareto pequeña."""
+    rng = np.random.default_rng(seed)
+    n_skus = -(-rows // n_periods)
+    periods = pd.date_range("2025-01-03", periods=n_periods, freq="W-FRI").strftime("%m-%d-%y")
+    plan = pd.DataFrame({
+        "Product": np.repeat([f"SKU{i:06d}" for i in range(n_skus)], n_periods)[:rows],
+        "Period": np.tile(periods, n_skus)[:rows],
+        "Production": rng.gamma(2.0, 500.0, size=rows),
+    })
+    pareto = pd.DataFrame({
+        "model": ["ws"] * 5 + ["lex"],
+        "w_s": [0.1, 1, 10, 100, 1000, np.nan],
+        "cost": rng.uniform(1e6, 2e6, size=6),
+        "service": rng.uniform(0.8, 1.0, size=6),
+    })
+    return plan, pareto
+
+
+# ---------------------------------------------------------------------------
+# 4. BENCHMARK
+# ---------------------------------------------------------------------------
+
+def _drf_default(plan: pd.DataFrame, pareto: pd.DataFrame) -> bytes:
+    """Lo que hace hoy la vista: ``Response`` con el DataFrame y los registros de Pareto."""
+    from rest_framework.renderers import JSONRenderer
+    payload = {"optimizedData": plan, "pareto": encoding.pareto_records(pareto)}
+    return JSONRenderer().render(payload)
+
+
+def _encoder(name: str, compress: bool) -> Callable[[pd.DataFrame, pd.DataFrame], bytes]:
+    if name == "default":
+        return _drf_default
+    return lambda plan, pareto: encoding.encode_plan(plan, pareto, name, compress)[0]
+
+
+def bench_rows(rows: int, repeat: int, seed: int) -> List[dict]:
+    plan, pareto = synthetic_plan(rows, seed=seed)
+    records, baseline = [], None
+    for name, compress in VARIANTS:
+        encode = _encoder(name, compress)
+        for r in range(repeat):
+            record = {"encoding": name, "gzip": compress, "rows": rows, "repeat": r}
+            try:
+                t0 = time.perf_counter()
+                body = encode(plan, pareto)
+                record.update(status="ok", seconds=time.perf_counter() - t0, bytes=len(body))
+            except Exception as e:
+                record.update(status="error", error=f"{type(e).__name__}: {e}")
+                records.append(record)
+                break
+            if name == "default" and not compress:
+                baseline = baseline or record
+            if baseline is not None:
+                record["speedup"] = baseline["seconds"] / max(record["seconds"], 1e-12)
+                record["size_ratio"] = record["bytes"] / baseline["bytes"]
+            records.append(record)
+        last = records[-1]
+        if last["status"] == "ok":
+            print(f"{name:<9} gzip={str(compress):<5} rows={rows:<8} "
+                  f"{last['seconds']:.4f}s {last['bytes'] / 1e6:8.2f} MB")
+        else:
+            print(f"{name:<9} gzip={str(compress):<5} rows={rows:<8} {last['error']}")
+    return records
+
+
+def main(argv: List[str] = None) -> dict:
+    parser = argparse.ArgumentParser(description="Benchmark de las codificaciones de respuesta.")
+    parser.add_argument("--rows", type=int, nargs="+", default=[10_000, 100_000, 500_000])
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--out", default="serialization_results.json")
+    args = parser.parse_args(argv)
+
+    # El renderer de DRF lee la configuración de Django
+    os.environ.setdefault("DJANGO_SETTINGS_MODULE", "django_optimization_api.settings")
+    import django
+    django.setup()
+
+    results = []
+    for rows in args.rows:
+        results.extend(bench_rows(rows, args.repeat, args.seed))
+
+    report = {
+        "meta": {
+            "created": datetime.now(timezone.utc).isoformat(),
+            "git_revision": _git_revision(),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "orjson": getattr(encoding.orjson, "__version__", None),
+            "args": vars(args),
+        },
+        "results": results,
+    }
+    with open(args.out, "w", encoding="utf-8") as fh:
+        json.dump(report, fh, indent=2)
+    print(f"Resultados guardados en {args.out}")
+    return report
+
+
+if __name__ == "__main__":
+    main()
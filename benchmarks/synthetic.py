@@ -0,0 +1,144 @@
+"""
+synthetic.py
+============
+
+Generador de libros Excel sintéticos con el formato de ``Hackaton DB Final.xlsx``:
+
+* ``Supply_Demand``: dos filas de etiquetas (trimestre / semana), cabecera
+  ``Product ID | Attribute | MM-DD-YY ...`` y seis atributos por SKU.
+* ``Boundary Conditions``: una fila de etiquetas, cabecera con los mismos
+  periodos y filas ``Available Capacity`` por línea de producción.
+* ``Costs``: costos unitarios por SKU (ver ``optimization_model.utils.costs``).
+
+La holgura de capacidad se controla con ``tightness`` ∈ (0, 1]: la capacidad de
+cada periodo es la producción mínima necesaria dividida entre ``tightness``
+(1.0 = capacidad justa, 0.5 = el doble de lo necesario).
+"""
+
+# ---------------------------------------------------------------------------
+# 1. IMPORTACIONES
+# ---------------------------------------------------------------------------
+from typing import Dict, List, Tuple
+
+import numpy as np
+import pandas as pd
+
+
+# ---------------------------------------------------------------------------
+# 2. PARÁMETROS
+# ---------------------------------------------------------------------------
+START_DATE: str = "2024-11-29"   # primer periodo del dataset original
+N_LINES: int = 2                 # filas 'Available Capacity' en Boundary Conditions
+
+ATTRIBUTES: List[str] = [
+    "Yielded Supply",
+    "Safety Stock Target",
+    "Safety Stock Target (WOS)",
+    "EffectiveDemand",
+    "Total Projected Inventory Balance",
+    "Inventory Balance in excess of SST",
+]
+
+
+# ---------------------------------------------------------------------------
+# 3. GENERACIÓN
+# ---------------------------------------------------------------------------
+
+def sku_ids(n_skus: int) -> List[str]:
+    """Identificadores tipo ``'21A'`` únicos para ``n_skus`` productos."""
+    return [f"{21 + i // 26}{chr(ord('A') + i % 26)}" for i in range(n_skus)]
+
+
+def period_labels(n_periods: int) -> List[str]:
+    """Columnas de periodo en formato ``MM-DD-YY`` (semanales, sin repetición)."""
+    dates = pd.date_range(START_DATE, periods=n_periods, freq="W-FRI")
+    return [d.strftime("%m-%d-%y") for d in dates]
+
+
+def synthetic_data(n_skus: int, n_periods: int, tightness: float = 0.9,
+                   seed: int = 0) -> Tuple[List[str], List[str], Dict[str, np.ndarray], np.ndarray]:
+    """
+    Genera los parámetros numéricos (enteros) del problema.
+    Devuelve:
+        products, periods, attrs (atributo -> matriz SKU × periodo), cap_lines (línea × periodo)
+    """
+    if not 0 < tightness <= 1:
+        raise ValueError("tightness debe estar en (0, 1]")
+    rng = np.random.default_rng(seed)
+    products, periods = sku_ids(n_skus), period_labels(n_periods)
+
+    base = rng.lognormal(mean=8.0, sigma=0.8, size=(n_skus, 1))
+    season = 1 + 0.25 * np.sin(np.linspace(0, 4 * np.pi, n_periods))[None, :]
+    noise = rng.normal(1.0, 0.15, size=(n_skus, n_periods)).clip(0.3)
+    demand = np.rint(base * season * noise)
+
+    wos = rng.uniform(1.2, 1.8, size=(n_skus, 1))
+    sst = np.rint(0.1 * wos * demand)
+    supply = np.rint(demand * rng.uniform(0.9, 1.2, size=demand.shape))
+    inventory = np.cumsum(supply - demand, axis=1)
+    excess = np.rint(rng.normal(0.0, 0.05, size=demand.shape) * demand)
+
+    # Producción mínima por periodo: demanda + incremento de SST
+    sst_prev = np.concatenate([np.zeros((n_skus, 1)), sst[:, :-1]], axis=1)
+    need = (demand + np.maximum(sst - sst_prev, 0)).sum(axis=0)
+    cap_total = np.ceil(need / tightness)
+    shares = rng.dirichlet(np.ones(N_LINES))
+    cap_lines = np.floor(np.outer(shares, cap_total))
+    cap_lines[-1] += cap_total - cap_lines.sum(axis=0)
+
+    attrs = {
+        "Yielded Supply": supply,
+        "Safety Stock Target": sst,
+        "Safety Stock Target (WOS)": np.repeat(wos, n_periods, axis=1).round(3),
+        "EffectiveDemand": demand,
+        "Total Projected Inventory Balance": inventory,
+        "Inventory Balance in excess of SST": excess,
+    }
+    return products, periods, attrs, cap_lines
+
+
+def synthetic_costs(products: List[str], seed: int = 0) -> Tuple[Dict[str, float], Dict[str, float], Dict[str, float]]:
+    """Costos unitarios aleatorios en los mismos rangos que los valores de ``Bus_lex``."""
+    rng = np.random.default_rng(seed + 1)
+    c_prod = dict(zip(products, rng.uniform(4.0, 6.5, len(products)).round(2)))
+    c_hold = dict(zip(products, rng.uniform(0.1, 0.3, len(products)).round(3)))
+    c_exc = {p: 1.0 for p in products}
+    return c_prod, c_hold, c_exc
+
+
+def generate_workbook(path: str, n_skus: int, n_periods: int, tightness: float = 0.9,
+                      seed: int = 0) -> str:
+    """Escribe el libro sintético en ``path`` y devuelve la ruta."""
+    products, periods, attrs, cap_lines = synthetic_data(n_skus, n_periods, tightness, seed)
+
+    sd_rows = [
+        [None, None] + [f"Q{(i // 13) % 4 + 1} {95 + i // 52}" for i in range(n_periods)],
+        [None, "EffectiveDemand"] + [f"W {i % 52 + 1:02d}" for i in range(n_periods)],
+        ["Product ID", "Attribute"] + periods,
+    ]
+    for i, p in enumerate(products):
+        for attr in ATTRIBUTES:
+            sd_rows.append([p, attr] + attrs[attr][i].tolist())
+
+    bc_rows = [
+        [None, None] + [f"Q{(i // 13) % 4 + 1} {95 + i // 52}" for i in range(n_periods)],
+        ["Product ID", "Attribute"] + periods,
+    ]
+    for k, row in enumerate(cap_lines):
+        line = f"Line-{k + 1:02d}"
+        bc_rows.append([line, "Available Capacity"] + row.tolist())
+        bc_rows.append([line, "Scheduled Capacity"] + [None] * n_periods)
+
+    c_prod, c_hold, c_exc = synthetic_costs(products, seed)
+    costs = pd.DataFrame({
+        "Product ID": products,
+        "Production Cost": [c_prod[p] for p in products],
+        "Holding Cost": [c_hold[p] for p in products],
+        "Excess Cost": [c_exc[p] for p in products],
+    })
+
+    with pd.ExcelWriter(path, engine="openpyxl") as writer:
+        pd.DataFrame(sd_rows).to_excel(writer, sheet_name="Supply_Demand", header=False, index=False)
+        pd.DataFrame(bc_rows).to_excel(writer, sheet_name="Boundary Conditions", header=False, index=False)
+        costs.to_excel(writer, sheet_name="Costs", index=False)
+    return path
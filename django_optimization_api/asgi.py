@@ -3,6 +3,11 @@ ASGI config for django_optimization_api project.
 
 It exposes the ASGI callable as a module-level variable named ``application``.
 
+Serve the API with an ASGI server so the async views (admission control and
+live streaming) run on the event loop, e.g.::
+
+    uvicorn django_optimization_api.asgi:application --workers 1
+
 For more information on this file, see
 https://docs.djangoproject.com/en/5.2/howto/deployment/asgi/
 """
@@ -72,6 +72,7 @@ TEMPLATES = [
 ]
 
 WSGI_APPLICATION = 'django_optimization_api.wsgi.application'
+ASGI_APPLICATION = 'django_optimization_api.asgi.application'
 
 
 # Database
@@ -81,6 +82,8 @@ DATABASES = {
     'default': {
         'ENGINE': 'django.db.backends.sqlite3',
         'NAME': BASE_DIR / 'db.sqlite3',
+        # los nodos de optimization_model.distributed escriben a la vez
+        'OPTIONS': {'timeout': 20},
     }
 }
 
@@ -128,6 +131,33 @@ DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 
 #cors authorization
 CORS_ALLOWED_ORIGINS = ["http://localhost:5173"]
+CORS_EXPOSE_HEADERS = ["X-Total-Rows"]
+
+# Planes por ejecución que se consultan por bloques (optimization_model.utils.plan_store)
+PLAN_STORE_DIR = BASE_DIR / 'plan_store'
+PLAN_STORE_MAX_RUNS = 100
+
+# Gráficas dibujadas en segundo plano por ejecución (optimization_model.utils.charts)
+CHART_DIR = BASE_DIR / 'charts'
+CHART_MAX_RUNS = 100
+
+# Límite de tiempo por resolución de CBC (segundos) cuando la petición no manda
+# presupuesto propio (optimization_model.utils.solver.SolveBudget)
+SOLVE_TIME_LIMIT = 300
+
+# Control de admisión de los endpoints que resuelven (optimization_model.utils.admission):
+# trabajos a la vez (None = núcleos disponibles), trabajos en cola (None = 2 por
+# cada uno en curso) y segundos máximos de espera en cola antes de responder 503
+OPTIMIZE_CONCURRENCY = None
+OPTIMIZE_QUEUE_DEPTH = None
+OPTIMIZE_QUEUE_TIMEOUT = 60
+
+# Reparto de resoluciones entre nodos (optimization_model.distributed): segundos
+# entre consultas de un nodo sin trabajo, entre latidos de una tarea en curso y
+# sin latido tras los que una tarea vuelve a la cola
+DISTRIBUTED_POLL = 0.2
+DISTRIBUTED_HEARTBEAT = 2
+DISTRIBUTED_LEASE = 10
 
 REST_FRAMEWORK = {
     "DEFAULT_SCHEMA_CLASS": "rest_framework.schemas.coreapi.AutoSchema",
@@ -1,3 +1,18 @@
 from django.contrib import admin
 
-# Register your models here.
+from .models import SolveBatch, SolveTask, WorkerNode
+
+
+@admin.register(SolveTask)
+class SolveTaskAdmin(admin.ModelAdmin):
+    list_display = ("batch", "index", "kind", "status", "worker", "attempts", "heartbeat_at")
+    list_filter = ("status", "kind")
+    exclude = ("result",)
+
+
+@admin.register(WorkerNode)
+class WorkerNodeAdmin(admin.ModelAdmin):
+    list_display = ("name", "host", "pid", "last_seen", "tasks_done")
+
+
+admin.site.register(SolveBatch)
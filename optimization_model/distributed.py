@@ -0,0 +1,253 @@
+"""
+distributed.py
+==============
+
+Reparto de resoluciones independientes entre nodos a través de la base de datos.
+
+Protocolo (tablas de ``models``):
+
+* El coordinador (la petición que optimiza) crea un ``SolveBatch`` con el
+  problema serializado (``utils.tasks.pack_problem``) y un ``SolveTask``
+  ``pending`` por resolución.
+* Cada nodo (``manage.py solve_worker``, en esta u otra máquina con acceso a
+  la misma base de datos) reclama tareas con una actualización condicional
+  (``pending`` → ``running``, gana un solo nodo), las resuelve con
+  ``utils.tasks.run_task`` y guarda el resultado (``done``) o el error.
+  Mientras resuelve, un hilo renueva ``heartbeat_at`` cada ``HEARTBEAT``
+  segundos.
+* Una tarea ``running`` sin latido en ``LEASE`` segundos se da por perdida
+  (nodo caído o colgado) y vuelve a ``pending``; tras ``MAX_ATTEMPTS``
+  intentos (perdidos o fallidos) queda ``failed``.
+* El coordinador devuelve los resultados en el orden de las tareas a medida
+  que están listos.  Mientras espera también reclama y resuelve tareas de su
+  propio lote, de modo que sin nodos activos el lote termina igual (en línea).
+  Al terminar (o si se cancela) borra el lote y sus tareas.
+
+Con SQLite todos los nodos deben estar en la misma máquina; para varias
+máquinas la base de datos debe ser compartida (PostgreSQL, MySQL, ...).
+"""
+
+# ---------------------------------------------------------------------------
+# 1. IMPORTACIONES
+# ---------------------------------------------------------------------------
+import os
+import socket
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from datetime import timedelta
+from typing import Dict, Iterator, List, Optional, Tuple
+
+import numpy as np
+from django.conf import settings
+from django.db import close_old_connections, connection, transaction
+from django.db.models import F
+from django.utils import timezone
+
+from .models import SolveBatch, SolveTask, WorkerNode
+from .utils.encoding import finite
+from .utils.problem import PlanningProblem
+from .utils.tasks import pack_problem, run_task, unpack_problem
+
+
+# ---------------------------------------------------------------------------
+# 2. PARÁMETROS
+# ---------------------------------------------------------------------------
+POLL: float = 0.2            # segundos entre consultas cuando no hay nada que hacer
+HEARTBEAT: float = 2.0       # segundos entre latidos de una tarea en curso
+LEASE: float = 10.0          # segundos sin latido tras los que una tarea se da por perdida
+MAX_ATTEMPTS: int = 3        # intentos por tarea (perdidos o fallidos)
+CACHED_BATCHES: int = 4      # problemas deserializados que guarda cada nodo
+
+
+def _setting(name: str, default):
+    return getattr(settings, f"DISTRIBUTED_{name}", default)
+
+
+class TaskFailed(RuntimeError):
+    """Una tarea del lote agotó sus intentos."""
+
+
+# ---------------------------------------------------------------------------
+# 3. TAREAS EN LA BASE DE DATOS
+# ---------------------------------------------------------------------------
+
+def requeue_lost(lease: Optional[float] = None) -> int:
+    """Devuelve a ``pending`` las tareas sin latido en ``lease`` segundos (o las marca ``failed``)."""
+    cutoff = timezone.now() - timedelta(seconds=lease or _setting("LEASE", LEASE))
+    lost = SolveTask.objects.filter(status=SolveTask.RUNNING, heartbeat_at__lt=cutoff)
+    lost.filter(attempts__gte=MAX_ATTEMPTS).update(
+        status=SolveTask.FAILED, error="Task lost (no heartbeat) after the last attempt")
+    return lost.update(status=SolveTask.PENDING, worker="")
+
+
+def claim(worker: str, batch_id: Optional[str] = None) -> Optional[SolveTask]:
+    """Reclama la tarea pendiente más antigua (de ``batch_id`` si se indica); ``None`` si no hay."""
+    pending = SolveTask.objects.filter(status=SolveTask.PENDING)
+    if batch_id is not None:
+        pending = pending.filter(batch_id=batch_id)
+    for pk in pending.order_by("id").values_list("pk", flat=True)[:16]:
+        won = SolveTask.objects.filter(pk=pk, status=SolveTask.PENDING).update(
+            status=SolveTask.RUNNING, worker=worker, heartbeat_at=timezone.now(), attempts=F("attempts") + 1)
+        if won:
+            return SolveTask.objects.get(pk=pk)
+    return None
+
+
+def _finish(task: SolveTask, result: Optional[dict], error: str = "") -> None:
+    """Guarda el resultado (o el error) salvo que la tarea ya esté terminada."""
+    open_task = SolveTask.objects.filter(pk=task.pk).exclude(status__in=[SolveTask.DONE, SolveTask.FAILED])
+    if result is not None:
+        # JSON estricto: NaN/inf no son JSON válido en la base de datos
+        open_task.update(status=SolveTask.DONE, result=finite(result), error="", heartbeat_at=timezone.now())
+    elif task.attempts >= MAX_ATTEMPTS:
+        open_task.update(status=SolveTask.FAILED, error=error)
+    else:
+        open_task.update(status=SolveTask.PENDING, worker="", error=error)
+
+
+class _Heartbeat(threading.Thread):
+    """Renueva el latido de la tarea (y del nodo) mientras se resuelve."""
+
+    def __init__(self, task: SolveTask, node: Optional[str], interval: float):
+        super().__init__(daemon=True)
+        self.task, self.node, self.interval = task, node, interval
+        self.done = threading.Event()
+
+    def run(self) -> None:
+        try:
+            while not self.done.wait(self.interval):
+                now = timezone.now()
+                SolveTask.objects.filter(pk=self.task.pk, status=SolveTask.RUNNING).update(heartbeat_at=now)
+                if self.node is not None:
+                    WorkerNode.objects.filter(name=self.node).update(last_seen=now)
+        finally:
+            connection.close()
+
+    def stop(self) -> None:
+        self.done.set()
+        self.join()
+
+
+class _ProblemCache:
+    """Problemas ya deserializados por lote (los lotes recientes, en memoria)."""
+
+    def __init__(self, size: int = CACHED_BATCHES):
+        self.size = size
+        self._items: "OrderedDict[str, Tuple[PlanningProblem, Dict[str, np.ndarray]]]" = OrderedDict()
+
+    def put(self, batch_id: str, problem: PlanningProblem, arrays: Dict[str, np.ndarray]) -> None:
+        self._items[batch_id] = (problem, arrays)
+        if len(self._items) > self.size:
+            self._items.popitem(last=False)
+
+    def get(self, batch_id: str) -> Tuple[PlanningProblem, Dict[str, np.ndarray]]:
+        if batch_id in self._items:
+            self._items.move_to_end(batch_id)
+            return self._items[batch_id]
+        batch = SolveBatch.objects.only("problem", "meta").get(pk=batch_id)
+        self.put(batch_id, *unpack_problem(batch.problem, batch.meta))
+        return self._items[batch_id]
+
+
+def execute(task: SolveTask, problems: _ProblemCache, node: Optional[str] = None) -> bool:
+    """Resuelve una tarea reclamada con latidos y guarda el resultado; ``True`` si terminó bien."""
+    heartbeat = _Heartbeat(task, node, _setting("HEARTBEAT", HEARTBEAT))
+    heartbeat.start()
+    result, error = None, ""
+    try:
+        problem, arrays = problems.get(task.batch_id)
+        result = run_task(task.kind, problem, arrays, task.payload)
+    except SolveBatch.DoesNotExist:
+        return False    # el coordinador ya borró el lote (terminado o cancelado)
+    except Exception as e:
+        error = f"{type(e).__name__}: {e}"
+    finally:
+        heartbeat.stop()
+    _finish(task, result, error)
+    return result is not None
+
+
+# ---------------------------------------------------------------------------
+# 4. COORDINADOR
+# ---------------------------------------------------------------------------
+
+def dispatch(problem: PlanningProblem, kind: str, payloads: List[dict],
+             arrays: Optional[Dict[str, np.ndarray]] = None) -> Iterator[dict]:
+    """
+    ``dispatch`` de ``utils.tasks`` repartido entre los nodos: una tarea por
+    payload y los resultados en ese orden.  ``TaskFailed`` si una tarea agota
+    sus intentos.
+    """
+    blob, meta = pack_problem(problem, arrays)
+    with transaction.atomic():
+        batch = SolveBatch.objects.create(id=uuid.uuid4().hex, problem=blob, meta=meta)
+        SolveTask.objects.bulk_create([SolveTask(batch=batch, index=i, kind=kind, payload=payload)
+                                       for i, payload in enumerate(payloads)])
+    me = f"coordinator@{socket.gethostname()}:{os.getpid()}:{threading.get_ident()}"
+    problems = _ProblemCache(1)
+    problems.put(batch.id, problem, arrays or {})
+    results: Dict[int, dict] = {}
+    next_index = 0
+    try:
+        while next_index < len(payloads):
+            requeue_lost()
+            finished = (SolveTask.objects.filter(batch=batch, index__gte=next_index,
+                                                 status__in=[SolveTask.DONE, SolveTask.FAILED])
+                        .values_list("index", "status", "result", "error"))
+            for index, status, result, error in finished:
+                if status == SolveTask.FAILED:
+                    raise TaskFailed(f"Task {index} ({kind}) failed: {error}")
+                results[index] = result
+            if next_index in results:
+                while next_index in results:
+                    yield results.pop(next_index)
+                    next_index += 1
+                continue
+            # Nada listo todavía: el coordinador también resuelve tareas de su lote
+            task = claim(me, batch.id)
+            if task is not None:
+                execute(task, problems)
+            else:
+                time.sleep(_setting("POLL", POLL))
+    finally:
+        SolveBatch.objects.filter(pk=batch.pk).delete()
+
+
+# ---------------------------------------------------------------------------
+# 5. NODO
+# ---------------------------------------------------------------------------
+
+def serve(name: Optional[str] = None, idle_timeout: Optional[float] = None,
+          max_tasks: Optional[int] = None, stop: Optional[threading.Event] = None, log=print) -> int:
+    """
+    Atiende tareas de cualquier lote hasta ``stop``, ``max_tasks`` tareas o
+    ``idle_timeout`` segundos sin trabajo.  Devuelve las tareas completadas.
+    """
+    name = name or f"{socket.gethostname()}:{os.getpid()}"
+    WorkerNode.objects.update_or_create(name=name, defaults={
+        "host": socket.gethostname(), "pid": os.getpid(), "last_seen": timezone.now(), "tasks_done": 0})
+    problems = _ProblemCache()
+    stop = stop or threading.Event()
+    done, idle_since = 0, time.monotonic()
+    try:
+        while not stop.is_set() and (max_tasks is None or done < max_tasks):
+            close_old_connections()
+            WorkerNode.objects.filter(name=name).update(last_seen=timezone.now())
+            requeue_lost()
+            task = claim(name)
+            if task is None:
+                if idle_timeout is not None and time.monotonic() - idle_since > idle_timeout:
+                    break
+                stop.wait(_setting("POLL", POLL))
+                continue
+            ok = execute(task, problems, name)
+            log(f"[{name}] {task.kind} {task.batch_id}[{task.index}] {'done' if ok else 'failed'}")
+            if ok:
+                done += 1
+                WorkerNode.objects.filter(name=name).update(tasks_done=F("tasks_done") + 1)
+            idle_since = time.monotonic()
+    finally:
+        WorkerNode.objects.filter(name=name).delete()
+    return done
@@ -0,0 +1,23 @@
+from django.core.management.base import BaseCommand
+
+from optimization_model import distributed
+
+
+class Command(BaseCommand):
+    help = "Atiende tareas de resolución repartidas (optimization_model.distributed) hasta Ctrl+C."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--name", default=None,
+                            help="Nombre del nodo (por defecto host:pid)")
+        parser.add_argument("--idle-timeout", type=float, default=None,
+                            help="Segundos sin tareas tras los que el nodo termina")
+        parser.add_argument("--max-tasks", type=int, default=None,
+                            help="Tareas completadas tras las que el nodo termina")
+
+    def handle(self, *args, **options):
+        try:
+            done = distributed.serve(options["name"], options["idle_timeout"], options["max_tasks"],
+                                     log=self.stdout.write)
+        except KeyboardInterrupt:
+            return
+        self.stdout.write(self.style.SUCCESS(f"{done} tareas completadas"))
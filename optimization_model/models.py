@@ -1,3 +1,50 @@
 from django.db import models
 
-# Create your models here.
+
+class SolveBatch(models.Model):
+    """Problema común de un lote de tareas repartidas (ver ``optimization_model.distributed``)."""
+    id = models.CharField(primary_key=True, max_length=32)
+    created_at = models.DateTimeField(auto_now_add=True)
+    problem = models.BinaryField()          # utils.tasks.pack_problem (.npz)
+    meta = models.JSONField(default=dict)   # productos, periodos y arreglos extra
+
+    def __str__(self):
+        return self.id
+
+
+class SolveTask(models.Model):
+    """Una resolución independiente; la reclama un nodo y la mantiene viva con latidos."""
+    PENDING, RUNNING, DONE, FAILED = "pending", "running", "done", "failed"
+    STATUSES = [(PENDING, "Pending"), (RUNNING, "Running"), (DONE, "Done"), (FAILED, "Failed")]
+
+    batch = models.ForeignKey(SolveBatch, on_delete=models.CASCADE, related_name="tasks")
+    index = models.PositiveIntegerField()
+    kind = models.CharField(max_length=32)
+    payload = models.JSONField(default=dict)
+    status = models.CharField(max_length=16, choices=STATUSES, default=PENDING)
+    worker = models.CharField(max_length=128, blank=True)
+    attempts = models.PositiveSmallIntegerField(default=0)
+    heartbeat_at = models.DateTimeField(null=True, blank=True)
+    result = models.JSONField(null=True, blank=True)
+    error = models.TextField(blank=True)
+
+    class Meta:
+        ordering = ["batch", "index"]
+        constraints = [models.UniqueConstraint(fields=["batch", "index"], name="unique_task_index")]
+        indexes = [models.Index(fields=["status", "heartbeat_at"])]
+
+    def __str__(self):
+        return f"{self.batch_id}[{self.index}] {self.kind} ({self.status})"
+
+
+class WorkerNode(models.Model):
+    """Nodo que atiende tareas (``manage.py solve_worker``) y su último latido."""
+    name = models.CharField(max_length=128, unique=True)
+    host = models.CharField(max_length=255)
+    pid = models.PositiveIntegerField()
+    started_at = models.DateTimeField(auto_now_add=True)
+    last_seen = models.DateTimeField()
+    tasks_done = models.PositiveIntegerField(default=0)
+
+    def __str__(self):
+        return self.name
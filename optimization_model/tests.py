@@ -1,3 +1,1362 @@
-from django.test import TestCase
+"""
+tests.py
+========
 
-# Create your tests here.
+Pruebas de comportamiento de las rutas de resolución: cada variante
+(pools, presolve, Benders, reparto entre nodos, admisión concurrente) se
+compara con el modelo completo resuelto directamente.  Los libros son
+sintéticos (``benchmarks.synthetic``) y pequeños para que CBC resuelva en
+décimas de segundo.
+
+    python manage.py test optimization_model
+"""
+
+# ---------------------------------------------------------------------------
+# 1. IMPORTACIONES
+# ---------------------------------------------------------------------------
+import gzip
+import importlib.util
+import json
+import os
+import shutil
+import tempfile
+import threading
+import time
+import uuid
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import contextmanager
+from datetime import timedelta
+from unittest import mock, skipUnless
+
+import numpy as np
+import pandas as pd
+import pulp as lp
+from django.test import AsyncClient, Client, SimpleTestCase, TestCase, override_settings
+from django.utils import timezone
+
+from benchmarks.synthetic import generate_workbook
+from optimization_model import distributed, views
+from optimization_model.models import SolveBatch, SolveTask
+from optimization_model.utils import Bus_lex, Script_Maestro, charts, comparison, encoding, lexicographic, scaling, stochastic
+from optimization_model.utils.admission import Admission
+from optimization_model.utils.comparison import ComparisonParams
+from optimization_model.utils.cores import SCHEDULER, available_cores
+from optimization_model.utils.costs import load_costs
+from optimization_model.utils.goals import parse_goals, solve_goals
+from optimization_model.utils.plan_store import PlanFilter, PlanStore
+from optimization_model.utils.presolve import presolve
+from optimization_model.utils.problem import build_planning_model, load_problem
+from optimization_model.utils.resources import load_resources
+from optimization_model.utils.scenarios import (MODELS, parse_scenarios, read_scenario_sheets, solve_scenario,
+                                                solve_scenarios)
+from optimization_model.utils.Script_Maestro import WS_VALUES, optimize_from_excel, weighted_point
+from optimization_model.utils.shared import attach_problem, share_problem
+from optimization_model.utils.skeleton import COST, WEIGHTED, Skeleton
+from optimization_model.utils.solution import TOL as PLAN_TOL, extract
+from optimization_model.utils.solver import SolveBudget, solve
+from optimization_model.utils.streaming import RUNS
+from optimization_model.utils.sweep import sweep_alpha
+from optimization_model.utils.telemetry import RunTelemetry
+from optimization_model.utils.tasks import local_dispatch, pack_problem, run_task
+from optimization_model.utils.validation import WorkbookValidationError, validate_frames, validate_workbook
+
+
+# ---------------------------------------------------------------------------
+# 2. LIBROS DE PRUEBA
+# ---------------------------------------------------------------------------
+TOL: float = 1e-6     # diferencia relativa de coste admitida entre variantes
+
+OPTIMIZE_URL = "/optimization/api/v1/optimize/"
+
+
+def close(a: float, b: float, tol: float = TOL) -> bool:
+    """``a`` y ``b`` coinciden salvo ``tol`` relativa (o faltan ambos, None/NaN: sin solución)."""
+    if pd.isna(a) or pd.isna(b):
+        return bool(pd.isna(a) and pd.isna(b))
+    return abs(a - b) <= tol * max(1.0, abs(a), abs(b))
+
+
+@contextmanager
+def cores(n: int):
+    """``SCHEDULER`` con ``n`` núcleos (los pools arrancan aunque la máquina tenga uno)."""
+    previous = SCHEDULER.cores
+    SCHEDULER.reset(n)
+    try:
+        yield
+    finally:
+        SCHEDULER.reset(previous)
+
+
+def with_lines(problem):
+    """``problem`` con dos líneas: el primer SKU puede ir a ambas y el resto solo a ``L1``."""
+    products, periods = problem.products, problem.periods
+    consumption = pd.DataFrame({"Product ID": [products[0]] + list(products),
+                                "Resource": ["L2"] + ["L1"] * len(products),
+                                "Rate": [1.0] + [1.2] * len(products)})
+    # L1 cubre D + SST del resto de SKU en cada periodo; el primero puede ir además por L2 (sin límite)
+    limit = 1.2 * (problem.demand[1:] + problem.sst[1:]).sum(axis=0)
+    capacity = pd.DataFrame([["L1"] + limit.tolist(), ["L2"] + [None] * len(periods)],
+                            columns=["Resource"] + list(periods))
+    return problem._replace(resources=load_resources(products, periods, consumption, capacity))
+
+
+def _attached_copy(handle):
+    """En un proceso hijo: copia del problema leído de la memoria compartida."""
+    problem, extra = attach_problem(handle)
+    copy = lambda a: np.array(a, copy=True)
+    resources = problem.resources
+    if resources is not None:
+        resources = resources._replace(**{key: copy(value) for key, value in resources.arrays().items()})
+    return (problem._replace(demand=copy(problem.demand), sst=copy(problem.sst), eex=copy(problem.eex),
+                             cap=copy(problem.cap), costs=type(problem.costs)(*map(copy, problem.costs)),
+                             resources=resources),
+            {key: copy(value) for key, value in extra.items()})
+
+
+class WorkbookMixin:
+    """Genera los libros en un directorio temporal que además es el de trabajo."""
+    WORKBOOKS = {"small": (6, 8, 0.9, 0), "other": (9, 8, 0.9, 1)}
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.workdir = tempfile.mkdtemp(prefix="optimization-tests-")
+        # Script_Maestro escribe sus archivos en el directorio de trabajo
+        cls.cwd = os.getcwd()
+        os.chdir(cls.workdir)
+        cls.paths = {name: generate_workbook(os.path.join(cls.workdir, f"{name}.xlsx"), *args)
+                     for name, args in cls.WORKBOOKS.items()}
+
+    @classmethod
+    def tearDownClass(cls):
+        os.chdir(cls.cwd)
+        shutil.rmtree(cls.workdir, ignore_errors=True)
+        super().tearDownClass()
+
+
+class WorkbookTestCase(WorkbookMixin, SimpleTestCase):
+    pass
+
+
+# ---------------------------------------------------------------------------
+# 3. ADMISIÓN (user-044)
+# ---------------------------------------------------------------------------
+
+@override_settings(ALLOWED_HOSTS=["testserver"], OPTIMIZE_CONCURRENCY=2)
+class ConcurrentRequestsTests(WorkbookTestCase):
+
+    def setUp(self):
+        views._admission.cache_clear()
+
+    def tearDown(self):
+        views._admission.cache_clear()
+
+    def _post(self, name: str) -> dict:
+        with open(self.paths[name], "rb") as fh:
+            response = Client().post(OPTIMIZE_URL, {"excel_file": fh})
+        self.assertEqual(response.status_code, 200, response.content[:500])
+        return response.json()
+
+    def test_default_concurrency_is_the_available_cores(self):
+        self.assertEqual(Admission().concurrency, available_cores())
+        self.assertEqual(views._admission().concurrency, 2)
+
+    def test_simultaneous_requests_get_their_own_results(self):
+        expected = {name: self._post(name) for name in self.paths}
+        results, errors = {}, []
+
+        def post(name):
+            try:
+                results[name] = self._post(name)
+            except Exception as e:    # noqa: BLE001 - se comprueba en el hilo principal
+                errors.append(e)
+
+        threads = [threading.Thread(target=post, args=(name,)) for name in self.paths]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        self.assertEqual(errors, [])
+        # Nada se escribe en el directorio de trabajo compartido por las peticiones
+        self.assertEqual(sorted(os.listdir(self.workdir)), sorted(os.path.basename(p) for p in self.paths.values()))
+        for name, payload in expected.items():
+            got = results[name]
+            self.assertEqual(set(got["optimizedData"]["Product"]), set(payload["optimizedData"]["Product"]))
+            self.assertEqual(len(got["pareto"]), len(payload["pareto"]))
+            for a, b in zip(got["pareto"], payload["pareto"]):
+                self.assertTrue(close(a["cost"], b["cost"]), (name, a, b))
+
+
+# ---------------------------------------------------------------------------
+# 4. ESCENARIOS (user-029)
+# ---------------------------------------------------------------------------
+# 1.15 deja infactible el libro ``small``: la fila debe decirlo igual que el modelo completo
+SPECS = [{"demand_factor": 0.8}, {"demand_factor": 1.15},
+         {"name": "noisy", "samples": 2, "cv": 0.2, "seed": 3}]
+
+
+class ScenarioBatchTests(WorkbookTestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.problems = {name: load_problem(path) for name, path in cls.paths.items()}
+
+    def expected(self, problem, scenarios, model):
+        """Cada escenario resuelto por separado con el modelo completo (sin presolve)."""
+        return [solve_scenario(problem.with_demand(demand), name, model, reduce=False)
+                for name, demand in scenarios]
+
+    def assertSameRows(self, table, expected):
+        rows = table.to_dict(orient="records")
+        self.assertEqual(len(rows), len(expected))
+        for got, want in zip(rows, expected):
+            self.assertEqual((got["scenario"], got["status"]), (want["scenario"], want["status"]))
+            self.assertTrue(close(got["total_demand"], want["total_demand"]), (got, want))
+            self.assertTrue(close(got["cost"], want["cost"]), (got, want))
+            self.assertTrue(close(got["shortfall"], want["shortfall"]), (got, want))
+
+    def test_inline_batch_matches_full_model(self):
+        problem = self.problems["small"]
+        scenarios = parse_scenarios(problem, SPECS)
+        for model in MODELS:
+            with self.subTest(model=model):
+                table = solve_scenarios(problem, scenarios, model, max_workers=1)
+                self.assertSameRows(table, self.expected(problem, scenarios, model))
+
+    def test_pool_batch_matches_full_model(self):
+        problem = self.problems["small"]
+        scenarios = parse_scenarios(problem, SPECS)
+        with cores(2):
+            table = solve_scenarios(problem, scenarios, "lex", max_workers=2)
+        self.assertSameRows(table, self.expected(problem, scenarios, "lex"))
+
+    def test_concurrent_inline_batches_keep_their_problem(self):
+        batches = {name: parse_scenarios(problem, SPECS) for name, problem in self.problems.items()}
+        results, errors = {}, []
+
+        def run(name):
+            try:
+                results[name] = solve_scenarios(self.problems[name], batches[name], "lex", max_workers=1)
+            except Exception as e:    # noqa: BLE001 - se comprueba en el hilo principal
+                errors.append(e)
+
+        threads = [threading.Thread(target=run, args=(name,)) for name in self.problems]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        self.assertEqual(errors, [])
+        for name, problem in self.problems.items():
+            self.assertSameRows(results[name], self.expected(problem, batches[name], "lex"))
+
+
+# ---------------------------------------------------------------------------
+# 5. ESTOCÁSTICO (user-030)
+# ---------------------------------------------------------------------------
+
+class StochasticTests(WorkbookTestCase):
+    WS = 10.0
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.problem = load_problem(cls.paths["small"])
+        cls.scenarios = parse_scenarios(cls.problem, [{"samples": 4, "cv": 0.15, "seed": 1}])
+        # La forma extensiva es el modelo completo: todos los escenarios en un solo LP
+        cls.extensive = {model: stochastic.solve_stochastic(cls.problem, cls.scenarios, model, "extensive",
+                                                            ws=cls.WS)
+                         for model in stochastic.MODELS}
+
+    def objective(self, result) -> float:
+        if result.model == "lex":
+            return result.expected_cost
+        return result.expected_cost + self.WS * result.expected_shortfall
+
+    def test_benders_matches_extensive_form(self):
+        for model in stochastic.MODELS:
+            for multicut in (False, True):
+                with self.subTest(model=model, multicut=multicut):
+                    full = self.extensive[model]
+                    result = stochastic.solve_stochastic(self.problem, self.scenarios, model, "benders",
+                                                         ws=self.WS, multicut=multicut, max_workers=1)
+                    self.assertEqual((full.status, result.status), ("Optimal", "Optimal"))
+                    # L-shaped converge a ``TOL`` relativa del óptimo, nunca por debajo de él
+                    self.assertTrue(close(self.objective(result), self.objective(full), stochastic.TOL))
+                    self.assertGreaterEqual(self.objective(result),
+                                            self.objective(full) * (1 - stochastic.TOL))
+                    self.assertEqual(result.plan.shape, self.problem.demand.shape)
+                    self.assertEqual(list(result.scenarios["scenario"]), [n for n, _ in self.scenarios])
+
+    def test_pooled_recourse_matches_inline(self):
+        inline = stochastic.solve_stochastic(self.problem, self.scenarios, "lex", "benders", max_workers=1)
+        with cores(2):
+            pooled = stochastic.solve_stochastic(self.problem, self.scenarios, "lex", "benders", max_workers=2)
+        self.assertEqual(pooled.iterations, inline.iterations)
+        self.assertTrue(close(pooled.expected_cost, inline.expected_cost))
+        self.assertTrue(close(pooled.expected_shortfall, inline.expected_shortfall))
+
+
+# ---------------------------------------------------------------------------
+# 6. PRESOLVE (user-034)
+# ---------------------------------------------------------------------------
+
+class PresolveTests(WorkbookTestCase):
+    WORKBOOKS = {"small": (6, 8, 0.9, 0), "tight": (8, 10, 1.0, 2)}
+    FACTORS = (1.0, 0.8, 1.15)
+
+    def test_reduced_model_matches_full_model(self):
+        for name, path in self.paths.items():
+            base = load_problem(path)
+            for factor in self.FACTORS:
+                problem = base.with_demand(base.demand * factor)
+                for model in MODELS:
+                    with self.subTest(workbook=name, factor=factor, model=model):
+                        full = solve_scenario(problem, "full", model, reduce=False)
+                        reduced = solve_scenario(problem, "reduced", model, reduce=True)
+                        self.assertEqual(reduced["status"], full["status"])
+                        self.assertTrue(close(reduced["cost"], full["cost"]), (full, reduced))
+                        self.assertTrue(close(reduced["shortfall"], full["shortfall"]), (full, reduced))
+                        self.assertTrue(close(reduced["total_production"], full["total_production"]))
+
+    def test_infeasibility_proof_agrees_with_cbc(self):
+        for name, path in self.paths.items():
+            base = load_problem(path)
+            for factor in self.FACTORS:
+                with self.subTest(workbook=name, factor=factor):
+                    problem = base.with_demand(base.demand * factor)
+                    reduction = presolve(problem)
+                    full = solve_scenario(problem, "full", "weighted", reduce=False)
+                    if reduction.infeasible:
+                        self.assertEqual(full["status"], "Infeasible")
+                    else:
+                        self.assertTrue((reduction.lower <= reduction.upper).all())
+                        stats = reduction.stats()
+                        self.assertLessEqual(stats["reduced"]["rows"], stats["original"]["rows"])
+
+    def test_skeleton_bounds_match_full_skeleton(self):
+        for name, path in self.paths.items():
+            problem = load_problem(path)
+            args = (problem.products, problem.periods, problem.demand, problem.sst, problem.eex, problem.cap)
+            with self.subTest(workbook=name):
+                reduction = presolve(problem)
+                full = Bus_lex.build_lex_model(*args, 0.9, *problem.costs)
+                reduced = Bus_lex.build_lex_model(*args, 0.9, *problem.costs, reduction=reduction)
+                self.assertTrue(close(reduced[0], full[0]), (full[0], reduced[0]))
+                self.assertTrue(close(reduced[1], full[1]), (full[1], reduced[1]))
+                for ws in (0.5, 10.0):
+                    plain = weighted_point(*args, problem.costs, ws)
+                    bounded = weighted_point(*args, problem.costs, ws, reduction=reduction)
+                    self.assertTrue(close(plain[0], bounded[0]) and close(plain[1], bounded[1]), (plain, bounded))
+
+    def test_skeleton_bounds_are_reset_between_requests(self):
+        problem = load_problem(self.paths["small"])
+        args = (problem.demand, problem.sst, problem.eex, problem.cap, problem.costs)
+        sk = Skeleton(problem.products, problem.periods, COST)
+        sk.bind(*args, reduction=presolve(problem))
+        self.assertTrue(any(v.lowBound > 0 for v in sk.I[problem.products[0]].values()))
+        sk.bind(*args)
+        self.assertTrue(all(v.lowBound == 0 and v.upBound is None
+                            for p in problem.products for v in sk.I[p].values()))
+
+    def test_optimize_rejects_infeasible_workbook_before_cbc(self):
+        problem = load_problem(self.paths["small"])
+        with mock.patch.object(Script_Maestro, "load_problem",
+                               return_value=problem.with_demand(problem.demand * 1.15)), \
+                mock.patch.object(Bus_lex, "solve") as cbc:
+            with self.assertRaisesRegex(ValueError, "presolve"):
+                Script_Maestro.run_lexicographic(0.9, self.paths["small"])
+        cbc.assert_not_called()
+
+
+# ---------------------------------------------------------------------------
+# 7. MEMORIA COMPARTIDA (user-045)
+# ---------------------------------------------------------------------------
+
+class SharedProblemTests(WorkbookTestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.problem = with_lines(load_problem(cls.paths["small"]))
+
+    def test_worker_sees_the_same_problem(self):
+        extra = {"scenario_demand": np.stack([self.problem.demand, 0.9 * self.problem.demand])}
+        with share_problem(self.problem, extra) as (handle, views):
+            self.assertFalse(views["demand"].flags.writeable)
+            with ProcessPoolExecutor(max_workers=1) as pool:
+                problem, arrays = pool.submit(_attached_copy, handle).result()
+
+        self.assertEqual((problem.products, problem.periods), (self.problem.products, self.problem.periods))
+        for key in ("demand", "sst", "eex", "cap"):
+            np.testing.assert_array_equal(getattr(problem, key), getattr(self.problem, key))
+        for got, want in zip(problem.costs, self.problem.costs):
+            np.testing.assert_array_equal(got, want)
+        self.assertEqual(problem.resources.names, self.problem.resources.names)
+        for key, value in self.problem.resources.arrays().items():
+            np.testing.assert_array_equal(problem.resources.arrays()[key], value)
+        np.testing.assert_array_equal(arrays["scenario_demand"], extra["scenario_demand"])
+
+        # El modelo armado en el worker es el mismo que el del padre
+        for model in MODELS:
+            with self.subTest(model=model):
+                want = solve_scenario(self.problem, "parent", model, reduce=False)
+                got = solve_scenario(problem, "worker", model, reduce=False)
+                self.assertEqual(want["status"], "Optimal")
+                self.assertTrue(close(got["cost"], want["cost"]), (got, want))
+
+    def test_pooled_sweep_matches_inline_and_full_model(self):
+        alphas = [0.8, 0.9, 0.95, 1.0]
+        inline = sweep_alpha(self.problem, alphas, max_workers=1)
+        with cores(2):
+            pooled = sweep_alpha(self.problem, alphas, max_workers=2)
+        self.assertTrue(close(pooled.f_star, inline.f_star))
+        for (_, a), (_, b) in zip(inline.curve.iterrows(), pooled.curve.iterrows()):
+            self.assertEqual((a["alpha"], a["status"]), (b["alpha"], b["status"]))
+            self.assertTrue(close(a["shortfall"], b["shortfall"]), (a, b))
+            self.assertTrue(close(a["cost"], b["cost"]), (a, b))
+            # Cada punto es la fase 2 del lexicográfico completo con ese alpha
+            full = solve_scenario(self.problem, "full", "lex", alpha=a["alpha"], reduce=False)
+            self.assertTrue(close(a["shortfall"], full["shortfall"]), (a, full))
+            self.assertTrue(close(a["cost"], full["cost"]), (a, full))
+
+
+# ---------------------------------------------------------------------------
+# 8. REPARTO ENTRE NODOS (user-046)
+# ---------------------------------------------------------------------------
+
+@override_settings(DISTRIBUTED_HEARTBEAT=60.0, DISTRIBUTED_POLL=0.01)
+class DistributedTests(WorkbookMixin, TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.problem = load_problem(cls.paths["small"])
+        cls.scenarios = parse_scenarios(cls.problem, SPECS)
+
+    def _batch(self, kind, payloads, arrays=None):
+        blob, meta = pack_problem(self.problem, arrays)
+        batch = SolveBatch.objects.create(id="b" * 32, problem=blob, meta=meta)
+        SolveTask.objects.bulk_create([SolveTask(batch=batch, index=i, kind=kind, payload=payload)
+                                       for i, payload in enumerate(payloads)])
+        return batch
+
+    def test_coordinator_alone_matches_local_dispatch_and_full_model(self):
+        # Sin nodos el coordinador resuelve todas las tareas de su lote
+        remote = solve_scenarios(self.problem, self.scenarios, "lex", dispatch=distributed.dispatch)
+        local = solve_scenarios(self.problem, self.scenarios, "lex", dispatch=local_dispatch)
+        self.assertEqual(SolveBatch.objects.count(), 0)
+        for (_, got), (_, want), (name, demand) in zip(remote.iterrows(), local.iterrows(), self.scenarios):
+            full = solve_scenario(self.problem.with_demand(demand), name, "lex", reduce=False)
+            self.assertEqual((got["scenario"], got["status"]), (want["scenario"], want["status"]))
+            self.assertEqual(got["status"], full["status"])
+            self.assertTrue(close(got["cost"], want["cost"]), (got, want))
+            self.assertTrue(close(got["cost"], full["cost"]), (got, full))
+            self.assertTrue(close(got["shortfall"], full["shortfall"]), (got, full))
+
+        alphas = [0.85, 0.9, 0.95]
+        remote = sweep_alpha(self.problem, alphas, dispatch=distributed.dispatch)
+        local = sweep_alpha(self.problem, alphas, max_workers=1)
+        self.assertEqual(list(remote.curve["alpha"]), alphas)
+        for column in ("cost", "shortfall"):
+            for a, b in zip(remote.curve[column], local.curve[column]):
+                self.assertTrue(close(a, b), (column, a, b))
+
+    def test_lost_task_is_requeued_and_solved_by_another_node(self):
+        demands = np.stack([demand for _, demand in self.scenarios[:1]])
+        payload = {"index": 0, "name": "lost", "model": "lex", "alpha": 0.9, "wc": 1.0, "ws": 10.0}
+        batch = self._batch("scenario", [payload], {"scenario_demand": demands})
+
+        task = distributed.claim("node-a", batch.id)
+        self.assertEqual((task.status, task.worker, task.attempts), (SolveTask.RUNNING, "node-a", 1))
+        self.assertIsNone(distributed.claim("node-b", batch.id))
+
+        # node-a deja de latir: pasado el plazo la tarea vuelve a la cola
+        SolveTask.objects.filter(pk=task.pk).update(heartbeat_at=timezone.now() - timedelta(seconds=60))
+        self.assertEqual(distributed.requeue_lost(lease=30), 1)
+        task = distributed.claim("node-b", batch.id)
+        self.assertEqual((task.worker, task.attempts), ("node-b", 2))
+
+        self.assertTrue(distributed.execute(task, distributed._ProblemCache(), None))
+        task.refresh_from_db()
+        self.assertEqual(task.status, SolveTask.DONE)
+        want = run_task("scenario", self.problem, {"scenario_demand": demands}, payload)["row"]
+        self.assertEqual(task.result["row"]["status"], want["status"])
+        self.assertTrue(close(task.result["row"]["cost"], want["cost"]))
+
+    def test_task_lost_on_every_attempt_fails(self):
+        batch = self._batch("alpha", [{"alphas": [0.9], "f_star": 0.0}])
+        stale = timezone.now() - timedelta(seconds=60)
+        for attempt in range(1, distributed.MAX_ATTEMPTS + 1):
+            task = distributed.claim(f"node-{attempt}", batch.id)
+            self.assertEqual(task.attempts, attempt)
+            SolveTask.objects.filter(pk=task.pk).update(heartbeat_at=stale)
+            distributed.requeue_lost(lease=30)
+        task.refresh_from_db()
+        self.assertEqual(task.status, SolveTask.FAILED)
+        self.assertIsNone(distributed.claim("node-x", batch.id))
+
+    def test_failing_task_raises_after_its_attempts(self):
+        payloads = [{"index": 0, "name": "bad", "model": "nope", "alpha": 0.9, "wc": 1.0, "ws": 10.0}]
+        demands = np.stack([self.problem.demand])
+        with self.assertRaises(distributed.TaskFailed):
+            list(distributed.dispatch(self.problem, "scenario", payloads, {"scenario_demand": demands}))
+        self.assertEqual(SolveBatch.objects.count(), 0)
+
+
+# ---------------------------------------------------------------------------
+# 9. SKU NUMÉRICOS (user-028)
+# ---------------------------------------------------------------------------
+
+class NumericSkuTests(WorkbookTestCase):
+    WORKBOOKS = {"small": (6, 8, 0.9, 0)}
+
+    def test_cost_table_matches_numeric_products(self):
+        products = [1001, 1002, 1003]
+        defaults = tuple({p: value for p in products} for value in (5.0, 0.2, 1.0))
+        table = pd.DataFrame({"Product ID": [1001, "1002 "], "Production Cost": [7.0, 8.0]})
+        costs = load_costs(products, table, defaults)
+        np.testing.assert_array_equal(costs.prod, [7.0, 8.0, 5.0])
+        np.testing.assert_array_equal(costs.hold, [0.2, 0.2, 0.2])
+
+    def test_scenario_sheet_matches_numeric_products(self):
+        base = load_problem(self.paths["small"])
+        problem = base._replace(products=list(range(1001, 1001 + len(base.products))))
+        sheet = pd.DataFrame({"Product ID": problem.products[:2], problem.periods[0]: [11.0, 12.0]})
+        path = os.path.join(self.workdir, "numeric.xlsx")
+        with pd.ExcelWriter(path, engine="openpyxl") as writer:
+            sheet.to_excel(writer, sheet_name="Scenario high", index=False)
+
+        [(name, demand)] = read_scenario_sheets(path, problem)
+        self.assertEqual(name, "high")
+        np.testing.assert_array_equal(demand[:2, 0], [11.0, 12.0])
+        np.testing.assert_array_equal(demand[2:], problem.demand[2:])
+        np.testing.assert_array_equal(demand[:, 1:], problem.demand[:, 1:])
+
+
+# ---------------------------------------------------------------------------
+# 10. FRONTERA DE PARETO (user-035)
+# ---------------------------------------------------------------------------
+
+class ParetoTests(WorkbookTestCase):
+    WORKBOOKS = {"small": (6, 8, 0.9, 0)}
+
+    def test_ranging_only_when_sensitivity_is_requested(self):
+        reports = []
+        plan, ranged = optimize_from_excel(self.paths["small"], sensitivity=reports)
+        plain_plan, plain = optimize_from_excel(self.paths["small"])
+
+        self.assertEqual(len(reports), len(WS_VALUES) + 1)
+        self.assertIn("coverage_dual", ranged.columns)
+        self.assertNotIn("coverage_dual", plain.columns)
+        for a, b in zip(plain.itertuples(), ranged.itertuples()):
+            self.assertTrue(close(a.cost, b.cost), (a, b))
+            self.assertTrue(close(a.service, b.service), (a, b))
+        self.assertEqual(len(plain_plan), len(plan))
+
+
+# ---------------------------------------------------------------------------
+# 11. PRESUPUESTO DE CBC (user-038)
+# ---------------------------------------------------------------------------
+
+class SolveBudgetTests(WorkbookTestCase):
+    WORKBOOKS = {"small": (6, 8, 0.9, 0)}
+
+    def test_proven_infeasibility_is_kept_under_a_tight_budget(self):
+        base = load_problem(self.paths["small"])
+        # 1.15 × demanda no cabe en la capacidad (ver ``SPECS``)
+        pm = build_planning_model(base.with_demand(base.demand * 1.15), "budget", integer=True)
+        m = pm.model
+        m.setObjective(pm.cost)
+        status = solve(m, "budget_mip", budget=SolveBudget(time_limit=0.01))
+        self.assertEqual(status, lp.LpStatusInfeasible)
+
+    def test_feasible_model_within_budget_is_optimal(self):
+        pm = build_planning_model(load_problem(self.paths["small"]), "budget", integer=True)
+        m = pm.model
+        m.setObjective(pm.cost)
+        self.assertEqual(solve(m, "budget_mip", budget=SolveBudget(time_limit=30)), lp.LpStatusOptimal)
+
+
+# ---------------------------------------------------------------------------
+# 12. LEXICOGRÁFICO SOBRE ESQUELETOS (user-037)
+# ---------------------------------------------------------------------------
+
+class LexSkeletonTests(WorkbookTestCase):
+    WORKBOOKS = {"small": (6, 8, 0.9, 0)}
+
+    def test_infeasible_phase1_does_not_reuse_the_cached_optimum(self):
+        problem = load_problem(self.paths["small"])
+        args = (problem.products, problem.periods)
+        # Primera resolución: deja el esqueleto de la fase 1 en caché con su óptimo
+        f_star, _, _ = Bus_lex.build_lex_model(*args, *problem.as_dicts(), 0.9, *problem.costs)
+        # Fase 1 entera: cerca del coste del LP completo
+        self.assertTrue(close(f_star, solve_scenario(problem, "full", "lex", reduce=False)["cost"], 1e-4))
+
+        infeasible = problem.with_demand(problem.demand * 1.15)
+        with self.assertRaisesRegex(ValueError, "Infeasible"):
+            Bus_lex.build_lex_model(*args, *infeasible.as_dicts(), 0.9, *infeasible.costs)
+
+    def _failing(self, label: str):
+        """``solve`` que resuelve de verdad salvo el modelo ``label``, que termina sin óptimo."""
+        def fake(model, name, *args, **kwargs):
+            return lp.LpStatusNotSolved if name == label else solve(model, name, *args, **kwargs)
+        return fake
+
+    def test_phase2_and_weighted_statuses_are_checked(self):
+        problem = load_problem(self.paths["small"])
+        args = (problem.products, problem.periods)
+        with mock.patch.object(Bus_lex, "solve", side_effect=self._failing("lex_phase2_mip")), \
+                self.assertRaisesRegex(ValueError, "fase 2.*Not Solved"):
+            Bus_lex.build_lex_model(*args, *problem.as_dicts(), 0.9, *problem.costs)
+        with mock.patch.object(Script_Maestro, "solve", side_effect=self._failing("lex_phase2_lp")), \
+                self.assertRaisesRegex(ValueError, "fase 2.*Not Solved"):
+            Script_Maestro.run_lexicographic(0.9, self.paths["small"])
+        with mock.patch.object(Script_Maestro, "solve", side_effect=self._failing("weighted_lp")), \
+                self.assertRaisesRegex(ValueError, "weighted-sum.*Not Solved"):
+            weighted_point(*args, problem.demand, problem.sst, problem.eex, problem.cap, problem.costs, 10.0)
+        # Con óptimo se extrae la solución
+        cost, service = weighted_point(*args, problem.demand, problem.sst, problem.eex, problem.cap,
+                                       problem.costs, 10.0)
+        self.assertGreater(cost, 0)
+        self.assertGreater(service, 0)
+
+
+# ---------------------------------------------------------------------------
+# 13. CAPACIDAD POR RECURSO (user-050)
+# ---------------------------------------------------------------------------
+
+class ResourceCapacityTests(WorkbookTestCase):
+    WORKBOOKS = {"small": (6, 8, 0.9, 0)}
+
+    def _sheets(self, problem, headers):
+        consumption = pd.DataFrame({"Product ID": problem.products, "Resource": "L1", "Rate": 1.0})
+        capacity = pd.DataFrame([["L1"] + [10.0 + k for k in range(len(headers))]],
+                                columns=["Resource"] + list(headers))
+        return consumption, capacity
+
+    def test_date_headers_match_the_model_periods(self):
+        problem = load_problem(self.paths["small"])
+        headers = [pd.to_datetime(t, format="%m-%d-%y") for t in problem.periods]
+        table = load_resources(problem.products, problem.periods, *self._sheets(problem, headers))
+        np.testing.assert_array_equal(table.capacity[0], [10.0 + k for k in range(len(headers))])
+
+    def test_headers_without_any_model_period_are_rejected(self):
+        problem = load_problem(self.paths["small"])
+        headers = [pd.to_datetime(t, format="%m-%d-%y") + pd.DateOffset(years=1) for t in problem.periods]
+        with self.assertRaisesRegex(ValueError, "Ninguna columna"):
+            load_resources(problem.products, problem.periods, *self._sheets(problem, headers))
+
+
+# ---------------------------------------------------------------------------
+# 14. CODIFICACIÓN ARROW (user-031)
+# ---------------------------------------------------------------------------
+
+@override_settings(ALLOWED_HOSTS=["testserver"])
+class ArrowEncodingTests(WorkbookTestCase):
+    WORKBOOKS = {"small": (6, 8, 0.9, 0)}
+
+    def test_missing_pyarrow_is_a_bad_request(self):
+        with mock.patch.object(encoding, "pa", None), \
+                mock.patch.object(views, "optimize_from_excel") as optimize, \
+                open(self.paths["small"], "rb") as fh:
+            response = Client().post(OPTIMIZE_URL + "?encoding=arrow", {"excel_file": fh})
+        self.assertEqual(response.status_code, 400)
+        self.assertIn("pyarrow", response.json()["error"])
+        optimize.assert_not_called()
+
+    def test_gzip_without_effect_is_a_bad_request(self):
+        for query in ("?gzip=1", "?encoding=default&gzip=1", "?encoding=json&gzip=1&store=1"):
+            with self.subTest(query=query), mock.patch.object(views, "optimize_from_excel") as optimize, \
+                    open(self.paths["small"], "rb") as fh:
+                response = Client().post(OPTIMIZE_URL + query, {"excel_file": fh})
+                self.assertEqual(response.status_code, 400)
+                self.assertIn("gzip", response.json()["error"])
+                optimize.assert_not_called()
+
+    def test_gzip_compresses_the_encoded_body(self):
+        with open(self.paths["small"], "rb") as fh:
+            response = Client().post(OPTIMIZE_URL + "?encoding=columnar&gzip=1", {"excel_file": fh})
+        self.assertEqual(response.status_code, 200, response.content[:500])
+        self.assertEqual(response["Content-Encoding"], "gzip")
+        payload = json.loads(gzip.decompress(response.content))
+        self.assertEqual(payload["encoding"], "columnar")
+        self.assertTrue(payload["provenOptimal"])
+
+
+# ---------------------------------------------------------------------------
+# 15. MÉTRICAS (user-026)
+# ---------------------------------------------------------------------------
+
+@override_settings(ALLOWED_HOSTS=["testserver"])
+class MetricsTests(SimpleTestCase):
+
+    def test_metrics_only_answers_get(self):
+        self.assertEqual(Client().get("/metrics").status_code, 200)
+        self.assertEqual(Client().post("/metrics").status_code, 405)
+
+
+# ---------------------------------------------------------------------------
+# 16. VISTAS SOBRE UN LIBRO (user-041)
+# ---------------------------------------------------------------------------
+
+@override_settings(ALLOWED_HOSTS=["testserver"], OPTIMIZE_CONCURRENCY=None)
+class WorkbookViewTests(WorkbookTestCase):
+    WORKBOOKS = {"small": (6, 8, 0.9, 0)}
+
+    def _post(self, url: str, data: dict):
+        with open(self.paths["small"], "rb") as fh:
+            return Client().post(url, {"excel_file": fh, **data})
+
+    def test_sweep_matches_the_scenario_solver(self):
+        response = self._post("/optimization/api/v1/optimize/sweep/?timings=1", {"alphas": "[0.9]"})
+        self.assertEqual(response.status_code, 200, response.content[:500])
+        payload = response.json()
+        self.assertIn("timings", payload)
+        columns, [row] = payload["curve"]["columns"], payload["curve"]["data"]
+        expected = solve_scenario(load_problem(self.paths["small"]), "base", "lex", alpha=0.9, reduce=False)
+        self.assertTrue(close(row[columns.index("cost")], expected["cost"], 1e-4), (row, expected))
+
+    def test_errors_are_mapped_to_status_codes(self):
+        self.assertEqual(Client().post("/optimization/api/v1/optimize/goals/").status_code, 400)
+        response = self._post("/optimization/api/v1/optimize/sweep/", {"alphas": '{"start": 0.8}'})
+        self.assertEqual(response.status_code, 400)
+        self.assertIn("stop", response.json()["error"])
+        self.assertNotIn("timings", response.json())
+
+
+# ---------------------------------------------------------------------------
+# 17. VALIDACIÓN DEL LIBRO (user-033)
+# ---------------------------------------------------------------------------
+
+@override_settings(ALLOWED_HOSTS=["testserver"])
+class WorkbookValidationTests(WorkbookTestCase):
+    WORKBOOKS = {"small": (6, 8, 0.9, 0)}
+
+    def _variant(self, name: str, edit) -> str:
+        """Copia del libro ``small`` con ``edit(hojas)`` aplicado a sus hojas sin encabezado."""
+        sheets = pd.read_excel(self.paths["small"], sheet_name=None, header=None)
+        edit(sheets)
+        path = os.path.join(self.workdir, f"{name}.xlsx")
+        with pd.ExcelWriter(path, engine="openpyxl") as writer:
+            for sheet, df in sheets.items():
+                df.to_excel(writer, sheet_name=sheet, header=False, index=False)
+        return path
+
+    def _codes(self, check, path) -> list:
+        with self.assertRaises(WorkbookValidationError) as ctx:
+            check(path)
+        return [e["code"] for e in ctx.exception.errors]
+
+    def test_valid_workbook_passes_both_steps(self):
+        validate_workbook(self.paths["small"])
+        validate_frames(*Bus_lex.load_data(self.paths["small"]))
+
+    def test_missing_sheet(self):
+        path = self._variant("no_bc", lambda sheets: sheets.pop("Boundary Conditions"))
+        self.assertEqual(self._codes(validate_workbook, path), ["missing_sheet"])
+
+    def test_missing_column(self):
+        def edit(sheets):
+            sheets["Supply_Demand"].iat[2, 1] = "Attr"
+        self.assertIn("missing_column", self._codes(validate_workbook, self._variant("no_attribute", edit)))
+
+    def test_no_period_columns(self):
+        def edit(sheets):
+            sd = sheets["Supply_Demand"]
+            sd.iloc[2, 2:] = [f"P{k}" for k in range(sd.shape[1] - 2)]
+        self.assertEqual(self._codes(validate_workbook, self._variant("no_periods", edit)), ["no_periods"])
+
+    def test_empty_key_column_is_rejected_before_preprocessing(self):
+        def edit(sheets):
+            sheets["Supply_Demand"].iloc[3:, 0] = None
+        path = self._variant("no_products", edit)
+        validate_workbook(path)     # los encabezados son correctos
+        codes = self._codes(load_problem, path)
+        self.assertIn("no_products", codes)
+        self.assertIn("missing_product_id", codes)
+
+        with open(path, "rb") as fh:
+            response = Client().post(OPTIMIZE_URL, {"excel_file": fh})
+        self.assertEqual(response.status_code, 400)
+        self.assertIn("no_products", [e["code"] for e in response.json()["errors"]])
+
+    def test_missing_attribute_rows(self):
+        def edit(sheets):
+            sd = sheets["Supply_Demand"]
+            sheets["Supply_Demand"] = sd[sd[1] != "Safety Stock Target"]
+        codes = self._codes(load_problem, self._variant("no_sst", edit))
+        self.assertEqual(codes, ["missing_attribute"])
+
+    def test_missing_capacity_row(self):
+        def edit(sheets):
+            bc = sheets["Boundary Conditions"]
+            sheets["Boundary Conditions"] = bc[bc[1] != "Available Capacity"]
+        self.assertEqual(self._codes(load_problem, self._variant("no_capacity", edit)), ["missing_attribute"])
+
+
+# ---------------------------------------------------------------------------
+# 18. COMPARACIÓN DE MODELOS (user-041)
+# ---------------------------------------------------------------------------
+
+@skipUnless(importlib.util.find_spec("pyomo"), "pyomo no está instalado")
+class PyomoGoalModelTests(SimpleTestCase):
+
+    def test_inventory_chain_follows_the_given_period_order(self):
+        from optimization_model.utils import Simplex_Goal_programming, Simplex_Restriccion_Funcional
+        periods = ["12-20-24", "12-27-24", "01-03-25"]
+        D = {("A", t): 1.0 for t in periods}
+        SST = {("A", t): 0.0 for t in periods}
+        for module in (Simplex_Goal_programming, Simplex_Restriccion_Funcional):
+            built = []
+            solver = mock.Mock(solve=lambda model, tee: built.append(model))
+            with mock.patch.object(module, "SolverFactory", return_value=solver):
+                module.build_goal_model(["A"], periods, D, SST, D, {t: 10.0 for t in periods},
+                                        c_prod={"A": 1.0}, c_hold={"A": 0.1}, alpha=0.9, cost_target=1.0)
+            balance = built[0].InvBalance
+            self.assertNotIn("I[A", str(balance["A", "12-20-24"].expr).split("==")[0])
+            self.assertIn("I[A,12-20-24]", str(balance["A", "12-27-24"].expr))
+            self.assertIn("I[A,12-27-24]", str(balance["A", "01-03-25"].expr))
+
+
+class _FakeGoalModule:
+    """Sustituto de ``Simplex_*`` sin GLPK: metas cumplidas exactamente (desviaciones nulas)."""
+
+    def __init__(self):
+        self.calls = []
+
+    def build_goal_model(self, *args, alpha=None, cost_target=None, **kwargs):
+        self.calls.append((alpha, cost_target))
+        time.sleep(0.05)      # deja que las comparaciones simultáneas se solapen
+        return (0.0, 0.0), (0.0, 0.0)
+
+
+class CompareModelsTests(WorkbookTestCase):
+    WORKBOOKS = {"small": (6, 8, 0.9, 0)}
+
+    def setUp(self):
+        self.problem = load_problem(self.paths["small"])
+
+    def _compare(self, params=ComparisonParams(), fake=None):
+        fake = fake or _FakeGoalModule()
+        with mock.patch.object(comparison, "glpk_available", return_value=True), \
+                mock.patch.object(comparison.importlib, "import_module", return_value=fake):
+            return comparison.compare_models(self.problem, params)
+
+    def test_one_row_per_model(self):
+        table = self._compare()
+        self.assertEqual(list(table.columns), comparison.METRIC_COLUMNS)
+        self.assertEqual(table["model_name"].tolist(), list(comparison.MODELS))
+        self.assertEqual(set(table["status"]), {comparison.OK})
+        self.assertTrue(table["error"].isna().all())
+
+        lex_row = table.set_index("model_name").loc[comparison.LEX]
+        f_star, _, _ = Bus_lex.build_lex_model(self.problem.products, self.problem.periods,
+                                               *self.problem.as_dicts(), ComparisonParams().alpha,
+                                               *self.problem.costs)
+        self.assertTrue(close(lex_row["total_cost"], f_star, 1e-4), (lex_row, f_star))
+
+    def test_failed_model_keeps_the_rest_of_the_table(self):
+        with mock.patch.object(comparison.wsum, "build_weighted_model", side_effect=RuntimeError("boom")):
+            table = self._compare().set_index("model_name")
+        self.assertEqual(table.loc[comparison.WEIGHTED, "status"], comparison.FAILED)
+        self.assertIn("boom", table.loc[comparison.WEIGHTED, "error"])
+        self.assertTrue(pd.isna(table.loc[comparison.WEIGHTED, "total_cost"]))
+        for name in (comparison.LEX, comparison.GOAL, comparison.FUNCTIONAL):
+            self.assertEqual(table.loc[name, "status"], comparison.OK)
+
+    def test_goal_rows_are_skipped_without_glpk(self):
+        with mock.patch.object(comparison, "glpk_available", return_value=False):
+            table = comparison.compare_models(self.problem).set_index("model_name")
+        for name in (comparison.GOAL, comparison.FUNCTIONAL):
+            self.assertEqual(table.loc[name, "status"], comparison.SKIPPED)
+        self.assertEqual(table.loc[comparison.LEX, "status"], comparison.OK)
+
+    def test_concurrent_comparisons_keep_their_own_targets(self):
+        params = [ComparisonParams(alpha=0.9, cost_factor=1.05), ComparisonParams(alpha=0.95, cost_factor=1.15)]
+        tables = [None, None]
+
+        def run(k):
+            tables[k] = comparison.compare_models(self.problem, params[k])
+
+        shared = _FakeGoalModule()
+        with mock.patch.object(comparison, "glpk_available", return_value=True), \
+                mock.patch.object(comparison.importlib, "import_module", return_value=shared):
+            threads = [threading.Thread(target=run, args=(k,)) for k in range(2)]
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join()
+
+        for p, table in zip(params, tables):
+            table = table.set_index("model_name")
+            f_star = table.loc[comparison.LEX, "total_cost"]
+            for name in (comparison.GOAL, comparison.FUNCTIONAL):
+                # Desviaciones nulas: coste = meta propia y servicio = alpha propio
+                self.assertTrue(close(table.loc[name, "total_cost"], p.cost_factor * f_star), (p, table))
+                self.assertTrue(close(table.loc[name, "service_level"], p.alpha), (p, table))
+            self.assertIn((p.alpha, p.cost_factor * f_star), shared.calls)
+
+
+# ---------------------------------------------------------------------------
+# 19. PLANES ALMACENADOS (user-032)
+# ---------------------------------------------------------------------------
+
+PRODUCTS, PERIODS = ["21A", "22B", "23C"], ["11-29-24", "12-06-24", "12-13-24", "12-20-24"]
+
+
+def _plan() -> pd.DataFrame:
+    """Plan de 3 SKU × 4 periodos con producción ``10·i + k``, ordenado por SKU."""
+    rows = [(p, t, 10.0 * i + k) for i, p in enumerate(PRODUCTS) for k, t in enumerate(PERIODS)]
+    return pd.DataFrame(rows, columns=["Product", "Period", "Production"])
+
+
+class PlanStoreTests(SimpleTestCase):
+
+    def setUp(self):
+        self.root = tempfile.mkdtemp(prefix="plan-store-")
+        self.addCleanup(shutil.rmtree, self.root, True)
+        self.store = PlanStore(self.root, max_runs=2)
+
+    def _rows(self, run_id: str, flt: PlanFilter = PlanFilter(), chunk_rows: int = 5) -> pd.DataFrame:
+        lines = b"".join(self.store.open(run_id).iter_ndjson(flt, chunk_rows)).splitlines()
+        return pd.DataFrame([json.loads(line) for line in lines], columns=["Product", "Period", "Production"])
+
+    def test_round_trip_across_blocks(self):
+        run_id = self.store.save(_plan())
+        pd.testing.assert_frame_equal(self._rows(run_id), _plan())
+        chunks = list(self.store.open(run_id).iter_chunks(chunk_rows=5))
+        self.assertEqual([len(c) for c in chunks], [5, 5, 2])
+        pd.testing.assert_frame_equal(pd.concat(chunks, ignore_index=True), _plan())
+
+    def test_offset_and_limit_page_through_the_plan(self):
+        run_id = self.store.save(_plan())
+        pages = [self._rows(run_id, PlanFilter(offset=offset, limit=4)) for offset in range(0, 12, 4)]
+        self.assertEqual([len(page) for page in pages], [4, 4, 4])
+        pd.testing.assert_frame_equal(pd.concat(pages, ignore_index=True), _plan())
+        self.assertEqual(len(self._rows(run_id, PlanFilter(offset=11, limit=4))), 1)
+
+    def test_product_and_period_filters(self):
+        run_id = self.store.save(_plan())
+        rows = self._rows(run_id, PlanFilter(products=["23C", "21A"], period_from="12-06-24",
+                                             period_to="12-13-24"))
+        expected = _plan()
+        expected = expected[expected["Product"].isin(["21A", "23C"])
+                            & expected["Period"].isin(["12-06-24", "12-13-24"])].reset_index(drop=True)
+        pd.testing.assert_frame_equal(rows, expected)
+        # Filtro y paginación combinados: la paginación cuenta solo las filas filtradas
+        page = self._rows(run_id, PlanFilter(products=["22B"], offset=1, limit=2))
+        self.assertEqual(page["Period"].tolist(), PERIODS[1:3])
+
+        plan = self.store.open(run_id)
+        with self.assertRaises(ValueError):
+            plan.iter_ndjson(PlanFilter(products=["99Z"]))
+        with self.assertRaises(ValueError):
+            plan.iter_ndjson(PlanFilter(period_from="01-01-99"))
+
+    def test_unknown_run_id(self):
+        with self.assertRaises(KeyError):
+            self.store.open(uuid.uuid4().hex)
+        with self.assertRaises(KeyError):
+            self.store.open("../etc")
+
+    def test_oldest_runs_are_pruned(self):
+        first = self.store.save(_plan())
+        os.utime(os.path.join(self.root, first), (1, 1))
+        second = self.store.save(_plan())
+        os.utime(os.path.join(self.root, second), (2, 2))
+        third = self.store.save(_plan())
+        with self.assertRaises(KeyError):
+            self.store.open(first)
+        for run_id in (second, third):
+            self.assertEqual(self.store.open(run_id).rows, 12)
+
+
+@override_settings(ALLOWED_HOSTS=["testserver"])
+class PlanRowsViewTests(SimpleTestCase):
+
+    def setUp(self):
+        root = tempfile.mkdtemp(prefix="plan-store-")
+        self.addCleanup(shutil.rmtree, root, True)
+        settings = override_settings(PLAN_STORE_DIR=root)
+        settings.enable()
+        self.addCleanup(settings.disable)
+        self.run_id = PlanStore(root).save(_plan())
+
+    def _get(self, run_id: str, query: str = ""):
+        return Client().get(f"/optimization/api/v1/plans/{run_id}/{query}")
+
+    def test_ndjson_with_filters_and_pagination(self):
+        response = self._get(self.run_id, "?product=21A,22B&period_to=12-06-24&offset=1&limit=2")
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response["Content-Type"], "application/x-ndjson")
+        self.assertEqual(response["X-Total-Rows"], "12")
+        rows = [json.loads(line) for line in b"".join(response.streaming_content).splitlines()]
+        self.assertEqual([(r["Product"], r["Period"]) for r in rows],
+                         [("21A", "12-06-24"), ("22B", "11-29-24")])
+
+    def test_unknown_run_is_404_and_bad_filter_is_400(self):
+        self.assertEqual(self._get(uuid.uuid4().hex).status_code, 404)
+        self.assertEqual(self._get(self.run_id, "?product=99Z").status_code, 400)
+
+
+# ---------------------------------------------------------------------------
+# 20. OPTIMIZACIÓN EN VIVO (user-043)
+# ---------------------------------------------------------------------------
+
+STREAM_URL = "/optimization/api/v1/optimize/stream/"
+
+
+async def _sse_events(response):
+    """(evento, datos) de una respuesta SSE, hasta el evento final; se ignoran los keep-alive."""
+    buffer = b""
+    async for chunk in response.streaming_content:
+        buffer += chunk
+        while b"\n\n" in buffer:
+            block, buffer = buffer.split(b"\n\n", 1)
+            if block.startswith(b":"):
+                continue
+            head, data = block.split(b"\n", 1)
+            yield head[len(b"event: "):].decode(), json.loads(data[len(b"data: "):])
+
+
+@override_settings(ALLOWED_HOSTS=["testserver"])
+class StreamTests(WorkbookTestCase):
+    WORKBOOKS = {"small": (6, 8, 0.9, 0)}
+
+    def setUp(self):
+        views._admission.cache_clear()
+
+    def tearDown(self):
+        views._admission.cache_clear()
+
+    async def _stream(self, on_event=None) -> list:
+        with open(self.paths["small"], "rb") as fh:
+            response = await AsyncClient().post(STREAM_URL, {"excel_file": fh})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response["Content-Type"], "text/event-stream")
+        events = []
+        async for event, data in _sse_events(response):
+            events.append((event, data))
+            if on_event is not None:
+                await on_event(event, data)
+        return events
+
+    async def test_event_order(self):
+        events = await self._stream()
+        names = [event for event, _ in events]
+        n_points = len(WS_VALUES) + 1
+        self.assertEqual(names, ["start"] + ["point"] * n_points + ["frontier", "plan", "done"])
+        self.assertEqual(events[1][1]["model"], "lex")
+        self.assertEqual(events[n_points + 1][1], {"points": n_points})
+        self.assertEqual(len(RUNS), 0)
+
+    async def test_cancel_stops_the_remaining_points(self):
+        resume = threading.Event()
+        weighted_point = Script_Maestro.weighted_point
+
+        def held_point(*args, **kwargs):
+            # El primer punto weighted‑sum espera a que el cliente haya cancelado
+            resume.wait(30)
+            return weighted_point(*args, **kwargs)
+
+        async def cancel_after_first_point(event, data):
+            if event == "start":
+                self.cancel_url = data["cancelUrl"]
+            elif event == "point":
+                response = await AsyncClient().post(self.cancel_url)
+                self.assertEqual(response.status_code, 200)
+                resume.set()
+
+        with mock.patch.object(Script_Maestro, "weighted_point", held_point):
+            events = await self._stream(cancel_after_first_point)
+        self.assertEqual([event for event, _ in events], ["start", "point", "cancelled"])
+        self.assertEqual(len(RUNS), 0)
+        response = await AsyncClient().post(self.cancel_url)
+        self.assertEqual(response.status_code, 404)
+
+
+# ---------------------------------------------------------------------------
+# 21. LEXICOGRÁFICO DE N OBJETIVOS (user-047)
+# ---------------------------------------------------------------------------
+
+class LexicographicTests(WorkbookTestCase):
+    WORKBOOKS = {"small": (6, 8, 0.9, 0)}
+
+    def setUp(self):
+        self.problem = load_problem(self.paths["small"])
+
+    def test_cost_then_shortfall_matches_bus_lex(self):
+        problem = self.problem
+        f_star, shortfall, plan = Bus_lex.build_lex_model(problem.products, problem.periods,
+                                                          *problem.as_dicts(), 0.9, *problem.costs)
+        result = lexicographic.solve_lexicographic(problem, ["cost", "shortfall"], alpha=0.9, integer=True)
+        self.assertEqual(result.status, "Optimal")
+        self.assertEqual(result.stages["objective"].tolist(), ["cost", "shortfall"])
+        self.assertTrue(close(result.values["cost"], f_star, 1e-6), (result.values, f_star))
+        self.assertTrue(close(result.values["shortfall"], shortfall, 1e-6), (result.values, shortfall))
+        self.assertTrue(close(result.plan["Production"].sum(), sum(plan.values()), 1e-6))
+
+    def test_lock_holds_earlier_objectives_at_their_optimum(self):
+        problem = self.problem
+        pm = build_planning_model(problem, "lock")
+        exprs = {name: lexicographic.OBJECTIVES[name](pm, problem, 0.9) for name in ("cost", "excess", "smoothing")}
+        rows = lexicographic.solve_stages(pm.model, list(exprs.items()), False, RunTelemetry())
+
+        self.assertEqual([row["status"] for row in rows], ["Optimal"] * 3)
+        self.assertEqual([name for name in pm.model.constraints if name.startswith("lock_")], ["lock_0", "lock_1"])
+        # Tras la última etapa, cada objetivo anterior sigue en su óptimo (salvo la holgura del candado)
+        for row, name in zip(rows[:2], ("cost", "excess")):
+            self.assertLessEqual(lp.value(exprs[name]),
+                                 row["value"] + 2 * lexicographic.LOCK_RTOL * max(1.0, abs(row["value"])))
+        # Sin candado, la última etapa sola empeoraría el coste
+        alone = build_planning_model(problem, "alone")
+        smoothing = lexicographic.OBJECTIVES["smoothing"](alone, problem, 0.9)
+        lexicographic.solve_stages(alone.model, [("smoothing", smoothing)], False, RunTelemetry())
+        self.assertGreater(lp.value(alone.cost), rows[0]["value"] * (1 + 1e-6))
+
+    def test_parse_objectives(self):
+        self.assertEqual(lexicographic.parse_objectives(None), ["cost", "shortfall"])
+        self.assertEqual(lexicographic.parse_objectives(" excess, cost "), ["excess", "cost"])
+        for spec, message in (("cost,profit", "desconocidos"), (["cost", "cost"], "una sola vez"),
+                              ([" "], "ningún objetivo"), (42, "lista")):
+            with self.assertRaisesRegex(ValueError, message):
+                lexicographic.parse_objectives(spec)
+
+    def test_infeasible_stage_stops_the_chain(self):
+        # Una línea sin capacidad en el primer periodo: el presolve (capacidad agregada) no lo detecta
+        problem = with_lines(self.problem)
+        capacity = problem.resources.capacity.copy()
+        capacity[:, 0] = 0.0
+        problem = problem._replace(resources=problem.resources._replace(capacity=capacity))
+
+        result = lexicographic.solve_lexicographic(problem, ["cost", "shortfall", "excess"])
+        self.assertEqual(result.status, "Infeasible")
+        self.assertEqual(result.stages["status"].tolist(), ["Infeasible"])
+        self.assertEqual(result.values, {})
+        self.assertTrue(result.plan.empty)
+
+
+# ---------------------------------------------------------------------------
+# 22. GOAL PROGRAMMING POR PRIORIDADES (user-048)
+# ---------------------------------------------------------------------------
+
+class GoalProgrammingTests(WorkbookTestCase):
+    WORKBOOKS = {"small": (6, 8, 0.9, 0)}
+
+    def setUp(self):
+        self.problem = load_problem(self.paths["small"])
+        self.f_star = lexicographic.solve_lexicographic(self.problem, ["cost"]).values["cost"]
+
+    def _solve(self, coverage_priority: int, cost_priority: int) -> pd.DataFrame:
+        # Metas en conflicto: cubrir el 105 % de la demanda y gastar la mitad del coste mínimo
+        goals = parse_goals([{"metric": "coverage", "target": 1.05, "priority": coverage_priority},
+                             {"metric": "cost", "target": 0.5 * self.f_star, "priority": cost_priority}])
+        result = solve_goals(self.problem, goals)
+        self.assertEqual(result.status, "Optimal")
+        self.assertEqual(result.priorities["priority"].tolist(), sorted({coverage_priority, cost_priority}))
+        return result.goals.set_index("metric")
+
+    def test_higher_priority_is_never_traded_for_a_lower_one(self):
+        coverage_first = self._solve(1, 2)
+        cost_first = self._solve(2, 1)
+        # Cobertura primero: se cumple aunque cueste más que el mínimo
+        self.assertTrue(coverage_first.loc["coverage", "achieved"])
+        self.assertGreater(coverage_first.loc["cost", "value"], self.f_star * (1 + 1e-6))
+        # Coste primero: el coste mínimo, sin ceder nada a favor de la cobertura
+        self.assertTrue(close(cost_first.loc["cost", "value"], self.f_star, 1e-6))
+        self.assertFalse(cost_first.loc["coverage", "achieved"])
+        self.assertGreater(cost_first.loc["coverage", "under"], 0)
+
+    def test_deviations_in_the_metric_units(self):
+        goals = self._solve(2, 1)
+        total_demand = float(self.problem.demand.sum())
+        coverage, cost = goals.loc["coverage"], goals.loc["cost"]
+        # Cobertura en unidades de producción; coste en dinero
+        self.assertTrue(close(coverage["target"], 1.05 * total_demand))
+        self.assertTrue(close(coverage["under"], coverage["target"] - coverage["value"], 1e-6))
+        self.assertTrue(close(cost["over"], cost["value"] - cost["target"], 1e-6))
+        self.assertTrue(close(cost["under"], 0.0) and close(coverage["over"], 0.0))
+        self.assertFalse(cost["achieved"])
+
+    def test_parse_goals_errors(self):
+        cases = [
+            ([], "lista no vacía"),
+            ({"metric": "cost"}, "lista no vacía"),
+            (["cost"], "debe ser un objeto"),
+            ([{"metric": "cost", "target": 1, "deadline": 3}], "Campos desconocidos"),
+            ([{"metric": "profit", "target": 1}], "Métrica desconocida"),
+            ([{"metric": "cost"}], "Falta target"),
+            ([{"metric": "cost", "target": 1, "sense": "<"}], "sense"),
+            ([{"metric": "cost", "target": 1, "priority": 0}], "priority"),
+            ([{"metric": "cost", "target": 1, "weight": 0}], "weight"),
+        ]
+        for spec, message in cases:
+            with self.subTest(spec=spec), self.assertRaisesRegex(ValueError, message):
+                parse_goals(spec)
+        [goal] = parse_goals([{"metric": "coverage", "target": "0.95"}])
+        self.assertEqual((goal.sense, goal.priority, goal.weight), (">=", 1, 1.0))
+
+
+# ---------------------------------------------------------------------------
+# 23. ESCALADO DE MODELOS (user-049)
+# ---------------------------------------------------------------------------
+
+def _badly_scaled_lp() -> lp.LpProblem:
+    """LP pequeño con coeficientes entre 1e-3 y 1e4 (rango muy por encima de ``MIN_RANGE``)."""
+    model = lp.LpProblem("badly_scaled", lp.LpMinimize)
+    x = lp.LpVariable("x", 0, 100)
+    y = lp.LpVariable("y", 0, 1e6)
+    z = lp.LpVariable("z", 0)
+    model += 1e4 * x + 0.01 * y + 3 * z
+    model += 1e3 * x + 0.001 * y >= 5, "demand"
+    model += 2 * x + 500 * z >= 7, "service"
+    model += y + 4000 * z <= 2e4, "capacity"
+    return model
+
+
+class ScalingTests(SimpleTestCase):
+    def _results(self, model: lp.LpProblem):
+        return ({v.name: (v.varValue, v.dj) for v in model.variables()},
+                {name: (c.pi, c.slack) for name, c in model.constraints.items()},
+                lp.value(model.objective))
+
+    def test_scaled_solve_matches_unscaled(self):
+        plain, model = _badly_scaled_lp(), _badly_scaled_lp()
+        self.assertEqual(solve(plain, "plain", scale=False), lp.LpStatusOptimal)
+
+        rows = dict(model.constraints)
+        exprs = {name: dict(c.expr) for name, c in rows.items()}
+        objective = model.objective
+        bounds = {v.name: (v.lowBound, v.upBound) for v in model.variables()}
+        factors = scaling.factors(model)
+        self.assertIsNotNone(factors)
+        self.assertTrue(any(c != 1.0 for c in factors.col.values()))
+        with scaling.scaled(model, factors):
+            self.assertIsNot(model.constraints["demand"], rows["demand"])
+            self.assertEqual(model.solve(lp.PULP_CBC_CMD(msg=False)), lp.LpStatusOptimal)
+
+        # Modelo restaurado: las mismas filas (objetos), el mismo objetivo y las mismas cotas
+        self.assertEqual(list(model.constraints), list(rows))
+        for name, row in rows.items():
+            self.assertIs(model.constraints[name], row)
+            self.assertEqual(dict(row.expr), exprs[name])
+        self.assertIs(model.objective, objective)
+        self.assertEqual({v.name: (v.lowBound, v.upBound) for v in model.variables()}, bounds)
+
+        # Primales, costes reducidos, duales, holguras y objetivo en unidades originales
+        (values, rows_out, obj), (ref_values, ref_rows, ref_obj) = self._results(model), self._results(plain)
+        self.assertTrue(close(obj, ref_obj, 1e-7))
+        for name, (value, dj) in ref_values.items():
+            self.assertTrue(close(values[name][0], value, 1e-7), name)
+            self.assertTrue(close(values[name][1], dj, 1e-7), name)
+        for name, (pi, slack) in ref_rows.items():
+            self.assertTrue(close(rows_out[name][0], pi, 1e-7), name)
+            self.assertTrue(close(rows_out[name][1], slack, 1e-7), name)
+
+    def test_solver_scale_flag(self):
+        plain, model = _badly_scaled_lp(), _badly_scaled_lp()
+        telemetry = RunTelemetry()
+        solve(plain, "plain", telemetry=telemetry, scale=False)
+        solve(model, "scaled", telemetry=telemetry, scale=True)
+        self.assertEqual([r["scaled"] for r in telemetry.solves], [False, True])
+        self.assertTrue(close(lp.value(model.objective), lp.value(plain.objective), 1e-7))
+        for name, row in plain.constraints.items():
+            self.assertTrue(close(model.constraints[name].pi, row.pi, 1e-7), name)
+
+
+# ---------------------------------------------------------------------------
+# 24. EXTRACCIÓN VECTORIZADA DE LA SOLUCIÓN (user-040)
+# ---------------------------------------------------------------------------
+
+def _per_variable(sk: Skeleton) -> dict:
+    """Extracción anterior a ``solution.extract``: una llamada a ``value()`` por variable."""
+    P, T, x, I = sk.products, sk.periods, sk.x, sk.I
+    total_production = sum(x[p][t].value() for p in P for t in T)
+    plan = pd.DataFrame([{"Product": p, "Period": t, "Production": x[p][t].value()}
+                         for p in P for t in T if x[p][t].value() > PLAN_TOL],
+                        columns=["Product", "Period", "Production"])
+    return {
+        "plan": plan,
+        "plan_dict": {(p, t): x[p][t].value() for p in P for t in T if x[p][t].value() > PLAN_TOL},
+        "shortfall": sk.s.value() if sk.s is not None else None,
+        "total_production": total_production,
+        "service_level": total_production / sk.total_demand,
+        "production_cost": sum(c * x[p][t].value() for p, c in zip(P, sk.costs.prod) for t in T),
+        "holding_cost": sum(c * I[p][t].value() for p, c in zip(P, sk.costs.hold) for t in T),
+        "total_cost": lp.value(sk.cost),
+    }
+
+
+class SolutionExtractTests(WorkbookTestCase):
+    WORKBOOKS = {"small": (6, 8, 0.9, 0), "tight": (12, 10, 0.97, 3)}
+
+    def _check(self, name: str, kind: str, **bind):
+        problem = load_problem(self.paths[name])
+        sk = Skeleton(problem.products, problem.periods, kind)
+        sk.bind(problem.demand, problem.sst, problem.eex, problem.cap, problem.costs, **bind)
+        self.assertEqual(solve(sk.model, kind), lp.LpStatusOptimal)
+        reference, solution = _per_variable(sk), extract(sk)
+
+        pd.testing.assert_frame_equal(solution.plan_frame(), reference["plan"], check_exact=True)
+        self.assertEqual(solution.plan_dict(), reference["plan_dict"])
+        self.assertEqual(solution.shortfall, reference["shortfall"])
+        for kpi in ("total_production", "service_level", "production_cost", "holding_cost", "total_cost"):
+            self.assertTrue(close(getattr(solution, kpi), reference[kpi], 1e-12), kpi)
+        self.assertTrue(close(solution.total_cost,
+                              solution.production_cost + solution.holding_cost + solution.excess_cost, 1e-12))
+
+    def test_cost_model_matches_per_variable_extraction(self):
+        for name in self.WORKBOOKS:
+            with self.subTest(name=name):
+                self._check(name, COST)
+
+    def test_weighted_model_matches_per_variable_extraction(self):
+        for name in self.WORKBOOKS:
+            with self.subTest(name=name):
+                self._check(name, WEIGHTED, alpha=0.9, ws=10.0)
+
+
+# ---------------------------------------------------------------------------
+# 25. SERVICIO DE GRÁFICAS (user-042)
+# ---------------------------------------------------------------------------
+
+class ChartServiceTests(SimpleTestCase):
+    PARETO = pd.DataFrame({"model": ["ws", "ws", "lex"], "service": [0.9, 0.95, 0.97],
+                           "cost": [100.0, 110.0, 125.0]})
+
+    def setUp(self):
+        self.root = tempfile.mkdtemp(prefix="charts-")
+        self.addCleanup(shutil.rmtree, self.root, True)
+        self.service = charts.ChartService(self.root, max_runs=1)
+
+    def _draw(self, run_id: str, kind: str, data, **kwargs) -> str:
+        path = self.service.submit(run_id, kind, data, **kwargs)
+        self.service.wait(path)
+        return path
+
+    def _fail(self, run_id: str) -> None:
+        # Cara degenerada: ``face_figure`` no devuelve figura
+        self._draw(run_id, charts.FACE, [], vx="x", vy="y", title="vacía")
+
+    def test_errors_of_pruned_runs_are_dropped(self):
+        old, new = uuid.uuid4().hex, uuid.uuid4().hex
+        self._draw(old, charts.PARETO, self.PARETO)
+        self._fail(old)
+        os.utime(os.path.join(self.root, old), (1, 1))
+        self.assertEqual(self.service.status(old, charts.FACE, charts.ChartParams())[0], charts.FAILED)
+
+        self._draw(new, charts.PARETO, self.PARETO)
+        self.assertFalse(os.path.isdir(os.path.join(self.root, old)))
+        self.assertEqual(self.service.status(old, charts.FACE, charts.ChartParams())[0], charts.MISSING)
+        self.assertEqual(self.service.status(new, charts.PARETO, charts.ChartParams())[0], charts.READY)
+
+    def test_errors_are_capped(self):
+        runs = [uuid.uuid4().hex for _ in range(4)]
+        with mock.patch.object(charts, "MAX_ERRORS", 2):
+            for run_id in runs:
+                self._fail(run_id)
+        states = [self.service.status(run_id, charts.FACE, charts.ChartParams())[0] for run_id in runs]
+        self.assertEqual(states, [charts.MISSING, charts.MISSING, charts.FAILED, charts.FAILED])
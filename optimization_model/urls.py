@@ -8,6 +8,17 @@ router = routers.DefaultRouter()
 
 urlpatterns = [
     path("api/v1/", include(router.urls)),
-    path('api/v1/optimize/', views.optimizeScript, name='optimize'),
+    path('api/v1/optimize/', views.admitted(views.optimizeScript), name='optimize'),
+    path('api/v1/optimize/scenarios/', views.admitted(views.optimizeScenarios), name='optimize-scenarios'),
+    path('api/v1/optimize/stochastic/', views.admitted(views.optimizeStochastic), name='optimize-stochastic'),
+    path('api/v1/optimize/sweep/', views.admitted(views.optimizeSweep), name='optimize-sweep'),
+    path('api/v1/optimize/lexicographic/', views.admitted(views.optimizeLexicographic),
+         name='optimize-lexicographic'),
+    path('api/v1/optimize/goals/', views.admitted(views.optimizeGoals), name='optimize-goals'),
+    path('api/v1/optimize/compare/', views.admitted(views.optimizeCompare), name='optimize-compare'),
+    path('api/v1/optimize/stream/', views.optimizeStream, name='optimize-stream'),
+    path('api/v1/optimize/stream/<str:run_id>/cancel/', views.optimizeStreamCancel, name='optimize-stream-cancel'),
+    path('api/v1/plans/<str:run_id>/', views.planRows, name='plan-rows'),
+    path('api/v1/charts/<str:run_id>/<str:kind>/', views.chartImage, name='chart'),
     path('docs/', include_docs_urls(title="Optimization API"))
 ]
\ No newline at end of file
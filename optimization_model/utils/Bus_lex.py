@@ -1,9 +1,24 @@
 # ----------------------------------------
 # 1. Importaciones de librerías
 # ----------------------------------------
+from contextlib import nullcontext
+
 import pandas as pd
 import pulp as lp
 
+# Import relativo dentro del paquete; absoluto al ejecutarlo desde utils/
+# (``python Bus_lex.py``, o importado por Caras optimas.py y UnicidadLex.py).
+try:
+    from .costs import cost_vectors
+    from .skeleton import COST, LEX_PHASE2, SKELETONS
+    from .solution import extract
+    from .solver import solve
+except ImportError:
+    from costs import cost_vectors
+    from skeleton import COST, LEX_PHASE2, SKELETONS
+    from solution import extract
+    from solver import solve
+
 # ----------------------------------------
 # 2. Parámetros definidos por el usuario
 # ----------------------------------------
@@ -80,93 +95,67 @@ def preprocess_data(df_sd, df_bc):
 
     return products, periods, D, SST, EEX, Cap
 
-def build_lex_model(products, periods, D, SST, EEX, Cap, alpha, c_prod, c_hold, c_exc):
+def build_lex_model(products, periods, D, SST, EEX, Cap, alpha, c_prod, c_hold, c_exc, telemetry=None,
+                    budget=None, reduction=None):
     """
     Construye y resuelve un modelo lexicográfico con dos fases:
       1) Minimizar costos.
       2) Minimizar shortfall de cobertura, dados los costos óptimos de la fase 1.
+    (Para otra lista de objetivos sobre un único modelo ver
+    ``lexicographic.solve_lexicographic``.)
     Parámetros:
         products (list): Lista de SKUs.
         periods (list): Lista de periodos históricos.
         D, SST, EEX, Cap (dicts): Parámetros del problema.
         alpha (float): Cobertura mínima deseada.
-        c_prod, c_hold, c_exc (dicts): Costos unitarios.
+        c_prod, c_hold, c_exc (dicts o arreglos alineados con products): Costos unitarios.
+        telemetry (RunTelemetry, opcional): Registro de tiempos y resoluciones.
+        budget (SolveBudget, opcional): Límites de CBC por fase; si se alcanzan
+            se usa la mejor solución encontrada (ver ``solver.solve``).
+        reduction (Reduction, opcional): ``presolve`` de los mismos datos; sus
+            cotas de inventario se aplican en ambas fases.
+    Lanza ValueError si alguna fase no termina en óptimo (p. ej. infactible).
     Devuelve:
         f1_star (float): Costo óptimo de la fase 1.
         shortfall (float): Shortfall de cobertura encontrado.
         production_plan (dict): Plan de producción lexicográfico.
     """
-    # Fase 1: minimización de costos
-    m1 = lp.LpProblem('CostMin', lp.LpMinimize)
-    x1 = lp.LpVariable.dicts('x', (products, periods), lowBound=0, cat='Integer')
-    I1 = lp.LpVariable.dicts('I', (products, periods), lowBound=0, cat='Integer')
-
-    # Función objetivo: costos de producción + inventario + excedentes
-    m1 += lp.lpSum(c_prod[p]*x1[p][t] + c_hold[p]*I1[p][t] + c_exc[p]*EEX[(p,t)]
-                   for p in products for t in periods)
-
-    # Restricciones de balance de inventario
-    for p in products:
-        for idx, t in enumerate(periods):
-            if idx == 0:
-                m1 += x1[p][t] == D[(p,t)] + I1[p][t]
-            else:
-                prev = periods[idx-1]
-                m1 += I1[p][prev] + x1[p][t] == D[(p,t)] + I1[p][t]
-
-    # Restricciones de stock de seguridad
-    for p in products:
-        for t in periods:
-            m1 += I1[p][t] >= SST[(p,t)]
-
-    # Restricciones de capacidad
-    for t in periods:
-        m1 += lp.lpSum(x1[p][t] for p in products) <= Cap[t]
-
-    # Resolver fase 1
-    m1.solve(lp.PULP_CBC_CMD(msg=False))
-    f1_star = lp.value(m1.objective)
-
-    # Fase 2: minimización de shortfall de cobertura
-    m2 = lp.LpProblem('Lexico', lp.LpMinimize)
-    x2 = lp.LpVariable.dicts('x2', (products, periods), lowBound=0, cat='Integer')
-    I2 = lp.LpVariable.dicts('I2', (products, periods), lowBound=0, cat='Integer')
-    s   = lp.LpVariable('shortfall', lowBound=0)
-
-    # Cota de costo igual a costo óptimo de fase 1
-    m2 += lp.lpSum(c_prod[p]*x2[p][t] + c_hold[p]*I2[p][t] + c_exc[p]*EEX[(p,t)]
-                   for p in products for t in periods) <= f1_star
-
-    # Objetivo secundario: minimizar shortfall
-    m2 += s
-
-    # Restricción de cobertura mínima con slack
-    m2 += lp.lpSum(x2[p][t] for p in products for t in periods) + s \
-          >= alpha * lp.lpSum(D[(p,t)] for p in products for t in periods)
-
-    # Repetir restricciones de balance, stock y capacidad de fase 1
-    for p in products:
-        for idx, t in enumerate(periods):
-            if idx == 0:
-                m2 += x2[p][t] == D[(p,t)] + I2[p][t]
-            else:
-                prev = periods[idx-1]
-                m2 += I2[p][prev] + x2[p][t] == D[(p,t)] + I2[p][t]
-
-    for p in products:
-        for t in periods:
-            m2 += I2[p][t] >= SST[(p,t)]
-
-    for t in periods:
-        m2 += lp.lpSum(x2[p][t] for p in products) <= Cap[t]
-
-    # Resolver fase 2
-    m2.solve(lp.PULP_CBC_CMD(msg=False))
-
-    # Capturar resultados
-    shortfall = s.value()
-    production_plan = {(p,t): x2[p][t].value()
-                       for p in products for t in periods if x2[p][t].value() > 1e-6}
+    stage = telemetry.stage if telemetry is not None else (lambda name: nullcontext())
+    costs = cost_vectors(products, c_prod, c_hold, c_exc)
+
+    # Fase 1: minimización de costos.  Los modelos salen de la caché de
+    # esqueletos por forma (products, periods): solo se reasignan los datos.
+    with stage('build_lex_phase1'):
+        sk1 = SKELETONS.acquire(products, periods, COST, integer=True)
+        sk1.bind(D, SST, EEX, Cap, costs, reduction=reduction)
+    try:
+        # Resolver fase 1.  Sin óptimo (o incumbente) el objetivo del esqueleto
+        # conserva los valores de la resolución anterior: no hay f★ válido
+        status = solve(sk1.model, 'lex_phase1_mip', telemetry, budget=budget)
+        if status != lp.LpStatusOptimal:
+            raise ValueError(f"La fase 1 del modelo lexicográfico terminó con estado "
+                             f"'{lp.LpStatus[status]}': no hay coste óptimo para la fase 2")
+        f1_star = lp.value(sk1.model.objective)
+    finally:
+        SKELETONS.release(sk1)
+
+    # Fase 2: minimización de shortfall de cobertura con costo <= f1_star
+    with stage('build_lex_phase2'):
+        sk2 = SKELETONS.acquire(products, periods, LEX_PHASE2, integer=True)
+        sk2.bind(D, SST, EEX, Cap, costs, alpha=alpha, f_star=f1_star, reduction=reduction)
+    try:
+        # Resolver fase 2 (mismo criterio que la fase 1: sin óptimo no hay plan)
+        status = solve(sk2.model, 'lex_phase2_mip', telemetry, budget=budget)
+        if status != lp.LpStatusOptimal:
+            raise ValueError(f"La fase 2 del modelo lexicográfico terminó con estado "
+                             f"'{lp.LpStatus[status]}': no hay plan de producción")
+
+        # Capturar resultados (vector primal en bloque)
+        solution = extract(sk2)
+        shortfall = solution.shortfall
+        production_plan = solution.plan_dict(1e-6)
+    finally:
+        SKELETONS.release(sk2)
 
     return f1_star, shortfall, production_plan
 
@@ -3,9 +3,7 @@
 #  (todo ASCII; DELTA = 1e-4)
 # ============================================================================
 import pulp as lp
-import pandas as pd
 import numpy as np
-import matplotlib.pyplot as plt
 import sys, warnings
 
 # salida UTF‑8 (Windows)
@@ -13,6 +11,7 @@ sys.stdout.reconfigure(encoding="utf-8", errors="replace")
 
 import Bus_lex as lex
 import Suma_ponderada_funciones as wsum
+from charts import face_figure, save
 
 TOL        = 1e-6     # tolerancia |dj|
 DELTA      = 1e-4     # holgura en el óptimo  (coste <= z*+DELTA)
@@ -47,15 +46,14 @@ def sample_face(model, free_list):
     return pts
 
 def plot_points(points, v1, v2, title):
-    df = pd.DataFrame({v1: [p.get(v1,0) for p in points],
-                       v2: [p.get(v2,0) for p in points]})
-    if df[v1].nunique() <= 1 and df[v2].nunique() <= 1:
+    # sin ventana: se guarda en PNG (backend Agg, ver charts.py)
+    fig = face_figure(points, v1, v2, title)
+    if fig is None:
         print(f"⚠  {title}: la cara sigue siendo puntual; nada que mostrar.")
         return
-    plt.figure(figsize=(6,5))
-    plt.scatter(df[v1], df[v2])
-    plt.title(title); plt.xlabel(v1); plt.ylabel(v2); plt.grid(True)
-    plt.show()
+    fig.set_size_inches(6, 5)
+    path = save(fig, f"{title.split()[-1]}_{v1}_{v2}.png")
+    print(f"   gráfica guardada en {path}")
 
 # ─────────────────────────────────────────────────────────────
 # modelos
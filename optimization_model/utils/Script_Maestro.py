@@ -17,14 +17,23 @@ Estructura pedida
 # 1. IMPORTACIONES
 # ---------------------------------------------------------------------------
 import sys
-from typing import List, Tuple
+from contextlib import nullcontext
+from typing import Callable, Iterator, List, Optional, Tuple
 
-import matplotlib.pyplot as plt
 import pandas as pd
 import pulp as lp
 
 from . import Bus_lex as lex
 from . import Suma_ponderada_funciones as wsum
+from .charts import face_figure, pareto_figure, save
+from .costs import CostTable, load_costs, read_cost_sheet
+from .presolve import presolve
+from .problem import PlanningProblem, load_problem
+from .sensitivity import pareto_summary, sensitivity_report, solve_with_ranging
+from .skeleton import LEX_PHASE2, SKELETONS, WEIGHTED
+from .solution import extract
+from .solver import SolveBudget, solve
+from .telemetry import RunTelemetry
 
 # Aseguramos que la salida soporte UTF‑8 para imprimir caracteres especiales
 sys.stdout.reconfigure(encoding="utf-8", errors="replace")
@@ -41,6 +50,8 @@ WS_VALUES: List[float] = [0.1, 0.5, 1, 2, 5, 10, 20]  # 0.1 – 20  → ↑w_s
 
 # Tolerancia numérica para detectar variables libres y degeneración
 TOL: float = 1e-6
+# Holgura relativa con la que ``lock_opt`` fija un óptimo
+LOCK_RTOL: float = 1e-7
 
 
 # ---------------------------------------------------------------------------
@@ -49,8 +60,70 @@ TOL: float = 1e-6
 
 # 3.1  Utilidades genéricas ------------------------------------------------
 
-def lock_opt(model: lp.LpProblem, expr: lp.LpAffineExpression, z_star: float, delta: float = 1e-7) -> None:
-    """Fija el valor óptimo añadiendo *expr == z★* mediante dos desigualdades."""
+def _stage(telemetry: Optional[RunTelemetry], name: str):
+    """Contexto de la etapa ``name`` (no hace nada si no hay telemetría)."""
+    return telemetry.stage(name) if telemetry is not None else nullcontext()
+
+
+def _resolve_costs(P: List[str], excel_file, cost_table: Optional[pd.DataFrame], defaults: tuple,
+                   telemetry: Optional[RunTelemetry]) -> CostTable:
+    """Costos alineados con ``P``: tabla subida, hoja ``Costs`` del libro o valores por defecto."""
+    with _stage(telemetry, "load_costs"):
+        table = cost_table if cost_table is not None else read_cost_sheet(excel_file)
+        return load_costs(P, table, defaults)
+
+
+def _reduce(problem: PlanningProblem, telemetry: Optional[RunTelemetry]):
+    """
+    ``presolve`` del problema para los esqueletos: demuestra la infactibilidad
+    sin llamar a CBC (ValueError) y acota ``I``.  Las filas que descartaría se
+    conservan, porque el esqueleto es común a todas las peticiones de la forma.
+    """
+    reduction = presolve(problem, telemetry=telemetry)
+    if reduction.infeasible:
+        raise ValueError("El presolve demostró que el problema es infactible")
+    return reduction
+
+
+def _require_optimal(status: int, what: str) -> None:
+    """
+    ValueError si una resolución no terminó en óptimo: el esqueleto conserva
+    los valores de la petición anterior y no deben leerse como solución.
+    """
+    if status != lp.LpStatusOptimal:
+        raise ValueError(f"{what} terminó con estado '{lp.LpStatus[status]}': no hay solución que extraer")
+
+
+def _unless_ranged(reduction, sensitivity: Optional[list]):
+    # Los rangos de CBC tratan las cotas como datos fijos: con informe de
+    # sensibilidad el LP se resuelve sin las cotas derivadas del presolve
+    return reduction if sensitivity is None else None
+
+
+def _optimality(telemetry: RunTelemetry, start: int) -> dict:
+    """
+    ``proven_optimal`` (todas las resoluciones registradas desde ``start``
+    demostradas óptimas) y el mayor gap entre ellas (``None`` si alguno se
+    desconoce).
+    """
+    records = telemetry.solves[start:]
+    gaps = [r.get("gap") for r in records]
+    return {
+        "proven_optimal": bool(records) and all(r.get("proven_optimal") for r in records),
+        "gap": max(gaps) if gaps and None not in gaps else None,
+    }
+
+
+def lock_opt(model: lp.LpProblem, expr: lp.LpAffineExpression, z_star: float, delta: Optional[float] = None) -> None:
+    """
+    Fija el valor óptimo añadiendo *expr == z★* mediante dos desigualdades.
+
+    La holgura ``delta`` es por defecto relativa a z★ (``LOCK_RTOL``): una
+    absoluta de 1e-7 sobre costes del orden de 1e8 queda por debajo de la
+    precisión con la que CBC cumple las filas.
+    """
+    if delta is None:
+        delta = LOCK_RTOL * max(1.0, abs(z_star))
     model += expr <= z_star + delta
     model += expr >= z_star - delta
 
@@ -74,132 +147,134 @@ def extreme_points(model: lp.LpProblem, free_list: List[lp.LpVariable]) -> List[
     return pts
 
 
-def scatter_face(points: List[dict], vx: str, vy: str, title: str) -> None:
-    """Grafica la proyección (vx, vy) de los puntos extremos obtenidos."""
-    df = pd.DataFrame([{"vx": p.get(vx, 0), "vy": p.get(vy, 0)} for p in points])
-    if df.empty or (df["vx"].nunique() <= 1 and df["vy"].nunique() <= 1):
+def scatter_face(points: List[dict], vx: str, vy: str, title: str, path: Optional[str] = None) -> None:
+    """Guarda la proyección (vx, vy) de los puntos extremos obtenidos (PNG, sin ventana)."""
+    fig = face_figure(points, vx, vy, title)
+    if fig is None:
         print(f"⚠️  Cara óptima {title} degenerada (no se grafica).")
         return
-    plt.figure()
-    plt.scatter(df["vx"], df["vy"])
-    plt.xlabel(vx)
-    plt.ylabel(vy)
-    plt.title(title)
-    plt.grid(True)
-    plt.show()
+    print(f"Cara óptima guardada en {save(fig, path or f'cara_{vx}_{vy}.png')}")
 
 
 # 3.2  Modelo lexicográfico ------------------------------------------------
 
-def run_lexicographic(alpha: float, excel_file: str) -> Tuple[float, float, pd.DataFrame]:
+def run_lexicographic(alpha: float, excel_file: str,
+                      telemetry: Optional[RunTelemetry] = None,
+                      cost_table: Optional[pd.DataFrame] = None,
+                      sensitivity: Optional[list] = None,
+                      budget: Optional[SolveBudget] = None) -> Tuple[float, float, pd.DataFrame]:
     """
-    Resuelve la Fase 2 del modelo lexicográfico.
+    Resuelve la Fase 2 del modelo lexicográfico.
     Devuelve:
-      - coste mínimo (fase 1)
+      - coste mínimo (fase 1)
       - nivel de servicio
       - DataFrame con la planificación óptima: columnas ['Product','Period','Production']
+    ``cost_table`` sustituye a la hoja ``Costs`` del libro (ver ``costs.load_costs``).
+    Si se pasa la lista ``sensitivity`` se le añade el informe de sensibilidad
+    de la fase 2 (``sensitivity.sensitivity_report``).  ``budget`` limita
+    cada resolución; la fase 1 entera puede devolver un incumbente no
+    demostrado óptimo (ver ``solver.SolveBudget``).  El problema pasa antes
+    por ``presolve``: una infactibilidad demostrada es ValueError y sus cotas
+    de inventario se aplican a los esqueletos de ambas fases.  Una fase que
+    no termina en óptimo también es ValueError.
     """
     # Cargar y preprocesar
-    df_sd, df_bc = lex.load_data(excel_file)
-    P, T, D, SST, EEX, Cap = lex.preprocess_data(df_sd, df_bc)
+    problem = load_problem(excel_file, cost_table, telemetry)
+    P, T, costs = problem.products, problem.periods, problem.costs
+    data = (problem.demand, problem.sst, problem.eex, problem.cap)
+    reduction = _reduce(problem, telemetry)
 
     # --- Fase 1: coste mínimo f★ ---
-    f_star, _, _ = lex.build_lex_model(P, T, D, SST, EEX, Cap, alpha, lex.c_prod, lex.c_hold, lex.c_exc)
+    f_star, _, _ = lex.build_lex_model(P, T, *data, alpha, *costs, telemetry=telemetry, budget=budget,
+                                       reduction=reduction)
 
     # --- Fase 2: minimiza shortfall manteniendo coste f★ ---
-    m = lp.LpProblem("lex_phase2", lp.LpMinimize)
-    x = lp.LpVariable.dicts("x", (P, T), lowBound=0)
-    I = lp.LpVariable.dicts("I", (P, T), lowBound=0)
-    s = lp.LpVariable("shortfall", lowBound=0)
-
-    cost_expr = lp.lpSum(lex.c_prod[p]*x[p][t] + lex.c_hold[p]*I[p][t] + lex.c_exc[p]*EEX[(p, t)]
-                         for p in P for t in T)
-    m += s
-    m += cost_expr <= f_star
-
-    total_demand = sum(D[(p, t)] for p in P for t in T)
-    m += lp.lpSum(x[p][t] for p in P for t in T) + s >= alpha * total_demand
-
-    # Inventario encadenado, SST y capacidad
-    for p in P:
-        for k, t in enumerate(T):
-            if k == 0:
-                m += x[p][t] == D[(p, t)] + I[p][t]
-            else:
-                prev = T[k-1]
-                m += I[p][prev] + x[p][t] == D[(p, t)] + I[p][t]
-            m += I[p][t] >= SST[(p, t)]
-    for t in T:
-        m += lp.lpSum(x[p][t] for p in P) <= Cap[t]
-
-    m.solve(lp.PULP_CBC_CMD(msg=False))
-
-    # --- Extraer resultados ---
-    # Nivel de servicio
-    total_production = sum(x[p][t].value() for p in P for t in T)
-    service_level = total_production / total_demand
-
-    # Planificación a DataFrame
-    plan = [
-        {"Product": p, "Period": t, "Production": x[p][t].value()}
-        for p in P for t in T if x[p][t].value() > TOL
-    ]
-    plan_df = pd.DataFrame(plan)
+    # Esqueleto de la caché para esta forma (P, T): solo se reasignan los datos
+    with _stage(telemetry, "build_lex_phase2_lp"):
+        sk = SKELETONS.acquire(P, T, LEX_PHASE2)
+        sk.bind(*data, costs, alpha=alpha, f_star=f_star, reduction=_unless_ranged(reduction, sensitivity))
+    try:
+        m, x, total_demand = sk.model, sk.x, sk.total_demand
+        # Los rangos cuestan resoluciones extra de CBC: solo si se pide el informe
+        if sensitivity is None:
+            status = solve(m, "lex_phase2_lp", telemetry, budget=budget)
+        else:
+            status, ranging = solve_with_ranging(m, "lex_phase2_lp", telemetry, budget=budget)
+        _require_optimal(status, "La fase 2 del modelo lexicográfico")
+        if sensitivity is not None:
+            with _stage(telemetry, "sensitivity"):
+                sensitivity.append(sensitivity_report(m, ranging, x, P, T, total_demand))
+
+        # --- Extraer resultados (vector primal en bloque) ---
+        with _stage(telemetry, "extract_plan"):
+            solution = extract(sk)
+            service_level = solution.service_level
+            plan_df = solution.plan_frame(TOL)
+    finally:
+        SKELETONS.release(sk)
 
     return f_star, service_level, plan_df
 
 
 # 3.3  Modelo weighted‑sum --------------------------------------------------
 
-def run_weighted(ws: float, excel_file: str, wc: float = WC, alpha: float = ALPHA) -> Tuple[float, float]:
-    """Ejecuta weighted‑sum y devuelve (coste_total, service_level)."""
-    df_sd, df_bc = wsum.load_data(excel_file)
-    P, T, D, SST, EEX, Cap = wsum.preprocess_data(df_sd, df_bc)
-
-    m = lp.LpProblem("weighted_sum", lp.LpMinimize)
-    x = lp.LpVariable.dicts("x", (P, T), lowBound=0)
-    I = lp.LpVariable.dicts("I", (P, T), lowBound=0)
-    s = lp.LpVariable("shortfall", lowBound=0)
-
-    cost_expr = lp.lpSum(wsum.c_prod[p]*x[p][t] + wsum.c_hold[p]*I[p][t] + wsum.c_exc[p]*EEX[(p, t)]
-                         for p in P for t in T)
-    m += wc * cost_expr + ws * s
-
-    total_demand = sum(D[(p, t)] for p in P for t in T)
-    m += s >= alpha * total_demand - lp.lpSum(x[p][t] for p in P for t in T)
-
-    for p in P:
-        for k, t in enumerate(T):
-            if k == 0:
-                m += x[p][t] == D[(p, t)] + I[p][t]
-            else:
-                prev = T[k-1]
-                m += I[p][prev] + x[p][t] == D[(p, t)] + I[p][t]
-            m += I[p][t] >= SST[(p, t)]
-    for t in T:
-        m += lp.lpSum(x[p][t] for p in P) <= Cap[t]
-
-    m.solve(lp.PULP_CBC_CMD(msg=False))
-
-    total_cost = lp.value(cost_expr)
-    total_production = sum(x[p][t].value() for p in P for t in T)
-    service_level = total_production / total_demand
-    return total_cost, service_level
+def run_weighted(ws: float, excel_file: str, wc: float = WC, alpha: float = ALPHA,
+                 telemetry: Optional[RunTelemetry] = None,
+                 cost_table: Optional[pd.DataFrame] = None,
+                 sensitivity: Optional[list] = None,
+                 budget: Optional[SolveBudget] = None) -> Tuple[float, float]:
+    """
+    Ejecuta weighted‑sum y devuelve (coste_total, service_level).
+    Con la lista ``sensitivity`` se le añade el informe de sensibilidad del LP.
+    ``budget`` limita la resolución (``solver.SolveBudget``).
+    """
+    with _stage(telemetry, "read_excel"):
+        df_sd, df_bc = wsum.load_data(excel_file)
+    with _stage(telemetry, "preprocess_data"):
+        P, T, D, SST, EEX, Cap = wsum.preprocess_data(df_sd, df_bc)
+    costs = _resolve_costs(P, excel_file, cost_table, (wsum.c_prod, wsum.c_hold, wsum.c_exc), telemetry)
+    return weighted_point(P, T, D, SST, EEX, Cap, costs, ws, wc, alpha, telemetry, sensitivity, budget)
+
+
+def weighted_point(P: List[str], T: List[str], D, SST, EEX, Cap, costs: CostTable,
+                   ws: float, wc: float = WC, alpha: float = ALPHA,
+                   telemetry: Optional[RunTelemetry] = None,
+                   sensitivity: Optional[list] = None,
+                   budget: Optional[SolveBudget] = None, reduction=None) -> Tuple[float, float]:
+    """
+    Weighted‑sum sobre datos ya preprocesados (ver ``run_weighted``): los
+    diccionarios de ``preprocess_data`` o las matrices de un ``PlanningProblem``
+    (ver ``Skeleton.bind``), con las cotas de ``reduction`` si se pasa (salvo
+    con informe de sensibilidad).  ValueError si el LP no termina en óptimo.
+    """
+    with _stage(telemetry, "build_weighted_lp"):
+        sk = SKELETONS.acquire(P, T, WEIGHTED)
+        sk.bind(D, SST, EEX, Cap, costs, alpha=alpha, wc=wc, ws=ws,
+                reduction=_unless_ranged(reduction, sensitivity))
+    try:
+        m, x, total_demand = sk.model, sk.x, sk.total_demand
+        if sensitivity is None:
+            status = solve(m, "weighted_lp", telemetry, budget=budget)
+        else:
+            status, ranging = solve_with_ranging(m, "weighted_lp", telemetry, budget=budget)
+        _require_optimal(status, f"El modelo weighted-sum (w_s = {ws:g})")
+        if sensitivity is not None:
+            with _stage(telemetry, "sensitivity"):
+                sensitivity.append(sensitivity_report(m, ranging, x, P, T, total_demand))
+
+        with _stage(telemetry, "extract_plan"):
+            solution = extract(sk)
+    finally:
+        SKELETONS.release(sk)
+    return solution.total_cost, solution.service_level
 
 
 # 3.4  Plot de la frontera de Pareto ----------------------------------------
 
-def plot_pareto(pareto_df: pd.DataFrame) -> None:
-    plt.figure()
-    plt.scatter(pareto_df["service"], pareto_df["cost"], label="Weighted‑sum")
-    row_lex = pareto_df[pareto_df["model"] == "lex"]
-    plt.scatter(row_lex["service"], row_lex["cost"], marker="x", s=100, label="Lexicográfico")
-    plt.xlabel("Service Level")
-    plt.ylabel("Coste total")
-    plt.title("Frontera de Pareto – Coste vs Service Level")
-    plt.legend()
-    plt.grid(True)
-    plt.show()
+def plot_pareto(pareto_df: pd.DataFrame, path: str = "pareto.png") -> None:
+    """Guarda la frontera de Pareto en ``path`` (backend Agg; ver ``utils.charts``)."""
+    save(pareto_figure(pareto_df), path)
+    print(f"Frontera de Pareto guardada en {path}")
 
 
 # 3.5  Función main() --------------------------------------------------------
@@ -239,30 +314,103 @@ def main(input_excel) -> None:
 if __name__ == "__main__":
     main()
 
-def optimize_from_excel(input_excel) -> dict:
-    """Ejecuta la optimización a partir de un archivo Excel y devuelve los resultados clave como diccionario."""
-    cost_lex, srv_lex, plan_df = run_lexicographic(ALPHA, input_excel)
+def _weighted_points(input_excel, telemetry: RunTelemetry, cost_table: Optional[pd.DataFrame],
+                     reports: list, budget: Optional[SolveBudget],
+                     dispatch: Optional[Callable[..., Iterator[dict]]]) -> Iterator[tuple]:
+    """
+    (w_s, primer registro de telemetría, coste, servicio) de cada punto de
+    ``WS_VALUES``, en orden; las resoluciones quedan en ``telemetry`` y los
+    informes de sensibilidad (si ``reports`` no es ``None``) en ``reports``.
+    """
+    # El libro se lee y preprocesa una sola vez para todos los puntos
+    problem = load_problem(input_excel, cost_table, telemetry)
+    if dispatch is None:
+        reduction = _reduce(problem, telemetry)
+        for ws in WS_VALUES:
+            start = len(telemetry.solves)
+            cost, srv = weighted_point(problem.products, problem.periods, problem.demand, problem.sst,
+                                       problem.eex, problem.cap, problem.costs, ws, telemetry=telemetry,
+                                       sensitivity=reports, budget=budget, reduction=reduction)
+            yield ws, start, cost, srv
+        return
+
+    limits = (budget or SolveBudget()).for_model("weighted_lp")
+    payloads = [{"ws": ws, "wc": WC, "alpha": ALPHA, "sensitivity": reports is not None,
+                 "budget": limits._asdict()} for ws in WS_VALUES]
+    for ws, result in zip(WS_VALUES, dispatch(problem, "weighted", payloads)):
+        start = len(telemetry.solves)
+        for record in result["solves"]:
+            telemetry.record_solve(record)
+        if result["report"] is not None:
+            reports.append(result["report"])
+        yield ws, start, result["cost"], result["service"]
+
+
+def optimize_from_excel(input_excel, telemetry: Optional[RunTelemetry] = None,
+                        cost_table: Optional[pd.DataFrame] = None,
+                        sensitivity: Optional[list] = None,
+                        budget: Optional[SolveBudget] = None,
+                        progress: Optional[Callable[[str, dict], None]] = None,
+                        dispatch: Optional[Callable[..., Iterator[dict]]] = None) -> dict:
+    """
+    Ejecuta la optimización a partir de un archivo Excel y devuelve los resultados clave como diccionario.
+
+    Cada etapa y cada resolución quedan registradas en ``telemetry`` (se crea
+    una si no se pasa, para alimentar igualmente las métricas globales).
+    ``cost_table`` es una tabla de costos por SKU subida aparte (opcional).
+    Solo si se pasa la lista ``sensitivity`` se calculan los rangos de CBC:
+    se le añaden los informes completos, en el mismo orden que las filas, y
+    cada fila de Pareto incluye el resumen de sensibilidad de su resolución
+    (``sensitivity.pareto_summary``).
+    ``budget`` (``solver.SolveBudget``) limita cada resolución; cada fila
+    indica si su resultado está demostrado óptimo (``proven_optimal``) y el
+    gap de su incumbente.
+    ``progress(evento, datos)`` recibe ``"point"`` con cada fila de Pareto en
+    cuanto termina su resolución (primero la lexicográfica) y ``"frontier"``
+    al completar la frontera, antes de recalcular el plan; si lanza una
+    excepción la ejecución se interrumpe ahí (cancelación).
+    Con ``dispatch`` (ver ``tasks``) los puntos weighted‑sum se reparten como
+    tareas ``"weighted"`` independientes en lugar de resolverse en línea.
+    """
+    telemetry = telemetry if telemetry is not None else RunTelemetry()
+    reports: Optional[list] = [] if sensitivity is not None else None
+    summary = pareto_summary if sensitivity is not None else (lambda report: {})
+    start = len(telemetry.solves)
+    cost_lex, srv_lex, plan_df = run_lexicographic(ALPHA, input_excel, telemetry=telemetry, cost_table=cost_table,
+                                                   sensitivity=reports, budget=budget)
+    lex_report = reports.pop() if reports else None
+    lex_row = {"model": "lex", "w_s": None, "cost": cost_lex, "service": srv_lex,
+               **_optimality(telemetry, start), **summary(lex_report)}
+    if progress is not None:
+        progress("point", lex_row)
 
     results = []
-    for ws in WS_VALUES:
-        cost, srv = run_weighted(ws, input_excel)
+    for ws, start, cost, srv in _weighted_points(input_excel, telemetry, cost_table, reports, budget, dispatch):
         print(f"   w_s={ws:<5}: coste={cost:,.2f}  service={srv:.4f}")
 
-        results.append({"model": "ws", "w_s": ws, "cost": cost, "service": srv})
-
-    results.append({"model": "lex", "w_s": None, "cost": cost_lex, "service": srv_lex})
+        results.append({"model": "ws", "w_s": ws, "cost": cost, "service": srv,
+                        **_optimality(telemetry, start),
+                        **summary(reports[-1] if reports else None)})
+        if sensitivity is not None and reports:
+            sensitivity.append({"model": "ws", "w_s": ws, **reports[-1]})
+        if progress is not None:
+            progress("point", results[-1])
+
+    results.append(lex_row)
+    if sensitivity is not None and lex_report is not None:
+        sensitivity.append({"model": "lex", "w_s": None, **lex_report})
     df_pareto = pd.DataFrame(results)
-    df_pareto.to_csv("pareto_results.csv", index=False)
-    print("\nResultados guardados en pareto_results.csv\n")
+    if progress is not None:
+        progress("frontier", {"points": len(df_pareto)})
 
-    cost_lex, srv_lex, plan_df = run_lexicographic(ALPHA, input_excel)
+    cost_lex, srv_lex, plan_df = run_lexicographic(ALPHA, input_excel, telemetry=telemetry, cost_table=cost_table,
+                                                   budget=budget)
     print(f"   Coste           : {cost_lex:,.2f}")
     print(f"   Service level   : {srv_lex:.4f}\n")
 
-    # Imprimir planificación y guardar Excel
+    # Imprimir planificación (los archivos los guarda ``main``; aquí el plan se devuelve)
     print(">>> Planificación óptima (lexicográfico):")
     print(plan_df.to_string(index=False))
-    plan_df.to_excel("Plan_de_Produccion_Lexico.xlsx", index=False)
-    
+
     # Regresar el DataFrame actualizado
     return plan_df, df_pareto
\ No newline at end of file
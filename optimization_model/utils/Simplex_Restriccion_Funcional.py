@@ -2,12 +2,21 @@
 # 1. Importaciones de librerías
 # ----------------------------------------
 import re
+from contextlib import nullcontext
+
 import pandas as pd
 from pyomo.environ import (
     ConcreteModel, Set, Param, Var,
     NonNegativeReals, Constraint, Objective,
     SolverFactory, minimize
 )
+from pyomo.core.expr.numeric_expr import LinearExpression
+
+# Import relativo dentro del paquete; absoluto con ``python Simplex_Restriccion_Funcional.py``.
+try:
+    from .costs import cost_vectors
+except ImportError:
+    from costs import cost_vectors
 
 # ----------------------------------------
 # 2. Parámetros definidos por el usuario
@@ -73,78 +82,95 @@ def preprocess_data(df):
     return products, periods, D, SST, EEX, Cap
 
 
-def build_goal_model(products, periods, D, SST, EEX, Cap):
+def build_goal_model(products, periods, D, SST, EEX, Cap, telemetry=None, c_prod=c_prod, c_hold=c_hold,
+                     alpha=None, cost_target=None):
     """
     Construye y resuelve el modelo de Goal Programming:
       - Variables de decisión de producción e inventario.
       - Variables de desviación para cobertura y costo.
       - Metas definidas por alpha y cost_target.
+    telemetry (RunTelemetry, opcional) registra tiempos de construcción y resolución.
+    c_prod, c_hold: costos por SKU (diccionarios o arreglos alineados con products).
+    alpha, cost_target: metas de la corrida; sin ellas se usan las del módulo
+    (pasarlas evita modificar variables globales desde otros hilos).
     Devuelve las desviaciones de cobertura y costo.
     """
-    model = ConcreteModel()
-
-    # Conjuntos y parámetros
-    model.P = Set(initialize=products)
-    model.T = Set(initialize=periods)
-    model.D = Param(model.P, model.T, initialize=D, mutable=True)
-    model.SST = Param(model.P, model.T, initialize=SST, mutable=True)
-    model.EEX = Param(model.P, model.T, initialize=EEX, mutable=True)
-    model.Cap = Param(model.T, initialize=Cap, mutable=True)
-
-    # Variables de decisión
-    model.x = Var(model.P, model.T, within=NonNegativeReals)
-    model.I = Var(model.P, model.T, within=NonNegativeReals)
-    model.dev_cov_neg = Var(within=NonNegativeReals)
-    model.dev_cov_pos = Var(within=NonNegativeReals)
-    model.dev_cost_neg = Var(within=NonNegativeReals)
-    model.dev_cost_pos = Var(within=NonNegativeReals)
-
-    # Restricción de inventario encadenado
-    def inv_balance(m, p, t):
-        ts = sorted(m.T)
-        idx = ts.index(t)
-        if idx == 0:
-            return m.x[p, t] == m.D[p, t] + m.I[p, t]
-        prev = ts[idx - 1]
-        return m.I[p, prev] + m.x[p, t] == m.D[p, t] + m.I[p, t]
-    model.InvBalance = Constraint(model.P, model.T, rule=inv_balance)
-
-    # Stock de seguridad
-    model.SafetyStock = Constraint(
-        model.P, model.T,
-        rule=lambda m, p, t: m.I[p, t] >= m.SST[p, t]
-    )
-
-    # Meta de cobertura
-    def goal_cov(m):
-        total_prod = sum(m.x[p, t] for p in m.P for t in m.T)
-        total_demand = sum(m.D[p, t] for p in m.P for t in m.T)
-        return total_prod + m.dev_cov_neg - m.dev_cov_pos == alpha * total_demand
-    model.GoalCov = Constraint(rule=goal_cov)
-
-    # Meta de costo
-    def goal_cost(m):
-        total_cost = sum(c_prod[p] * m.x[p, t] + c_hold[p] * m.I[p, t]
-                         for p in m.P for t in m.T)
-        return total_cost + m.dev_cost_neg - m.dev_cost_pos == cost_target
-    model.GoalCost = Constraint(rule=goal_cost)
-
-    # Capacidad productiva
-    model.Capacity = Constraint(
-        model.T,
-        rule=lambda m, t: sum(m.x[p, t] for p in m.P) <= m.Cap[t]
-    )
-
-    # Objetivo: minimizar desviaciones ponderadas
-    model.obj = Objective(
-        expr=w_cov * (model.dev_cov_neg + model.dev_cov_pos)
-             + w_cost * (model.dev_cost_neg + model.dev_cost_pos),
-        sense=minimize
-    )
+    stage = telemetry.stage if telemetry is not None else (lambda name: nullcontext())
+    costs = cost_vectors(products, c_prod, c_hold, [0.0] * len(products))
+    alpha = globals()['alpha'] if alpha is None else alpha
+    cost_target = globals()['cost_target'] if cost_target is None else cost_target
+
+    with stage('build_functional'):
+        model = ConcreteModel()
+
+        # Conjuntos y parámetros
+        model.P = Set(initialize=products)
+        model.T = Set(initialize=periods)
+        model.D = Param(model.P, model.T, initialize=D, mutable=True)
+        model.SST = Param(model.P, model.T, initialize=SST, mutable=True)
+        model.EEX = Param(model.P, model.T, initialize=EEX, mutable=True)
+        model.Cap = Param(model.T, initialize=Cap, mutable=True)
+
+        # Variables de decisión
+        model.x = Var(model.P, model.T, within=NonNegativeReals)
+        model.I = Var(model.P, model.T, within=NonNegativeReals)
+        model.dev_cov_neg = Var(within=NonNegativeReals)
+        model.dev_cov_pos = Var(within=NonNegativeReals)
+        model.dev_cost_neg = Var(within=NonNegativeReals)
+        model.dev_cost_pos = Var(within=NonNegativeReals)
+
+        # Restricción de inventario encadenado, en el orden de ``periods`` (las
+        # columnas del libro): ordenar textos 'MM-DD-YY' rompe el cambio de año
+        ts = list(periods)
+        prev = dict(zip(ts[1:], ts[:-1]))
+        def inv_balance(m, p, t):
+            if t not in prev:
+                return m.x[p, t] == m.D[p, t] + m.I[p, t]
+            return m.I[p, prev[t]] + m.x[p, t] == m.D[p, t] + m.I[p, t]
+        model.InvBalance = Constraint(model.P, model.T, rule=inv_balance)
+
+        # Stock de seguridad
+        model.SafetyStock = Constraint(
+            model.P, model.T,
+            rule=lambda m, p, t: m.I[p, t] >= m.SST[p, t]
+        )
+
+        # Meta de cobertura
+        def goal_cov(m):
+            total_prod = sum(m.x[p, t] for p in m.P for t in m.T)
+            total_demand = sum(m.D[p, t] for p in m.P for t in m.T)
+            return total_prod + m.dev_cov_neg - m.dev_cov_pos == alpha * total_demand
+        model.GoalCov = Constraint(rule=goal_cov)
+
+        # Meta de costo
+        def goal_cost(m):
+            n_t = len(periods)
+            total_cost = LinearExpression(
+                constant=0.0,
+                linear_coefs=costs.prod.repeat(n_t).tolist() + costs.hold.repeat(n_t).tolist(),
+                linear_vars=[m.x[p, t] for p in products for t in periods]
+                            + [m.I[p, t] for p in products for t in periods],
+            )
+            return total_cost + m.dev_cost_neg - m.dev_cost_pos == cost_target
+        model.GoalCost = Constraint(rule=goal_cost)
+
+        # Capacidad productiva
+        model.Capacity = Constraint(
+            model.T,
+            rule=lambda m, t: sum(m.x[p, t] for p in m.P) <= m.Cap[t]
+        )
+
+        # Objetivo: minimizar desviaciones ponderadas
+        model.obj = Objective(
+            expr=w_cov * (model.dev_cov_neg + model.dev_cov_pos)
+                 + w_cost * (model.dev_cost_neg + model.dev_cost_pos),
+            sense=minimize
+        )
 
     # Resolver el modelo
-    solver = SolverFactory('glpk')
-    result = solver.solve(model, tee=True)
+    with stage('glpk'):
+        solver = SolverFactory('glpk')
+        result = solver.solve(model, tee=True)
 
     desv_cov = (model.dev_cov_neg(), model.dev_cov_pos())
     desv_cost = (model.dev_cost_neg(), model.dev_cost_pos())
@@ -1,9 +1,24 @@
 # ----------------------------------------
 # 1. Importaciones de librerías
 # ----------------------------------------
+from contextlib import nullcontext
+
 import pandas as pd
 import pulp as lp
 
+# Import relativo dentro del paquete; absoluto al ejecutarlo desde utils/
+# (``python Suma_ponderada_funciones.py``, o desde Caras optimas.py y UnicidadSPF.py).
+try:
+    from .costs import cost_vectors
+    from .skeleton import SKELETONS, WEIGHTED
+    from .solution import extract
+    from .solver import solve
+except ImportError:
+    from costs import cost_vectors
+    from skeleton import SKELETONS, WEIGHTED
+    from solution import extract
+    from solver import solve
+
 # ----------------------------------------
 # 2. Parámetros definidos por el usuario
 # ----------------------------------------
@@ -69,55 +84,36 @@ def preprocess_data(df_sd, df_bc):
     return products, periods, D, SST, EEX, Cap
 
 
-def build_weighted_model(products, periods, D, SST, EEX, Cap, alpha, w_c, w_s, c_prod, c_hold, c_exc):
+def build_weighted_model(products, periods, D, SST, EEX, Cap, alpha, w_c, w_s, c_prod, c_hold, c_exc, telemetry=None,
+                         budget=None):
     """
     Construye y resuelve el modelo de suma ponderada:
     Objetivo: w_c * costo_total + w_s * shortfall.
+    c_prod, c_hold y c_exc pueden ser diccionarios por SKU o arreglos alineados con products.
+    telemetry (RunTelemetry, opcional) registra tiempos de construcción y resolución.
+    budget (SolveBudget, opcional) limita la resolución (tiempo, gap, nodos).
     Devuelve:
         objective_value (float), shortfall (float), production_plan (dict)
     """
-    model = lp.LpProblem('Weighted_Sum', lp.LpMinimize)
-
-    # Variables de decisión
-    x = lp.LpVariable.dicts('x', (products, periods), lowBound=0, cat='Integer')
-    I = lp.LpVariable.dicts('I', (products, periods), lowBound=0, cat='Integer')
-    s = lp.LpVariable('shortfall', lowBound=0)
-
-    # Término de costo total
-    cost_term = lp.lpSum(c_prod[p]*x[p][t] + c_hold[p]*I[p][t] + c_exc[p]*EEX[(p,t)]
-                         for p in products for t in periods)
-
-    # Función objetivo
-    model += w_c * cost_term + w_s * s
-
-    # Restricción de shortfall
-    model += s >= alpha * lp.lpSum(D[(p,t)] for p in products for t in periods) - \
-              lp.lpSum(x[p][t] for p in products for t in periods)
-
-    # Balance de inventario
-    for p in products:
-        for i, t in enumerate(periods):
-            if i == 0:
-                model += x[p][t] == D[(p,t)] + I[p][t]
-            else:
-                prev = periods[i-1]
-                model += I[p][prev] + x[p][t] == D[(p,t)] + I[p][t]
-
-    # Stock de seguridad
-    for p in products:
-        for t in periods:
-            model += I[p][t] >= SST[(p,t)]
-
-    # Capacidad productiva
-    for t in periods:
-        model += lp.lpSum(x[p][t] for p in products) <= Cap[t]
-
-    # Resolver
-    model.solve(lp.PULP_CBC_CMD(msg=False))
-
-    obj_val = lp.value(model.objective)
-    shortfall_val = s.value()
-    production_plan = {(p,t): x[p][t].value() for p in products for t in periods if x[p][t].value() > 1e-6}
+    stage = telemetry.stage if telemetry is not None else (lambda name: nullcontext())
+    costs = cost_vectors(products, c_prod, c_hold, c_exc)
+
+    # Esqueleto de la caché para la forma (products, periods): solo se reasignan los datos
+    with stage('build_weighted'):
+        sk = SKELETONS.acquire(products, periods, WEIGHTED, integer=True)
+        sk.bind(D, SST, EEX, Cap, costs, alpha=alpha, wc=w_c, ws=w_s)
+
+    try:
+        # Resolver
+        solve(sk.model, 'weighted_mip', telemetry, budget=budget)
+
+        obj_val = lp.value(sk.model.objective)
+        # Vector primal en bloque
+        solution = extract(sk)
+        shortfall_val = solution.shortfall
+        production_plan = solution.plan_dict(1e-6)
+    finally:
+        SKELETONS.release(sk)
 
     return obj_val, shortfall_val, production_plan
 
@@ -0,0 +1,186 @@
+"""
+admission.py
+============
+
+Control de admisión de las peticiones que resuelven modelos.
+
+Las vistas asíncronas no resuelven en el bucle de eventos: entregan el
+trabajo (lectura del libro, resolución y serialización) a ``Admission``, un
+pool de hilos acotado:
+
+* ``concurrency`` trabajos a la vez (por defecto, un núcleo cada uno: CBC y
+  los pools de procesos reparten esos núcleos con ``cores.SCHEDULER``);
+* hasta ``queue_depth`` trabajos más esperando turno.
+
+Con la cola llena la petición se rechaza en el acto (``Saturated`` con
+estado 429) y, si espera turno más de ``max_wait`` segundos, se abandona
+antes de empezar (503).  En ambos casos ``retry_after`` estima cuándo habrá
+sitio a partir de la duración media de los trabajos recientes.
+
+Métricas: trabajos en curso y en cola, utilización (en curso /
+concurrencia), tiempo de espera acumulado y rechazos por motivo.
+"""
+
+# ---------------------------------------------------------------------------
+# 1. IMPORTACIONES
+# ---------------------------------------------------------------------------
+import asyncio
+import math
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Optional
+
+from .cores import available_cores
+from .telemetry import METRICS
+
+
+# ---------------------------------------------------------------------------
+# 2. PARÁMETROS
+# ---------------------------------------------------------------------------
+QUEUE_FACTOR: int = 2        # trabajos en cola por cada trabajo en curso (por defecto)
+MAX_WAIT: float = 60.0       # segundos de espera en cola antes de abandonar (503)
+EWMA: float = 0.2            # peso del último trabajo en la duración media
+
+QUEUE_FULL, QUEUE_TIMEOUT = "queue_full", "queue_timeout"
+
+METRICS.describe("optimization_executor_running", "Trabajos de optimización en curso.")
+METRICS.describe("optimization_executor_queued", "Trabajos de optimización esperando turno.")
+METRICS.describe("optimization_executor_utilization", "Trabajos en curso / concurrencia máxima.")
+METRICS.describe("optimization_queue_wait_seconds_total", "Tiempo acumulado en cola antes de empezar.")
+METRICS.describe("optimization_queue_admitted_total", "Trabajos que salieron de la cola y empezaron.")
+METRICS.describe("optimization_requests_rejected_total", "Peticiones rechazadas por saturación, por motivo.")
+
+
+class Saturated(Exception):
+    """No hay sitio para la petición; ``status`` HTTP y ``retry_after`` en segundos."""
+
+    def __init__(self, reason: str, retry_after: int):
+        self.reason = reason
+        self.status = 429 if reason == QUEUE_FULL else 503
+        self.retry_after = retry_after
+        super().__init__("Optimization queue is full" if reason == QUEUE_FULL
+                         else "Timed out waiting for a free optimization slot")
+
+
+class _Ticket:
+    __slots__ = ("submitted", "started", "abandoned")
+
+    def __init__(self) -> None:
+        self.submitted = time.perf_counter()
+        self.started = False
+        self.abandoned = False
+
+
+# ---------------------------------------------------------------------------
+# 3. EJECUTOR ACOTADO
+# ---------------------------------------------------------------------------
+
+class Admission:
+    """Pool de hilos con concurrencia y cola acotadas."""
+
+    def __init__(self, concurrency: Optional[int] = None, queue_depth: Optional[int] = None,
+                 max_wait: Optional[float] = MAX_WAIT):
+        self.concurrency = max(1, concurrency or available_cores())
+        self.queue_depth = max(0, QUEUE_FACTOR * self.concurrency if queue_depth is None else queue_depth)
+        self.max_wait = max_wait
+        self._pool = ThreadPoolExecutor(max_workers=self.concurrency, thread_name_prefix="optimize")
+        self._lock = threading.Lock()
+        self.running = 0
+        self.queued = 0
+        self.mean_seconds = 0.0
+
+    def _publish(self) -> None:
+        METRICS.set("optimization_executor_running", self.running)
+        METRICS.set("optimization_executor_queued", self.queued)
+        METRICS.set("optimization_executor_utilization", self.running / self.concurrency)
+
+    def retry_after(self) -> int:
+        """Segundos estimados hasta que se libere sitio (al menos 1)."""
+        with self._lock:
+            waves = (self.queued + 1) / self.concurrency
+            return max(1, math.ceil(self.mean_seconds * waves))
+
+    def _reject(self, reason: str) -> Saturated:
+        METRICS.inc("optimization_requests_rejected_total", 1, {"reason": reason})
+        return Saturated(reason, self.retry_after())
+
+    def _admit(self) -> _Ticket:
+        with self._lock:
+            if self.running + self.queued >= self.concurrency + self.queue_depth:
+                full = True
+            else:
+                full = False
+                self.queued += 1
+                self._publish()
+        if full:
+            raise self._reject(QUEUE_FULL)
+        return _Ticket()
+
+    def _abandon(self, ticket: _Ticket) -> bool:
+        """Saca de la cola un trabajo que aún no empezó; ``False`` si ya empezó."""
+        with self._lock:
+            if ticket.started:
+                return False
+            if ticket.abandoned:
+                return True
+            ticket.abandoned = True
+            self.queued -= 1
+            self._publish()
+            return True
+
+    def _work(self, ticket: _Ticket, loop, started: asyncio.Future, fn: Callable, args: tuple):
+        with self._lock:
+            if ticket.abandoned:
+                return None
+            ticket.started = True
+            self.queued -= 1
+            self.running += 1
+            self._publish()
+        METRICS.inc("optimization_queue_wait_seconds_total", time.perf_counter() - ticket.submitted)
+        METRICS.inc("optimization_queue_admitted_total")
+        try:
+            loop.call_soon_threadsafe(lambda: started.done() or started.set_result(None))
+        except RuntimeError:
+            pass    # el bucle de la petición ya se cerró (cliente desconectado)
+        t0 = time.perf_counter()
+        try:
+            return fn(*args)
+        finally:
+            seconds = time.perf_counter() - t0
+            with self._lock:
+                self.running -= 1
+                self.mean_seconds = seconds if not self.mean_seconds else (
+                    (1 - EWMA) * self.mean_seconds + EWMA * seconds)
+                self._publish()
+
+    def submit(self, fn: Callable, *args) -> "asyncio.Future":
+        """
+        Encola ``fn(*args)`` y devuelve la tarea de asyncio con su resultado.
+
+        Lanza ``Saturated`` (429) en el acto si la cola está llena; la tarea
+        termina con ``Saturated`` (503) si el trabajo no empieza en
+        ``max_wait`` segundos.  Si la tarea se cancela (cliente desconectado)
+        mientras espera, el trabajo no llega a ejecutarse.
+        """
+        ticket = self._admit()
+        task = asyncio.ensure_future(self._run(ticket, fn, args))
+        task.add_done_callback(lambda t: t.cancelled() and self._abandon(ticket))
+        return task
+
+    async def run(self, fn: Callable, *args):
+        """``submit`` y espera el resultado."""
+        return await self.submit(fn, *args)
+
+    async def _run(self, ticket: _Ticket, fn: Callable, args: tuple):
+        loop = asyncio.get_running_loop()
+        started = loop.create_future()
+        future = asyncio.wrap_future(self._pool.submit(self._work, ticket, loop, started, fn, args))
+        if self.max_wait is not None:
+            try:
+                await asyncio.wait_for(asyncio.shield(started), self.max_wait)
+            except asyncio.TimeoutError:
+                if self._abandon(ticket):
+                    raise self._reject(QUEUE_TIMEOUT)
+        # Si el cliente se va, un trabajo ya en marcha termina igualmente en su hilo
+        return await asyncio.shield(future)
@@ -0,0 +1,261 @@
+"""
+charts.py
+=========
+
+Gráficas del servidor sin ventana (backend Agg) y su caché en disco.
+
+Las figuras se construyen con la API orientada a objetos de matplotlib
+(``Figure`` + ``FigureCanvasAgg``): no pasan por ``pyplot`` ni por el
+backend global, así que se pueden dibujar en hilos sin bloquear ni abrir
+ventanas.  Tipos de gráfica (``KINDS``):
+
+* ``pareto``: frontera coste vs nivel de servicio de ``optimize_from_excel``;
+* ``comparison``: tabla de ``comparison.compare_models``;
+* ``face``: proyección 2‑D de puntos de una cara óptima (scripts de análisis).
+
+``ChartService`` dibuja en segundo plano: ``submit`` devuelve de inmediato y
+la imagen queda en ``<raíz>/<run_id>/<tipo>-<parámetros>.<formato>``, de modo
+que la misma gráfica con los mismos parámetros se dibuja una sola vez.  Se
+conservan las ``max_runs`` ejecuciones más recientes.
+"""
+
+# ---------------------------------------------------------------------------
+# 1. IMPORTACIONES
+# ---------------------------------------------------------------------------
+import hashlib
+import io
+import os
+import re
+import shutil
+import tempfile
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Callable, Dict, List, NamedTuple, Optional
+
+import pandas as pd
+from matplotlib.backends.backend_agg import FigureCanvasAgg
+from matplotlib.figure import Figure
+
+
+# ---------------------------------------------------------------------------
+# 2. PARÁMETROS
+# ---------------------------------------------------------------------------
+MAX_RUNS: int = 100          # ejecuciones con gráficas que se conservan en disco
+MAX_ERRORS: int = 1000       # errores de dibujo que se conservan en memoria (los más recientes)
+MAX_DPI: int = 300
+MAX_INCHES: float = 20.0
+
+FORMATS = {"png": "image/png", "svg": "image/svg+xml"}
+
+PARETO = "pareto"
+COMPARISON = "comparison"
+FACE = "face"
+KINDS = (PARETO, COMPARISON, FACE)
+
+# Estados de una gráfica en ``ChartService.status``
+READY, PENDING, FAILED, MISSING = "ready", "pending", "failed", "missing"
+
+_RUN_ID = re.compile(r"[0-9a-f]{32}")    # mismo formato que ``plan_store``
+
+
+class ChartParams(NamedTuple):
+    fmt: str = "png"
+    dpi: int = 100
+    width: float = 6.4           # pulgadas
+    height: float = 4.8
+
+    @property
+    def content_type(self) -> str:
+        return FORMATS[self.fmt]
+
+    @property
+    def digest(self) -> str:
+        """Huella corta de los parámetros (parte del nombre del fichero en caché)."""
+        return hashlib.sha1(repr(tuple(self)).encode()).hexdigest()[:12]
+
+
+def parse_params(fmt: str = "png", dpi=None, width=None, height=None) -> ChartParams:
+    """Valida formato, resolución y tamaño (ValueError si no son válidos)."""
+    default = ChartParams()
+    fmt = (fmt or default.fmt).lower()
+    if fmt not in FORMATS:
+        raise ValueError(f"Formato de gráfica desconocido '{fmt}' (válidos: {', '.join(FORMATS)})")
+    dpi = default.dpi if dpi in (None, "") else int(dpi)
+    width = default.width if width in (None, "") else float(width)
+    height = default.height if height in (None, "") else float(height)
+    if not 10 <= dpi <= MAX_DPI:
+        raise ValueError(f"dpi debe estar entre 10 y {MAX_DPI}")
+    if not (0 < width <= MAX_INCHES and 0 < height <= MAX_INCHES):
+        raise ValueError(f"width y height deben estar entre 0 y {MAX_INCHES} pulgadas")
+    return ChartParams(fmt, dpi, width, height)
+
+
+# ---------------------------------------------------------------------------
+# 3. FIGURAS
+# ---------------------------------------------------------------------------
+
+def _figure(params: ChartParams) -> Figure:
+    fig = Figure(figsize=(params.width, params.height), dpi=params.dpi)
+    FigureCanvasAgg(fig)
+    return fig
+
+
+def pareto_figure(pareto_df: pd.DataFrame, params: ChartParams = ChartParams()) -> Figure:
+    """Frontera de Pareto: puntos weighted‑sum y el punto lexicográfico."""
+    fig = _figure(params)
+    ax = fig.add_subplot()
+    ax.scatter(pareto_df["service"], pareto_df["cost"], label="Weighted‑sum")
+    row_lex = pareto_df[pareto_df["model"] == "lex"]
+    ax.scatter(row_lex["service"], row_lex["cost"], marker="x", s=100, label="Lexicográfico")
+    ax.set_xlabel("Service Level")
+    ax.set_ylabel("Coste total")
+    ax.set_title("Frontera de Pareto – Coste vs Service Level")
+    ax.legend()
+    ax.grid(True)
+    return fig
+
+
+def comparison_figure(table: pd.DataFrame, params: ChartParams = ChartParams()) -> Figure:
+    """Coste vs nivel de servicio de cada modelo comparado (sin los que fallaron)."""
+    fig = _figure(params)
+    ax = fig.add_subplot()
+    df = table.dropna(subset=["total_cost", "service_level"])
+    ax.scatter(df["service_level"], df["total_cost"])
+    for _, r in df.iterrows():
+        ax.annotate(r["model_name"], (r["service_level"], r["total_cost"]))
+    ax.set_xlabel("Nivel de servicio")
+    ax.set_ylabel("Coste total")
+    ax.set_title("Coste vs. Nivel de servicio")
+    fig.tight_layout()
+    return fig
+
+
+def face_figure(points: List[dict], vx: str, vy: str, title: str,
+                params: ChartParams = ChartParams()) -> Optional[Figure]:
+    """Proyección ``(vx, vy)`` de puntos de la cara óptima; ``None`` si la cara es degenerada."""
+    df = pd.DataFrame([{"vx": p.get(vx, 0), "vy": p.get(vy, 0)} for p in points])
+    if df.empty or (df["vx"].nunique() <= 1 and df["vy"].nunique() <= 1):
+        return None
+    fig = _figure(params)
+    ax = fig.add_subplot()
+    ax.scatter(df["vx"], df["vy"])
+    ax.set_xlabel(vx)
+    ax.set_ylabel(vy)
+    ax.set_title(title)
+    ax.grid(True)
+    return fig
+
+
+RENDERERS: Dict[str, Callable[..., Optional[Figure]]] = {
+    PARETO: pareto_figure,
+    COMPARISON: comparison_figure,
+    FACE: face_figure,
+}
+
+
+def render(fig: Figure, params: ChartParams = ChartParams()) -> bytes:
+    """Imagen de ``fig`` en el formato de ``params``."""
+    buf = io.BytesIO()
+    fig.savefig(buf, format=params.fmt, dpi=params.dpi)
+    return buf.getvalue()
+
+
+def save(fig: Figure, path: str) -> str:
+    """Guarda ``fig`` en ``path`` (formato según la extensión) y devuelve la ruta."""
+    fig.savefig(path)
+    return path
+
+
+# ---------------------------------------------------------------------------
+# 4. SERVICIO EN SEGUNDO PLANO
+# ---------------------------------------------------------------------------
+
+class ChartService:
+    """Dibuja gráficas en un hilo aparte y las guarda por ``run_id`` y parámetros."""
+
+    def __init__(self, root: str, max_runs: int = MAX_RUNS, max_workers: int = 1):
+        self.root = str(root)
+        self.max_runs = max_runs
+        self._pool = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="charts")
+        self._lock = threading.Lock()
+        self._pending: Dict[str, Future] = {}
+        self._errors: Dict[str, str] = {}
+
+    def path(self, run_id: str, kind: str, params: ChartParams) -> str:
+        """Ruta en caché; ``KeyError`` si ``run_id`` o ``kind`` no son válidos."""
+        if not _RUN_ID.fullmatch(run_id) or kind not in KINDS:
+            raise KeyError(run_id if kind in KINDS else kind)
+        return os.path.join(self.root, run_id, f"{kind}-{params.digest}.{params.fmt}")
+
+    def status(self, run_id: str, kind: str, params: ChartParams) -> tuple:
+        """(estado, ruta o mensaje de error) de una gráfica."""
+        path = self.path(run_id, kind, params)
+        if os.path.isfile(path):
+            return READY, path
+        with self._lock:
+            if path in self._pending:
+                return PENDING, path
+            if path in self._errors:
+                return FAILED, self._errors[path]
+        return MISSING, path
+
+    def submit(self, run_id: str, kind: str, data, params: ChartParams = ChartParams(), **kwargs) -> str:
+        """
+        Encola el dibujo de ``RENDERERS[kind](data, **kwargs)`` y devuelve su
+        ruta sin esperar.  No hace nada si ya está en disco o en cola.
+        """
+        path = self.path(run_id, kind, params)
+        with self._lock:
+            if path in self._pending or os.path.isfile(path):
+                return path
+            self._errors.pop(path, None)
+            self._pending[path] = self._pool.submit(self._draw, path, kind, data, params, kwargs)
+        return path
+
+    def wait(self, path: str, timeout: Optional[float] = None) -> None:
+        """Espera a que termine el dibujo de ``path`` (si está en cola)."""
+        with self._lock:
+            future = self._pending.get(path)
+        if future is not None:
+            future.result(timeout)
+
+    def _draw(self, path: str, kind: str, data, params: ChartParams, kwargs: dict) -> None:
+        try:
+            fig = RENDERERS[kind](data, **kwargs, params=params)
+            if fig is None:
+                raise ValueError("No hay nada que graficar (datos vacíos o degenerados)")
+            directory = os.path.dirname(path)
+            os.makedirs(directory, exist_ok=True)
+            fd, tmp = tempfile.mkstemp(prefix=".tmp-", suffix=f".{params.fmt}", dir=directory)
+            try:
+                with os.fdopen(fd, "wb") as fh:
+                    fh.write(render(fig, params))
+                os.replace(tmp, path)
+            except BaseException:
+                os.unlink(tmp)
+                raise
+            self.prune()
+        except Exception as e:
+            with self._lock:
+                self._errors[path] = f"{type(e).__name__}: {e}"
+                # Un dibujo fallido puede no crear el directorio de su ejecución
+                # (``prune`` no lo vería): se descartan los errores más antiguos
+                while len(self._errors) > MAX_ERRORS:
+                    del self._errors[next(iter(self._errors))]
+        finally:
+            with self._lock:
+                self._pending.pop(path, None)
+
+    def prune(self) -> None:
+        """
+        Elimina las gráficas de las ejecuciones más antiguas por encima de
+        ``max_runs`` y los errores de dibujo de esas ejecuciones.
+        """
+        runs = [e for e in os.scandir(self.root) if e.is_dir() and _RUN_ID.fullmatch(e.name)]
+        runs.sort(key=lambda e: e.stat().st_mtime, reverse=True)
+        pruned = {entry.path for entry in runs[self.max_runs:]}
+        for path in pruned:
+            shutil.rmtree(path, ignore_errors=True)
+        with self._lock:
+            for path in [p for p in self._errors if os.path.dirname(p) in pruned]:
+                del self._errors[path]
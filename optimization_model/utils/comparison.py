@@ -0,0 +1,176 @@
+"""
+comparison.py
+=============
+
+Comparación de las cuatro familias de modelos sobre unos mismos datos.
+
+Sustituye al script de ``Run_comparison``: en lugar de leer el libro al
+importar y modificar ``goal.alpha``/``goal.cost_target``, recibe un
+``PlanningProblem`` ya preprocesado y unos ``ComparisonParams`` y no toca
+ningún estado global, de modo que varias peticiones pueden comparar a la vez.
+
+Los modelos se lanzan en hilos (CBC y GLPK corren como procesos aparte):
+
+* lexicográfico y weighted‑sum empiezan a la vez;
+* goal programming y restricción funcional esperan al coste ``f★`` del
+  lexicográfico (su meta de coste es ``cost_factor · f★``).  Pyomo comparte
+  el gestor de ficheros temporales entre hilos, así que estos dos se
+  resuelven uno tras otro (en paralelo con los modelos de CBC).
+
+Goal programming y restricción funcional (``Simplex_*``) usan pyomo y el
+ejecutable ``glpsol`` de GLPK, dependencias opcionales que no están en
+``requirements.txt``: se importan solo al usarse y, si GLPK no está
+disponible, sus filas se marcan como omitidas (``status = "skipped"``) sin
+intentar resolverlas.
+
+El resultado es una tabla homogénea (``METRIC_COLUMNS``) con una fila por
+modelo, su tiempo de pared, su ``status`` (``ok``, ``failed`` o
+``skipped``) y el motivo si no se resolvió (las métricas de esa fila quedan
+vacías y el resto de la tabla se conserva).
+"""
+
+# ---------------------------------------------------------------------------
+# 1. IMPORTACIONES
+# ---------------------------------------------------------------------------
+import importlib
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache, partial
+from typing import Callable, NamedTuple, Optional
+
+import pandas as pd
+
+from . import Bus_lex as lex
+from . import Suma_ponderada_funciones as wsum
+from .problem import PlanningProblem
+from .solver import SolveBudget
+from .telemetry import RunTelemetry
+
+
+# ---------------------------------------------------------------------------
+# 2. PARÁMETROS
+# ---------------------------------------------------------------------------
+LEX = "lexicográfico"
+GOAL = "goal-programming"
+FUNCTIONAL = "funcional"
+WEIGHTED = "weighted-sum"
+MODELS = (LEX, GOAL, FUNCTIONAL, WEIGHTED)
+
+METRIC_COLUMNS = ["model_name", "total_cost", "service_level", "shortfall_units",
+                  "backorder_units", "seconds", "status", "error"]
+OK, FAILED, SKIPPED = "ok", "failed", "skipped"
+
+# Módulo pyomo/GLPK de cada modelo por metas (se importa al usarse)
+GOAL_MODULES = {GOAL: "Simplex_Goal_programming", FUNCTIONAL: "Simplex_Restriccion_Funcional"}
+
+# Pyomo no es seguro entre hilos (ficheros temporales compartidos)
+_PYOMO_LOCK = threading.Lock()
+
+
+class ComparisonParams(NamedTuple):
+    alpha: float = 0.95          # cobertura mínima: 0.90–0.99
+    w_c: float = 1.0             # peso del costo en weighted‑sum
+    w_s: float = 10.0            # peso del shortfall en weighted‑sum: 5.0–20.0
+    cost_factor: float = 1.05    # meta de coste de goal/funcional = factor · f★: 1.05–1.15
+
+
+# ---------------------------------------------------------------------------
+# 3. MODELOS
+# ---------------------------------------------------------------------------
+
+def _row(name: str, total_cost, service_level, shortfall) -> dict:
+    return {"model_name": name, "total_cost": total_cost, "service_level": service_level,
+            "shortfall_units": shortfall, "backorder_units": 0.0}
+
+
+def _run_lex(problem: PlanningProblem, dicts: tuple, params: ComparisonParams, telemetry, budget) -> dict:
+    D, SST, EEX, Cap = dicts
+    f1_star, shortfall, plan = lex.build_lex_model(
+        problem.products, problem.periods, D, SST, EEX, Cap, params.alpha, *problem.costs,
+        telemetry=telemetry, budget=budget)
+    return _row(LEX, f1_star, sum(plan.values()) / float(problem.demand.sum()), shortfall)
+
+
+def _run_weighted(problem: PlanningProblem, dicts: tuple, params: ComparisonParams, telemetry, budget) -> dict:
+    D, SST, EEX, Cap = dicts
+    obj_val, shortfall, plan = wsum.build_weighted_model(
+        problem.products, problem.periods, D, SST, EEX, Cap, params.alpha, params.w_c, params.w_s,
+        *problem.costs, telemetry=telemetry, budget=budget)
+    return _row(WEIGHTED, obj_val, sum(plan.values()) / float(problem.demand.sum()), shortfall)
+
+
+@lru_cache(maxsize=1)
+def glpk_available() -> bool:
+    """pyomo importable y ``glpsol`` en el PATH (se comprueba una vez por proceso)."""
+    try:
+        from pyomo.environ import SolverFactory
+    except ImportError:
+        return False
+    return bool(SolverFactory("glpk").available(exception_flag=False))
+
+
+def _run_goal(name: str, problem: PlanningProblem, dicts: tuple, params: ComparisonParams,
+              f1_star: float, telemetry) -> dict:
+    """Goal programming (o su variante funcional) con meta de coste ``cost_factor · f★``."""
+    D, SST, EEX, Cap = dicts
+    cost_target = f1_star * params.cost_factor
+    module = importlib.import_module(f"{__package__}.{GOAL_MODULES[name]}")
+    with _PYOMO_LOCK:
+        dev_cov, dev_cost = module.build_goal_model(
+            problem.products, problem.periods, D, SST, EEX, Cap, telemetry=telemetry,
+            c_prod=problem.costs.prod, c_hold=problem.costs.hold,
+            alpha=params.alpha, cost_target=cost_target)
+    total_demand = float(problem.demand.sum())
+    shortfall = dev_cov[1]
+    return _row(name, cost_target - dev_cost[0] + dev_cost[1],
+                (params.alpha * total_demand - shortfall) / total_demand, shortfall)
+
+
+def _failed(name: str, error: str, seconds: float = 0.0, status: str = FAILED) -> dict:
+    return {**_row(name, None, None, None), "backorder_units": None, "seconds": seconds,
+            "status": status, "error": error}
+
+
+def _timed(name: str, run: Callable[[], dict]) -> dict:
+    """Ejecuta ``run`` y añade su tiempo de pared; si falla, fila vacía con el error."""
+    t0 = time.perf_counter()
+    try:
+        row = {**run(), "status": OK, "error": None}
+    except Exception as e:
+        return _failed(name, f"{type(e).__name__}: {e}", time.perf_counter() - t0)
+    row["seconds"] = time.perf_counter() - t0
+    return row
+
+
+def compare_models(problem: PlanningProblem, params: ComparisonParams = ComparisonParams(),
+                   telemetry: Optional[RunTelemetry] = None,
+                   budget: Optional[SolveBudget] = None) -> pd.DataFrame:
+    """
+    Resuelve las cuatro familias sobre ``problem`` y devuelve la tabla de
+    métricas en el orden de ``MODELS``.  Sin GLPK, goal programming y
+    restricción funcional se omiten (``status = "skipped"``).
+
+    ``budget`` limita las resoluciones de CBC (lexicográfico y weighted‑sum).
+    """
+    dicts = problem.as_dicts()
+    with ThreadPoolExecutor(max_workers=3) as pool:
+        lex_future = pool.submit(_timed, LEX, partial(_run_lex, problem, dicts, params, telemetry, budget))
+        weighted_future = pool.submit(_timed, WEIGHTED,
+                                      partial(_run_weighted, problem, dicts, params, telemetry, budget))
+        rows = {LEX: lex_future.result()}
+
+        f1_star = rows[LEX]["total_cost"]
+        goal_futures = {}
+        for name in GOAL_MODULES:
+            if not glpk_available():
+                rows[name] = _failed(name, "pyomo/GLPK no está instalado", status=SKIPPED)
+            elif f1_star is None:
+                rows[name] = _failed(name, "Sin coste del modelo lexicográfico no hay meta de coste")
+            else:
+                goal_futures[name] = pool.submit(
+                    _timed, name, partial(_run_goal, name, problem, dicts, params, f1_star, telemetry))
+        rows.update({name: f.result() for name, f in goal_futures.items()})
+        rows[WEIGHTED] = weighted_future.result()
+
+    return pd.DataFrame([rows[name] for name in MODELS], columns=METRIC_COLUMNS)
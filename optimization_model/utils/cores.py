@@ -0,0 +1,107 @@
+"""
+cores.py
+========
+
+Reparto de núcleos entre las resoluciones de CBC del proceso.
+
+CBC solo aprovecha varios hilos en la ramificación de un MIP; un LP usa uno.
+``CoreScheduler`` lleva la cuenta de los núcleos en uso en el proceso y
+concede a cada resolución o pool lo que queda libre:
+
+* un MIP pide todos los núcleos libres (hasta ``MAX_MIP_THREADS``) y se
+  resuelve con ``threads`` de CBC;
+* un LP pide un núcleo;
+* un pool de procesos (escenarios, barrido de ``α``, recurso estocástico)
+  pide un núcleo por worker y cada worker resuelve con un solo hilo.
+
+Nunca se bloquea: si no queda nada libre se concede un núcleo, de modo que
+varias peticiones a la vez comparten la máquina en lugar de multiplicar
+hilos.  En los procesos del pool ``SCHEDULER`` se reinicia con los núcleos
+que el padre asignó a cada worker.
+"""
+
+# ---------------------------------------------------------------------------
+# 1. IMPORTACIONES
+# ---------------------------------------------------------------------------
+import os
+import threading
+from contextlib import contextmanager
+from typing import Iterator, Optional
+
+# Absoluto cuando lo importa ``solver`` en los scripts ejecutados desde utils/.
+try:
+    from .telemetry import METRICS
+except ImportError:
+    from telemetry import METRICS
+
+
+# ---------------------------------------------------------------------------
+# 2. PARÁMETROS
+# ---------------------------------------------------------------------------
+MAX_MIP_THREADS: int = 8     # más hilos apenas acortan la ramificación de CBC
+
+METRICS.describe("optimization_cores_in_use", "Núcleos asignados a resoluciones y pools en curso.")
+
+
+def available_cores() -> int:
+    """Núcleos que puede usar el proceso (afinidad de CPU si el sistema la expone)."""
+    try:
+        return max(1, len(os.sched_getaffinity(0)))
+    except AttributeError:
+        return max(1, os.cpu_count() or 1)
+
+
+# ---------------------------------------------------------------------------
+# 3. PLANIFICADOR
+# ---------------------------------------------------------------------------
+
+class CoreScheduler:
+    """Núcleos del proceso y cuántos están asignados."""
+
+    def __init__(self, cores: Optional[int] = None):
+        self._lock = threading.Lock()
+        self.cores = cores or available_cores()
+        self.in_use = 0
+
+    def reset(self, cores: int) -> None:
+        """Reinicia el planificador con ``cores`` núcleos (en cada proceso del pool)."""
+        with self._lock:
+            self.cores, self.in_use = max(1, cores), 0
+
+    def acquire(self, want: int) -> int:
+        """Concede hasta ``want`` núcleos de los libres (al menos uno) y los marca en uso."""
+        with self._lock:
+            granted = max(1, min(want, self.cores - self.in_use))
+            self.in_use += granted
+            in_use = self.in_use
+        METRICS.set("optimization_cores_in_use", in_use)
+        return granted
+
+    def release(self, granted: int) -> None:
+        with self._lock:
+            self.in_use = max(0, self.in_use - granted)
+            in_use = self.in_use
+        METRICS.set("optimization_cores_in_use", in_use)
+
+    @contextmanager
+    def lease(self, want: int) -> Iterator[int]:
+        """``acquire``/``release`` alrededor del bloque ``with``; devuelve lo concedido."""
+        granted = self.acquire(want)
+        try:
+            yield granted
+        finally:
+            self.release(granted)
+
+    def solve_threads(self, mip: bool) -> int:
+        """Hilos que pediría una resolución: los libres para un MIP, uno para un LP."""
+        if not mip:
+            return 1
+        with self._lock:
+            return max(1, min(MAX_MIP_THREADS, self.cores - self.in_use))
+
+    def pool_workers(self, tasks: int, max_workers: Optional[int] = None) -> int:
+        """Workers que pediría un pool de ``tasks`` tareas de un hilo cada una."""
+        return max(1, min(max_workers or self.cores, self.cores, tasks))
+
+
+SCHEDULER = CoreScheduler()
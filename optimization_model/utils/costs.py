@@ -0,0 +1,170 @@
+"""
+costs.py
+========
+
+Datos maestros de costos por SKU.
+
+Los costos unitarios (producción, inventario y exceso sobre SST) pueden venir
+de una hoja opcional ``Costs`` del libro de entrada o de una tabla subida
+aparte (CSV/Excel) con las columnas::
+
+    Product ID | Production Cost | Holding Cost | Excess Cost
+
+Lo que falte se completa con los diccionarios por defecto de cada módulo
+(``Bus_lex.c_prod``, ...).  La tabla se valida una sola vez y se guarda como
+arreglos NumPy alineados con el orden de ``products``; así los modelos arman
+el término de costo directamente a partir de los coeficientes, sin búsquedas
+en diccionarios por cada término.
+"""
+
+# ---------------------------------------------------------------------------
+# 1. IMPORTACIONES
+# ---------------------------------------------------------------------------
+from typing import Mapping, NamedTuple, Optional, Sequence, Tuple
+
+import numpy as np
+import pandas as pd
+import pulp as lp
+
+
+# ---------------------------------------------------------------------------
+# 2. PARÁMETROS
+# ---------------------------------------------------------------------------
+COST_SHEET: str = "Costs"
+
+# Columna canónica -> alias aceptados (sin distinguir mayúsculas)
+COLUMNS = {
+    "prod": ("production cost", "c_prod"),
+    "hold": ("holding cost", "c_hold"),
+    "exc": ("excess cost", "c_exc"),
+}
+
+
+# ---------------------------------------------------------------------------
+# 3. TABLA DE COSTOS
+# ---------------------------------------------------------------------------
+
+class CostTable(NamedTuple):
+    """Costos unitarios alineados con la lista de productos usada al cargarlos."""
+    prod: np.ndarray
+    hold: np.ndarray
+    exc: np.ndarray
+
+
+def _validate(products: Sequence, costs: CostTable) -> CostTable:
+    for name, values in zip(CostTable._fields, costs):
+        if len(values) != len(products):
+            raise ValueError(f"Costos '{name}': se esperaban {len(products)} valores, hay {len(values)}")
+        bad = [p for p, v in zip(products, values) if not np.isfinite(v) or v < 0]
+        if bad:
+            raise ValueError(f"Costos '{name}' inválidos (negativos o vacíos) para los SKU: {bad}")
+    return costs
+
+
+def cost_vectors(products: Sequence, c_prod, c_hold, c_exc) -> CostTable:
+    """
+    Normaliza los costos recibidos por los modelos a una ``CostTable``.
+
+    Acepta diccionarios SKU -> costo (se verifica que cubran todos los
+    productos) o arreglos ya alineados con ``products``.
+    """
+    vectors = []
+    for name, values in zip(CostTable._fields, (c_prod, c_hold, c_exc)):
+        if isinstance(values, Mapping):
+            missing = [p for p in products if p not in values]
+            if missing:
+                raise ValueError(f"Faltan costos '{name}' para los SKU: {missing}")
+            values = [values[p] for p in products]
+        vectors.append(np.asarray(values, dtype=float))
+    return _validate(products, CostTable(*vectors))
+
+
+def sku_key(p) -> str:
+    """Clave común de un SKU en el modelo y en las tablas leídas del libro."""
+    return str(p).strip()
+
+
+def _normalize_columns(df: pd.DataFrame) -> pd.DataFrame:
+    rename = {}
+    for col in df.columns:
+        key = str(col).strip().lower()
+        if key == "product id":
+            rename[col] = "Product ID"
+        for field, aliases in COLUMNS.items():
+            if key in aliases:
+                rename[col] = field
+    df = df.rename(columns=rename)
+    if "Product ID" not in df.columns:
+        raise ValueError("La tabla de costos debe tener la columna 'Product ID'")
+    df["Product ID"] = df["Product ID"].map(sku_key)
+    if df["Product ID"].duplicated().any():
+        dup = df.loc[df["Product ID"].duplicated(), "Product ID"].tolist()
+        raise ValueError(f"SKU repetidos en la tabla de costos: {dup}")
+    return df.set_index("Product ID")
+
+
+def read_cost_sheet(excel_file) -> Optional[pd.DataFrame]:
+    """Lee la hoja opcional ``Costs`` del libro de entrada (``None`` si no existe)."""
+    with pd.ExcelFile(excel_file) as xl:
+        if COST_SHEET not in xl.sheet_names:
+            return None
+        return xl.parse(COST_SHEET)
+
+
+def read_cost_table(upload) -> pd.DataFrame:
+    """Lee una tabla de costos subida como CSV o Excel (hoja ``Costs`` o la primera)."""
+    name = str(getattr(upload, "name", upload)).lower()
+    if name.endswith(".csv"):
+        return pd.read_csv(upload)
+    with pd.ExcelFile(upload) as xl:
+        sheet = COST_SHEET if COST_SHEET in xl.sheet_names else 0
+        return xl.parse(sheet)
+
+
+def load_costs(products: Sequence, table: Optional[pd.DataFrame],
+               defaults: Tuple[Mapping, Mapping, Mapping]) -> CostTable:
+    """
+    Combina ``table`` (si hay) con los costos por defecto y valida el resultado.
+    Parámetros:
+        products: Orden de SKUs del modelo.
+        table: Tabla de costos (hoja ``Costs`` o archivo subido) o ``None``.
+        defaults: (c_prod, c_hold, c_exc) usados para los SKU/columnas sin dato.
+    """
+    # La tabla llega con los SKU como texto: ambos lados se indexan por ``str(p)``
+    # para que un SKU numérico del modelo (1001) coincida con su fila ("1001")
+    keys = [sku_key(p) for p in products]
+    merged = [{sku_key(p): v for p, v in d.items()} for d in defaults]
+    if table is not None:
+        df = _normalize_columns(table)
+        for i, field in enumerate(CostTable._fields):
+            if field in df.columns:
+                merged[i].update(df[field].dropna().astype(float).to_dict())
+    return cost_vectors(keys, *merged)
+
+
+# ---------------------------------------------------------------------------
+# 4. TÉRMINO DE COSTO
+# ---------------------------------------------------------------------------
+
+def eex_matrix(EEX, products: Sequence, periods: Sequence) -> np.ndarray:
+    """Matriz SKU × periodo del exceso de inventario sobre SST (acepta dict o matriz)."""
+    if isinstance(EEX, np.ndarray):
+        return EEX
+    return np.array([[EEX[(p, t)] for t in periods] for p in products], dtype=float)
+
+
+def cost_expression(costs: CostTable, x, I, EEX, products: Sequence,
+                    periods: Sequence) -> lp.LpAffineExpression:
+    """
+    Costo total ``Σ c_prod·x + c_hold·I + c_exc·EEX`` construido de una vez.
+
+    ``x`` e ``I`` son los diccionarios de ``LpVariable.dicts``; ``EEX`` puede
+    ser el diccionario de ``preprocess_data`` o la matriz SKU × periodo.  El
+    término constante de exceso se calcula con NumPy.
+    """
+    n_t = len(periods)
+    x_vars = [x[p][t] for p in products for t in periods]
+    i_vars = [I[p][t] for p in products for t in periods]
+    coefs = np.concatenate([np.repeat(costs.prod, n_t), np.repeat(costs.hold, n_t)])
+    constant = float(costs.exc @ eex_matrix(EEX, products, periods).sum(axis=1))
+    return lp.LpAffineExpression(zip(x_vars + i_vars, coefs.tolist()), constant=constant)
@@ -0,0 +1,204 @@
+"""
+encoding.py
+===========
+
+Codificaciones de la respuesta de optimización para planes grandes.
+
+* ``default``: la respuesta de DRF de siempre (``optimizedData`` como columna →
+  lista, con el producto y el periodo repetidos en cada fila).
+* ``json``: el mismo contenido y la misma forma, serializado con orjson
+  (``json`` de la biblioteca estándar si orjson no está instalado).
+* ``columnar``: el plan con diccionarios de productos y periodos y arreglos
+  de índices enteros en lugar de cadenas repetidas::
+
+      {"products": ["21A", ...], "periods": ["11-29-24", ...],
+       "product": [0, 0, 1, ...], "period": [0, 3, 1, ...],
+       "production": [2593.7, ...]}
+
+* ``arrow``: flujo Arrow IPC del plan (``Product`` y ``Period`` como columnas
+  diccionario); ``pareto`` y los campos extra van en los metadatos del esquema
+  como JSON.  Requiere pyarrow, dependencia opcional que no está en
+  ``requirements.txt``: sin ella la petición se rechaza (ValueError → 400)
+  antes de optimizar.
+
+Cualquiera de ellas (salvo ``default``) puede comprimirse con gzip.
+"""
+
+# ---------------------------------------------------------------------------
+# 1. IMPORTACIONES
+# ---------------------------------------------------------------------------
+import datetime
+import gzip
+import json
+from typing import Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+try:
+    import orjson
+except ImportError:  # orjson es opcional: se usa json de la biblioteca estándar
+    orjson = None
+
+try:
+    import pyarrow as pa
+except ImportError:  # pyarrow es opcional: sin él 'arrow' se rechaza con 400
+    pa = None
+
+
+# ---------------------------------------------------------------------------
+# 2. PARÁMETROS
+# ---------------------------------------------------------------------------
+ENCODINGS = ("default", "json", "columnar", "arrow")
+
+JSON_CONTENT_TYPE = "application/json"
+ARROW_CONTENT_TYPE = "application/vnd.apache.arrow.stream"
+
+# Nivel de gzip: con 500k filas el nivel 1 tarda ~5x menos que el 6 y el
+# cuerpo solo crece ~7 %
+GZIP_LEVEL: int = 1
+
+
+# ---------------------------------------------------------------------------
+# 3. JSON RÁPIDO
+# ---------------------------------------------------------------------------
+
+def _default(obj):
+    """Tipos que ni orjson ni json serializan por sí mismos."""
+    if isinstance(obj, np.ndarray):
+        if obj.dtype.kind == "f":
+            return np.where(np.isfinite(obj), obj, None).tolist()
+        return obj.tolist()
+    if isinstance(obj, np.generic):
+        return obj.item()
+    if isinstance(obj, (pd.Timestamp, datetime.date)):
+        return obj.isoformat()
+    raise TypeError(f"Tipo no serializable: {type(obj).__name__}")
+
+
+def dumps(obj) -> bytes:
+    """JSON compacto en bytes; los arreglos NumPy se serializan sin pasar por listas con orjson."""
+    if orjson is not None:
+        return orjson.dumps(obj, default=_default,
+                            option=orjson.OPT_SERIALIZE_NUMPY | orjson.OPT_NON_STR_KEYS)
+    return json.dumps(obj, default=_default, separators=(",", ":")).encode("utf-8")
+
+
+def _column(series: pd.Series):
+    """Columna numérica como arreglo NumPy; el resto como lista de Python."""
+    if series.dtype.kind in "if":
+        return np.ascontiguousarray(series.to_numpy())
+    return series.tolist()
+
+
+# ---------------------------------------------------------------------------
+# 4. FORMAS DEL PLAN
+# ---------------------------------------------------------------------------
+
+def plan_columns(plan_df: pd.DataFrame) -> dict:
+    """Plan columna → valores, la misma forma que produce DRF con el DataFrame."""
+    return {col: _column(plan_df[col]) for col in plan_df.columns}
+
+
+def _dictionary(values: pd.Series, order: Optional[list]) -> Tuple[np.ndarray, list]:
+    """Códigos y diccionario; con ``order`` (p. ej. los periodos del modelo) se respeta ese orden."""
+    if order is not None:
+        codes = pd.Categorical(values, categories=order).codes
+        if len(codes) == 0 or codes.min() >= 0:
+            return codes, list(order)
+    codes, uniques = pd.factorize(values)
+    return codes, uniques.tolist()
+
+
+def plan_columnar(plan_df: pd.DataFrame) -> dict:
+    """
+    Plan con diccionarios de productos/periodos e índices enteros.
+
+    Si ``plan_df.attrs`` trae ``products``/``periods`` (``run_lexicographic``),
+    los diccionarios siguen el orden del modelo; si no, el de aparición.
+    """
+    if plan_df.empty and "Product" not in plan_df.columns:
+        return {"products": [], "periods": [], "product": [], "period": [], "production": []}
+    product, products = _dictionary(plan_df["Product"], plan_df.attrs.get("products"))
+    period, periods = _dictionary(plan_df["Period"], plan_df.attrs.get("periods"))
+    return {
+        "products": products,
+        "periods": periods,
+        "product": product.astype(np.int32),
+        "period": period.astype(np.int32),
+        "production": np.ascontiguousarray(plan_df["Production"].to_numpy(dtype=float)),
+    }
+
+
+def finite(obj):
+    """Copia de ``obj`` (dicts, listas y escalares) con los flotantes no finitos como ``None``."""
+    if isinstance(obj, np.generic):
+        obj = obj.item()
+    if isinstance(obj, float):
+        return obj if np.isfinite(obj) else None
+    if isinstance(obj, dict):
+        return {k: finite(v) for k, v in obj.items()}
+    if isinstance(obj, (list, tuple)):
+        return [finite(v) for v in obj]
+    return obj
+
+
+def pareto_records(pareto_df: pd.DataFrame) -> list:
+    """Frontera de Pareto como registros, con NaN/inf como null."""
+    return pareto_df.replace([np.nan, np.inf, -np.inf], None).to_dict(orient="records")
+
+
+def _arrow_stream(plan_df: pd.DataFrame, metadata: dict) -> bytes:
+    columns = plan_columnar(plan_df)
+    table = pa.table({
+        "Product": pa.DictionaryArray.from_arrays(pa.array(columns["product"], pa.int32()),
+                                                  pa.array([str(p) for p in columns["products"]])),
+        "Period": pa.DictionaryArray.from_arrays(pa.array(columns["period"], pa.int32()),
+                                                 pa.array([str(t) for t in columns["periods"]])),
+        "Production": pa.array(columns["production"], pa.float64()),
+    })
+    table = table.replace_schema_metadata({k: dumps(v) for k, v in metadata.items()})
+    sink = pa.BufferOutputStream()
+    with pa.ipc.new_stream(sink, table.schema) as writer:
+        writer.write_table(table)
+    return sink.getvalue().to_pybytes()
+
+
+# ---------------------------------------------------------------------------
+# 5. PUNTO DE ENTRADA
+# ---------------------------------------------------------------------------
+
+def check_encoding(encoding: str) -> None:
+    """Valida la codificación antes de optimizar (ValueError si no es utilizable)."""
+    if encoding not in ENCODINGS:
+        raise ValueError(f"Codificación desconocida '{encoding}' (opciones: {', '.join(ENCODINGS)})")
+    if encoding == "arrow" and pa is None:
+        raise ValueError("La codificación 'arrow' requiere el paquete opcional pyarrow, que no está instalado "
+                         "(pip install pyarrow); use 'columnar' o 'json'")
+
+
+def encode_plan(plan_df: pd.DataFrame, pareto_df: pd.DataFrame, encoding: str,
+                compress: bool = False, extra: Optional[dict] = None) -> Tuple[bytes, str]:
+    """
+    Serializa el plan y la frontera de Pareto; devuelve (cuerpo, content type).
+
+    ``extra`` son campos adicionales de la respuesta (p. ej. ``timings``).  Con
+    ``compress`` el cuerpo va comprimido con gzip y el llamador debe añadir
+    ``Content-Encoding: gzip``.  ``default`` no pasa por aquí (lo serializa DRF).
+    """
+    check_encoding(encoding)
+    if encoding == "default":
+        raise ValueError("La codificación 'default' la serializa DRF")
+    extra = extra or {}
+    pareto = pareto_records(pareto_df)
+
+    if encoding == "arrow":
+        body, content_type = _arrow_stream(plan_df, {"pareto": pareto, **extra}), ARROW_CONTENT_TYPE
+    else:
+        plan = plan_columns(plan_df) if encoding == "json" else plan_columnar(plan_df)
+        body = dumps({"optimizedData": plan, "pareto": pareto, "encoding": encoding, **extra})
+        content_type = JSON_CONTENT_TYPE
+
+    if compress:
+        body = gzip.compress(body, compresslevel=GZIP_LEVEL, mtime=0)
+    return body, content_type
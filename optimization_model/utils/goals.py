@@ -0,0 +1,212 @@
+"""
+goals.py
+========
+
+Goal programming por prioridades (preemptivo) sobre un único modelo.
+
+``Simplex_Goal_programming.build_goal_model`` suma las desviaciones de
+cobertura (unidades) y de coste (dinero, con metas del orden de 1e8) con los
+pesos fijos ``w_cov``/``w_cost``: las escalas tan distintas hacen que una
+meta domine a la otra y que el LP quede mal condicionado.  Aquí:
+
+* cada meta (``Goal``) es una fila ``(f(x) - meta) / escala + u - o = 0``
+  con ``escala = |meta|``: las desviaciones ``u`` (por debajo) y ``o`` (por
+  encima) son fracciones de la meta, comparables entre métricas y con
+  coeficientes de la misma magnitud que el resto del modelo;
+* las metas se agrupan por ``priority`` (1 = la más importante) y cada
+  nivel minimiza la suma ponderada de sus desviaciones no deseadas sin
+  empeorar los niveles anteriores: las etapas se resuelven una tras otra
+  sobre el mismo modelo con el candado y el arranque en caliente de
+  ``lexicographic.solve_stages``.
+
+Métricas (``GOAL_METRICS``) y sentido por defecto de su meta:
+
+* ``coverage``: producción total; la meta es la fracción ``α`` de ``ΣD`` (>=);
+* ``cost``: coste total en dinero (<=);
+* ``excess``: inventario por encima del stock de seguridad en unidades (<=).
+
+El resultado da, por nivel, el logro (suma ponderada de desviaciones no
+deseadas; 0 = todas sus metas cumplidas) y el tiempo de su resolución, y por
+meta el valor alcanzado y las desviaciones en las unidades de la métrica.
+"""
+
+# ---------------------------------------------------------------------------
+# 1. IMPORTACIONES
+# ---------------------------------------------------------------------------
+from typing import Callable, Dict, List, NamedTuple, Optional
+
+import pandas as pd
+import pulp as lp
+
+from .lexicographic import plan_frame, resource_usage, solve_stages
+from .presolve import presolve
+from .problem import PlanningModel, PlanningProblem, build_planning_model
+from .resources import USAGE_COLUMNS
+from .solution import PLAN_COLUMNS
+from .solver import SolveBudget
+from .telemetry import RunTelemetry
+
+
+# ---------------------------------------------------------------------------
+# 2. PARÁMETROS
+# ---------------------------------------------------------------------------
+TOL: float = 1e-6            # desviación relativa por debajo de la cual la meta se da por cumplida
+
+AT_LEAST, AT_MOST, EXACTLY = ">=", "<=", "=="
+SENSES = (AT_LEAST, AT_MOST, EXACTLY)
+
+PRIORITY_COLUMNS = ["priority", "goals", "status", "achievement", "proven_optimal", "iterations", "seconds"]
+GOAL_COLUMNS = ["goal", "metric", "sense", "target", "priority", "weight", "value", "under", "over", "achieved"]
+
+
+class Goal(NamedTuple):
+    metric: str                  # clave de GOAL_METRICS
+    target: float                # en las unidades de la métrica (coverage: fracción de ΣD)
+    priority: int = 1            # 1 = la más importante
+    sense: Optional[str] = None  # ">=", "<=" o "=="; por defecto el de la métrica
+    weight: float = 1.0          # peso dentro de su nivel de prioridad
+
+
+# ---------------------------------------------------------------------------
+# 3. MÉTRICAS
+# ---------------------------------------------------------------------------
+# (expresión, meta en unidades del modelo) de cada métrica
+
+def _coverage(pm: PlanningModel, problem: PlanningProblem, target: float):
+    return pm.production, target * float(problem.demand.sum())
+
+
+def _cost(pm: PlanningModel, problem: PlanningProblem, target: float):
+    return pm.cost, target
+
+
+def _excess(pm: PlanningModel, problem: PlanningProblem, target: float):
+    P, T = problem.products, problem.periods
+    return lp.lpSum(pm.I[p][t] for p in P for t in T) - float(problem.sst.sum()), target
+
+
+GOAL_METRICS: Dict[str, Callable[[PlanningModel, PlanningProblem, float], tuple]] = {
+    "coverage": _coverage,
+    "cost": _cost,
+    "excess": _excess,
+}
+DEFAULT_SENSE = {"coverage": AT_LEAST, "cost": AT_MOST, "excess": AT_MOST}
+
+
+def parse_goals(specs) -> List[Goal]:
+    """Metas a partir de una lista de objetos ``{metric, target, priority, sense, weight}``."""
+    if not isinstance(specs, (list, tuple)) or not specs:
+        raise ValueError("goals debe ser una lista no vacía de {metric, target, priority, sense, weight}")
+    goals = []
+    for j, spec in enumerate(specs):
+        if not isinstance(spec, dict):
+            raise ValueError(f"La meta {j} debe ser un objeto")
+        unknown = set(spec) - set(Goal._fields)
+        if unknown:
+            raise ValueError(f"Campos desconocidos en la meta {j}: {', '.join(sorted(unknown))}")
+        metric = spec.get("metric")
+        if metric not in GOAL_METRICS:
+            raise ValueError(f"Métrica desconocida '{metric}' en la meta {j} "
+                             f"(opciones: {', '.join(GOAL_METRICS)})")
+        if spec.get("target") in (None, ""):
+            raise ValueError(f"Falta target en la meta {j}")
+        sense = spec.get("sense") or DEFAULT_SENSE[metric]
+        if sense not in SENSES:
+            raise ValueError(f"sense debe ser uno de {', '.join(SENSES)} (meta {j})")
+        goal = Goal(metric, float(spec["target"]), int(spec.get("priority", 1)), sense,
+                    float(spec.get("weight", 1.0)))
+        if goal.priority < 1 or goal.weight <= 0:
+            raise ValueError(f"priority debe ser >= 1 y weight > 0 (meta {j})")
+        goals.append(goal)
+    return goals
+
+
+# ---------------------------------------------------------------------------
+# 4. RESOLUCIÓN
+# ---------------------------------------------------------------------------
+
+class GoalResult(NamedTuple):
+    status: str                  # estado del último nivel resuelto
+    priorities: pd.DataFrame     # una fila por nivel resuelto (PRIORITY_COLUMNS)
+    goals: pd.DataFrame          # una fila por meta (GOAL_COLUMNS); vacía sin solución
+    service_level: Optional[float]
+    plan: pd.DataFrame           # Product | Period | Production (vacío sin solución)
+    usage: pd.DataFrame          # uso por línea y periodo (USAGE_COLUMNS; vacío sin recursos)
+
+
+def _failed(status: str, levels: list) -> GoalResult:
+    return GoalResult(status, pd.DataFrame(levels, columns=PRIORITY_COLUMNS),
+                      pd.DataFrame(columns=GOAL_COLUMNS), None, pd.DataFrame(columns=PLAN_COLUMNS),
+                      pd.DataFrame(columns=USAGE_COLUMNS))
+
+
+def solve_goals(problem: PlanningProblem, goals: List[Goal], integer: bool = False,
+                telemetry: Optional[RunTelemetry] = None,
+                budget: Optional[SolveBudget] = None) -> GoalResult:
+    """
+    Resuelve las metas por niveles de prioridad (ver el módulo).
+
+    Cada nivel se registra en la telemetría como ``goal_p<nivel>_lp``/``_mip``
+    y ``budget`` se aplica por nivel con esas etiquetas.  Si un nivel no
+    tiene solución el resultado se detiene en él.
+    """
+    tel = telemetry if telemetry is not None else RunTelemetry()
+    suffix = "mip" if integer else "lp"
+
+    reduction = presolve(problem, integer, telemetry=telemetry)
+    if reduction.infeasible:
+        return _failed(lp.LpStatus[lp.LpStatusInfeasible], [])
+    with tel.stage("build_goal_model"):
+        pm = build_planning_model(problem, "goals", integer=integer, reduction=reduction)
+        m = pm.model
+        rows = []   # (meta, expresión, meta en unidades del modelo, escala, u, o)
+        for j, goal in enumerate(goals):
+            expr, target = GOAL_METRICS[goal.metric](pm, problem, goal.target)
+            scale = max(abs(target), 1.0)
+            under = lp.LpVariable(f"under_{j}", lowBound=0)
+            over = lp.LpVariable(f"over_{j}", lowBound=0)
+            m += ((expr - target) * (1.0 / scale) + under - over == 0, f"goal_{j}")
+            rows.append((goal, expr, target, scale, under, over))
+
+        levels = sorted({goal.priority for goal in goals})
+        stages = []
+        for level in levels:
+            terms = []
+            for goal, _, _, _, under, over in rows:
+                if goal.priority != level:
+                    continue
+                if goal.sense in (AT_LEAST, EXACTLY):
+                    terms.append((under, goal.weight))
+                if goal.sense in (AT_MOST, EXACTLY):
+                    terms.append((over, goal.weight))
+            stages.append((f"goal_p{level}_{suffix}", lp.LpAffineExpression(terms)))
+
+    solved = solve_stages(m, stages, integer, tel, budget)
+    levels_table = [{"priority": level, "goals": sum(goal.priority == level for goal in goals),
+                     "status": row["status"], "achievement": row["value"], "proven_optimal": row["proven_optimal"],
+                     "iterations": row["iterations"], "seconds": row["seconds"]}
+                    for level, row in zip(levels, solved)]
+    if levels_table[-1]["status"] != lp.LpStatus[lp.LpStatusOptimal]:
+        return _failed(levels_table[-1]["status"], levels_table)
+
+    goal_table = []
+    for j, (goal, expr, target, scale, under, over) in enumerate(rows):
+        u, o = under.value() * scale, over.value() * scale
+        missed = {AT_LEAST: under.value(), AT_MOST: over.value(), EXACTLY: under.value() + over.value()}[goal.sense]
+        goal_table.append({"goal": j, "metric": goal.metric, "sense": goal.sense, "target": target,
+                           "priority": goal.priority, "weight": goal.weight, "value": lp.value(expr),
+                           "under": u, "over": o, "achieved": missed <= TOL})
+
+    total_demand = float(problem.demand.sum())
+    production = lp.value(pm.production)
+    with tel.stage("extract_plan"):
+        plan = plan_frame(pm, problem)
+        usage = resource_usage(pm, problem)
+    return GoalResult(
+        status=levels_table[-1]["status"],
+        priorities=pd.DataFrame(levels_table, columns=PRIORITY_COLUMNS),
+        goals=pd.DataFrame(goal_table, columns=GOAL_COLUMNS),
+        service_level=production / total_demand if total_demand else None,
+        plan=plan,
+        usage=usage,
+    )
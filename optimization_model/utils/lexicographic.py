@@ -0,0 +1,244 @@
+"""
+lexicographic.py
+================
+
+Motor lexicográfico de N objetivos sobre un único modelo.
+
+``Bus_lex.build_lex_model`` resuelve dos fases fijas (coste y después
+shortfall) en dos modelos con variables propias.  ``solve_lexicographic``
+recibe una lista ordenada de objetivos (``OBJECTIVES``) y los optimiza uno
+tras otro sobre el mismo ``LpProblem``:
+
+1. el modelo base (``problem.build_planning_model``, reducido con
+   ``presolve``) y las variables y filas auxiliares de todos los objetivos
+   pedidos se construyen una sola vez;
+2. cada etapa fija su objetivo, resuelve y añade la fila ``lock_{k}``
+   ``f_k <= f_k★ + holgura`` (el candado de ``Script_Maestro.lock_opt``; basta
+   un lado porque se minimiza);
+3. la etapa siguiente arranca de la solución anterior, que sigue siendo
+   factible con el candado nuevo: un LP parte de la base óptima de CBC
+   (``basisI``/``basisO``, como ``sweep``) y un MIP de la solución como
+   ``mipstart``.
+
+Objetivos disponibles (todos se minimizan):
+
+* ``cost``: coste total (producción, inventario y exceso sobre SST);
+* ``shortfall``: unidades que faltan para la cobertura ``Σx >= α·ΣD``;
+* ``smoothing``: variación del inventario entre periodos ``Σ|I[t] - I[t-1]|``;
+* ``excess``: inventario por encima del stock de seguridad ``Σ(I - SST)``.
+
+``["cost", "shortfall"]`` es el modelo lexicográfico de ``Bus_lex``.
+"""
+
+# ---------------------------------------------------------------------------
+# 1. IMPORTACIONES
+# ---------------------------------------------------------------------------
+import os
+import shutil
+import tempfile
+import time
+from typing import Callable, Dict, List, NamedTuple, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+import pulp as lp
+
+from .presolve import presolve
+from .problem import PlanningModel, PlanningProblem, build_planning_model
+from .resources import USAGE_COLUMNS, usage_frame
+from .sensitivity import COVERAGE
+from .solution import PLAN_COLUMNS, TOL
+from .solver import SolveBudget, solve
+from .telemetry import RunTelemetry
+
+
+# ---------------------------------------------------------------------------
+# 2. PARÁMETROS
+# ---------------------------------------------------------------------------
+LOCK_RTOL: float = 1e-7      # holgura relativa del candado de cada etapa
+WARM_START: bool = True      # cada etapa arranca de la solución de la anterior
+
+COST, SHORTFALL, SMOOTHING, EXCESS = "cost", "shortfall", "smoothing", "excess"
+DEFAULT_OBJECTIVES = (COST, SHORTFALL)
+
+STAGE_COLUMNS = ["stage", "objective", "status", "value", "proven_optimal", "iterations", "seconds"]
+
+
+# ---------------------------------------------------------------------------
+# 3. OBJETIVOS
+# ---------------------------------------------------------------------------
+# Cada objetivo añade al modelo sus variables y filas auxiliares y devuelve la
+# expresión a minimizar.
+
+def _cost(pm: PlanningModel, problem: PlanningProblem, alpha: float) -> lp.LpAffineExpression:
+    return pm.cost
+
+
+def _shortfall(pm: PlanningModel, problem: PlanningProblem, alpha: float) -> lp.LpAffineExpression:
+    s = lp.LpVariable("shortfall", lowBound=0)
+    m = pm.model
+    m += (pm.production + s >= alpha * float(problem.demand.sum()), COVERAGE)
+    return lp.LpAffineExpression([(s, 1.0)])
+
+
+def _smoothing(pm: PlanningModel, problem: PlanningProblem, alpha: float) -> lp.LpAffineExpression:
+    P, T = problem.products, problem.periods
+    m = pm.model
+    u = lp.LpVariable.dicts("dI", (P, T[1:]), lowBound=0)
+    for i, p in enumerate(P):
+        for k in range(1, len(T)):
+            step = pm.I[p][T[k]] - pm.I[p][T[k - 1]]
+            m += (u[p][T[k]] >= step, f"smooth_up_{i}_{k}")
+            m += (u[p][T[k]] >= -step, f"smooth_down_{i}_{k}")
+    return lp.lpSum(u[p][t] for p in P for t in T[1:])
+
+
+def _excess(pm: PlanningModel, problem: PlanningProblem, alpha: float) -> lp.LpAffineExpression:
+    P, T = problem.products, problem.periods
+    return lp.lpSum(pm.I[p][t] for p in P for t in T) - float(problem.sst.sum())
+
+
+OBJECTIVES: Dict[str, Callable[[PlanningModel, PlanningProblem, float], lp.LpAffineExpression]] = {
+    COST: _cost,
+    SHORTFALL: _shortfall,
+    SMOOTHING: _smoothing,
+    EXCESS: _excess,
+}
+
+
+def parse_objectives(spec) -> List[str]:
+    """Lista ordenada de objetivos a partir de una lista o de un texto ``"cost,shortfall"``."""
+    if spec in (None, ""):
+        return list(DEFAULT_OBJECTIVES)
+    if isinstance(spec, str):
+        spec = spec.split(",")
+    if not isinstance(spec, (list, tuple)):
+        raise ValueError("objectives debe ser una lista o un texto 'cost,shortfall,...'")
+    names = [str(name).strip() for name in spec if str(name).strip()]
+    unknown = [name for name in names if name not in OBJECTIVES]
+    if unknown:
+        raise ValueError(f"Objetivos desconocidos: {', '.join(unknown)} (opciones: {', '.join(OBJECTIVES)})")
+    if len(set(names)) != len(names):
+        raise ValueError("Cada objetivo puede aparecer una sola vez")
+    if not names:
+        raise ValueError("No se indicó ningún objetivo")
+    return names
+
+
+# ---------------------------------------------------------------------------
+# 4. RESOLUCIÓN
+# ---------------------------------------------------------------------------
+
+class LexResult(NamedTuple):
+    status: str                  # estado de la última etapa resuelta
+    stages: pd.DataFrame         # una fila por etapa resuelta (STAGE_COLUMNS)
+    values: Dict[str, float]     # valor final de cada objetivo pedido (vacío sin solución)
+    service_level: Optional[float]
+    plan: pd.DataFrame           # Product | Period | Production (vacío sin solución)
+    usage: pd.DataFrame          # uso por línea y periodo (USAGE_COLUMNS; vacío sin recursos)
+
+
+def plan_frame(pm: PlanningModel, problem: PlanningProblem) -> pd.DataFrame:
+    """Plan disperso ``Product | Period | Production`` de un modelo ya resuelto."""
+    P, T = problem.products, problem.periods
+    production = np.array([[lp.value(pm.x[p][t]) for t in T] for p in P], dtype=float)
+    i, k = np.nonzero(production > TOL)
+    plan = pd.DataFrame({"Product": np.array(P, dtype=object)[i], "Period": np.array(T, dtype=object)[k],
+                         "Production": production[i, k]}, columns=PLAN_COLUMNS)
+    plan.attrs.update(products=list(P), periods=list(T))
+    return plan
+
+
+def resource_usage(pm: PlanningModel, problem: PlanningProblem) -> pd.DataFrame:
+    """Uso de cada línea por periodo de un modelo ya resuelto (vacío si el problema no tiene recursos)."""
+    if pm.resources is None:
+        return pd.DataFrame(columns=USAGE_COLUMNS)
+    return usage_frame(pm.model, problem.resources, pm.resources, problem.periods)
+
+
+def solve_stages(model: lp.LpProblem, stages: List[Tuple[str, lp.LpAffineExpression]], integer: bool,
+                 telemetry: RunTelemetry, budget: Optional[SolveBudget] = None) -> List[dict]:
+    """
+    Minimiza cada expresión de ``stages`` (etiqueta de telemetría, expresión)
+    en orden sobre ``model``, con el candado ``lock_{k}`` tras cada etapa y
+    arranque en caliente desde la anterior.  Devuelve una fila por etapa
+    resuelta (``status``, ``value``, ``proven_optimal``, ``iterations``,
+    ``seconds``) y se detiene en la primera sin solución.
+    """
+    workdir = tempfile.mkdtemp(prefix="lex-")
+    basis = os.path.join(workdir, "stage.bas")
+    rows = []
+    try:
+        for k, (label, expr) in enumerate(stages):
+            t0 = time.perf_counter()
+            model.setObjective(expr)
+            options = None
+            if not integer:
+                options = ["initialSolve", f"basisO {basis}"]
+                if WARM_START and k and os.path.exists(basis):
+                    options.insert(0, f"basisI {basis}")
+            status = solve(model, label, telemetry, options=options, budget=budget,
+                           warm_start=WARM_START and integer and k > 0)
+            record = telemetry.solves[-1]
+            optimal = status == lp.LpStatusOptimal
+            value = lp.value(expr) if optimal else None
+            rows.append({"status": lp.LpStatus[status], "value": value,
+                         "proven_optimal": record.get("proven_optimal"),
+                         "iterations": record.get("iterations"), "seconds": time.perf_counter() - t0})
+            if not optimal:
+                break
+            if k + 1 < len(stages):
+                model += (expr <= value + LOCK_RTOL * max(1.0, abs(value)), f"lock_{k}")
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+    return rows
+
+
+def _failed(status: str, stages: list) -> LexResult:
+    return LexResult(status, pd.DataFrame(stages, columns=STAGE_COLUMNS), {}, None,
+                     pd.DataFrame(columns=PLAN_COLUMNS), pd.DataFrame(columns=USAGE_COLUMNS))
+
+
+def solve_lexicographic(problem: PlanningProblem, objectives=DEFAULT_OBJECTIVES, alpha: float = 0.9,
+                        integer: bool = False, telemetry: Optional[RunTelemetry] = None,
+                        budget: Optional[SolveBudget] = None) -> LexResult:
+    """
+    Optimiza ``objectives`` en orden sobre un único modelo (ver el módulo).
+
+    ``alpha`` es la cobertura del objetivo ``shortfall``; ``integer``
+    resuelve el MIP (producción e inventario enteros).  Cada etapa se
+    registra en la telemetría como ``lex_<objetivo>_lp``/``_mip`` y
+    ``budget`` se aplica por etapa con esas etiquetas; si una etapa se
+    detiene con un incumbente no demostrado óptimo, el candado usa su valor.
+    Si una etapa no tiene solución el resultado se detiene en ella.
+    """
+    objectives = parse_objectives(list(objectives))
+    tel = telemetry if telemetry is not None else RunTelemetry()
+    suffix = "mip" if integer else "lp"
+
+    reduction = presolve(problem, integer, telemetry=telemetry)
+    if reduction.infeasible:
+        return _failed(lp.LpStatus[lp.LpStatusInfeasible], [])
+    with tel.stage("build_lex_model"):
+        pm = build_planning_model(problem, "lexicographic", integer=integer, reduction=reduction)
+        exprs = {name: OBJECTIVES[name](pm, problem, alpha) for name in objectives}
+
+    rows = solve_stages(pm.model, [(f"lex_{name}_{suffix}", exprs[name]) for name in objectives],
+                        integer, tel, budget)
+    stages = [{"stage": k + 1, "objective": name, **row} for k, (name, row) in enumerate(zip(objectives, rows))]
+    if stages[-1]["status"] != lp.LpStatus[lp.LpStatusOptimal]:
+        return _failed(stages[-1]["status"], stages)
+
+    total_demand = float(problem.demand.sum())
+    production = lp.value(pm.production)
+    with tel.stage("extract_plan"):
+        plan = plan_frame(pm, problem)
+        usage = resource_usage(pm, problem)
+    return LexResult(
+        status=stages[-1]["status"],
+        stages=pd.DataFrame(stages, columns=STAGE_COLUMNS),
+        values={name: lp.value(exprs[name]) for name in objectives},
+        service_level=production / total_demand if total_demand else None,
+        plan=plan,
+        usage=usage,
+    )
@@ -0,0 +1,200 @@
+"""
+plan_store.py
+=============
+
+Almacén en disco de los planes de producción por ejecución.
+
+Cada plan se guarda en ``<raíz>/<run_id>/`` como columnas NumPy (índices de
+producto y periodo ``int32`` y producción ``float64``) más ``meta.json`` con
+los diccionarios de productos y periodos (en el orden del modelo) y la
+frontera de Pareto.  Las columnas se leen con ``mmap`` y se recorren por
+bloques, de modo que filtrar y transmitir un plan grande no lo carga entero
+en memoria.  Se conservan las ``max_runs`` ejecuciones más recientes.
+"""
+
+# ---------------------------------------------------------------------------
+# 1. IMPORTACIONES
+# ---------------------------------------------------------------------------
+import json
+import os
+import re
+import shutil
+import tempfile
+import time
+import uuid
+from typing import Iterator, List, NamedTuple, Optional
+
+import numpy as np
+import pandas as pd
+
+from .encoding import dumps, pareto_records, plan_columnar
+
+
+# ---------------------------------------------------------------------------
+# 2. PARÁMETROS
+# ---------------------------------------------------------------------------
+MAX_RUNS: int = 100          # ejecuciones que se conservan en disco
+CHUNK_ROWS: int = 50_000     # filas por bloque al filtrar y transmitir
+COLUMNS = ("product", "period", "production")
+
+_RUN_ID = re.compile(r"[0-9a-f]{32}")
+
+
+# ---------------------------------------------------------------------------
+# 3. PLAN ALMACENADO
+# ---------------------------------------------------------------------------
+
+class PlanFilter(NamedTuple):
+    products: Optional[List[str]] = None   # None = todos
+    period_from: Optional[str] = None      # periodos inclusivos, en el orden del modelo
+    period_to: Optional[str] = None
+    offset: int = 0
+    limit: Optional[int] = None
+
+
+class StoredPlan:
+    """Plan de una ejecución con columnas mapeadas en memoria."""
+
+    def __init__(self, path: str):
+        with open(os.path.join(path, "meta.json"), encoding="utf-8") as fh:
+            self.meta = json.load(fh)
+        self.products: List[str] = self.meta["products"]
+        self.periods: List[str] = self.meta["periods"]
+        self.columns = {c: np.load(os.path.join(path, f"{c}.npy"), mmap_mode="r") for c in COLUMNS}
+
+    @property
+    def rows(self) -> int:
+        return int(self.meta["rows"])
+
+    def _period_range(self, flt: PlanFilter) -> tuple:
+        bounds = []
+        for label, default in ((flt.period_from, 0), (flt.period_to, len(self.periods) - 1)):
+            if label is None:
+                bounds.append(default)
+            elif label in self.periods:
+                bounds.append(self.periods.index(label))
+            else:
+                raise ValueError(f"Periodo desconocido '{label}'")
+        return tuple(bounds)
+
+    def _product_mask(self, flt: PlanFilter) -> Optional[np.ndarray]:
+        if flt.products is None:
+            return None
+        unknown = [p for p in flt.products if p not in self.products]
+        if unknown:
+            raise ValueError(f"SKU desconocido: {', '.join(unknown)}")
+        mask = np.zeros(len(self.products), dtype=bool)
+        mask[[self.products.index(p) for p in flt.products]] = True
+        return mask
+
+    def _blocks(self, flt: PlanFilter, chunk_rows: int) -> Iterator[tuple]:
+        """Valida ``flt`` y devuelve el iterador de bloques (códigos de producto, de periodo, producción)."""
+        lo, hi = self._period_range(flt)
+        product_mask = self._product_mask(flt)
+
+        def blocks() -> Iterator[tuple]:
+            product, period, production = (self.columns[c] for c in COLUMNS)
+            skip, remaining = flt.offset, flt.limit
+            for start in range(0, self.rows, chunk_rows):
+                if remaining is not None and remaining <= 0:
+                    return
+                idx = slice(start, start + chunk_rows)
+                p, t = np.asarray(product[idx]), np.asarray(period[idx])
+                keep = (t >= lo) & (t <= hi)
+                if product_mask is not None:
+                    keep &= product_mask[p]
+                rows = np.flatnonzero(keep)
+                if skip:
+                    rows, skip = rows[skip:], max(0, skip - len(rows))
+                if remaining is not None:
+                    rows = rows[:remaining]
+                    remaining -= len(rows)
+                if len(rows):
+                    yield p[rows], t[rows], np.asarray(production[idx])[rows]
+        return blocks()
+
+    def iter_chunks(self, flt: PlanFilter = PlanFilter(),
+                    chunk_rows: int = CHUNK_ROWS) -> Iterator[pd.DataFrame]:
+        """
+        Filas que cumplen ``flt`` por bloques de a lo sumo ``chunk_rows``.
+
+        El filtro se valida al llamar (ValueError), no al consumir el iterador,
+        para poder responder 400 antes de empezar a transmitir.
+        """
+        products, periods = np.asarray(self.products, dtype=object), np.asarray(self.periods, dtype=object)
+        return (pd.DataFrame({"Product": products[p], "Period": periods[t], "Production": x})
+                for p, t, x in self._blocks(flt, chunk_rows))
+
+    def iter_ndjson(self, flt: PlanFilter = PlanFilter(), chunk_rows: int = CHUNK_ROWS) -> Iterator[bytes]:
+        """
+        Una línea ``{"Product", "Period", "Production"}`` por fila, agrupadas por bloque.
+
+        Los prefijos de cada producto y periodo se codifican una sola vez y la
+        producción de todo el bloque en una llamada; cada línea solo concatena.
+        """
+        blocks = self._blocks(flt, chunk_rows)
+        heads = [b'{"Product":' + dumps(p) + b',"Period":' for p in self.products]
+        mids = [dumps(t) + b',"Production":' for t in self.periods]
+
+        def lines() -> Iterator[bytes]:
+            for p, t, x in blocks:
+                values = dumps(x)[1:-1].split(b",")
+                yield b"".join(heads[i] + mids[k] + v + b"}\n" for i, k, v in zip(p.tolist(), t.tolist(), values))
+        return lines()
+
+
+# ---------------------------------------------------------------------------
+# 4. ALMACÉN
+# ---------------------------------------------------------------------------
+
+class PlanStore:
+    """Directorio con un subdirectorio por ejecución (``run_id`` hexadecimal)."""
+
+    def __init__(self, root: str, max_runs: int = MAX_RUNS):
+        self.root = str(root)
+        self.max_runs = max_runs
+
+    def _path(self, run_id: str) -> str:
+        if not _RUN_ID.fullmatch(run_id):
+            raise KeyError(run_id)
+        return os.path.join(self.root, run_id)
+
+    def save(self, plan_df: pd.DataFrame, pareto_df: Optional[pd.DataFrame] = None) -> str:
+        """Guarda el plan y devuelve su ``run_id``; el directorio aparece completo o no aparece."""
+        os.makedirs(self.root, exist_ok=True)
+        run_id = uuid.uuid4().hex
+        columns = plan_columnar(plan_df)
+        meta = {
+            "run_id": run_id,
+            "created": time.time(),
+            "rows": len(plan_df),
+            "products": [str(p) for p in columns["products"]],
+            "periods": [str(t) for t in columns["periods"]],
+            "pareto": pareto_records(pareto_df) if pareto_df is not None else None,
+        }
+        tmp = tempfile.mkdtemp(prefix=".tmp-", dir=self.root)
+        try:
+            for c, dtype in zip(COLUMNS, (np.int32, np.int32, np.float64)):
+                np.save(os.path.join(tmp, f"{c}.npy"), np.asarray(columns[c], dtype=dtype))
+            with open(os.path.join(tmp, "meta.json"), "wb") as fh:
+                fh.write(dumps(meta))
+            os.replace(tmp, self._path(run_id))
+        except BaseException:
+            shutil.rmtree(tmp, ignore_errors=True)
+            raise
+        self.prune()
+        return run_id
+
+    def open(self, run_id: str) -> StoredPlan:
+        """Plan almacenado; ``KeyError`` si la ejecución no existe (o ya se descartó)."""
+        path = self._path(run_id)
+        if not os.path.isfile(os.path.join(path, "meta.json")):
+            raise KeyError(run_id)
+        return StoredPlan(path)
+
+    def prune(self) -> None:
+        """Elimina las ejecuciones más antiguas por encima de ``max_runs``."""
+        runs = [e for e in os.scandir(self.root) if e.is_dir() and _RUN_ID.fullmatch(e.name)]
+        runs.sort(key=lambda e: e.stat().st_mtime, reverse=True)
+        for entry in runs[self.max_runs:]:
+            shutil.rmtree(entry.path, ignore_errors=True)
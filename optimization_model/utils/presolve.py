@@ -0,0 +1,185 @@
+"""
+presolve.py
+===========
+
+Reducción del modelo de planificación antes de construirlo.
+
+Con el balance ``I[k] = I[k-1] + x[k] - D[k]`` (``I[-1] = 0``) la producción
+queda determinada por el inventario: ``x[k] = I[k] - I[k-1] + D[k]``.  El
+modelo reducido se escribe solo en ``I``:
+
+* desaparecen las columnas ``x`` y las filas de balance;
+* ``I >= SST`` pasa de fila a cota inferior de la variable;
+* ``x >= 0`` queda como fila de dos coeficientes ``I[k] - I[k-1] >= -D[k]``;
+* la capacidad ``Σ_p x[p,k] <= Cap[k]`` conserva su forma dispersa.
+
+(Eliminar ``I`` en lugar de ``x`` daría filas acumuladas densas.)
+
+Sobre esas filas se propagan cotas de ``I`` hacia delante y hacia atrás en
+el tiempo, más la cota de capacidad acumulada ``Σ_p I[p,k] <= Σ_{j<=k} Cap[j]
+- Σ_p Σ_{j<=k} D[p,j]``.  Con las cotas resultantes:
+
+* los inventarios con ``U - L`` dentro de la tolerancia quedan fijos;
+* se descartan las filas ``x >= 0`` y de capacidad que las cotas ya implican
+  (las cotas se conservan en el modelo, así que descartarlas es exacto);
+* una cota inferior por encima de la superior demuestra que el problema es
+  infactible sin llamar a CBC.
+
+Con la capacidad de respaldo de ``preprocess_data`` (``Cap = Σ(D + SST)``)
+los primeros periodos quedan fijados y sus filas desaparecen.  Las
+reducciones no dependen del objetivo, de modo que sirven para los modelos
+lexicográfico, ponderado y de escenarios por igual.
+"""
+
+# ---------------------------------------------------------------------------
+# 1. IMPORTACIONES
+# ---------------------------------------------------------------------------
+import time
+from contextlib import nullcontext
+from typing import TYPE_CHECKING, NamedTuple
+
+import numpy as np
+
+if TYPE_CHECKING:
+    from .problem import PlanningProblem
+
+
+# ---------------------------------------------------------------------------
+# 2. PARÁMETROS
+# ---------------------------------------------------------------------------
+MAX_ROUNDS: int = 10          # pasadas adelante/atrás de propagación de cotas
+FEAS_RTOL: float = 1e-9       # tolerancia relativa a la escala de los datos
+
+
+# ---------------------------------------------------------------------------
+# 3. RESULTADO
+# ---------------------------------------------------------------------------
+
+class Reduction(NamedTuple):
+    """Cotas de ``I`` y filas que sobreviven (matrices SKU × periodo salvo ``keep_cap``)."""
+    lower: np.ndarray          # cota inferior de I
+    upper: np.ndarray          # cota superior de I (inf = sin cota)
+    fixed: np.ndarray          # bool: I fijado (lower == upper)
+    keep_nonneg: np.ndarray    # bool: fila x[p,k] >= 0 que se conserva
+    keep_cap: np.ndarray       # bool por periodo: fila de capacidad que se conserva
+    infeasible: bool
+    rounds: int
+    seconds: float
+
+    def stats(self) -> dict:
+        """Tamaño del modelo original frente al reducido (filas, columnas, no nulos)."""
+        n, n_t = self.lower.shape
+        original = {
+            "rows": 2 * n * n_t + n_t,
+            "columns": 2 * n * n_t,
+            # balance (2 en el primer periodo, 3 después) + SST + capacidad
+            "nonzeros": n * (3 * n_t - 1) + n * n_t + n * n_t,
+        }
+        # x[p,0] = I[p,0] + D[p,0] tiene un coeficiente; el resto, dos
+        width = np.full(n_t, 2)
+        width[0] = 1
+        reduced = {
+            "rows": int(self.keep_nonneg.sum() + self.keep_cap.sum()),
+            "columns": n * n_t,
+            "nonzeros": int((self.keep_nonneg * width).sum() + n * (width * self.keep_cap).sum()),
+        }
+        return {
+            "original": original,
+            "reduced": reduced,
+            "fixed_columns": int(self.fixed.sum()),
+            "finite_upper_bounds": int(np.isfinite(self.upper).sum()),
+            "dropped_nonneg_rows": int(self.keep_nonneg.size - self.keep_nonneg.sum()),
+            "dropped_capacity_rows": int(self.keep_cap.size - self.keep_cap.sum()),
+            "infeasible": self.infeasible,
+            "rounds": self.rounds,
+            "seconds": self.seconds,
+        }
+
+
+# ---------------------------------------------------------------------------
+# 4. PROPAGACIÓN DE COTAS
+# ---------------------------------------------------------------------------
+
+def _shift(a: np.ndarray) -> np.ndarray:
+    """Columna ``k-1`` de cada periodo, con ``I[-1] = 0``."""
+    return np.concatenate([np.zeros((a.shape[0], 1)), a[:, :-1]], axis=1)
+
+
+def _production_range(L, U, L_prev, U_prev, D, cap_k):
+    """Intervalo [xmin, xmax] de ``x[:,k]`` dadas las cotas de ``I[:,k]``, ``I[:,k-1]`` y la capacidad."""
+    xmin = np.maximum(0.0, L - U_prev + D)
+    xmax = np.minimum(U - L_prev + D, cap_k - (xmin.sum() - xmin))
+    return xmin, xmax
+
+
+def _raise(bound: np.ndarray, candidate: np.ndarray, tol: float) -> np.ndarray:
+    """Cota inferior mejorada solo si sube más de ``tol`` (evita arrastrar errores de redondeo)."""
+    return np.where(candidate > bound + tol, candidate, bound)
+
+
+def _lower(bound: np.ndarray, candidate: np.ndarray, tol: float) -> np.ndarray:
+    """Cota superior mejorada solo si baja más de ``tol``."""
+    return np.where(candidate < bound - tol, candidate, bound)
+
+
+def presolve(problem: "PlanningProblem", integer: bool = False, telemetry=None) -> Reduction:
+    """
+    Propaga cotas de inventario y marca las filas redundantes de ``problem``.
+
+    Con ``integer`` las cotas se redondean hacia dentro; la sustitución
+    ``x = I - I_prev + D`` solo conserva la integralidad de ``x`` si la
+    demanda es entera, así que en ese caso se exige (ValueError si no).
+    """
+    stage = telemetry.stage if telemetry is not None else (lambda name: nullcontext())
+    D = np.asarray(problem.demand, dtype=float)
+    cap = np.asarray(problem.cap, dtype=float)
+    if integer and not np.array_equal(D, np.round(D)):
+        raise ValueError("El presolve de modelos enteros requiere demanda entera")
+
+    with stage("presolve"):
+        t0 = time.perf_counter()
+        n, n_t = D.shape
+        scale = max(1.0, *(float(np.abs(a).max(initial=0.0)) for a in (D, problem.sst, cap)))
+        tol = FEAS_RTOL * scale
+
+        L = np.maximum(np.asarray(problem.sst, dtype=float), 0.0)
+        U = np.full_like(L, np.inf)
+        room = np.cumsum(cap) - np.cumsum(D, axis=1).sum(axis=0)
+
+        def crossed() -> bool:
+            return bool(np.any(L - U > tol))
+
+        rounds, infeasible = 0, False
+        while rounds < MAX_ROUNDS and not infeasible:
+            rounds += 1
+            L_old, U_old = L.copy(), U.copy()
+            U = _lower(U, room - (L.sum(axis=0) - L), tol)
+            zero = np.zeros(n)
+            for k in range(n_t):
+                L_prev, U_prev = (L[:, k - 1], U[:, k - 1]) if k else (zero, zero)
+                xmin, xmax = _production_range(L[:, k], U[:, k], L_prev, U_prev, D[:, k], cap[k])
+                L[:, k] = _raise(L[:, k], L_prev + xmin - D[:, k], tol)
+                U[:, k] = _lower(U[:, k], U_prev + xmax - D[:, k], tol)
+            # Con cotas cruzadas la propagación diverge: se para en cuanto aparecen
+            if crossed():
+                infeasible = True
+                break
+            for k in range(n_t - 1, 0, -1):
+                xmin, xmax = _production_range(L[:, k], U[:, k], L[:, k - 1], U[:, k - 1], D[:, k], cap[k])
+                U[:, k - 1] = _lower(U[:, k - 1], U[:, k] - xmin + D[:, k], tol)
+                L[:, k - 1] = _raise(L[:, k - 1], L[:, k] - xmax + D[:, k], tol)
+            if integer:
+                L, U = np.ceil(L - tol), np.floor(U + tol)
+            infeasible = crossed()
+            if np.array_equal(L, L_old) and np.array_equal(U, U_old):
+                break
+
+        fixed = (U - L <= tol) & ~infeasible
+        U = np.where(fixed, L, U)
+
+        # Fila redundante: su actividad extrema dentro de las cotas ya la cumple
+        keep_nonneg = ~(L - _shift(U) + D >= 0) | infeasible
+        keep_cap = ~((U - _shift(L) + D).sum(axis=0) <= cap) | infeasible
+        seconds = time.perf_counter() - t0
+
+    return Reduction(L, U, fixed, keep_nonneg, keep_cap, infeasible, rounds, seconds)
@@ -0,0 +1,191 @@
+"""
+problem.py
+==========
+
+Datos estáticos del problema de planificación en forma de arreglos NumPy.
+
+``PlanningProblem`` agrupa lo que ``preprocess_data`` devuelve como
+diccionarios (D, SST, EEX, Cap) más los costos por SKU, con matrices
+SKU × periodo alineadas con ``products`` y ``periods``.  Se carga una vez por
+libro y se reutiliza para construir tantos modelos como haga falta
+(escenarios, barridos de parámetros, ...).
+
+Si el libro trae las hojas ``Resources``/``Resource Capacity`` el problema
+incluye además la capacidad por línea (``resources.ResourceTable``) y los
+modelos construidos aquí añaden sus filas.
+"""
+
+# ---------------------------------------------------------------------------
+# 1. IMPORTACIONES
+# ---------------------------------------------------------------------------
+from contextlib import nullcontext
+from typing import Dict, List, NamedTuple, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+import pulp as lp
+
+from . import Bus_lex as lex
+from .costs import CostTable, cost_expression, eex_matrix, load_costs, read_cost_sheet
+from .presolve import Reduction
+from .resources import ResourceRows, ResourceTable, add_resource_rows, load_resources, read_resource_sheets
+from .validation import validate_frames
+
+
+# ---------------------------------------------------------------------------
+# 2. DATOS
+# ---------------------------------------------------------------------------
+
+class PlanningProblem(NamedTuple):
+    """Parámetros del modelo alineados con ``products`` (filas) y ``periods`` (columnas)."""
+    products: List[str]
+    periods: List[str]
+    demand: np.ndarray   # D   (SKU × periodo)
+    sst: np.ndarray      # SST (SKU × periodo)
+    eex: np.ndarray      # EEX (SKU × periodo)
+    cap: np.ndarray      # Cap (periodo)
+    costs: CostTable
+    resources: Optional[ResourceTable] = None   # capacidad por línea (hojas opcionales)
+
+    def as_dicts(self) -> Tuple[Dict, Dict, Dict, Dict]:
+        """Devuelve (D, SST, EEX, Cap) con las mismas claves que ``preprocess_data``."""
+        def to_dict(matrix: np.ndarray) -> Dict:
+            return {(p, t): matrix[i, j] for i, p in enumerate(self.products)
+                    for j, t in enumerate(self.periods)}
+        return to_dict(self.demand), to_dict(self.sst), to_dict(self.eex), dict(zip(self.periods, self.cap))
+
+    def with_demand(self, demand: np.ndarray) -> "PlanningProblem":
+        """Copia del problema con otra matriz de demanda (misma estructura)."""
+        demand = np.asarray(demand, dtype=float)
+        if demand.shape != self.demand.shape:
+            raise ValueError(f"La demanda debe tener forma {self.demand.shape}, no {demand.shape}")
+        return self._replace(demand=demand)
+
+
+def from_dicts(products: List[str], periods: List[str], D: Dict, SST: Dict, EEX: Dict, Cap: Dict,
+               costs: CostTable) -> PlanningProblem:
+    """Convierte la salida de ``preprocess_data`` a ``PlanningProblem``."""
+    def to_matrix(d: Dict) -> np.ndarray:
+        return np.array([[d[(p, t)] for t in periods] for p in products], dtype=float)
+    return PlanningProblem(list(products), list(periods), to_matrix(D), to_matrix(SST), to_matrix(EEX),
+                           np.array([Cap[t] for t in periods], dtype=float), costs)
+
+
+def load_problem(excel_file, cost_table: Optional[pd.DataFrame] = None, telemetry=None) -> PlanningProblem:
+    """Lee y preprocesa el libro una sola vez (mismo formato que ``Bus_lex``)."""
+    stage = telemetry.stage if telemetry is not None else (lambda name: nullcontext())
+    with stage("read_excel"):
+        df_sd, df_bc = lex.load_data(excel_file)
+    with stage("validate"):
+        validate_frames(df_sd, df_bc)
+    with stage("preprocess_data"):
+        P, T, D, SST, EEX, Cap = lex.preprocess_data(df_sd, df_bc)
+    with stage("load_costs"):
+        table = cost_table if cost_table is not None else read_cost_sheet(excel_file)
+        costs = load_costs(P, table, (lex.c_prod, lex.c_hold, lex.c_exc))
+    with stage("load_resources"):
+        sheets = read_resource_sheets(excel_file)
+        resources = load_resources(P, T, *sheets) if sheets is not None else None
+    return from_dicts(P, T, D, SST, EEX, Cap, costs)._replace(resources=resources)
+
+
+# ---------------------------------------------------------------------------
+# 3. MODELO BASE
+# ---------------------------------------------------------------------------
+
+class PlanningModel(NamedTuple):
+    """Modelo PuLP con las restricciones comunes y las referencias necesarias para extenderlo."""
+    model: lp.LpProblem
+    x: Dict
+    I: Dict
+    cost: lp.LpAffineExpression
+    production: lp.LpAffineExpression
+    reduction: Optional[Reduction] = None
+    resources: Optional[ResourceRows] = None    # reparto y filas por línea (si el problema las tiene)
+
+
+def build_planning_model(problem: PlanningProblem, name: str, integer: bool = False,
+                         reduction: Optional[Reduction] = None) -> PlanningModel:
+    """
+    Construye variables x/I y las restricciones de balance, stock de seguridad y
+    capacidad (agregada y, si hay ``problem.resources``, por línea).  El objetivo queda vacío: cada modelo (lexicográfico, ponderado,
+    escenario, ...) añade el suyo.
+
+    Con ``reduction`` (``presolve.presolve``) se construye el modelo reducido:
+    solo columnas I con las cotas propagadas, ``x`` como expresiones de I y
+    únicamente las filas no redundantes.  ``cost`` y ``production`` valen lo
+    mismo que en el modelo completo.  Una reducción infactible no se construye
+    (ValueError): el llamador debe comprobar ``reduction.infeasible`` antes.
+    """
+    if reduction is not None:
+        return _build_reduced_model(problem, name, integer, reduction)
+    P, T = problem.products, problem.periods
+    cat = "Integer" if integer else "Continuous"
+    m = lp.LpProblem(name, lp.LpMinimize)
+    x = lp.LpVariable.dicts("x", (P, T), lowBound=0, cat=cat)
+    I = lp.LpVariable.dicts("I", (P, T), lowBound=0, cat=cat)
+
+    # Nombres por índice (bal_i_k, sst_i_k, cap_k) para poder localizar las
+    # restricciones después (duales, cambios de lado derecho, ...)
+    D, SST, cap = problem.demand, problem.sst, problem.cap
+    for i, p in enumerate(P):
+        for k, t in enumerate(T):
+            if k == 0:
+                m += (x[p][t] - I[p][t] == D[i, k], f"bal_{i}_{k}")
+            else:
+                m += (I[p][T[k-1]] + x[p][t] - I[p][t] == D[i, k], f"bal_{i}_{k}")
+            m += (I[p][t] >= SST[i, k], f"sst_{i}_{k}")
+    for k, t in enumerate(T):
+        m += (lp.lpSum(x[p][t] for p in P) <= cap[k], f"cap_{k}")
+
+    rows = add_resource_rows(m, x, P, T, problem.resources, integer) if problem.resources is not None else None
+
+    cost = cost_expression(problem.costs, x, I, problem.eex, P, T)
+    production = lp.lpSum(x[p][t] for p in P for t in T)
+    return PlanningModel(m, x, I, cost, production, resources=rows)
+
+
+def _build_reduced_model(problem: PlanningProblem, name: str, integer: bool,
+                         reduction: Reduction) -> PlanningModel:
+    """
+    Modelo en el espacio de I: ``x[p][t]`` es la expresión ``I[k] - I[k-1] + D[k]``
+    y las filas conservadas se llaman ``pos_{i}_{k}`` (x >= 0) y ``cap_{k}``.
+    """
+    if reduction.infeasible:
+        raise ValueError("El presolve demostró que el problema es infactible")
+    P, T = problem.products, problem.periods
+    cat = "Integer" if integer else "Continuous"
+    m = lp.LpProblem(name, lp.LpMinimize)
+    I = lp.LpVariable.dicts("I", (P, T), lowBound=0, cat=cat)
+    D, costs = problem.demand, problem.costs
+    lower, upper = reduction.lower.tolist(), reduction.upper.tolist()
+
+    x = {}
+    for i, p in enumerate(P):
+        x[p] = {}
+        for k, t in enumerate(T):
+            v = I[p][t]
+            v.lowBound = lower[i][k]
+            v.upBound = upper[i][k] if np.isfinite(upper[i][k]) else None
+            terms = [(v, 1)] if k == 0 else [(v, 1), (I[p][T[k - 1]], -1)]
+            x[p][t] = lp.LpAffineExpression(terms, constant=float(D[i, k]))
+
+    for i, k in zip(*np.nonzero(reduction.keep_nonneg)):
+        m += (x[P[i]][T[k]] >= 0, f"pos_{i}_{k}")
+    for k in np.flatnonzero(reduction.keep_cap):
+        m += (lp.lpSum(x[p][T[k]] for p in P) <= problem.cap[k], f"cap_{k}")
+    # Las cotas del presolve solo usan la capacidad agregada: siguen siendo
+    # válidas con las filas por línea, que se añaden completas
+    rows = add_resource_rows(m, x, P, T, problem.resources, integer) if problem.resources is not None else None
+
+    # Σ_k c_prod·x[k] se telescopa a c_prod·(I[T-1] + Σ_k D[k])
+    coefs = np.repeat(costs.hold[:, None], len(T), axis=1)
+    coefs[:, -1] += costs.prod
+    terms = zip((I[p][t] for p in P for t in T), coefs.ravel().tolist())
+    last = T[-1]
+    demand_total = D.sum(axis=1)
+    constant = float(costs.prod @ demand_total
+                     + costs.exc @ eex_matrix(problem.eex, P, T).sum(axis=1))
+    cost = lp.LpAffineExpression(terms, constant=constant)
+    production = lp.LpAffineExpression([(I[p][last], 1) for p in P], constant=float(demand_total.sum()))
+    return PlanningModel(m, x, I, cost, production, reduction, rows)
@@ -0,0 +1,248 @@
+"""
+resources.py
+============
+
+Capacidad por recurso (línea) y periodo a partir de un consumo disperso.
+
+``Boundary Conditions`` da una sola capacidad agregada por periodo (``Cap``)
+y cada SKU consume una unidad de ella.  Dos hojas opcionales del libro
+describen además las líneas de la planta:
+
+* ``Resources``: una fila por par elegible ``Product ID | Resource | Rate``,
+  donde ``Rate`` es la capacidad del recurso que consume una unidad del SKU
+  producida en él;
+* ``Resource Capacity``: una fila por recurso ``Resource | <periodos>`` con
+  la capacidad disponible en cada periodo (mismas columnas ``MM-DD-YY`` que
+  ``Supply_Demand``, también como celdas de fecha; un periodo sin columna o
+  vacío no limita el recurso, pero al menos un periodo debe coincidir).
+
+Con esas hojas (``ResourceTable``) los modelos añaden, además de la
+capacidad agregada:
+
+* para un SKU con varias líneas elegibles, una variable de producción por
+  (SKU, línea, periodo) y la fila ``route_{i}_{k}`` ``Σ_r y = x``; un SKU con
+  una sola línea la usa con su propia ``x`` (sin variables ni filas extra);
+* la fila ``res_{r}_{k}`` ``Σ rate·y <= capacidad`` por recurso y periodo
+  con capacidad finita.
+
+Los SKU sin filas en ``Resources`` no consumen ningún recurso.  La tabla se
+guarda como arreglos dispersos (un elemento por par elegible, ordenados por
+SKU) y las filas se arman agrupando esos arreglos: con miles de pares el
+coste de construcción es proporcional a los pares, no a SKU × recursos.
+"""
+
+# ---------------------------------------------------------------------------
+# 1. IMPORTACIONES
+# ---------------------------------------------------------------------------
+import datetime
+from typing import Dict, List, NamedTuple, Optional, Sequence
+
+import numpy as np
+import pandas as pd
+import pulp as lp
+
+
+# ---------------------------------------------------------------------------
+# 2. PARÁMETROS
+# ---------------------------------------------------------------------------
+RESOURCE_SHEET: str = "Resources"
+CAPACITY_SHEET: str = "Resource Capacity"
+
+# Columna canónica -> alias aceptados (sin distinguir mayúsculas)
+COLUMNS = {
+    "Product ID": ("product id",),
+    "Resource": ("resource", "line"),
+    "Rate": ("rate", "consumption", "usage"),
+}
+
+USAGE_COLUMNS = ["Resource", "Period", "Used", "Capacity", "Utilization"]
+ARRAYS = ("sku", "resource", "rate", "capacity")
+
+
+class ResourceTable(NamedTuple):
+    """Pares (SKU, recurso) elegibles en forma dispersa, ordenados por SKU."""
+    names: List[str]           # recursos
+    sku: np.ndarray            # índice en ``products`` de cada par
+    resource: np.ndarray       # índice en ``names`` de cada par
+    rate: np.ndarray           # capacidad consumida por unidad producida
+    capacity: np.ndarray       # recurso × periodo (inf = sin límite)
+
+    def arrays(self) -> Dict[str, np.ndarray]:
+        """Arreglos de la tabla (para serializarla o compartirla junto al problema)."""
+        return {key: getattr(self, key) for key in ARRAYS}
+
+
+# ---------------------------------------------------------------------------
+# 3. LECTURA
+# ---------------------------------------------------------------------------
+
+def _normalize_columns(df: pd.DataFrame, required: Sequence[str], sheet: str) -> pd.DataFrame:
+    rename = {}
+    for col in df.columns:
+        key = str(col).strip().lower()
+        for field, aliases in COLUMNS.items():
+            if key in aliases:
+                rename[col] = field
+    df = df.rename(columns=rename)
+    missing = [c for c in required if c not in df.columns]
+    if missing:
+        raise ValueError(f"Faltan las columnas {missing} en la hoja '{sheet}'")
+    return df
+
+
+def _period_key(col) -> str:
+    """Encabezado de periodo como lo ve ``preprocess_data`` (las fechas de Excel pasan a ``MM-DD-YY``)."""
+    if isinstance(col, (datetime.date, pd.Timestamp)):
+        return col.strftime("%m-%d-%y")
+    return str(col).strip()
+
+
+def read_resource_sheets(excel_file) -> Optional[tuple]:
+    """(consumo, capacidad) de las hojas opcionales; ``None`` si el libro no tiene ``Resources``."""
+    with pd.ExcelFile(excel_file) as xl:
+        if RESOURCE_SHEET not in xl.sheet_names:
+            return None
+        if CAPACITY_SHEET not in xl.sheet_names:
+            raise ValueError(f"La hoja '{RESOURCE_SHEET}' necesita la hoja '{CAPACITY_SHEET}'")
+        return xl.parse(RESOURCE_SHEET), xl.parse(CAPACITY_SHEET)
+
+
+def load_resources(products: Sequence, periods: Sequence, consumption: pd.DataFrame,
+                   capacity: pd.DataFrame) -> ResourceTable:
+    """
+    Valida las hojas y las convierte en una ``ResourceTable`` alineada con
+    ``products`` y ``periods``.  Los SKU que no están en el modelo se ignoran;
+    un par repetido, una tasa no positiva, un recurso sin capacidad o una
+    hoja de capacidad sin ningún periodo del modelo son errores (ValueError).
+    """
+    consumption = _normalize_columns(consumption, ("Product ID", "Resource", "Rate"), RESOURCE_SHEET)
+    capacity = _normalize_columns(capacity, ("Resource",), CAPACITY_SHEET)
+    consumption = consumption.dropna(subset=["Product ID", "Resource"])
+    sku_ids = consumption["Product ID"].astype(str).str.strip()
+    resource_ids = consumption["Resource"].astype(str).str.strip()
+    rates = pd.to_numeric(consumption["Rate"], errors="coerce").to_numpy(dtype=float)
+
+    bad = sorted(set(sku_ids[~(np.isfinite(rates) & (rates > 0))]))
+    if bad:
+        raise ValueError(f"Tasas de consumo inválidas (vacías o <= 0) en '{RESOURCE_SHEET}' para los SKU: {bad}")
+    pairs = pd.DataFrame({"sku": sku_ids, "resource": resource_ids})
+    if pairs.duplicated().any():
+        dup = pairs[pairs.duplicated()].apply(tuple, axis=1).tolist()
+        raise ValueError(f"Pares SKU/recurso repetidos en '{RESOURCE_SHEET}': {dup}")
+
+    capacity = capacity.dropna(subset=["Resource"])
+    capacity = capacity.assign(Resource=capacity["Resource"].astype(str).str.strip())
+    if capacity["Resource"].duplicated().any():
+        raise ValueError(f"Recursos repetidos en '{CAPACITY_SHEET}': "
+                         f"{capacity.loc[capacity['Resource'].duplicated(), 'Resource'].tolist()}")
+    names = capacity["Resource"].tolist()
+    missing = sorted(set(resource_ids) - set(names))
+    if missing:
+        raise ValueError(f"Recursos sin capacidad en '{CAPACITY_SHEET}': {missing}")
+
+    columns = {_period_key(c): c for c in capacity.columns if c != "Resource"}
+    matched = [k for k, t in enumerate(periods) if _period_key(t) in columns]
+    if periods and not matched:
+        raise ValueError(f"Ninguna columna de '{CAPACITY_SHEET}' coincide con los periodos del modelo "
+                         f"({_period_key(periods[0])} … {_period_key(periods[-1])}); "
+                         f"columnas: {list(columns)[:10]}")
+    limits = np.full((len(names), len(periods)), np.inf)
+    for k in matched:
+        values = pd.to_numeric(capacity[columns[_period_key(periods[k])]], errors="coerce").to_numpy(dtype=float)
+        limits[:, k] = np.where(np.isnan(values), np.inf, values)
+    if (limits < 0).any():
+        raise ValueError(f"Capacidades negativas en '{CAPACITY_SHEET}'")
+
+    # Pares del modelo, en arreglos ordenados por SKU
+    sku_index = {str(p): i for i, p in enumerate(products)}
+    resource_index = {r: j for j, r in enumerate(names)}
+    known = sku_ids.map(sku_index).notna().to_numpy()
+    sku = sku_ids[known].map(sku_index).to_numpy(dtype=np.int64)
+    resource = resource_ids[known].map(resource_index).to_numpy(dtype=np.int64)
+    order = np.lexsort((resource, sku))
+    return ResourceTable(names, sku[order], resource[order], rates[known][order], limits)
+
+
+def from_arrays(names: List[str], arrays: Dict[str, np.ndarray]) -> ResourceTable:
+    """Inverso de ``ResourceTable.arrays``."""
+    return ResourceTable(list(names), *(arrays[key] for key in ARRAYS))
+
+
+# ---------------------------------------------------------------------------
+# 4. FILAS DEL MODELO
+# ---------------------------------------------------------------------------
+
+class ResourceRows(NamedTuple):
+    """Producción de cada par elegible por periodo y nombres de las filas añadidas."""
+    flows: List[list]          # flows[j][k]: variable o expresión de producción del par j en el periodo k
+    rows: Dict[tuple, str]     # (recurso, periodo) -> nombre de la fila ``res_{r}_{k}``
+
+
+def add_resource_rows(model: lp.LpProblem, x, products: Sequence, periods: Sequence,
+                      resources: ResourceTable, integer: bool = False) -> ResourceRows:
+    """
+    Añade a ``model`` el reparto por líneas y las filas de capacidad por
+    recurso (ver el módulo).  ``x[p][t]`` puede ser una variable o una
+    expresión (modelo reducido por ``presolve``).
+    """
+    cat = "Integer" if integer else "Continuous"
+    n_t = len(periods)
+    sku, resource, rate = resources.sku, resources.resource, resources.rate
+    starts = np.searchsorted(sku, np.arange(len(products) + 1)).tolist()
+
+    # Producción por par: la propia x si el SKU tiene una sola línea
+    flows: List[list] = [None] * len(sku)
+    for i in np.flatnonzero(np.diff(starts)).tolist():
+        p, pairs = products[i], range(starts[i], starts[i + 1])
+        if len(pairs) == 1:
+            flows[pairs[0]] = [x[p][t] for t in periods]
+            continue
+        for j in pairs:
+            r = int(resource[j])
+            flows[j] = [lp.LpVariable(f"y_{i}_{r}_{k}", lowBound=0, cat=cat) for k in range(n_t)]
+        for k, t in enumerate(periods):
+            route = lp.LpAffineExpression([(flows[j][k], 1) for j in pairs])
+            model += (route - x[p][t] == 0, f"route_{i}_{k}")
+
+    # Capacidad: pares agrupados por recurso
+    rows = {}
+    by_resource = np.argsort(resource, kind="stable")
+    bounds = np.searchsorted(resource[by_resource], np.arange(len(resources.names) + 1))
+    rates = rate.tolist()
+    for r in range(len(resources.names)):
+        group = by_resource[bounds[r]:bounds[r + 1]].tolist()
+        if not group:
+            continue
+        for k in np.flatnonzero(np.isfinite(resources.capacity[r])).tolist():
+            # Variables como términos de una vez; las expresiones (x reducida) se suman aparte
+            terms, exprs = [], []
+            for j in group:
+                flow = flows[j][k]
+                (terms if isinstance(flow, lp.LpVariable) else exprs).append((flow, rates[j]))
+            expr = lp.LpAffineExpression(terms)
+            for flow, a in exprs:
+                expr.addInPlace(flow * a)
+            name = f"res_{r}_{k}"
+            model += (expr <= float(resources.capacity[r, k]), name)
+            rows[(r, k)] = name
+    return ResourceRows(flows, rows)
+
+
+# ---------------------------------------------------------------------------
+# 5. RESULTADOS
+# ---------------------------------------------------------------------------
+
+def usage_frame(model: lp.LpProblem, resources: ResourceTable, resource_rows: ResourceRows,
+                periods: Sequence) -> pd.DataFrame:
+    """Uso de cada recurso por periodo en la solución de ``model`` (``USAGE_COLUMNS``)."""
+    used = np.zeros(resources.capacity.shape)
+    for j, (r, rate) in enumerate(zip(resources.resource.tolist(), resources.rate.tolist())):
+        used[r] += rate * np.array([lp.value(flow) or 0.0 for flow in resource_rows.flows[j]], dtype=float)
+    r, k = np.nonzero(used > 0)
+    capacity = resources.capacity[r, k]
+    with np.errstate(divide="ignore", invalid="ignore"):
+        utilization = np.where(np.isfinite(capacity) & (capacity > 0), used[r, k] / capacity, np.nan)
+    return pd.DataFrame({"Resource": np.array(resources.names, dtype=object)[r],
+                         "Period": np.array(periods, dtype=object)[k], "Used": used[r, k],
+                         "Capacity": np.where(np.isfinite(capacity), capacity, np.nan),
+                         "Utilization": utilization}, columns=USAGE_COLUMNS)
@@ -0,0 +1,174 @@
+"""
+scaling.py
+==========
+
+Escalado de filas, columnas y objetivo de un modelo PuLP antes de CBC.
+
+Los modelos mezclan costes unitarios (~5), costes de inventario (~0.15),
+demandas totales de millones y candados de coste del orden de 1e8.  Con ese
+rango el simplex necesita más iteraciones y las tolerancias absolutas de CBC
+(1e-7) pueden declarar infactible un candado que no lo es.  ``scaled`` deja el
+modelo, solo mientras dura la resolución, como
+
+    min σ·cᵀC·x'   s.a.   R·A·C·x'  (≤, =, ≥)  R·b,   x = C·x'
+
+con ``R`` y ``C`` diagonales y ``σ`` escalar:
+
+* los factores salen de unas pasadas de media geométrica sobre la matriz
+  dispersa (``PASSES``), de modo que cada fila y cada columna quedan con
+  coeficientes alrededor de 1; el objetivo se escala a la misma magnitud;
+* todos los factores son potencias de 2: escalar y desescalar es exacto;
+* las columnas enteras no se escalan (``x'`` dejaría de ser entero).
+
+Al salir se restauran las filas, cotas y el objetivo originales y se
+desescalan los resultados que lee el llamador: ``varValue`` y ``dj`` de cada
+variable, ``pi`` y ``slack`` de cada fila.  Las filas del modelo se
+sustituyen por copias escaladas (no se modifican), así que las expresiones
+que el llamador conserva (``pm.cost``, ...) nunca cambian.
+
+Los informes de rangos de CBC (``sensitivity``) quedarían en unidades
+escaladas: esas resoluciones no se escalan.
+
+CBC ya escala cada LP internamente.  En los libros sintéticos
+(``benchmarks.scaling``) las filas de balance, stock y capacidad tienen
+coeficientes ±1 y no se escalan; la fase 2 lexicográfica (candado de coste)
+sí, y CBC necesita entonces más iteraciones y tiempo, así que el escalado
+está desactivado por defecto (``ENABLED``) y queda disponible por resolución
+(``solver.solve(..., scale=True)``) para modelos con coeficientes propios de
+rangos muy distintos.
+"""
+
+# ---------------------------------------------------------------------------
+# 1. IMPORTACIONES
+# ---------------------------------------------------------------------------
+from contextlib import contextmanager
+from typing import Dict, Iterator, List, NamedTuple, Optional
+
+import numpy as np
+import pulp as lp
+
+
+# ---------------------------------------------------------------------------
+# 2. PARÁMETROS
+# ---------------------------------------------------------------------------
+ENABLED: bool = False        # escalar por defecto las resoluciones de ``solver.solve``
+PASSES: int = 4              # pasadas de media geométrica (filas y columnas alternadas)
+MIN_RANGE: float = 16.0      # no se escala un modelo cuyo rango de coeficientes ya es menor
+
+
+class Scaling(NamedTuple):
+    """Factores aplicados (``x = col[v]·x'``, fila escalada = ``row[name]``·fila, objetivo = ``objective``·f)."""
+    row: Dict[str, float]
+    col: Dict[lp.LpVariable, float]
+    objective: float
+
+
+# ---------------------------------------------------------------------------
+# 3. FACTORES
+# ---------------------------------------------------------------------------
+
+def _centre(log_values: np.ndarray, index: np.ndarray, size: int) -> np.ndarray:
+    """``-(max + min) / 2`` de ``log_values`` por grupo ``index`` (0 en grupos vacíos)."""
+    hi = np.full(size, -np.inf)
+    lo = np.full(size, np.inf)
+    np.maximum.at(hi, index, log_values)
+    np.minimum.at(lo, index, log_values)
+    out = -(hi + lo) / 2
+    out[~np.isfinite(out)] = 0.0
+    return out
+
+
+def factors(model: lp.LpProblem) -> Optional[Scaling]:
+    """
+    Factores de escala de ``model`` (potencias de 2); ``None`` si el rango de
+    coeficientes ya es menor que ``MIN_RANGE`` y no vale la pena escalar.
+    """
+    variables: List[lp.LpVariable] = model.variables()
+    position = {v.name: j for j, v in enumerate(variables)}
+    names = list(model.constraints)
+    rows, cols, values = [], [], []
+    for i, name in enumerate(names):
+        for v, a in model.constraints[name].expr.items():
+            if a:
+                rows.append(i)
+                cols.append(position[v.name])
+                values.append(a)
+    if not values:
+        return None
+    rows, cols = np.asarray(rows), np.asarray(cols)
+    log_a = np.log2(np.abs(np.asarray(values, dtype=float)))
+    if np.ptp(log_a) < np.log2(MIN_RANGE):
+        return None
+
+    scalable = np.array([v.cat == lp.LpContinuous for v in variables])
+    log_r, log_c = np.zeros(len(names)), np.zeros(len(variables))
+    for _ in range(PASSES):
+        log_r = _centre(log_a + log_c[cols], rows, len(names))
+        log_c = np.where(scalable, _centre(log_a + log_r[rows], cols, len(variables)), 0.0)
+    log_r, log_c = np.rint(log_r), np.rint(log_c)
+
+    # El objetivo como una fila más, tras escalar las columnas
+    terms = [(position[v.name], a) for v, a in model.objective.items() if a] if model.objective else []
+    log_o = 0.0
+    if terms:
+        j, a = (np.asarray(t) for t in zip(*terms))
+        log_obj = np.log2(np.abs(a.astype(float))) + log_c[j.astype(int)]
+        log_o = float(np.rint(-(log_obj.max() + log_obj.min()) / 2))
+
+    return Scaling(dict(zip(names, np.exp2(log_r).tolist())),
+                   dict(zip(variables, np.exp2(log_c).tolist())), float(2.0 ** log_o))
+
+
+# ---------------------------------------------------------------------------
+# 4. APLICACIÓN
+# ---------------------------------------------------------------------------
+
+def _scaled_expr(expr: lp.LpAffineExpression, col: Dict[lp.LpVariable, float], factor: float,
+                 constant: float) -> lp.LpAffineExpression:
+    return lp.LpAffineExpression([(v, a * factor * col[v]) for v, a in expr.items()], constant=constant * factor)
+
+
+@contextmanager
+def scaled(model: lp.LpProblem, scaling: Optional[Scaling] = None) -> Iterator[Optional[Scaling]]:
+    """
+    Escala ``model`` mientras dura el ``with`` (ver el módulo) y devuelve los
+    factores usados (``None`` si no se escaló).  Al salir restaura el modelo
+    y desescala valores primales, costes reducidos, duales y holguras.
+    """
+    scaling = scaling or factors(model)
+    if scaling is None:
+        yield None
+        return
+    row, col, sigma = scaling
+    originals = dict(model.constraints)
+    objective = model.objective
+    bounds = {v: (v.lowBound, v.upBound) for v in col}
+    for name, constraint in originals.items():
+        scaled_row = lp.LpConstraint(_scaled_expr(constraint.expr, col, row[name], 0.0), constraint.sense, name)
+        scaled_row.constant = constraint.constant * row[name]
+        model.constraints[name] = scaled_row
+    if objective is not None:
+        model.objective = _scaled_expr(objective, col, sigma, objective.constant)
+    for v, c in col.items():
+        if c != 1.0:
+            low, up = bounds[v]
+            v.lowBound = None if low is None else low / c
+            v.upBound = None if up is None else up / c
+            if v.varValue is not None:
+                v.varValue /= c     # solución inicial de un ``mipstart``
+    try:
+        yield scaling
+    finally:
+        for name, constraint in originals.items():
+            solved = model.constraints[name]
+            constraint.pi = None if solved.pi is None else solved.pi * row[name] / sigma
+            constraint.slack = None if solved.slack is None else solved.slack / row[name]
+            model.constraints[name] = constraint
+        model.objective = objective
+        for v, c in col.items():
+            if c != 1.0:
+                v.lowBound, v.upBound = bounds[v]
+            if v.varValue is not None:
+                v.varValue *= c
+            if v.dj is not None:
+                v.dj = v.dj / (sigma * c)
@@ -0,0 +1,250 @@
+"""
+scenarios.py
+============
+
+Resolución por lotes de escenarios de demanda.
+
+Un libro base se lee y preprocesa una sola vez (``problem.load_problem``);
+cada escenario solo sustituye la matriz de demanda, de modo que todos comparten
+capacidad, stock de seguridad, costos y la misma estructura de restricciones.
+Los escenarios se resuelven en paralelo en un pool de procesos: el problema
+base se envía una vez a cada proceso (``initializer``) y cada tarea solo lleva
+su matriz de demanda.
+
+Definición de escenarios (lista JSON)::
+
+    [{"name": "optimista", "demand_factor": 1.1},
+     {"name": "pesimista", "demand_factor": 0.9, "sku_factors": {"21A": 0.8}},
+     {"name": "mc", "samples": 20, "cv": 0.1, "seed": 0}]
+
+y/o hojas ``Scenario*`` en el libro base con ``Product ID`` y columnas de
+periodo (demanda efectiva; las celdas vacías toman la demanda base).
+"""
+
+# ---------------------------------------------------------------------------
+# 1. IMPORTACIONES
+# ---------------------------------------------------------------------------
+import time
+from concurrent.futures import ProcessPoolExecutor
+from typing import Callable, Iterator, List, Optional, Sequence, Tuple, Union
+
+import numpy as np
+import pandas as pd
+import pulp as lp
+
+from .cores import SCHEDULER
+from .costs import sku_key
+from .presolve import presolve
+from .problem import PlanningProblem, build_planning_model
+from .shared import SharedHandle, attach_problem, share_problem
+from .solver import solve
+from .telemetry import RunTelemetry
+
+
+# ---------------------------------------------------------------------------
+# 2. PARÁMETROS
+# ---------------------------------------------------------------------------
+SCENARIO_SHEET_PREFIX: str = "Scenario"
+MODELS = ("lex", "weighted")
+
+# Holgura relativa al fijar el coste óptimo de la fase 1 en la fase 2
+COST_LOCK_RTOL: float = 1e-7
+
+
+# ---------------------------------------------------------------------------
+# 3. DEFINICIÓN DE ESCENARIOS
+# ---------------------------------------------------------------------------
+
+def _apply_spec(problem: PlanningProblem, spec: dict) -> np.ndarray:
+    demand = problem.demand * float(spec.get("demand_factor", 1.0))
+    for sku, f in spec.get("sku_factors", {}).items():
+        if sku not in problem.products:
+            raise ValueError(f"Escenario '{spec['name']}': SKU desconocido '{sku}'")
+        demand[problem.products.index(sku), :] *= float(f)
+    for period, f in spec.get("period_factors", {}).items():
+        if period not in problem.periods:
+            raise ValueError(f"Escenario '{spec['name']}': periodo desconocido '{period}'")
+        demand[:, problem.periods.index(period)] *= float(f)
+    return demand
+
+
+def parse_scenarios(problem: PlanningProblem, specs: List[dict]) -> List[Tuple[str, np.ndarray]]:
+    """
+    Convierte la lista de definiciones en pares (nombre, matriz de demanda).
+
+    Claves admitidas: ``demand_factor``, ``sku_factors``, ``period_factors`` y,
+    para muestras aleatorias, ``samples``/``cv``/``seed`` (ruido lognormal
+    multiplicativo de media 1 aplicado sobre el resultado de los factores).
+    """
+    scenarios = []
+    for n, spec in enumerate(specs):
+        if not isinstance(spec, dict):
+            raise ValueError("Cada escenario debe ser un objeto JSON")
+        spec = {"name": f"scenario-{n + 1}", **spec}
+        demand = _apply_spec(problem, spec)
+        samples = int(spec.get("samples", 0))
+        if samples <= 0:
+            scenarios.append((str(spec["name"]), demand))
+            continue
+        cv = float(spec.get("cv", 0.1))
+        sigma = np.sqrt(np.log1p(cv ** 2))
+        rng = np.random.default_rng(spec.get("seed"))
+        for k in range(samples):
+            noise = rng.lognormal(-sigma ** 2 / 2, sigma, size=demand.shape)
+            scenarios.append((f"{spec['name']}-{k + 1:03d}", demand * noise))
+    return scenarios
+
+
+def read_scenario_sheets(excel_file, problem: PlanningProblem) -> List[Tuple[str, np.ndarray]]:
+    """Escenarios definidos como hojas ``Scenario*`` del libro base."""
+    scenarios = []
+    with pd.ExcelFile(excel_file) as xl:
+        for sheet in xl.sheet_names:
+            if not sheet.startswith(SCENARIO_SHEET_PREFIX):
+                continue
+            df = xl.parse(sheet)
+            if "Product ID" not in df.columns:
+                raise ValueError(f"La hoja '{sheet}' debe tener la columna 'Product ID'")
+            if not any(t in df.columns for t in problem.periods):
+                raise ValueError(f"La hoja '{sheet}' no tiene columnas de periodo del libro base")
+            # SKU como texto en ambos lados (un SKU numérico del modelo coincide con su fila)
+            df = df.set_index(df["Product ID"].map(sku_key))
+            values = df.reindex(index=[sku_key(p) for p in problem.products],
+                                columns=problem.periods).to_numpy(dtype=float)
+            demand = np.where(np.isnan(values), problem.demand, values)
+            scenarios.append((sheet[len(SCENARIO_SHEET_PREFIX):].strip(" _-") or sheet, demand))
+    return scenarios
+
+
+# ---------------------------------------------------------------------------
+# 4. RESOLUCIÓN
+# ---------------------------------------------------------------------------
+
+def solve_scenario(problem: PlanningProblem, name: str, model: str = "lex", alpha: float = 0.9,
+                   wc: float = 1.0, ws: float = 10.0, telemetry: Optional[RunTelemetry] = None,
+                   reduce: bool = True) -> dict:
+    """
+    Resuelve un escenario con el modelo lexicográfico (coste y luego shortfall,
+    sobre el mismo modelo) o weighted‑sum, y devuelve una fila de la tabla comparativa.
+    Con ``reduce`` (por defecto) el modelo pasa antes por ``presolve``.
+    """
+    if model not in MODELS:
+        raise ValueError(f"Modelo desconocido '{model}' (opciones: {', '.join(MODELS)})")
+    t0 = time.perf_counter()
+    total_demand = float(problem.demand.sum())
+    s = lp.LpVariable("shortfall", lowBound=0)
+
+    # Cada escenario tiene su demanda: las cotas se propagan por escenario, y
+    # si se cruzan el escenario es infactible sin llegar a CBC
+    reduction = presolve(problem, telemetry=telemetry) if reduce else None
+    if reduction is not None and reduction.infeasible:
+        status, pm = lp.LpStatusInfeasible, None
+    else:
+        pm = build_planning_model(problem, f"scenario_{model}", reduction=reduction)
+        m = pm.model
+
+    if pm is None:
+        pass
+    elif model == "lex":
+        m.setObjective(pm.cost)
+        status = solve(m, "scenario_lex_phase1", telemetry)
+        if status == lp.LpStatusOptimal:
+            f_star = lp.value(pm.cost)
+            m += pm.cost <= f_star + COST_LOCK_RTOL * max(1.0, abs(f_star))
+            m += pm.production + s >= alpha * total_demand
+            m.setObjective(s)
+            status = solve(m, "scenario_lex_phase2", telemetry)
+    else:
+        m += s >= alpha * total_demand - pm.production
+        m.setObjective(wc * pm.cost + ws * s)
+        status = solve(m, "scenario_weighted", telemetry)
+
+    optimal = status == lp.LpStatusOptimal
+    production = lp.value(pm.production) if optimal else None
+    return {
+        "scenario": name,
+        "status": lp.LpStatus[status],
+        "total_demand": total_demand,
+        "total_production": production,
+        "cost": lp.value(pm.cost) if optimal else None,
+        "shortfall": s.value() if optimal else None,
+        "service_level": production / total_demand if optimal and total_demand else None,
+        "seconds": time.perf_counter() - t0,
+    }
+
+
+# En los procesos del pool el problema base y las demandas de todos los
+# escenarios viven en memoria compartida (``shared``); las tareas solo llevan
+# el índice del escenario.  Solo ``_init_worker`` (initializer del pool) toca
+# estas variables: en línea se pasan como argumentos, porque las vistas
+# resuelven peticiones concurrentes en hilos del mismo proceso.
+_BASE: Optional[PlanningProblem] = None
+_DEMANDS: Optional[Sequence[np.ndarray]] = None
+
+
+def _init_worker(problem: Union[PlanningProblem, SharedHandle], demands: Optional[Sequence[np.ndarray]] = None,
+                 cores: Optional[int] = None) -> None:
+    global _BASE, _DEMANDS
+    if isinstance(problem, SharedHandle):
+        problem, arrays = attach_problem(problem)
+        demands = arrays["scenario_demand"]
+    _BASE, _DEMANDS = problem, demands
+    if cores is not None:
+        SCHEDULER.reset(cores)
+
+
+def _solve_in_worker(index: int, name: str, model: str, alpha: float, wc: float, ws: float,
+                     base: Optional[Tuple[PlanningProblem, Sequence[np.ndarray]]] = None) -> Tuple[dict, List[dict]]:
+    problem, demands = base or (_BASE, _DEMANDS)
+    tel = RunTelemetry()
+    row = solve_scenario(problem.with_demand(demands[index]), name, model, alpha, wc, ws, tel)
+    return row, tel.solves
+
+
+def solve_scenarios(problem: PlanningProblem, scenarios: List[Tuple[str, np.ndarray]],
+                    model: str = "lex", alpha: float = 0.9, wc: float = 1.0, ws: float = 10.0,
+                    max_workers: Optional[int] = None,
+                    telemetry: Optional[RunTelemetry] = None,
+                    dispatch: Optional[Callable[..., Iterator[dict]]] = None) -> pd.DataFrame:
+    """
+    Resuelve todos los escenarios (en paralelo si hay más de un proceso) y
+    devuelve la tabla comparativa en el orden de entrada.
+
+    Los escenarios son LPs de un hilo: cada proceso del pool ocupa un núcleo
+    de ``SCHEDULER``.  El problema y las demandas se copian una vez a memoria
+    compartida; cada tarea solo envía el índice de su escenario.  Con
+    ``dispatch`` (ver ``tasks``) cada escenario es una tarea ``"scenario"``.
+    """
+    if model not in MODELS:
+        raise ValueError(f"Modelo desconocido '{model}' (opciones: {', '.join(MODELS)})")
+    workers = SCHEDULER.pool_workers(len(scenarios), max_workers)
+
+    names = [name for name, _ in scenarios]
+    if dispatch is not None:
+        workers = 1
+        demands = np.stack([np.asarray(demand, dtype=float) for _, demand in scenarios])
+        payloads = [{"index": i, "name": name, "model": model, "alpha": alpha, "wc": wc, "ws": ws}
+                    for i, name in enumerate(names)]
+        results = [(r["row"], r["solves"])
+                   for r in dispatch(problem, "scenario", payloads, {"scenario_demand": demands})]
+    elif workers == 1:
+        base = (problem, [demand for _, demand in scenarios])
+        results = [_solve_in_worker(i, name, model, alpha, wc, ws, base) for i, name in enumerate(names)]
+    else:
+        demands = np.stack([np.asarray(demand, dtype=float) for _, demand in scenarios])
+        with SCHEDULER.lease(workers) as workers, \
+                share_problem(problem, {"scenario_demand": demands}) as (handle, _):
+            del demands
+            with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker,
+                                     initargs=(handle, None, 1)) as pool:
+                futures = [pool.submit(_solve_in_worker, i, name, model, alpha, wc, ws)
+                           for i, name in enumerate(names)]
+                results = [f.result() for f in futures]
+
+    # Las resoluciones de los procesos hijos se agregan a la telemetría del padre
+    if telemetry is not None:
+        telemetry.record_allocation("scenarios", workers, 1, SCHEDULER.cores)
+        for _, solves in results:
+            for record in solves:
+                telemetry.record_solve(record)
+    return pd.DataFrame([row for row, _ in results])
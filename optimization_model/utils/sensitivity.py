@@ -0,0 +1,227 @@
+"""
+sensitivity.py
+==============
+
+Análisis de sensibilidad de un LP ya resuelto: precios sombra, costos
+reducidos y rangos de lado derecho y de coeficientes de la función objetivo.
+
+CBC calcula los rangos sobre la base óptima (``printingOptions rhs`` y
+``printingOptions objective``) en la misma llamada que resuelve el modelo: se
+piden antes de que PuLP escriba su solución, así que no hace falta una segunda
+resolución.  Para una fila con dual ``π`` y rango ``[lo, hi]`` del lado
+derecho, cambiar el lado derecho a ``b' ∈ [lo, hi]`` cambia el objetivo en
+``π · (b' - b)`` sin volver a optimizar; lo mismo para el coeficiente de
+costo ``c' ∈ [lo, hi]`` de una variable: la solución no cambia.
+
+Los modelos de ``Script_Maestro`` nombran las filas que interesan a los
+planificadores:
+
+* ``cap_{k}``: capacidad del periodo ``k``;
+* ``coverage``: cobertura ``Σx + s >= α·ΣD`` (su rango se traduce a ``α``);
+* ``cost_lock``: coste ``<= f★`` de la fase 2 lexicográfica.
+
+Solo aplica a LPs; en un MIP los duales no tienen este significado.
+"""
+
+# ---------------------------------------------------------------------------
+# 1. IMPORTACIONES
+# ---------------------------------------------------------------------------
+import csv
+import math
+import os
+import shutil
+import tempfile
+from typing import Dict, List, NamedTuple, Optional, Sequence, Tuple
+
+import pulp as lp
+
+from .solver import SolveBudget, solve
+
+
+# ---------------------------------------------------------------------------
+# 2. PARÁMETROS
+# ---------------------------------------------------------------------------
+TOL: float = 1e-6                    # holgura por debajo de la cual una fila se considera activa
+CBC_INFINITY: float = 1e100          # CBC escribe 1.0e100 cuando el rango no tiene límite
+
+CAPACITY_PREFIX = "cap_"
+COVERAGE = "coverage"
+COST_LOCK = "cost_lock"
+
+
+# ---------------------------------------------------------------------------
+# 3. RANGOS DE CBC
+# ---------------------------------------------------------------------------
+
+class Ranging(NamedTuple):
+    """Aumento y disminución admisibles (deltas ≥ 0) por nombre de fila y de variable."""
+    rows: Dict[str, Tuple[float, float]]
+    columns: Dict[str, Tuple[float, float]]
+
+
+def _read_ranging(path: str, names: Sequence[str]) -> Dict[str, Tuple[float, float]]:
+    """
+    Lee un informe de rangos de CBC (``índice,nombre,aumento,var,disminución,var``).
+
+    PuLP escribe el MPS con nombres genéricos, así que se usa el índice y
+    ``names`` en el mismo orden que el MPS.
+    """
+    def value(text: str) -> float:
+        v = float(text)
+        return math.inf if v >= CBC_INFINITY else v
+
+    ranges = {}
+    with open(path, newline="") as fh:
+        reader = csv.reader(fh)
+        next(reader, None)
+        for row in reader:
+            if len(row) >= 5 and row[0].strip().isdigit():
+                ranges[names[int(row[0])]] = (value(row[2]), value(row[4]))
+    return ranges
+
+
+def solve_with_ranging(model: lp.LpProblem, label: str, telemetry=None,
+                       budget: Optional[SolveBudget] = None) -> Tuple[int, Optional[Ranging]]:
+    """
+    Resuelve ``model`` y devuelve (estado, rangos); ``None`` si no es óptimo o es un MIP.
+
+    CBC resuelve, escribe los dos informes de rangos y vuelve a resolver en
+    caliente (0 iteraciones) antes de la solución que lee PuLP: el cálculo de
+    rangos deja los duales internos alterados y esa segunda pasada los restaura.
+
+    En algunos modelos CBC 2.10 aborta (violación de segmento) al escribir los
+    rangos sobre el modelo presuelto; entonces se repite sin presolve (más
+    lento, pero correcto) y, si también falla, se resuelve sin rangos.
+    """
+    if model.isMIP():
+        return solve(model, label, telemetry, budget=budget), None
+    workdir = tempfile.mkdtemp(prefix="cbc-ranging-")
+    try:
+        rhs_path, obj_path = os.path.join(workdir, "rhs.csv"), os.path.join(workdir, "obj.csv")
+        options = ["initialSolve",
+                   "printingOptions rhs", f"solution {rhs_path}",
+                   "printingOptions objective", f"solution {obj_path}"]
+        try:
+            status = solve(model, label, telemetry, options=options, budget=budget, scale=False)
+        except lp.PulpSolverError:
+            try:
+                status = solve(model, label, telemetry, options=["presolve off"] + options, budget=budget,
+                               scale=False)
+            except lp.PulpSolverError:
+                return solve(model, label, telemetry, budget=budget), None
+        if status != lp.LpStatusOptimal or not os.path.exists(obj_path):
+            return status, None
+        rows = _read_ranging(rhs_path, list(model.constraints))
+        columns = _read_ranging(obj_path, [v.name for v in model.variables()])
+        return status, Ranging(rows, columns)
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+
+
+# ---------------------------------------------------------------------------
+# 4. INFORMES
+# ---------------------------------------------------------------------------
+
+def _finite(v: Optional[float]) -> Optional[float]:
+    """``None`` para valores no finitos (JSON estricto)."""
+    return float(v) if v is not None and math.isfinite(v) else None
+
+
+def row_sensitivity(model: lp.LpProblem, name: str, ranging: Optional[Ranging]) -> dict:
+    """Dual, holgura y rango del lado derecho de la fila ``name``."""
+    c = model.constraints[name]
+    rhs = -c.constant
+    up, down = ranging.rows.get(name, (math.nan, math.nan)) if ranging else (math.nan, math.nan)
+    return {
+        "dual": _finite(c.pi),
+        "slack": _finite(c.slack),
+        "rhs": _finite(rhs),
+        "rhs_low": _finite(rhs - down),
+        "rhs_high": _finite(rhs + up),
+    }
+
+
+def _column_ranges(model: lp.LpProblem, variables: List[lp.LpVariable],
+                   ranging: Optional[Ranging]) -> Tuple[List, List]:
+    low, high = [], []
+    coefs = model.objective
+    for v in variables:
+        c = coefs.get(v, 0.0)
+        up, down = ranging.columns.get(v.name, (math.nan, math.nan)) if ranging else (math.nan, math.nan)
+        low.append(_finite(c - down))
+        high.append(_finite(c + up))
+    return low, high
+
+
+def sensitivity_report(model: lp.LpProblem, ranging: Optional[Ranging], x: Dict,
+                       products: Sequence, periods: Sequence, total_demand: float) -> dict:
+    """
+    Informe de sensibilidad de un modelo de ``Script_Maestro``.
+
+    * ``capacity``: por periodo, dual, holgura y rango de ``Cap``;
+    * ``coverage``: dual de la cobertura y rango equivalente de ``α``;
+    * ``cost_lock``: dual del presupuesto de coste (fase 2 lexicográfica);
+    * ``production``: por SKU × periodo, producción, costo reducido y rango
+      del coeficiente de ``x`` en el objetivo.
+
+    Si la resolución no fue óptima solo se informa el estado.
+    """
+    status = lp.LpStatus[model.status]
+    if model.status != lp.LpStatusOptimal:
+        return {"status": status, "objective": None, "ranging": False, "capacity": None,
+                "coverage": None, "cost_lock": None, "production": None}
+
+    capacity: Dict[str, list] = {"period": [], "dual": [], "slack": [], "rhs": [], "rhs_low": [], "rhs_high": []}
+    for k, t in enumerate(periods):
+        name = f"{CAPACITY_PREFIX}{k}"
+        if name not in model.constraints:
+            continue
+        row = row_sensitivity(model, name, ranging)
+        capacity["period"].append(t)
+        for key in ("dual", "slack", "rhs", "rhs_low", "rhs_high"):
+            capacity[key].append(row[key])
+
+    coverage = None
+    if COVERAGE in model.constraints:
+        coverage = row_sensitivity(model, COVERAGE, ranging)
+        scale = total_demand if total_demand else math.nan
+        for key, src in (("alpha", "rhs"), ("alpha_low", "rhs_low"), ("alpha_high", "rhs_high")):
+            coverage[key] = _finite(coverage[src] / scale) if coverage[src] is not None else None
+
+    cost_lock = row_sensitivity(model, COST_LOCK, ranging) if COST_LOCK in model.constraints else None
+
+    variables = [x[p][t] for p in products for t in periods]
+    cost_low, cost_high = _column_ranges(model, variables, ranging)
+    production = {
+        "product": [p for p in products for _ in periods],
+        "period": [t for _ in products for t in periods],
+        "value": [_finite(v.varValue) for v in variables],
+        "reduced_cost": [_finite(v.dj) for v in variables],
+        "cost_low": cost_low,
+        "cost_high": cost_high,
+    }
+    return {
+        "status": status,
+        "objective": _finite(lp.value(model.objective)),
+        "ranging": ranging is not None,
+        "capacity": capacity,
+        "coverage": coverage,
+        "cost_lock": cost_lock,
+        "production": production,
+    }
+
+
+def pareto_summary(report: Optional[dict]) -> dict:
+    """Columnas de sensibilidad que se añaden a cada fila de la frontera de Pareto."""
+    if report is None or report["capacity"] is None:
+        return {"coverage_dual": None, "alpha_low": None, "alpha_high": None, "binding_capacity": None}
+    coverage = report["coverage"] or {}
+    capacity = report["capacity"]
+    binding = sum(1 for s, b in zip(capacity["slack"], capacity["rhs"])
+                  if s is not None and abs(s) <= TOL * max(1.0, abs(b or 0.0)))
+    return {
+        "coverage_dual": coverage.get("dual"),
+        "alpha_low": coverage.get("alpha_low"),
+        "alpha_high": coverage.get("alpha_high"),
+        "binding_capacity": binding,
+    }
@@ -0,0 +1,137 @@
+"""
+shared.py
+=========
+
+Arreglos del problema en memoria compartida para los procesos del pool.
+
+Los pools (escenarios, barrido de ``α``, recurso estocástico) necesitan en
+cada worker las matrices del problema.  En lugar de serializarlas para cada
+proceso (o, peor, para cada tarea), el padre las copia una vez a un bloque de
+``multiprocessing.shared_memory``; los workers se adjuntan por nombre y leen
+vistas NumPy de solo lectura sin copiar nada.  Lo único que viaja es un
+``SharedHandle``: el nombre del bloque, la posición de cada arreglo y unos
+pocos metadatos (listas de productos y periodos).
+
+El bloque vive lo que dura el ``with share(...)`` del padre, que lo libera al
+salir; los workers solo lo mapean mientras viven.
+"""
+
+# ---------------------------------------------------------------------------
+# 1. IMPORTACIONES
+# ---------------------------------------------------------------------------
+from contextlib import contextmanager
+from multiprocessing import shared_memory
+from typing import Dict, Iterator, NamedTuple, Optional, Tuple
+
+import numpy as np
+
+from .costs import CostTable
+from .problem import PlanningProblem
+from .resources import from_arrays
+
+
+# ---------------------------------------------------------------------------
+# 2. PARÁMETROS
+# ---------------------------------------------------------------------------
+ALIGN: int = 64              # alineación de cada arreglo dentro del bloque (línea de caché)
+
+# Campos de ``PlanningProblem`` y ``CostTable`` que van al bloque
+_PROBLEM_ARRAYS = ("demand", "sst", "eex", "cap")
+_COST_ARRAYS = tuple(f"cost_{name}" for name in CostTable._fields)
+_RESOURCE_PREFIX = "resource_"
+
+# Bloques adjuntos en este proceso (se mantienen abiertos mientras haya vistas)
+_ATTACHED: Dict[str, shared_memory.SharedMemory] = {}
+
+
+class SharedHandle(NamedTuple):
+    """Referencia serializable (y pequeña) a un bloque de arreglos compartidos."""
+    name: str
+    layout: Tuple[Tuple[str, int, Tuple[int, ...], str], ...]   # (clave, offset, forma, dtype)
+    meta: dict
+
+
+# ---------------------------------------------------------------------------
+# 3. BLOQUES
+# ---------------------------------------------------------------------------
+
+def _views(buf, layout) -> Dict[str, np.ndarray]:
+    return {key: np.ndarray(shape, dtype=np.dtype(dtype), buffer=buf, offset=offset)
+            for key, offset, shape, dtype in layout}
+
+
+@contextmanager
+def share(arrays: Dict[str, np.ndarray], meta: Optional[dict] = None,
+          writable: Tuple[str, ...] = ()) -> Iterator[Tuple[SharedHandle, Dict[str, np.ndarray]]]:
+    """
+    Copia ``arrays`` a un bloque compartido nuevo y devuelve (handle, vistas).
+
+    Las vistas del padre son de solo lectura salvo las de ``writable`` (p. ej.
+    un búfer que el padre rellena antes de cada ronda de tareas).  El bloque
+    se libera al salir del ``with``.
+    """
+    layout, size = [], 0
+    for key, value in arrays.items():
+        value = np.ascontiguousarray(value)
+        size = -(-size // ALIGN) * ALIGN
+        layout.append((key, size, value.shape, value.dtype.str))
+        size += value.nbytes
+    shm = shared_memory.SharedMemory(create=True, size=max(size, 1))
+    views = None
+    try:
+        views = _views(shm.buf, layout)
+        for key, value in arrays.items():
+            views[key][...] = value
+            views[key].flags.writeable = key in writable
+        yield SharedHandle(shm.name, tuple(layout), dict(meta or {})), views
+    finally:
+        views = None
+        try:
+            shm.close()
+        except BufferError:
+            pass    # el llamador aún tiene vistas: el mapeo se libera con ellas
+        shm.unlink()
+
+
+def attach(handle: SharedHandle) -> Dict[str, np.ndarray]:
+    """Vistas de solo lectura de los arreglos de ``handle`` (en un worker)."""
+    shm = _ATTACHED.get(handle.name)
+    if shm is None:
+        shm = _ATTACHED[handle.name] = shared_memory.SharedMemory(name=handle.name)
+    views = _views(shm.buf, handle.layout)
+    for view in views.values():
+        view.flags.writeable = False
+    return views
+
+
+# ---------------------------------------------------------------------------
+# 4. PROBLEMA DE PLANIFICACIÓN
+# ---------------------------------------------------------------------------
+
+@contextmanager
+def share_problem(problem: PlanningProblem, extra: Optional[Dict[str, np.ndarray]] = None,
+                  writable: Tuple[str, ...] = ()) -> Iterator[Tuple[SharedHandle, Dict[str, np.ndarray]]]:
+    """``share`` de las matrices, costos y recursos de ``problem`` más los arreglos ``extra``."""
+    arrays = {key: getattr(problem, key) for key in _PROBLEM_ARRAYS}
+    arrays.update(zip(_COST_ARRAYS, problem.costs))
+    if problem.resources is not None:
+        arrays.update({_RESOURCE_PREFIX + key: value for key, value in problem.resources.arrays().items()})
+    arrays.update(extra or {})
+    meta = {"products": problem.products, "periods": problem.periods,
+            "resources": problem.resources.names if problem.resources is not None else None}
+    with share(arrays, meta, writable) as shared:
+        yield shared
+
+
+def attach_problem(handle: SharedHandle) -> Tuple[PlanningProblem, Dict[str, np.ndarray]]:
+    """``PlanningProblem`` sobre las vistas compartidas y los arreglos extra del bloque."""
+    views = attach(handle)
+    problem = PlanningProblem(
+        handle.meta["products"], handle.meta["periods"],
+        *(views.pop(key) for key in _PROBLEM_ARRAYS),
+        CostTable(*(views.pop(key) for key in _COST_ARRAYS)),
+    )
+    if handle.meta.get("resources") is not None:
+        problem = problem._replace(resources=from_arrays(handle.meta["resources"], {
+            key[len(_RESOURCE_PREFIX):]: views.pop(key) for key in list(views) if key.startswith(_RESOURCE_PREFIX)}))
+    return problem, views
@@ -0,0 +1,265 @@
+"""
+skeleton.py
+===========
+
+Caché en proceso de esqueletos de modelo por forma del problema.
+
+Los modelos de planificación (coste mínimo, fase 2 lexicográfica y suma
+ponderada) tienen la misma estructura para un mismo conjunto de SKUs y
+periodos: solo cambian los datos.  Un ``Skeleton`` guarda el ``LpProblem`` ya
+construido (variables, filas con nombre y objetivo) y ``bind`` reasigna en su
+sitio lo que depende de los datos:
+
+* lados derechos de balance (``D``), stock de seguridad (``SST``), capacidad
+  (``Cap``), cobertura (``α·ΣD``) y presupuesto de coste (``f★``);
+* coeficientes de costo de ``x`` e ``I`` y el término constante de exceso
+  (``EEX``) en el objetivo y en la fila ``cost_lock``;
+* cotas de ``I`` de ``presolve`` (si se pasa la reducción).  Las filas que el
+  presolve descartaría se conservan: la estructura es la de toda la forma.
+
+``SkeletonCache`` indexa los esqueletos por ``(products, periods, kind,
+integer)`` con desalojo LRU.  Un esqueleto se presta en exclusiva
+(``acquire``/``release``): mientras está prestado no está en la caché, de modo
+que dos peticiones concurrentes con la misma forma nunca comparten modelo (la
+segunda construye el suyo).  Aciertos, fallos y desalojos se publican en
+``METRICS``.
+"""
+
+# ---------------------------------------------------------------------------
+# 1. IMPORTACIONES
+# ---------------------------------------------------------------------------
+import threading
+from collections import OrderedDict
+from typing import Dict, Optional, Sequence, Tuple
+
+import numpy as np
+import pulp as lp
+
+# Absoluto cuando lo importan Bus_lex o Suma_ponderada_funciones ejecutados desde utils/.
+try:
+    from .telemetry import METRICS
+except ImportError:
+    from telemetry import METRICS
+
+
+# ---------------------------------------------------------------------------
+# 2. PARÁMETROS
+# ---------------------------------------------------------------------------
+MAX_SKELETONS: int = 16      # esqueletos que se conservan (0 = sin caché)
+LOCK_RTOL: float = 1e-7      # holgura relativa de ``cost_lock`` sobre f★
+
+COST = "cost"                # min coste (fase 1 lexicográfica)
+LEX_PHASE2 = "lex_phase2"    # min shortfall con coste <= f★
+WEIGHTED = "weighted"        # min w_c·coste + w_s·shortfall
+KINDS = (COST, LEX_PHASE2, WEIGHTED)
+
+# Nombres de fila compartidos con ``sensitivity`` (no se importa para poder
+# usar este módulo también como script)
+COVERAGE = "coverage"
+COST_LOCK = "cost_lock"
+
+METRICS.describe("optimization_skeleton_cache_total", "Peticiones a la caché de esqueletos por resultado.")
+METRICS.describe("optimization_skeleton_cache_evictions_total", "Esqueletos desalojados de la caché (LRU).")
+METRICS.describe("optimization_skeleton_cache_size", "Esqueletos en la caché.")
+
+Key = Tuple[Tuple[str, ...], Tuple[str, ...], str, bool]
+
+
+def _matrix(values, products: Sequence, periods: Sequence) -> np.ndarray:
+    """Matriz SKU × periodo a partir del diccionario ``(p, t)`` de ``preprocess_data`` (o de una matriz)."""
+    if isinstance(values, np.ndarray):
+        return values.astype(float, copy=False)
+    return np.array([[values[(p, t)] for t in periods] for p in products], dtype=float)
+
+
+# ---------------------------------------------------------------------------
+# 3. ESQUELETO
+# ---------------------------------------------------------------------------
+
+class Skeleton:
+    """
+    Modelo de una forma ``(products, periods)`` sin datos.
+
+    Las filas se crean con lado derecho cero y se guardan en el orden de las
+    matrices (SKU × periodo) para reasignarlas en bloque.  Los nombres de
+    variables y filas (``x``, ``I``, ``shortfall``, ``coverage``,
+    ``cost_lock``, ``cap_{k}``) son los que espera ``sensitivity``.
+    """
+
+    def __init__(self, products: Sequence, periods: Sequence, kind: str, integer: bool = False):
+        if kind not in KINDS:
+            raise ValueError(f"Tipo de modelo desconocido '{kind}' (válidos: {', '.join(KINDS)})")
+        self.products, self.periods = list(products), list(periods)
+        self.kind, self.integer = kind, integer
+        P, T = self.products, self.periods
+        cat = "Integer" if integer else "Continuous"
+
+        m = lp.LpProblem(kind, lp.LpMinimize)
+        self.x = lp.LpVariable.dicts("x", (P, T), lowBound=0, cat=cat)
+        self.I = lp.LpVariable.dicts("I", (P, T), lowBound=0, cat=cat)
+        self.s: Optional[lp.LpVariable] = None
+        x_vars = [self.x[p][t] for p in P for t in T]
+        self._i_vars = [self.I[p][t] for p in P for t in T]
+        self._cost_vars = x_vars + self._i_vars
+        # Costo total; sus coeficientes se fijan en ``bind``
+        self.cost = lp.LpAffineExpression([(v, 0.0) for v in self._cost_vars])
+
+        if kind == COST:
+            m.setObjective(lp.LpAffineExpression(self.cost))
+        else:
+            self.s = lp.LpVariable("shortfall", lowBound=0)
+            if kind == LEX_PHASE2:
+                m.setObjective(lp.LpAffineExpression([(self.s, 1.0)]))
+                m += (self.cost <= 0.0, COST_LOCK)
+            else:
+                m.setObjective(lp.LpAffineExpression([(v, 0.0) for v in self._cost_vars + [self.s]]))
+            m += (lp.lpSum(x_vars) + self.s >= 0.0, COVERAGE)
+
+        # Inventario encadenado, SST y capacidad (mismo orden que Script_Maestro)
+        bal, sst = [], []
+        for i, p in enumerate(P):
+            for k, t in enumerate(T):
+                expr = self.x[p][t] - self.I[p][t]
+                if k:
+                    expr += self.I[p][T[k - 1]]
+                m += (expr == 0.0, f"bal_{i}_{k}")
+                m += (self.I[p][t] >= 0.0, f"sst_{i}_{k}")
+                bal.append(m.constraints[f"bal_{i}_{k}"])
+                sst.append(m.constraints[f"sst_{i}_{k}"])
+        for k, t in enumerate(T):
+            m += (lp.lpSum(self.x[p][t] for p in P) <= 0.0, f"cap_{k}")
+        self._bal, self._sst = bal, sst
+        self._cap = [m.constraints[f"cap_{k}"] for k in range(len(T))]
+        self.model = m
+        self.costs = None
+        self.excess_cost: float = 0.0
+        self.total_demand: float = 0.0
+
+    @property
+    def key(self) -> Key:
+        return tuple(self.products), tuple(self.periods), self.kind, self.integer
+
+    def bind(self, D, SST, EEX, Cap, costs, alpha: float = 0.0, f_star: Optional[float] = None,
+             wc: float = 1.0, ws: float = 0.0, reduction=None) -> "Skeleton":
+        """
+        Reasigna los datos de una petición y devuelve el propio esqueleto.
+
+        ``D``, ``SST`` y ``EEX`` son diccionarios ``(p, t)`` o matrices
+        SKU × periodo; ``Cap`` un diccionario por periodo o un vector;
+        ``costs`` una ``CostTable`` alineada con ``products``.  ``alpha`` se
+        usa en la cobertura, ``f_star`` en ``cost_lock`` (obligatorio en la
+        fase 2 lexicográfica, con holgura ``LOCK_RTOL`` relativa) y ``wc``/``ws`` en el objetivo ponderado.
+        ``reduction`` (``presolve.presolve`` de los mismos datos) acota ``I``;
+        sin ella las cotas vuelven a ``[0, ∞)``.
+        """
+        P, T = self.products, self.periods
+        demand = _matrix(D, P, T)
+        sst = _matrix(SST, P, T)
+        cap = Cap if isinstance(Cap, np.ndarray) else np.array([Cap[t] for t in T], dtype=float)
+
+        for row, value in zip(self._bal, (-demand).ravel().tolist()):
+            row.constant = value
+        for row, value in zip(self._sst, (-sst).ravel().tolist()):
+            row.constant = value
+        for row, value in zip(self._cap, (-cap).tolist()):
+            row.constant = value
+        # Cotas de I de la reducción (se reasignan siempre: el esqueleto se reutiliza)
+        if reduction is None:
+            for v in self._i_vars:
+                v.lowBound, v.upBound = 0, None
+        else:
+            bounds = zip(reduction.lower.ravel().tolist(), reduction.upper.ravel().tolist())
+            for v, (lo, up) in zip(self._i_vars, bounds):
+                v.lowBound, v.upBound = lo, (up if up < np.inf else None)
+
+        n_t = len(T)
+        coefs = np.concatenate([np.repeat(costs.prod, n_t), np.repeat(costs.hold, n_t)])
+        constant = float(costs.exc @ _matrix(EEX, P, T).sum(axis=1))
+        self.cost.update(zip(self._cost_vars, coefs.tolist()))
+        self.cost.constant = constant
+        self.costs, self.excess_cost = costs, constant
+        self.total_demand = float(demand.sum())
+
+        m = self.model
+        if self.kind == COST:
+            m.objective.update(zip(self._cost_vars, coefs.tolist()))
+            m.objective.constant = constant
+            return self
+
+        m.constraints[COVERAGE].constant = -alpha * self.total_demand
+        if self.kind == LEX_PHASE2:
+            if f_star is None:
+                raise ValueError("La fase 2 lexicográfica necesita el coste f★ de la fase 1")
+            lock = m.constraints[COST_LOCK]
+            lock.expr.update(zip(self._cost_vars, coefs.tolist()))
+            lock.constant = constant - f_star - LOCK_RTOL * max(1.0, abs(f_star))
+        else:
+            m.objective.update(zip(self._cost_vars, (wc * coefs).tolist()))
+            m.objective[self.s] = ws
+            m.objective.constant = wc * constant
+        return self
+
+
+# ---------------------------------------------------------------------------
+# 4. CACHÉ LRU
+# ---------------------------------------------------------------------------
+
+class SkeletonCache:
+    """Esqueletos libres por forma, del menos al más recientemente devuelto."""
+
+    def __init__(self, max_size: int = MAX_SKELETONS):
+        self.max_size = max_size
+        self._lock = threading.Lock()
+        self._idle: "OrderedDict[Key, Skeleton]" = OrderedDict()
+        self.hits = self.misses = self.evictions = 0
+
+    def acquire(self, products: Sequence, periods: Sequence, kind: str, integer: bool = False) -> Skeleton:
+        """Esqueleto en exclusiva para la forma pedida; se construye si no hay uno libre."""
+        key: Key = (tuple(products), tuple(periods), kind, integer)
+        with self._lock:
+            skeleton = self._idle.pop(key, None)
+            if skeleton is not None:
+                self.hits += 1
+            else:
+                self.misses += 1
+        METRICS.inc("optimization_skeleton_cache_total", 1,
+                    {"kind": kind, "result": "hit" if skeleton is not None else "miss"})
+        return skeleton if skeleton is not None else Skeleton(products, periods, kind, integer)
+
+    def release(self, skeleton: Skeleton) -> None:
+        """Devuelve ``skeleton`` a la caché y desaloja los menos usados por encima de ``max_size``."""
+        evicted = 0
+        with self._lock:
+            if self.max_size > 0:
+                # Si otra petición ya devolvió uno de la misma forma, se conserva el más reciente
+                self._idle.pop(skeleton.key, None)
+                self._idle[skeleton.key] = skeleton
+            while len(self._idle) > self.max_size:
+                self._idle.popitem(last=False)
+                evicted += 1
+            self.evictions += evicted
+            size = len(self._idle)
+        if evicted:
+            METRICS.inc("optimization_skeleton_cache_evictions_total", evicted)
+        METRICS.set("optimization_skeleton_cache_size", size)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._idle.clear()
+        METRICS.set("optimization_skeleton_cache_size", 0)
+
+    def stats(self) -> Dict[str, float]:
+        """Aciertos, fallos, desalojos, tasa de aciertos y tamaño actual."""
+        with self._lock:
+            requests = self.hits + self.misses
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "hit_rate": self.hits / requests if requests else 0.0,
+                "size": len(self._idle),
+                "max_size": self.max_size,
+            }
+
+
+SKELETONS = SkeletonCache()
@@ -0,0 +1,111 @@
+"""
+solution.py
+===========
+
+Extracción en bloque de la solución de un ``Skeleton`` ya resuelto.
+
+El vector primal (``x``, ``I`` y ``shortfall``) se lee una sola vez en una
+matriz NumPy; a partir de ella se calculan con operaciones vectorizadas:
+
+* producción e inventario SKU × periodo;
+* producción total y nivel de servicio (``Σx / ΣD``);
+* desglose del costo (producción, inventario, exceso sobre SST y total);
+* el plan disperso (solo celdas con producción > ``TOL``) como DataFrame
+  ``Product | Period | Production`` o diccionario ``(p, t) -> cantidad``.
+
+Las variables sin valor (modelo no resuelto) quedan como ``NaN``.
+"""
+
+# ---------------------------------------------------------------------------
+# 1. IMPORTACIONES
+# ---------------------------------------------------------------------------
+from typing import TYPE_CHECKING, Dict, NamedTuple, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+if TYPE_CHECKING:
+    from .skeleton import Skeleton
+
+
+# ---------------------------------------------------------------------------
+# 2. PARÁMETROS
+# ---------------------------------------------------------------------------
+TOL: float = 1e-6                # producción por debajo de la cual la celda no entra en el plan
+
+PLAN_COLUMNS = ["Product", "Period", "Production"]
+
+
+# ---------------------------------------------------------------------------
+# 3. SOLUCIÓN
+# ---------------------------------------------------------------------------
+
+class Solution(NamedTuple):
+    """Valores primales y KPIs de una resolución (matrices SKU × periodo)."""
+    products: np.ndarray         # objetos, en el orden del modelo
+    periods: np.ndarray
+    production: np.ndarray
+    inventory: np.ndarray
+    shortfall: Optional[float]   # ``None`` en el modelo de coste mínimo
+    total_production: float
+    total_demand: float
+    service_level: float
+    production_cost: float
+    holding_cost: float
+    excess_cost: float           # término constante c_exc·ΣEEX
+    total_cost: float
+
+    def _nonzero(self, tol: float) -> Tuple[np.ndarray, np.ndarray]:
+        return np.nonzero(self.production > tol)
+
+    def plan_frame(self, tol: float = TOL) -> pd.DataFrame:
+        """Plan disperso ``Product | Period | Production`` (orden SKU, periodo)."""
+        i, k = self._nonzero(tol)
+        plan = pd.DataFrame({"Product": self.products[i], "Period": self.periods[k],
+                             "Production": self.production[i, k]}, columns=PLAN_COLUMNS)
+        # Orden del modelo, para los diccionarios de producto/periodo (utils.encoding)
+        plan.attrs.update(products=self.products.tolist(), periods=self.periods.tolist())
+        return plan
+
+    def plan_dict(self, tol: float = TOL) -> Dict[tuple, float]:
+        """Plan disperso como diccionario ``(p, t) -> cantidad`` (formato de ``Bus_lex``)."""
+        i, k = self._nonzero(tol)
+        return dict(zip(zip(self.products[i].tolist(), self.periods[k].tolist()),
+                        self.production[i, k].tolist()))
+
+
+def _objects(values) -> np.ndarray:
+    """Arreglo de objetos (conserva fechas y textos tal cual)."""
+    out = np.empty(len(values), dtype=object)
+    out[:] = list(values)
+    return out
+
+
+def extract(skeleton: "Skeleton") -> Solution:
+    """Lee de una vez el vector primal de ``skeleton`` y calcula sus KPIs."""
+    n, n_t = len(skeleton.products), len(skeleton.periods)
+    # _cost_vars: x e I en orden SKU × periodo
+    values = np.array([v.varValue for v in skeleton._cost_vars], dtype=float)
+    production = values[:n * n_t].reshape(n, n_t)
+    inventory = values[n * n_t:].reshape(n, n_t)
+
+    costs = skeleton.costs
+    production_cost = float(costs.prod @ production.sum(axis=1))
+    holding_cost = float(costs.hold @ inventory.sum(axis=1))
+    excess_cost = float(skeleton.excess_cost)
+    total_production = float(production.sum())
+    total_demand = skeleton.total_demand
+    return Solution(
+        products=_objects(skeleton.products),
+        periods=_objects(skeleton.periods),
+        production=production,
+        inventory=inventory,
+        shortfall=skeleton.s.varValue if skeleton.s is not None else None,
+        total_production=total_production,
+        total_demand=total_demand,
+        service_level=total_production / total_demand,
+        production_cost=production_cost,
+        holding_cost=holding_cost,
+        excess_cost=excess_cost,
+        total_cost=production_cost + holding_cost + excess_cost,
+    )
@@ -0,0 +1,252 @@
+"""
+solver.py
+=========
+
+Punto único de llamada a CBC para los modelos PuLP del pipeline.
+
+Cada resolución se cronometra y, si se pasa una ``RunTelemetry``, se registra
+con el tamaño del modelo (filas, columnas, no nulos), el estado devuelto y las
+iteraciones/nodos que CBC reporta en su log.
+
+Un ``SolveBudget`` limita cada resolución (tiempo, gap relativo y nodos, con
+valores por modelo).  Si CBC se detiene por el presupuesto se conserva la
+mejor solución entera encontrada; el registro indica la cota, el gap y si el
+resultado está demostrado óptimo.  Si se detiene sin ninguna solución se lanza
+``BudgetExhausted``.
+
+Los hilos de CBC los decide ``cores.SCHEDULER`` según los núcleos libres: un
+MIP recibe varios, un LP uno; el número usado queda en el registro.
+"""
+
+# ---------------------------------------------------------------------------
+# 1. IMPORTACIONES
+# ---------------------------------------------------------------------------
+import os
+import re
+import tempfile
+import time
+from contextlib import nullcontext
+from typing import Dict, List, NamedTuple, Optional
+
+import pulp as lp
+
+# Absoluto cuando lo importan Bus_lex o Suma_ponderada_funciones ejecutados desde utils/.
+try:
+    from . import scaling
+    from .cores import SCHEDULER
+except ImportError:
+    import scaling
+    from cores import SCHEDULER
+
+
+# ---------------------------------------------------------------------------
+# 2. UTILIDADES
+# ---------------------------------------------------------------------------
+
+# Resumen final de CBC (MIP) y línea de cierre del simplex (LP)
+_MIP_ITERATIONS = re.compile(r"Total iterations:\s+(\d+)")
+_MIP_NODES = re.compile(r"Enumerated nodes:\s+(\d+)")
+_LP_ITERATIONS = re.compile(r"objective\s+\S+\s+-\s+(\d+)\s+iterations")
+_RESULT = re.compile(r"^Result - (.+?)\s*$", re.MULTILINE)
+_MIP_OBJECTIVE = re.compile(r"^Objective value:\s+(\S+)", re.MULTILINE)
+_MIP_BOUND = re.compile(r"^(?:Lower|Upper) bound:\s+(\S+)", re.MULTILINE)
+
+PROVEN = "Optimal solution found"   # resultado de CBC sin límites alcanzados
+
+
+def model_size(model: lp.LpProblem) -> Dict[str, int]:
+    """Filas, columnas y coeficientes no nulos del modelo tal como se envía a CBC."""
+    return {
+        "rows": len(model.constraints),
+        "columns": len(model.variables()),
+        "nonzeros": sum(len(c) for c in model.constraints.values()),
+    }
+
+
+def parse_cbc_log(text: str) -> Dict[str, Optional[int]]:
+    """Extrae iteraciones y nodos del log de CBC (``None`` si no aparecen)."""
+    iters = _MIP_ITERATIONS.search(text) or _LP_ITERATIONS.search(text)
+    nodes = _MIP_NODES.search(text)
+    return {
+        "iterations": int(iters.group(1)) if iters else None,
+        "nodes": int(nodes.group(1)) if nodes else None,
+    }
+
+
+def parse_cbc_result(text: str) -> Dict[str, Optional[object]]:
+    """
+    Resultado final de un MIP en el log de CBC: motivo de parada, incumbente y
+    cota (sin el término constante del objetivo, que CBC no ve).
+    """
+    result, objective, bound = (r.search(text) for r in (_RESULT, _MIP_OBJECTIVE, _MIP_BOUND))
+    return {
+        "result": result.group(1) if result else None,
+        "cbc_objective": float(objective.group(1)) if objective else None,
+        "cbc_bound": float(bound.group(1)) if bound else None,
+    }
+
+
+def optimality(model: lp.LpProblem, status: int, text: str, objective_scale: float = 1.0) -> Dict[str, object]:
+    """
+    ``proven_optimal``, cota y gap relativo ``|incumbente - cota| / |incumbente|``.
+
+    Un LP o un MIP que CBC cierra sin alcanzar ningún límite está demostrado
+    óptimo (cota = objetivo, gap 0).  Si se detuvo por tiempo, nodos o gap la
+    cota es la del árbol de ramificación, desplazada por la constante del
+    objetivo para compararla con ``lp.value(model.objective)``.  Si el
+    objetivo se resolvió escalado (``scaling``), ``objective_scale`` es su
+    factor: el incumbente y la cota del log se dividen por él.
+    """
+    parsed = parse_cbc_result(text)
+    for key in ("cbc_objective", "cbc_bound"):
+        if parsed[key] is not None:
+            parsed[key] /= objective_scale
+    result = parsed["result"]
+    objective = lp.value(model.objective) if status == lp.LpStatusOptimal else None
+    proven = (status == lp.LpStatusOptimal and model.sol_status == lp.LpSolutionOptimal
+              and (result is None or result == PROVEN))
+    bound = gap = None
+    if proven:
+        bound, gap = objective, 0.0
+    elif objective is not None and parsed["cbc_bound"] is not None and parsed["cbc_objective"] is not None:
+        bound = parsed["cbc_bound"] + (objective - parsed["cbc_objective"])
+        gap = abs(parsed["cbc_objective"] - parsed["cbc_bound"]) / max(abs(parsed["cbc_objective"]), 1e-10)
+    return {"result": result, "proven_optimal": proven, "bound": bound, "gap": gap}
+
+
+# ---------------------------------------------------------------------------
+# 3. PRESUPUESTO DE RESOLUCIÓN
+# ---------------------------------------------------------------------------
+
+class BudgetExhausted(RuntimeError):
+    """CBC alcanzó el presupuesto sin encontrar ninguna solución factible."""
+
+    def __init__(self, label: str, result: Optional[str]):
+        super().__init__(f"'{label}': {result or 'detenido'} sin solución factible; amplíe el presupuesto")
+        self.label = label
+        self.result = result
+
+
+class SolveBudget(NamedTuple):
+    """
+    Límites de CBC (``None`` = sin límite).  ``models`` sustituye campos por
+    etiqueta de modelo (``"lex_phase1_mip"``, ``"weighted_lp"``, ...).
+    """
+    time_limit: Optional[float] = None    # segundos de reloj
+    gap_rel: Optional[float] = None       # gap relativo con el que se acepta el incumbente
+    max_nodes: Optional[int] = None       # nodos del árbol de ramificación
+    models: Optional[Dict[str, "SolveBudget"]] = None
+
+    def for_model(self, label: str) -> "SolveBudget":
+        """Presupuesto efectivo de ``label``: los campos del modelo sustituyen a los generales."""
+        override = (self.models or {}).get(label)
+        if override is None:
+            return self._replace(models=None)
+        return SolveBudget(*(o if o is not None else b for o, b in zip(override[:3], self[:3])))
+
+    def solver_kwargs(self) -> Dict[str, object]:
+        return {"timeLimit": self.time_limit, "gapRel": self.gap_rel, "maxNodes": self.max_nodes}
+
+
+def _budget_fields(spec: dict, where: str) -> dict:
+    unknown = set(spec) - {"time_limit", "gap_rel", "max_nodes", "models"}
+    if unknown:
+        raise ValueError(f"Campos de presupuesto desconocidos en {where}: {', '.join(sorted(unknown))}")
+    fields = {}
+    for name, cast, valid, rule in (("time_limit", float, lambda v: v > 0, "> 0"),
+                                    ("gap_rel", float, lambda v: 0 <= v < 1, "en [0, 1)"),
+                                    ("max_nodes", int, lambda v: v >= 0, ">= 0")):
+        value = spec.get(name)
+        if value in (None, ""):
+            continue
+        value = cast(value)
+        if not valid(value):
+            raise ValueError(f"{name} debe ser {rule} ({where})")
+        fields[name] = value
+    return fields
+
+
+def parse_budget(spec: Optional[dict], default: Optional[SolveBudget] = None) -> SolveBudget:
+    """
+    ``SolveBudget`` a partir de ``{"time_limit", "gap_rel", "max_nodes",
+    "models": {etiqueta: {...}}}``; los campos ausentes toman ``default``.
+    """
+    default = default or SolveBudget()
+    spec = spec or {}
+    if not isinstance(spec, dict):
+        raise ValueError("El presupuesto debe ser un objeto {time_limit, gap_rel, max_nodes, models}")
+    budget = default._replace(**_budget_fields(spec, "budget"))
+    models = spec.get("models") or {}
+    if not isinstance(models, dict):
+        raise ValueError("budget.models debe ser un objeto {etiqueta: presupuesto}")
+    overrides = {}
+    for label, fields in models.items():
+        if not isinstance(fields, dict) or "models" in fields:
+            raise ValueError(f"Presupuesto inválido para el modelo '{label}'")
+        overrides[str(label)] = SolveBudget(**_budget_fields(fields, f"models.{label}"))
+    return budget._replace(models={**(default.models or {}), **overrides} or None)
+
+
+# ---------------------------------------------------------------------------
+# 4. RESOLUCIÓN
+# ---------------------------------------------------------------------------
+
+def solve(model: lp.LpProblem, label: str, telemetry=None, options: Optional[List[str]] = None,
+          budget: Optional[SolveBudget] = None, warm_start: bool = False,
+          scale: Optional[bool] = None) -> int:
+    """
+    Resuelve ``model`` con CBC y devuelve el estado de PuLP.
+
+    ``label`` identifica el modelo en la telemetría (p. ej. ``"lex_phase2"``).
+    ``options`` son comandos adicionales de CBC (sin el guion inicial); se
+    ejecutan antes de la resolución y la escritura de la solución de PuLP.
+    ``budget`` limita la resolución (``SolveBudget.for_model(label)``); si
+    CBC se detiene sin solución factible se lanza ``BudgetExhausted``.  Con
+    ``warm_start`` los valores actuales de las variables de un MIP se pasan
+    como solución inicial (``mipstart``).  ``scale`` (por defecto
+    ``scaling.ENABLED``) resuelve el modelo escalado y devuelve los resultados
+    en sus unidades originales.  Los hilos se reservan en ``SCHEDULER``
+    mientras CBC corre.
+    """
+    size = model_size(model)
+    limits = budget.for_model(label).solver_kwargs() if budget is not None else {}
+    fd, log_path = tempfile.mkstemp(suffix=".log", prefix="cbc-")
+    os.close(fd)
+    try:
+        with SCHEDULER.lease(SCHEDULER.solve_threads(model.isMIP())) as threads:
+            cmd = lp.PULP_CBC_CMD(msg=False, logPath=log_path, options=options,
+                                  threads=threads if threads > 1 else None,
+                                  warmStart=warm_start and model.isMIP(), **limits)
+            scale = scaling.ENABLED if scale is None else scale
+            t0 = time.perf_counter()
+            with telemetry.stage("cbc") if telemetry is not None else nullcontext():
+                with scaling.scaled(model) if scale else nullcontext() as factors:
+                    status = model.solve(cmd)
+            elapsed = time.perf_counter() - t0
+        with open(log_path, encoding="utf-8", errors="replace") as fh:
+            text = fh.read()
+    finally:
+        os.remove(log_path)
+    stats = parse_cbc_log(text)
+    outcome = optimality(model, status, text, factors.objective if factors is not None else 1.0)
+    stopped = (outcome["result"] or "").startswith("Stopped")
+    if stopped and status not in (lp.LpStatusOptimal, lp.LpStatusInfeasible, lp.LpStatusUnbounded):
+        # CBC se detuvo por el presupuesto sin solución: no se sabe nada del
+        # modelo.  Una infactibilidad o no acotación demostradas se conservan.
+        status = model.status = lp.LpStatusNotSolved
+
+    if telemetry is not None:
+        telemetry.record_solve({
+            "model": label,
+            "status": lp.LpStatus[status],
+            "seconds": elapsed,
+            "threads": threads,
+            "scaled": factors is not None,
+            "objective": lp.value(model.objective) if status == lp.LpStatusOptimal else None,
+            **size,
+            **stats,
+            **outcome,
+        })
+    if status == lp.LpStatusNotSolved and stopped:
+        raise BudgetExhausted(label, outcome["result"])
+    return status
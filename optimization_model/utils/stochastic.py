@@ -0,0 +1,617 @@
+"""
+stochastic.py
+=============
+
+Planificación estocástica en dos etapas sobre escenarios de demanda.
+
+Primera etapa (común a todos los escenarios): producción ``x`` por SKU y
+periodo, sujeta a la capacidad.  Segunda etapa (por escenario ω): inventario
+``I_ω ≥ SST`` y faltante ``u_ω ≥ 0`` (requerimiento no cubierto por el plan:
+venta perdida o suministro de emergencia), con el balance
+
+    I_ω[k-1] + x[k] + u_ω[k] - I_ω[k] = D_ω[k]
+
+El recurso es completo (``u`` siempre permite cumplir el balance), así que no
+hacen falta cortes de factibilidad.  Por escenario se mide:
+
+* coste    = Σ c_prod·x + Σ c_hold·I_ω + Σ c_exc·EEX
+* shortfall = max(0, Σ u_ω - (1 - α)·Σ D_ω)   (faltante de cobertura bajo α)
+
+Modelos (equivalentes estocásticos de ``Bus_lex`` y ``Suma_ponderada_funciones``):
+
+* ``weighted``: min  w_c·E[coste] + w_s·E[shortfall]
+* ``lex``: fase 1 min E[coste] con E[Σ u] ≤ (1 - α)·E[Σ D] (nivel de
+  servicio esperado ≥ α); fase 2 min E[Σ u] con E[coste] fijo.  Es el orden
+  de ``Bus_lex`` (coste y luego cobertura): la demanda no puede ser una
+  restricción dura en todos los escenarios, así que se exige en esperanza.
+
+Métodos de resolución:
+
+* ``extensive``: un único LP con todas las copias de segunda etapa (referencia,
+  adecuado para pocos escenarios).
+* ``benders``: L-shaped.  El maestro solo contiene ``x`` y las variables de
+  epígrafe θ (un corte agregado por iteración o uno por escenario con
+  ``multicut``).  El subproblema de cada escenario es separable por SKU y
+  monótono: el inventario mínimo ``I[k] = max(SST[k], I[k-1] + x[k] - D[k])``
+  es óptimo para coste y faltante a la vez, así que valores y subgradientes
+  se calculan en bloque con NumPy, repartiendo los escenarios entre procesos.
+  Los procesos leen las demandas y el plan ``x`` de cada iteración de
+  memoria compartida (``shared``): las tareas solo llevan su rango de
+  escenarios.
+"""
+
+# ---------------------------------------------------------------------------
+# 1. IMPORTACIONES
+# ---------------------------------------------------------------------------
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import ExitStack, nullcontext
+from typing import Dict, List, NamedTuple, Optional, Tuple, Union
+
+import numpy as np
+import pandas as pd
+import pulp as lp
+
+from .cores import SCHEDULER
+from .problem import PlanningProblem
+from .resources import add_resource_rows
+from .shared import SharedHandle, attach, share
+from .solver import solve
+from .telemetry import RunTelemetry
+
+
+# ---------------------------------------------------------------------------
+# 2. PARÁMETROS
+# ---------------------------------------------------------------------------
+MODELS = ("lex", "weighted")
+METHODS = ("benders", "extensive")
+
+TOL: float = 1e-4          # tolerancia relativa de convergencia de L-shaped (gap y cotas)
+MAX_ITERATIONS: int = 200  # iteraciones máximas de L-shaped por fase
+PLAN_TOL: float = 1e-6     # producción mínima que se reporta en el plan
+LOCK_RTOL: float = 1e-7    # holgura relativa al fijar el coste óptimo de la fase 1 en la fase 2
+
+# Región de confianza de L-shaped, en múltiplos de la demanda de cada SKU/periodo
+TR_RADIUS: float = 0.5
+TR_RADIUS_MIN: float = 1e-3
+TR_RADIUS_MAX: float = 8.0
+
+
+# ---------------------------------------------------------------------------
+# 3. RECURSO (SEGUNDA ETAPA)
+# ---------------------------------------------------------------------------
+
+class Recourse(NamedTuple):
+    """Valores de segunda etapa y subgradientes respecto de ``x`` (SKU × periodo)."""
+    holding: np.ndarray             # (N, n)    c_hold·Σ_k I_ω por escenario y SKU
+    unmet: np.ndarray               # (N, n)    Σ_k u_ω por escenario y SKU
+    shortfall: np.ndarray           # (N,)      max(0, Σ u_ω - (1 - α)·Σ D_ω)
+    g_holding: np.ndarray           # (n, T)    Σ_ω ∂holding/∂x
+    g_shortfall: np.ndarray         # (n, T)    Σ_ω ∂shortfall/∂x
+    g_unmet_sum: np.ndarray         # (n, T)    Σ_ω ∂unmet_ω,i/∂x_i
+    g_unmet: Optional[np.ndarray]   # (N, n, T) ∂unmet_ω,i/∂x_i (solo si se pide por escenario)
+
+
+def evaluate_recourse(x: np.ndarray, demand: np.ndarray, sst: np.ndarray, hold: np.ndarray,
+                      allowance: np.ndarray, per_scenario: bool = False) -> Recourse:
+    """
+    Resuelve el subproblema de todos los escenarios para el plan ``x``.
+
+    ``demand`` es (N, n, T) y ``allowance`` (N,) el faltante tolerado por
+    escenario.  Con ``per_scenario`` se devuelven también los subgradientes
+    del faltante por escenario y SKU (cortes desagregados).
+    """
+    n_t = demand.shape[2]
+    inventory = np.empty_like(demand)
+    binding = np.empty(demand.shape, dtype=bool)
+    prev = np.zeros(demand.shape[:2])
+    for k in range(n_t):
+        available = prev + x[:, k] - demand[:, :, k]
+        binding[:, :, k] = available <= sst[:, k]
+        prev = inventory[:, :, k] = np.maximum(available, sst[:, k])
+
+    # Σ_k u = I[T-1] - Σ_k x + Σ_k D (el balance telescópico elimina los periodos intermedios)
+    unmet = inventory[:, :, -1] - x.sum(axis=1) + demand.sum(axis=2)
+    holding = inventory.sum(axis=2) * hold
+    excess = unmet.sum(axis=1) - allowance
+    active = excess > 0
+    shortfall = np.where(active, excess, 0.0)
+
+    # Una unidad más de x[k] eleva el inventario desde k hasta el siguiente
+    # periodo en que I quedaría por debajo de SST (allí la absorbe u).
+    steps = np.arange(n_t)
+    next_binding = np.where(binding, steps, n_t)
+    next_binding = np.minimum.accumulate(next_binding[:, :, ::-1], axis=2)[:, :, ::-1]
+    g_holding = hold[:, None] * (next_binding - steps).sum(axis=0)
+    g_unmet = -(next_binding < n_t).astype(float)
+    g_shortfall = g_unmet[active].sum(axis=0)
+    return Recourse(holding, unmet, shortfall, g_holding, g_shortfall, g_unmet.sum(axis=0),
+                    g_unmet if per_scenario else None)
+
+
+# Datos de escenario (demand, sst, hold, allowance) y búfer del plan ``x`` en
+# memoria compartida; las tareas solo llevan su rango de escenarios.  Solo los
+# procesos del pool usan esta variable: en línea el evaluador guarda sus
+# arreglos (las vistas resuelven peticiones concurrentes en hilos).
+_SCENARIOS: Optional[Dict[str, np.ndarray]] = None
+
+
+def _init_worker(arrays: Union[Dict[str, np.ndarray], SharedHandle]) -> None:
+    global _SCENARIOS
+    _SCENARIOS = attach(arrays) if isinstance(arrays, SharedHandle) else arrays
+
+
+def _evaluate_chunk(lo: int, hi: int, per_scenario: bool, x: Optional[np.ndarray] = None,
+                    arrays: Optional[Dict[str, np.ndarray]] = None) -> Recourse:
+    """
+    Recurso de los escenarios ``lo:hi`` con ``arrays`` (o los del proceso);
+    sin ``x`` se usa el plan del búfer compartido.
+    """
+    a = _SCENARIOS if arrays is None else arrays
+    x = a["x"] if x is None else x
+    return evaluate_recourse(x, a["demand"][lo:hi], a["sst"], a["hold"], a["allowance"][lo:hi], per_scenario)
+
+
+class _RecourseEvaluator:
+    """
+    Reparte la evaluación del recurso entre procesos (o la hace en línea con 1 worker).
+
+    Los núcleos del pool se reservan en ``SCHEDULER`` solo mientras se evalúa:
+    entre evaluaciones el pool espera al maestro (un LP de un hilo).
+    """
+
+    def __init__(self, demand: np.ndarray, sst: np.ndarray, hold: np.ndarray,
+                 allowance: np.ndarray, max_workers: Optional[int]):
+        n_scen = demand.shape[0]
+        self.mean_demand = float(demand.sum(axis=(1, 2)).mean())
+        workers = self.workers = SCHEDULER.pool_workers(n_scen, max_workers)
+        bounds = np.linspace(0, n_scen, workers + 1).astype(int)
+        self.chunks = list(zip(bounds[:-1].tolist(), bounds[1:].tolist()))
+        arrays = {"demand": demand, "sst": sst, "hold": hold, "allowance": allowance}
+        self.pool, self.arrays = None, None
+        self._shared = ExitStack()
+        if workers > 1:
+            # El padre escribe x en el búfer compartido antes de cada evaluación
+            arrays["x"] = np.zeros(demand.shape[1:])
+            handle, views = self._shared.enter_context(share(arrays, writable=("x",)))
+            self.x = views["x"]
+            self.pool = ProcessPoolExecutor(max_workers=workers, initializer=_init_worker, initargs=(handle,))
+        else:
+            self.arrays = arrays
+
+    def __call__(self, x: np.ndarray, per_scenario: bool) -> Recourse:
+        if self.pool is None:
+            return _evaluate_chunk(0, self.chunks[0][1], per_scenario, x, self.arrays)
+        self.x[...] = x
+        args = [(lo, hi, per_scenario) for lo, hi in self.chunks]
+        with SCHEDULER.lease(self.workers):
+            parts = list(self.pool.map(_evaluate_chunk, *zip(*args)))
+        return Recourse(
+            np.concatenate([p.holding for p in parts]),
+            np.concatenate([p.unmet for p in parts]),
+            np.concatenate([p.shortfall for p in parts]),
+            sum(p.g_holding for p in parts),
+            sum(p.g_shortfall for p in parts),
+            sum(p.g_unmet_sum for p in parts),
+            np.concatenate([p.g_unmet for p in parts]) if per_scenario else None,
+        )
+
+    def close(self) -> None:
+        if self.pool is not None:
+            self.pool.shutdown()
+            self.x = None
+        self._shared.close()
+
+
+# ---------------------------------------------------------------------------
+# 4. RESULTADO
+# ---------------------------------------------------------------------------
+
+class StochasticResult(NamedTuple):
+    status: str
+    method: str
+    model: str
+    iterations: int              # iteraciones de L-shaped (0 en la forma extensiva)
+    gap: Optional[float]         # gap relativo final de la última fase
+    expected_cost: Optional[float]
+    expected_shortfall: Optional[float]
+    service_level: Optional[float]   # 1 - E[Σ u] / E[Σ D]
+    plan: Optional[np.ndarray]       # producción SKU × periodo
+    scenarios: Optional[pd.DataFrame]
+
+    def plan_records(self, problem: PlanningProblem) -> List[dict]:
+        """Plan en el formato de ``run_lexicographic`` (Product, Period, Production)."""
+        if self.plan is None:
+            return []
+        return [{"Product": p, "Period": t, "Production": float(self.plan[i, k])}
+                for i, p in enumerate(problem.products) for k, t in enumerate(problem.periods)
+                if self.plan[i, k] > PLAN_TOL]
+
+
+def _summarize(problem: PlanningProblem, names: List[str], demand: np.ndarray, alpha: float,
+               x: np.ndarray) -> Tuple[float, float, float, pd.DataFrame]:
+    """Evalúa el plan ``x`` escenario por escenario (mismo cálculo para ambos métodos)."""
+    totals = demand.sum(axis=(1, 2))
+    rec = evaluate_recourse(x, demand, problem.sst, problem.costs.hold, (1 - alpha) * totals)
+    cost = _first_stage_cost(problem, x) + rec.holding.sum(axis=1)
+    unmet = rec.unmet.sum(axis=1)
+    table = pd.DataFrame({
+        "scenario": names,
+        "total_demand": totals,
+        "cost": cost,
+        "unmet": unmet,
+        "shortfall": rec.shortfall,
+        "service_level": 1 - unmet / np.where(totals > 0, totals, 1.0),
+    })
+    service = 1 - unmet.mean() / totals.mean() if totals.mean() > 0 else 1.0
+    return float(cost.mean()), float(rec.shortfall.mean()), float(service), table
+
+
+def _excess_cost(problem: PlanningProblem) -> float:
+    return float(problem.costs.exc @ problem.eex.sum(axis=1))
+
+
+def _first_stage_cost(problem: PlanningProblem, x: np.ndarray) -> float:
+    """Producción más el término constante de exceso sobre SST."""
+    return float(problem.costs.prod @ x.sum(axis=1)) + _excess_cost(problem)
+
+
+# ---------------------------------------------------------------------------
+# 5. FORMA EXTENSIVA
+# ---------------------------------------------------------------------------
+
+def _solve_extensive(problem: PlanningProblem, demand: np.ndarray, model: str, alpha: float,
+                     wc: float, ws: float, telemetry: Optional[RunTelemetry]) -> Tuple[str, Optional[np.ndarray]]:
+    P, T = problem.products, problem.periods
+    n_scen = demand.shape[0]
+    stage = telemetry.stage if telemetry is not None else (lambda name: nullcontext())
+
+    with stage("build_stochastic_extensive"):
+        m = lp.LpProblem("stochastic_extensive", lp.LpMinimize)
+        x = lp.LpVariable.dicts("x", (P, T), lowBound=0)
+        for k, t in enumerate(T):
+            m += (lp.lpSum(x[p][t] for p in P) <= problem.cap[k], f"cap_{k}")
+        if problem.resources is not None:
+            add_resource_rows(m, x, P, T, problem.resources)
+
+        holding, unmet, shortfall = [], [], []
+        for w in range(n_scen):
+            I = lp.LpVariable.dicts(f"I_{w}", (P, T), lowBound=0)
+            u = lp.LpVariable.dicts(f"u_{w}", (P, T), lowBound=0)
+            for i, p in enumerate(P):
+                for k, t in enumerate(T):
+                    prev = I[p][T[k-1]] if k else 0
+                    m += (prev + x[p][t] + u[p][t] - I[p][t] == demand[w, i, k], f"bal_{w}_{i}_{k}")
+                    # El stock de seguridad va como cota de la variable (no añade filas)
+                    I[p][t].lowBound = float(problem.sst[i, k])
+            unmet.append(lp.lpSum(u[p][t] for p in P for t in T))
+            if model == "weighted":
+                s = lp.LpVariable(f"s_{w}", lowBound=0)
+                m += s >= unmet[-1] - (1 - alpha) * demand[w].sum()
+                shortfall.append(s)
+            holding.append(lp.LpAffineExpression(
+                (I[p][t], problem.costs.hold[i]) for i, p in enumerate(P) for t in T))
+
+        production = lp.LpAffineExpression(
+            (x[p][t], problem.costs.prod[i]) for i, p in enumerate(P) for t in T)
+        exp_cost = production + lp.lpSum(holding) * (1.0 / n_scen) + _excess_cost(problem)
+        exp_unmet = lp.lpSum(unmet) * (1.0 / n_scen)
+        exp_shortfall = lp.lpSum(shortfall) * (1.0 / n_scen)
+
+    if model == "weighted":
+        m.setObjective(wc * exp_cost + ws * exp_shortfall)
+        status = solve(m, "stochastic_extensive_weighted", telemetry)
+    else:
+        m += (exp_unmet <= (1 - alpha) * demand.sum(axis=(1, 2)).mean(), "service_level")
+        m.setObjective(exp_cost)
+        status = solve(m, "stochastic_extensive_lex_phase1", telemetry)
+        if status == lp.LpStatusOptimal:
+            f_star = lp.value(exp_cost)
+            m += (exp_cost <= f_star + LOCK_RTOL * max(1.0, abs(f_star)), "phase_limit")
+            m.setObjective(exp_unmet)
+            status = solve(m, "stochastic_extensive_lex_phase2", telemetry)
+
+    if status != lp.LpStatusOptimal:
+        return lp.LpStatus[status], None
+    plan = np.array([[x[p][t].value() or 0.0 for t in T] for p in P])
+    return lp.LpStatus[status], plan
+
+
+# ---------------------------------------------------------------------------
+# 6. L-SHAPED (BENDERS)
+# ---------------------------------------------------------------------------
+# El recurso esperado es separable por SKU.  Con X = producción acumulada,
+# I[k] = X[k] - D_acum[k] + U[k], donde U[k] ≥ 0 es el faltante acumulado; la
+# parte lineal del coste de inventario va exacta en el maestro y solo la
+# corrección c_hold·Σ_k U[k] se aproxima con un epígrafe θ_i por SKU.  El
+# faltante esperado también es separable (un epígrafe por SKU, o por
+# (escenario, SKU) con ``multicut``); solo el shortfall del modelo weighted,
+# que acopla los SKU en cada escenario, necesita un corte denso (agregado) o
+# las filas s_ω ≥ Σ_i ν_ω,i - (1 - α)·Σ D_ω (``multicut``).  Solo se añaden
+# los cortes violados de los términos que usa la fase.
+
+class _Master:
+    """Problema maestro: x, epígrafes del recurso y cortes acumulados."""
+
+    def __init__(self, problem: PlanningProblem, demand: np.ndarray, allowance: np.ndarray, multicut: bool):
+        P, T = problem.products, problem.periods
+        n_scen = len(allowance)
+        self.model = lp.LpProblem("stochastic_master", lp.LpMinimize)
+        x = lp.LpVariable.dicts("x", (P, T), lowBound=0)
+        self.x = [[x[p][t] for t in T] for p in P]
+        for k, t in enumerate(T):
+            self.model += (lp.lpSum(x[p][t] for p in P) <= problem.cap[k], f"cap_{k}")
+        if problem.resources is not None:
+            add_resource_rows(self.model, x, P, T, problem.resources)
+
+        # Inventario esperado = Σ_k (T - k)·x[k] - E[Σ_k D_acum[k]] + corrección ≥ 0
+        hold = problem.costs.hold
+        self.hold_linear = hold[:, None] * (len(T) - np.arange(len(T)))[None, :]
+        self.hold_offset = hold * demand.cumsum(axis=2).sum(axis=2).mean(axis=0)
+        linear = lp.LpAffineExpression(
+            (self.x[i][k], problem.costs.prod[i] + self.hold_linear[i, k])
+            for i in range(len(P)) for k in range(len(T)))
+
+        # Correcciones no negativas: θ ≥ 0 acota el maestro desde la primera iteración
+        self.theta_h = [lp.LpVariable(f"theta_h_{i}", lowBound=0) for i in range(len(P))]
+        self.cost = linear + lp.lpSum(self.theta_h) + _excess_cost(problem) - float(self.hold_offset.sum())
+
+        if multicut:
+            self.nu = [[lp.LpVariable(f"nu_{w}_{i}", lowBound=0) for i in range(len(P))]
+                       for w in range(n_scen)]
+            s = [lp.LpVariable(f"s_{w}", lowBound=0) for w in range(n_scen)]
+            for w in range(n_scen):
+                self.model += (s[w] >= lp.lpSum(self.nu[w]) - allowance[w], f"short_{w}")
+            self.unmet = lp.lpSum(v for row in self.nu for v in row) * (1.0 / n_scen)
+            self.shortfall = lp.lpSum(s) * (1.0 / n_scen)
+        else:
+            self.nu = None
+            self.theta_u = [lp.LpVariable(f"theta_u_{i}", lowBound=0) for i in range(len(P))]
+            self.theta_s = lp.LpVariable("theta_s", lowBound=0)
+            self.unmet = lp.lpSum(self.theta_u)
+            self.shortfall = lp.LpAffineExpression([(self.theta_s, 1.0)])
+        self.n_cuts = 0
+
+    def values(self) -> np.ndarray:
+        return np.array([[v.value() or 0.0 for v in row] for row in self.x])
+
+    def add_cut(self, theta: lp.LpVariable, value: float, grad: np.ndarray,
+                x_vars: List[lp.LpVariable], x_hat: np.ndarray) -> None:
+        """θ ≥ value + grad·(x - x̂), con solo los coeficientes no nulos."""
+        grad, x_hat = grad.ravel(), x_hat.ravel()
+        nz = np.flatnonzero(grad)
+        expr = lp.LpAffineExpression([(theta, 1.0)] + [(x_vars[j], -float(grad[j])) for j in nz])
+        self.n_cuts += 1
+        self.model += (expr >= value - float(grad[nz] @ x_hat[nz]), f"cut_{self.n_cuts}")
+
+    def set_box(self, lower: Optional[np.ndarray], upper: Optional[np.ndarray]) -> None:
+        """Región de confianza sobre x (``None`` la elimina)."""
+        for i, row in enumerate(self.x):
+            for k, v in enumerate(row):
+                v.lowBound = 0 if lower is None else float(lower[i, k])
+                v.upBound = None if upper is None else float(upper[i, k])
+
+    def set_phase(self, objective: lp.LpAffineExpression,
+                  limit: Optional[Tuple[lp.LpAffineExpression, float]]) -> None:
+        self.model.setObjective(objective)
+        self.model.constraints.pop("phase_limit", None)
+        if limit is not None:
+            self.model += (limit[0] <= limit[1], "phase_limit")
+
+
+def _add_cuts(master: _Master, rec: Recourse, x_hat: np.ndarray, tol: float, terms: set) -> int:
+    """Añade los cortes violados por el punto actual del maestro para ``terms``; devuelve cuántos."""
+    n_scen = rec.unmet.shape[0]
+    violated = lambda true, approx: true - approx > tol * max(1.0, abs(true))
+    added = 0
+
+    # Corrección del inventario respecto de su parte lineal (ver _Master)
+    if "cost" in terms:
+        correction = rec.holding.mean(axis=0) - (master.hold_linear * x_hat).sum(axis=1) + master.hold_offset
+        g_correction = rec.g_holding / n_scen - master.hold_linear
+        for i, theta in enumerate(master.theta_h):
+            if violated(correction[i], theta.value() or 0.0):
+                master.add_cut(theta, correction[i], g_correction[i], master.x[i], x_hat[i])
+                added += 1
+
+    if master.nu is not None:
+        if terms & {"unmet", "shortfall"}:
+            for w, i in zip(*np.nonzero(rec.unmet > 0)):
+                nu = master.nu[w][i]
+                if violated(rec.unmet[w, i], nu.value() or 0.0):
+                    master.add_cut(nu, rec.unmet[w, i], rec.g_unmet[w, i], master.x[i], x_hat[i])
+                    added += 1
+        return added
+
+    if "unmet" in terms:
+        unmet = rec.unmet.mean(axis=0)
+        for i, theta in enumerate(master.theta_u):
+            if violated(unmet[i], theta.value() or 0.0):
+                master.add_cut(theta, unmet[i], rec.g_unmet_sum[i] / n_scen, master.x[i], x_hat[i])
+                added += 1
+    if "shortfall" in terms and violated(rec.shortfall.mean(), master.theta_s.value() or 0.0):
+        x_vars = [v for row in master.x for v in row]
+        master.add_cut(master.theta_s, rec.shortfall.mean(), rec.g_shortfall / n_scen, x_vars, x_hat)
+        added += 1
+    return added
+
+
+def _benders_phase(master: _Master, evaluate: _RecourseEvaluator, problem: PlanningProblem,
+                   weights: dict, limit: Optional[Tuple[str, float]], tol: float,
+                   max_iterations: int, label: str, telemetry: Optional[RunTelemetry],
+                   start: Optional[np.ndarray] = None) -> Tuple[str, int, Optional[float], Optional[np.ndarray]]:
+    """
+    Minimiza Σ peso·término para ``weights`` = {"cost"|"unmet"|"shortfall": peso}
+    (con ``limit`` = (término, cota) opcional) añadiendo cortes hasta que el gap
+    y la violación de la cota sean ≤ ``tol``.
+
+    El maestro se resuelve dentro de una región de confianza (caja escalada
+    por la demanda media) alrededor del mejor plan encontrado, lo que evita las
+    oscilaciones del método de planos de corte puro.  Con ``limit`` los planes
+    se comparan por el mérito ℓ1 ``f + M·violación``, con M el doble del mayor
+    dual de la cota en el maestro: así la región existe desde la primera
+    iteración aunque ningún plan cumpla aún la cota.  ``start`` es un plan
+    inicial (p. ej. el de la fase anterior); los cortes de fases anteriores
+    siguen siendo válidos y se conservan.
+    """
+    exprs = {"cost": master.cost, "unmet": master.unmet, "shortfall": master.shortfall}
+    objective = lp.lpSum(w * exprs[term] for term, w in weights.items() if w)
+    master.set_phase(objective, (exprs[limit[0]], limit[1]) if limit else None)
+    terms = {term for term, w in weights.items() if w} | ({limit[0]} if limit else set())
+    radius_unit = problem.demand + 1.0
+    delta, penalty = TR_RADIUS, 0.0
+    incumbent, f_inc, viol_inc, gap = None, np.inf, 0.0, None
+
+    # Escalas de la cota: el coste relativo al coste de producir la demanda
+    # base, el faltante relativo a la demanda esperada
+    scale = {"cost": max(1.0, _first_stage_cost(problem, problem.demand)),
+             "unmet": max(1.0, evaluate.mean_demand),
+             "shortfall": max(1.0, evaluate.mean_demand)}
+
+    def evaluate_point(x_hat: np.ndarray) -> Tuple[Recourse, float, float]:
+        rec = evaluate(x_hat, per_scenario=master.nu is not None)
+        true = {"cost": _first_stage_cost(problem, x_hat) + rec.holding.sum(axis=1).mean(),
+                "unmet": rec.unmet.sum(axis=1).mean(),
+                "shortfall": rec.shortfall.mean()}
+        violation = max(0.0, true[limit[0]] - limit[1]) if limit else 0.0
+        return rec, sum(w * true[term] for term, w in weights.items() if w), violation
+
+    def feasible(violation: float) -> bool:
+        return limit is None or violation <= tol * scale[limit[0]]
+
+    if start is not None:
+        rec, f_inc, viol_inc = evaluate_point(start)
+        incumbent = start
+        _add_cuts(master, rec, start, tol, terms)
+
+    try:
+        verify = False
+        for it in range(1, max_iterations + 1):
+            # Sin caja cuando hay que confirmar la convergencia: solo el maestro
+            # completo da una cota inferior global.
+            boxed = incumbent is not None and not verify
+            if boxed:
+                master.set_box(np.maximum(incumbent - delta * radius_unit, 0.0), incumbent + delta * radius_unit)
+            else:
+                master.set_box(None, None)
+            status = solve(master.model, label, telemetry)
+            if status == lp.LpStatusInfeasible and boxed:
+                # La cota de la fase no se alcanza dentro de la caja
+                master.set_box(None, None)
+                boxed = False
+                status = solve(master.model, label, telemetry)
+            if status != lp.LpStatusOptimal:
+                return lp.LpStatus[status], it, gap, None
+            if limit:
+                penalty = max(penalty, 2 * abs(master.model.constraints["phase_limit"].pi or 0.0))
+            predicted = lp.value(objective)
+            x_hat = master.values()
+            rec, f_hat, viol_hat = evaluate_point(x_hat)
+
+            if incumbent is None:
+                incumbent, f_inc, viol_inc = x_hat, f_hat, viol_hat
+                _add_cuts(master, rec, x_hat, tol, terms)
+                continue
+
+            merit_inc = f_inc + penalty * viol_inc
+            gap = max(0.0, merit_inc - predicted) / max(1.0, abs(merit_inc))
+            if gap <= tol and feasible(viol_inc):
+                if not boxed:
+                    return "Optimal", it, gap, incumbent
+                verify = True
+                continue
+            if gap <= tol:
+                # Incumbente aún infactible con el modelo ya ajustado: M es corto
+                penalty = 2 * penalty if penalty > 0 else 1.0
+                merit_inc = f_inc + penalty * viol_inc
+            if verify:
+                # El óptimo del modelo está fuera de la caja: se amplía la región
+                verify, delta = False, max(delta, TR_RADIUS)
+
+            # Paso serio si x̂ mejora lo suficiente el mérito del incumbente; si
+            # la mejora fue buena y x̂ tocó el borde de la caja, se amplía la región.
+            merit_hat = f_hat + penalty * viol_hat
+            rho = (merit_inc - merit_hat) / max(merit_inc - predicted, 1e-12 * max(1.0, abs(merit_inc)))
+            if rho >= 1e-4:
+                on_border = np.any(np.abs(x_hat - incumbent) >= (1 - 1e-6) * delta * radius_unit)
+                if rho > 0.5 and on_border:
+                    delta = min(2 * delta, TR_RADIUS_MAX)
+                incumbent, f_inc, viol_inc = x_hat, f_hat, viol_hat
+            elif rho < 0:
+                delta = max(delta / 2, TR_RADIUS_MIN)
+            _add_cuts(master, rec, x_hat, tol, terms)
+        return "Not Solved", max_iterations, gap, None
+    finally:
+        master.set_box(None, None)
+
+
+def _solve_benders(problem: PlanningProblem, demand: np.ndarray, model: str, alpha: float,
+                   wc: float, ws: float, multicut: bool, max_workers: Optional[int], tol: float,
+                   max_iterations: int, telemetry: Optional[RunTelemetry]):
+    allowance = (1 - alpha) * demand.sum(axis=(1, 2))
+    stage = telemetry.stage if telemetry is not None else (lambda name: nullcontext())
+    with stage("build_stochastic_master"):
+        master = _Master(problem, demand, allowance, multicut)
+    evaluate = _RecourseEvaluator(demand, problem.sst, problem.costs.hold, allowance, max_workers)
+    if telemetry is not None:
+        telemetry.record_allocation("stochastic_recourse", evaluate.workers, 1, SCHEDULER.cores)
+    try:
+        with stage("benders"):
+            if model == "weighted":
+                return _benders_phase(master, evaluate, problem, {"cost": wc, "shortfall": ws}, None, tol,
+                                      max_iterations, "stochastic_master_weighted", telemetry)
+
+            # Fase 1: coste con nivel de servicio esperado ≥ α
+            limit = ("unmet", (1 - alpha) * evaluate.mean_demand)
+            status, it1, gap, x_hat = _benders_phase(master, evaluate, problem, {"cost": 1.0}, limit, tol,
+                                                     max_iterations, "stochastic_master_lex_phase1", telemetry)
+            if x_hat is None:
+                return status, it1, gap, None
+            # Fase 2: faltante esperado con el coste de la fase 1 fijo
+            rec = evaluate(x_hat, per_scenario=False)
+            f_star = _first_stage_cost(problem, x_hat) + rec.holding.sum(axis=1).mean()
+            limit = ("cost", f_star + LOCK_RTOL * max(1.0, abs(f_star)))
+            status, it2, gap, x_hat = _benders_phase(master, evaluate, problem, {"unmet": 1.0}, limit, tol,
+                                                     max_iterations, "stochastic_master_lex_phase2", telemetry,
+                                                     start=x_hat)
+            return status, it1 + it2, gap, x_hat
+    finally:
+        evaluate.close()
+
+
+# ---------------------------------------------------------------------------
+# 7. PUNTO DE ENTRADA
+# ---------------------------------------------------------------------------
+
+def solve_stochastic(problem: PlanningProblem, scenarios: List[Tuple[str, np.ndarray]],
+                     model: str = "lex", method: str = "benders", alpha: float = 0.9,
+                     wc: float = 1.0, ws: float = 10.0, multicut: bool = False,
+                     max_workers: Optional[int] = None, tol: float = TOL,
+                     max_iterations: int = MAX_ITERATIONS,
+                     telemetry: Optional[RunTelemetry] = None) -> StochasticResult:
+    """
+    Resuelve el modelo estocástico con escenarios equiprobables.
+
+    ``scenarios`` son pares (nombre, demanda SKU × periodo), p. ej. de
+    ``scenarios.parse_scenarios``.  El plan devuelto se evalúa escenario por
+    escenario en ``result.scenarios``.
+    """
+    if model not in MODELS:
+        raise ValueError(f"Modelo desconocido '{model}' (opciones: {', '.join(MODELS)})")
+    if method not in METHODS:
+        raise ValueError(f"Método desconocido '{method}' (opciones: {', '.join(METHODS)})")
+    if not scenarios:
+        raise ValueError("Se necesita al menos un escenario")
+    names = [name for name, _ in scenarios]
+    demand = np.stack([problem.with_demand(d).demand for _, d in scenarios])
+
+    if method == "extensive":
+        status, plan = _solve_extensive(problem, demand, model, alpha, wc, ws, telemetry)
+        iterations, gap = 0, None
+    else:
+        status, iterations, gap, plan = _solve_benders(problem, demand, model, alpha, wc, ws, multicut,
+                                                       max_workers, tol, max_iterations, telemetry)
+
+    if plan is None:
+        return StochasticResult(status, method, model, iterations, gap, None, None, None, None, None)
+    cost, shortfall, service, table = _summarize(problem, names, demand, alpha, plan)
+    return StochasticResult(status, method, model, iterations, gap, cost, shortfall, service, plan, table)
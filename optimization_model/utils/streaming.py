@@ -0,0 +1,158 @@
+"""
+streaming.py
+============
+
+Progreso de una optimización en vivo como Server‑Sent Events (SSE).
+
+La optimización corre en un hilo aparte y publica eventos (``point``,
+``frontier``, ``alpha``, ``plan``, ...) con ``RunProgress``; la vista
+asíncrona los lee de una ``asyncio.Queue`` y los envía al cliente en cuanto
+llegan, con un comentario ``: keep-alive`` cada ``HEARTBEAT`` segundos de
+silencio para que los proxies no corten la conexión.
+
+Cancelación: ``cancel`` (por ``run_id`` desde otra petición o al
+desconectarse el cliente) marca la ejecución; la siguiente publicación lanza
+``Cancelled`` dentro del hilo de la optimización, que deja de lanzar
+resoluciones.  Una resolución de CBC ya en marcha termina antes de que la
+cancelación surta efecto.
+
+Cada ejecución termina con un evento de ``TERMINAL``: ``done``,
+``cancelled`` o ``error``.
+"""
+
+# ---------------------------------------------------------------------------
+# 1. IMPORTACIONES
+# ---------------------------------------------------------------------------
+import asyncio
+import threading
+import uuid
+from typing import AsyncIterator, Callable, Dict, Optional, Tuple
+
+from .encoding import dumps, finite
+
+
+# ---------------------------------------------------------------------------
+# 2. PARÁMETROS
+# ---------------------------------------------------------------------------
+HEARTBEAT: float = 15.0      # segundos sin eventos antes de enviar un keep-alive
+
+CONTENT_TYPE = "text/event-stream"
+
+DONE, CANCELLED, ERROR = "done", "cancelled", "error"
+TERMINAL = (DONE, CANCELLED, ERROR)
+
+
+class Cancelled(Exception):
+    """La ejecución se canceló (por el cliente o al desconectarse)."""
+
+
+# ---------------------------------------------------------------------------
+# 3. FORMATO SSE
+# ---------------------------------------------------------------------------
+
+def sse(event: str, data) -> bytes:
+    """Un evento SSE: ``event: <nombre>`` y ``data: <json>`` en una línea."""
+    return b"event: " + event.encode() + b"\ndata: " + dumps(finite(data)) + b"\n\n"
+
+
+# ---------------------------------------------------------------------------
+# 4. PROGRESO DE UNA EJECUCIÓN
+# ---------------------------------------------------------------------------
+
+class RunProgress:
+    """
+    Canal de eventos de un hilo de optimización hacia el bucle de asyncio.
+
+    Se usa como ``progress(evento, datos)`` de ``Script_Maestro`` y, con
+    ``point(evento)``, como ``on_point`` de ``sweep.sweep_alpha``.
+    """
+
+    def __init__(self, loop: asyncio.AbstractEventLoop):
+        self.run_id = uuid.uuid4().hex
+        self.loop = loop
+        self.queue: "asyncio.Queue[Tuple[str, dict]]" = asyncio.Queue()
+        self._cancel = threading.Event()
+
+    @property
+    def cancelled(self) -> bool:
+        return self._cancel.is_set()
+
+    def cancel(self) -> None:
+        self._cancel.set()
+
+    def check(self) -> None:
+        """Lanza ``Cancelled`` si se pidió cancelar."""
+        if self._cancel.is_set():
+            raise Cancelled(self.run_id)
+
+    def _put(self, event: str, data: dict) -> None:
+        try:
+            self.loop.call_soon_threadsafe(self.queue.put_nowait, (event, data))
+        except RuntimeError:
+            # El bucle ya se cerró: nadie escucha
+            self.cancel()
+
+    def __call__(self, event: str, data: dict) -> None:
+        """Publica un evento; lanza ``Cancelled`` si la ejecución se canceló."""
+        self.check()
+        self._put(event, data)
+
+    def point(self, event: str) -> Callable[[dict], None]:
+        """Callback de un solo argumento que publica cada fila como ``event``."""
+        return lambda row: self(event, row)
+
+    def finish(self, event: str, data: dict) -> None:
+        """Publica el evento final (``TERMINAL``) aunque se haya cancelado."""
+        self._put(event, data)
+
+    async def events(self, heartbeat: float = HEARTBEAT) -> AsyncIterator[bytes]:
+        """Eventos SSE hasta el final de la ejecución, con keep-alive en los silencios."""
+        while True:
+            try:
+                event, data = await asyncio.wait_for(self.queue.get(), heartbeat)
+            except asyncio.TimeoutError:
+                yield b": keep-alive\n\n"
+                continue
+            yield sse(event, data)
+            if event in TERMINAL:
+                return
+
+
+# ---------------------------------------------------------------------------
+# 5. REGISTRO DE EJECUCIONES EN CURSO
+# ---------------------------------------------------------------------------
+
+class RunRegistry:
+    """Ejecuciones en curso del proceso, por ``run_id`` (para cancelarlas)."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._runs: Dict[str, RunProgress] = {}
+
+    def add(self, progress: RunProgress) -> str:
+        with self._lock:
+            self._runs[progress.run_id] = progress
+        return progress.run_id
+
+    def remove(self, run_id: str) -> None:
+        with self._lock:
+            self._runs.pop(run_id, None)
+
+    def get(self, run_id: str) -> Optional[RunProgress]:
+        with self._lock:
+            return self._runs.get(run_id)
+
+    def cancel(self, run_id: str) -> bool:
+        """Cancela la ejecución ``run_id``; ``False`` si no está en curso."""
+        progress = self.get(run_id)
+        if progress is None:
+            return False
+        progress.cancel()
+        return True
+
+    def __len__(self) -> int:
+        with self._lock:
+            return len(self._runs)
+
+
+RUNS = RunRegistry()
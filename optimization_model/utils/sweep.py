@@ -0,0 +1,255 @@
+"""
+sweep.py
+========
+
+Barrido de ``α`` para el modelo lexicográfico.
+
+La fase 1 (coste mínimo) no depende de ``α``: se resuelve una sola vez.  La
+fase 2 (shortfall mínimo con el coste fijado en ``f★``) solo cambia el lado
+derecho de la fila de cobertura ``Σx + s >= α·ΣD``, así que cada proceso
+construye el modelo una vez y recorre un tramo contiguo de valores de ``α``
+cambiando únicamente esa constante.  Cada punto arranca de la base óptima del
+anterior (``basisIn``/``basisOut`` de CBC): al mover solo un lado derecho la
+base sigue siendo dual factible y CBC termina en unas pocas iteraciones.
+
+Los valores de ``α`` se reparten en tramos contiguos (ordenados) entre
+procesos, de modo que los arranques en caliente se hacen entre puntos
+vecinos.  El resultado es la curva servicio/coste con el dual de la cobertura
+(coste marginal del shortfall) en cada punto.  Los procesos leen el problema
+de memoria compartida (``shared``): no se copia a cada uno.
+
+``on_point`` recibe cada punto en cuanto está resuelto (en línea, uno a uno;
+con procesos, al terminar cada tramo) para mostrar la curva parcial; si lanza
+una excepción el barrido se detiene y no se lanzan más tramos.
+"""
+
+# ---------------------------------------------------------------------------
+# 1. IMPORTACIONES
+# ---------------------------------------------------------------------------
+import os
+import re
+import shutil
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from typing import Callable, Iterator, List, NamedTuple, Optional, Tuple, Union
+
+import numpy as np
+import pandas as pd
+import pulp as lp
+
+from .cores import SCHEDULER
+from .presolve import presolve
+from .problem import PlanningProblem, build_planning_model
+from .scenarios import COST_LOCK_RTOL
+from .sensitivity import COST_LOCK, COVERAGE
+from .shared import SharedHandle, attach_problem, share_problem
+from .solver import solve
+from .telemetry import RunTelemetry
+
+
+# ---------------------------------------------------------------------------
+# 2. PARÁMETROS
+# ---------------------------------------------------------------------------
+MAX_POINTS: int = 500        # puntos por barrido
+WARM_START: bool = True      # arranque en caliente con la base del punto anterior
+DISPATCH_CHUNK: int = 8      # alphas contiguos por tarea repartida (``dispatch``)
+
+CURVE_COLUMNS = ["alpha", "status", "cost", "shortfall", "total_production",
+                 "service_level", "coverage_dual", "iterations", "seconds"]
+
+_RANGE = re.compile(r"^\s*([^:]+):([^:]+):([^:]+)\s*$")
+
+
+# ---------------------------------------------------------------------------
+# 3. VALORES DE ALPHA
+# ---------------------------------------------------------------------------
+
+def _arange(start: float, stop: float, step: float) -> List[float]:
+    """Valores de ``start`` a ``stop`` (inclusive) con paso ``step``."""
+    if step <= 0:
+        raise ValueError("El paso de alpha debe ser positivo")
+    n = int(np.floor((stop - start) / step + 1e-9)) + 1
+    if n > MAX_POINTS:
+        raise ValueError(f"Demasiados valores de alpha ({n}; máximo {MAX_POINTS})")
+    return [round(start + i * step, 12) for i in range(max(n, 0))]
+
+
+def parse_alphas(spec) -> List[float]:
+    """
+    Lista ordenada y sin repetidos de valores de ``α``.
+
+    Admite una lista de números, un texto ``"0.8,0.9,0.95"``, un rango
+    ``"inicio:fin:paso"`` o un objeto ``{"start", "stop", "step"}`` (o
+    ``"num"`` en lugar de ``"step"``, como ``numpy.linspace``).
+    """
+    if isinstance(spec, str):
+        match = _RANGE.match(spec)
+        if match:
+            values = _arange(*(float(v) for v in match.groups()))
+        else:
+            values = [float(v) for v in spec.split(",") if v.strip()]
+    elif isinstance(spec, dict):
+        start, stop = float(spec["start"]), float(spec["stop"])
+        if "num" in spec:
+            num = int(spec["num"])
+            if not 0 < num <= MAX_POINTS:
+                raise ValueError(f"num debe estar entre 1 y {MAX_POINTS}")
+            values = np.linspace(start, stop, num).tolist()
+        else:
+            values = _arange(start, stop, float(spec["step"]))
+    elif isinstance(spec, (list, tuple)):
+        values = [float(v) for v in spec]
+    else:
+        raise ValueError("alphas debe ser una lista, un rango 'inicio:fin:paso' o {start, stop, step}")
+
+    values = sorted(set(values))
+    if not values:
+        raise ValueError("No se indicó ningún valor de alpha")
+    if len(values) > MAX_POINTS:
+        raise ValueError(f"Demasiados valores de alpha ({len(values)}; máximo {MAX_POINTS})")
+    if values[0] < 0 or not np.all(np.isfinite(values)):
+        raise ValueError("Los valores de alpha deben ser finitos y no negativos")
+    return values
+
+
+# ---------------------------------------------------------------------------
+# 4. RESOLUCIÓN
+# ---------------------------------------------------------------------------
+
+class SweepResult(NamedTuple):
+    status: str              # estado de la fase 1
+    f_star: Optional[float]  # coste óptimo de la fase 1
+    curve: pd.DataFrame      # una fila por alpha (CURVE_COLUMNS)
+
+
+def _phase1(problem: PlanningProblem, telemetry: Optional[RunTelemetry]) -> Tuple[int, Optional[float]]:
+    reduction = presolve(problem, telemetry=telemetry)
+    if reduction.infeasible:
+        return lp.LpStatusInfeasible, None
+    pm = build_planning_model(problem, "sweep_phase1", reduction=reduction)
+    pm.model.setObjective(pm.cost)
+    status = solve(pm.model, "sweep_phase1", telemetry)
+    return status, (lp.value(pm.cost) if status == lp.LpStatusOptimal else None)
+
+
+# Problema base y f★ en cada proceso del pool; las tareas solo llevan sus
+# alphas.  En línea se pasan como ``base`` (hilos concurrentes de las vistas).
+_SWEEP: Optional[Tuple[PlanningProblem, float]] = None
+
+
+def _init_worker(problem: Union[PlanningProblem, SharedHandle], f_star: float,
+                 cores: Optional[int] = None) -> None:
+    global _SWEEP
+    if isinstance(problem, SharedHandle):
+        problem, _ = attach_problem(problem)
+    _SWEEP = (problem, f_star)
+    if cores is not None:
+        SCHEDULER.reset(cores)
+
+
+def _solve_chunk(alphas: List[float], on_point: Optional[Callable[[dict], None]] = None,
+                 base: Optional[Tuple[PlanningProblem, float]] = None) -> Tuple[List[dict], List[dict]]:
+    """Fase 2 para un tramo contiguo de alphas sobre un único modelo (``base`` o el del proceso)."""
+    problem, f_star = base or _SWEEP
+    tel = RunTelemetry()
+    pm = build_planning_model(problem, "sweep_phase2", reduction=presolve(problem))
+    m = pm.model
+    total_demand = float(problem.demand.sum())
+    s = lp.LpVariable("shortfall", lowBound=0)
+    m += (pm.cost <= f_star + COST_LOCK_RTOL * max(1.0, abs(f_star)), COST_LOCK)
+    m += (pm.production + s >= 0.0, COVERAGE)
+    m.setObjective(s)
+    coverage = m.constraints[COVERAGE]
+    offset = coverage.constant   # constante de Σx (la demanda sustituida); el lado derecho se resta
+
+    workdir = tempfile.mkdtemp(prefix="sweep-")
+    basis = os.path.join(workdir, "phase2.bas")
+    rows = []
+    try:
+        for alpha in alphas:
+            t0 = time.perf_counter()
+            coverage.constant = offset - alpha * total_demand
+            options = ["initialSolve", f"basisO {basis}"]
+            if WARM_START and os.path.exists(basis):
+                options.insert(0, f"basisI {basis}")
+            status = solve(m, "sweep_phase2", tel, options=options)
+            optimal = status == lp.LpStatusOptimal
+            production = lp.value(pm.production) if optimal else None
+            rows.append({
+                "alpha": alpha,
+                "status": lp.LpStatus[status],
+                "cost": lp.value(pm.cost) if optimal else None,
+                "shortfall": s.value() if optimal else None,
+                "total_production": production,
+                "service_level": production / total_demand if optimal and total_demand else None,
+                "coverage_dual": coverage.pi if optimal else None,
+                "iterations": tel.solves[-1].get("iterations"),
+                "seconds": time.perf_counter() - t0,
+            })
+            if not optimal and os.path.exists(basis):
+                os.remove(basis)
+            if on_point is not None:
+                on_point(rows[-1])
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+    return rows, tel.solves
+
+
+def sweep_alpha(problem: PlanningProblem, alphas: List[float], max_workers: Optional[int] = None,
+                telemetry: Optional[RunTelemetry] = None,
+                on_point: Optional[Callable[[dict], None]] = None,
+                dispatch: Optional[Callable[..., Iterator[dict]]] = None) -> SweepResult:
+    """
+    Curva servicio/coste del modelo lexicográfico para cada ``α`` de ``alphas``.
+
+    La fase 1 se resuelve una vez; los alphas (ordenados) se reparten en
+    tramos contiguos entre ``max_workers`` procesos, uno por núcleo libre de
+    ``SCHEDULER`` (cada LP usa un solo hilo).  ``on_point(fila)`` se llama
+    con cada punto a medida que termina; la curva final sigue ordenada por ``α``.
+    Con ``dispatch`` (ver ``tasks``) los tramos de ``DISPATCH_CHUNK`` alphas
+    se reparten como tareas ``"alpha"`` en lugar de usar el pool local.
+    """
+    alphas = sorted(alphas)
+    status, f_star = _phase1(problem, telemetry)
+    if f_star is None:
+        return SweepResult(lp.LpStatus[status], None, pd.DataFrame(columns=CURVE_COLUMNS))
+
+    workers = SCHEDULER.pool_workers(len(alphas), max_workers)
+    if dispatch is not None:
+        workers = 1
+        chunks = [alphas[i:i + DISPATCH_CHUNK] for i in range(0, len(alphas), DISPATCH_CHUNK)]
+        results = []
+        for result in dispatch(problem, "alpha", [{"alphas": c, "f_star": f_star} for c in chunks]):
+            results.append((result["rows"], result["solves"]))
+            if on_point is not None:
+                for row in result["rows"]:
+                    on_point(row)
+    elif workers == 1:
+        results = [_solve_chunk(alphas, on_point, base=(problem, f_star))]
+    else:
+        with SCHEDULER.lease(workers) as workers, share_problem(problem) as (handle, _):
+            chunks = [c.tolist() for c in np.array_split(np.asarray(alphas), workers) if len(c)]
+            with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker,
+                                     initargs=(handle, f_star, 1)) as pool:
+                futures = {pool.submit(_solve_chunk, chunk): i for i, chunk in enumerate(chunks)}
+                results = [None] * len(chunks)
+                try:
+                    for future in as_completed(futures):
+                        results[futures[future]] = future.result()
+                        if on_point is not None:
+                            for row in results[futures[future]][0]:
+                                on_point(row)
+                except BaseException:
+                    # Cancelación (o fallo): los tramos que aún no empezaron no se lanzan
+                    pool.shutdown(wait=False, cancel_futures=True)
+                    raise
+
+    # Las resoluciones de los procesos hijos se agregan a la telemetría del padre
+    if telemetry is not None:
+        telemetry.record_allocation("sweep", workers, 1, SCHEDULER.cores)
+        for _, solves in results:
+            for record in solves:
+                telemetry.record_solve(record)
+    curve = pd.DataFrame([row for rows, _ in results for row in rows], columns=CURVE_COLUMNS)
+    return SweepResult(lp.LpStatus[status], f_star, curve)
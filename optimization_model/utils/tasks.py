@@ -0,0 +1,137 @@
+"""
+tasks.py
+========
+
+Resoluciones independientes que se pueden repartir entre procesos o nodos.
+
+``optimize_from_excel`` (pesos weighted‑sum), ``sweep_alpha`` (tramos de
+``α``) y ``solve_scenarios`` (escenarios) aceptan un ``dispatch``: una
+función ``dispatch(problem, kind, payloads, arrays=None)`` que ejecuta una
+tarea ``kind`` por cada ``payload`` y devuelve un iterador con los
+resultados **en el orden de ``payloads``**.  ``local_dispatch`` las ejecuta en
+línea; ``optimization_model.distributed`` las reparte entre nodos a través de
+la base de datos.
+
+Tareas (``TASKS``): ``run_task(kind, problem, arrays, payload)`` devuelve un
+diccionario serializable en JSON que siempre incluye ``solves`` (los
+registros de telemetría de sus resoluciones, para agregarlos en el llamador).
+
+* ``weighted``: ``{ws, wc, alpha, sensitivity, budget}`` → ``{cost, service, report}``;
+* ``alpha``: ``{alphas, f_star}`` → ``{rows}`` (filas de ``sweep.CURVE_COLUMNS``);
+* ``scenario``: ``{index, name, model, alpha, wc, ws}`` → ``{row}``; la
+  demanda es ``arrays["scenario_demand"][index]``.
+
+``pack_problem``/``unpack_problem`` serializan el problema (con su tabla de
+recursos, si la tiene) y los arreglos extra (``.npz`` sin pickle y metadatos JSON) para enviarlos a otro nodo.
+"""
+
+# ---------------------------------------------------------------------------
+# 1. IMPORTACIONES
+# ---------------------------------------------------------------------------
+import io
+from typing import Callable, Dict, Iterator, List, Optional, Tuple
+
+import numpy as np
+
+from .Script_Maestro import _reduce, weighted_point
+from .costs import CostTable
+from .problem import PlanningProblem
+from .resources import from_arrays
+from .scenarios import solve_scenario
+from .solver import SolveBudget
+from .sweep import _solve_chunk
+from .telemetry import RunTelemetry
+
+
+# ---------------------------------------------------------------------------
+# 2. PARÁMETROS
+# ---------------------------------------------------------------------------
+WEIGHTED, ALPHA, SCENARIO = "weighted", "alpha", "scenario"
+
+_PROBLEM_ARRAYS = ("demand", "sst", "eex", "cap")
+_COST_PREFIX = "cost_"
+_RESOURCE_PREFIX = "resource_"
+
+
+# ---------------------------------------------------------------------------
+# 3. TAREAS
+# ---------------------------------------------------------------------------
+
+def _weighted(problem: PlanningProblem, arrays: Dict[str, np.ndarray], payload: dict, tel: RunTelemetry) -> dict:
+    reports = [] if payload.get("sensitivity") else None
+    budget = SolveBudget(**payload["budget"]) if payload.get("budget") else None
+    cost, service = weighted_point(problem.products, problem.periods, problem.demand, problem.sst, problem.eex,
+                                   problem.cap, problem.costs, payload["ws"], payload["wc"], payload["alpha"],
+                                   tel, reports, budget, _reduce(problem, tel))
+    return {"cost": cost, "service": service, "report": reports[-1] if reports else None}
+
+
+def _alpha(problem: PlanningProblem, arrays: Dict[str, np.ndarray], payload: dict, tel: RunTelemetry) -> dict:
+    rows, solves = _solve_chunk(payload["alphas"], base=(problem, payload["f_star"]))
+    for record in solves:
+        tel.record_solve(record)
+    return {"rows": rows}
+
+
+def _scenario(problem: PlanningProblem, arrays: Dict[str, np.ndarray], payload: dict, tel: RunTelemetry) -> dict:
+    demand = arrays["scenario_demand"][payload["index"]]
+    return {"row": solve_scenario(problem.with_demand(demand), payload["name"], payload["model"],
+                                  payload["alpha"], payload["wc"], payload["ws"], tel)}
+
+
+TASKS: Dict[str, Callable[[PlanningProblem, Dict[str, np.ndarray], dict, RunTelemetry], dict]] = {
+    WEIGHTED: _weighted,
+    ALPHA: _alpha,
+    SCENARIO: _scenario,
+}
+
+
+def run_task(kind: str, problem: PlanningProblem, arrays: Optional[Dict[str, np.ndarray]], payload: dict) -> dict:
+    """Ejecuta una tarea y devuelve su resultado con los registros de sus resoluciones."""
+    if kind not in TASKS:
+        raise ValueError(f"Tipo de tarea desconocido '{kind}' (opciones: {', '.join(TASKS)})")
+    tel = RunTelemetry()
+    result = TASKS[kind](problem, arrays or {}, payload, tel)
+    result["solves"] = tel.solves
+    return result
+
+
+def local_dispatch(problem: PlanningProblem, kind: str, payloads: List[dict],
+                   arrays: Optional[Dict[str, np.ndarray]] = None) -> Iterator[dict]:
+    """``dispatch`` en línea: una tarea tras otra en este proceso."""
+    for payload in payloads:
+        yield run_task(kind, problem, arrays, payload)
+
+
+# ---------------------------------------------------------------------------
+# 4. SERIALIZACIÓN
+# ---------------------------------------------------------------------------
+
+def pack_problem(problem: PlanningProblem,
+                 arrays: Optional[Dict[str, np.ndarray]] = None) -> Tuple[bytes, dict]:
+    """(``.npz`` con las matrices, costos y ``arrays``; metadatos JSON con productos y periodos)."""
+    data = {key: getattr(problem, key) for key in _PROBLEM_ARRAYS}
+    data.update({_COST_PREFIX + name: values for name, values in zip(CostTable._fields, problem.costs)})
+    if problem.resources is not None:
+        data.update({_RESOURCE_PREFIX + key: value for key, value in problem.resources.arrays().items()})
+    data.update(arrays or {})
+    buf = io.BytesIO()
+    np.savez(buf, **data)
+    meta = {"products": list(problem.products), "periods": list(problem.periods),
+            "resources": problem.resources.names if problem.resources is not None else None,
+            "arrays": sorted(arrays or {})}
+    return buf.getvalue(), meta
+
+
+def unpack_problem(blob: bytes, meta: dict) -> Tuple[PlanningProblem, Dict[str, np.ndarray]]:
+    """Inverso de ``pack_problem``: (problema, arreglos extra)."""
+    with np.load(io.BytesIO(bytes(blob)), allow_pickle=False) as data:
+        problem = PlanningProblem(
+            meta["products"], meta["periods"],
+            *(data[key] for key in _PROBLEM_ARRAYS),
+            CostTable(*(data[_COST_PREFIX + name] for name in CostTable._fields)),
+        )
+        if meta.get("resources") is not None:
+            problem = problem._replace(resources=from_arrays(meta["resources"], {
+                key[len(_RESOURCE_PREFIX):]: data[key] for key in data.files if key.startswith(_RESOURCE_PREFIX)}))
+        return problem, {key: data[key] for key in meta["arrays"]}
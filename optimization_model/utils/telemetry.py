@@ -0,0 +1,142 @@
+"""
+telemetry.py
+============
+
+Instrumentación ligera del pipeline de optimización.
+
+* ``RunTelemetry`` acumula, para una sola petición, el tiempo de cada etapa
+  (lectura del Excel, preprocesamiento, construcción del modelo, CBC,
+  exportación), un registro por cada resolución (tamaño, estado, iteraciones,
+  hilos) y los núcleos asignados a cada pool de procesos (``cores``).
+* ``METRICS`` es el registro global del proceso; se alimenta de todas las
+  ejecuciones y se expone en formato Prometheus desde la vista ``/metrics``.
+"""
+
+# ---------------------------------------------------------------------------
+# 1. IMPORTACIONES
+# ---------------------------------------------------------------------------
+import threading
+import time
+from contextlib import contextmanager
+from typing import Dict, Iterator, List, Optional, Tuple
+
+
+# ---------------------------------------------------------------------------
+# 2. REGISTRO GLOBAL (PROMETHEUS)
+# ---------------------------------------------------------------------------
+
+LabelSet = Tuple[Tuple[str, str], ...]
+
+
+class MetricsRegistry:
+    """Contadores y gauges en memoria, seguros entre hilos."""
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self._counters: Dict[str, Dict[LabelSet, float]] = {}
+        self._gauges: Dict[str, Dict[LabelSet, float]] = {}
+        self._help: Dict[str, str] = {}
+
+    @staticmethod
+    def _key(labels: Optional[Dict[str, str]]) -> LabelSet:
+        return tuple(sorted((k, str(v)) for k, v in (labels or {}).items()))
+
+    def describe(self, name: str, text: str) -> None:
+        self._help[name] = text
+
+    def inc(self, name: str, value: float = 1.0, labels: Optional[Dict[str, str]] = None) -> None:
+        key = self._key(labels)
+        with self._lock:
+            series = self._counters.setdefault(name, {})
+            series[key] = series.get(key, 0.0) + value
+
+    def set(self, name: str, value: float, labels: Optional[Dict[str, str]] = None) -> None:
+        key = self._key(labels)
+        with self._lock:
+            self._gauges.setdefault(name, {})[key] = float(value)
+
+    def render(self) -> str:
+        """Devuelve todas las series en el formato de texto de Prometheus."""
+        lines: List[str] = []
+        with self._lock:
+            for kind, table in (("counter", self._counters), ("gauge", self._gauges)):
+                for name in sorted(table):
+                    if name in self._help:
+                        lines.append(f"# HELP {name} {self._help[name]}")
+                    lines.append(f"# TYPE {name} {kind}")
+                    for labels, value in sorted(table[name].items()):
+                        lbl = ",".join(f'{k}="{v}"' for k, v in labels)
+                        lines.append(f"{name}{{{lbl}}} {value:g}" if lbl else f"{name} {value:g}")
+        return "\n".join(lines) + "\n"
+
+
+METRICS = MetricsRegistry()
+METRICS.describe("optimization_stage_seconds_total", "Tiempo acumulado por etapa del pipeline.")
+METRICS.describe("optimization_stage_calls_total", "Número de veces que se ejecutó cada etapa.")
+METRICS.describe("optimization_solves_total", "Resoluciones por modelo y estado del solver.")
+METRICS.describe("optimization_solve_seconds_total", "Tiempo acumulado dentro del solver.")
+METRICS.describe("optimization_solver_iterations_total", "Iteraciones simplex/B&B acumuladas.")
+METRICS.describe("optimization_model_rows", "Filas del último modelo resuelto.")
+METRICS.describe("optimization_model_columns", "Columnas del último modelo resuelto.")
+METRICS.describe("optimization_model_nonzeros", "Coeficientes no nulos del último modelo resuelto.")
+METRICS.describe("optimization_requests_total", "Peticiones de optimización por resultado.")
+METRICS.describe("optimization_request_seconds_total", "Tiempo acumulado atendiendo peticiones de optimización.")
+
+
+# ---------------------------------------------------------------------------
+# 3. TELEMETRÍA POR EJECUCIÓN
+# ---------------------------------------------------------------------------
+
+class RunTelemetry:
+    """Recoge etapas y resoluciones de una ejecución y las replica en ``METRICS``."""
+
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self._t0 = time.perf_counter()
+        self.stages: List[dict] = []
+        self.solves: List[dict] = []
+        self.allocations: List[dict] = []
+
+    @contextmanager
+    def stage(self, name: str) -> Iterator[None]:
+        """Cronometra el bloque ``with`` bajo la etapa ``name``."""
+        t0 = time.perf_counter()
+        try:
+            yield
+        finally:
+            elapsed = time.perf_counter() - t0
+            with self._lock:
+                self.stages.append({"stage": name, "seconds": elapsed})
+            METRICS.inc("optimization_stage_seconds_total", elapsed, {"stage": name})
+            METRICS.inc("optimization_stage_calls_total", 1, {"stage": name})
+
+    def record_solve(self, record: dict) -> None:
+        """Registra una resolución (ver ``solver.solve``)."""
+        with self._lock:
+            self.solves.append(record)
+        labels = {"model": record["model"]}
+        METRICS.inc("optimization_solves_total", 1, {**labels, "status": record["status"]})
+        METRICS.inc("optimization_solve_seconds_total", record["seconds"], labels)
+        if record.get("iterations") is not None:
+            METRICS.inc("optimization_solver_iterations_total", record["iterations"], labels)
+        METRICS.set("optimization_model_rows", record["rows"], labels)
+        METRICS.set("optimization_model_columns", record["columns"], labels)
+        METRICS.set("optimization_model_nonzeros", record["nonzeros"], labels)
+
+    def record_allocation(self, pool: str, workers: int, threads: int, cores: int) -> None:
+        """Registra el reparto de un pool: ``workers`` procesos de ``threads`` hilos sobre ``cores`` núcleos."""
+        with self._lock:
+            self.allocations.append({"pool": pool, "workers": workers, "threads": threads, "cores": cores})
+
+    def as_dict(self) -> dict:
+        """Resumen serializable: total, tiempo agregado por etapa y detalle de resoluciones."""
+        with self._lock:
+            totals: Dict[str, float] = {}
+            for s in self.stages:
+                totals[s["stage"]] = totals.get(s["stage"], 0.0) + s["seconds"]
+            return {
+                "total_seconds": time.perf_counter() - self._t0,
+                "stages": totals,
+                "solves": list(self.solves),
+                "allocations": list(self.allocations),
+            }
@@ -0,0 +1,228 @@
+"""
+validation.py
+=============
+
+Validación del libro de entrada antes de cualquier resolución, en dos pasos
+para no leer dos veces las filas de datos:
+
+* ``validate_workbook`` (al subir el archivo): solo los nombres de hoja y la
+  fila de encabezados, con openpyxl en modo de solo lectura cortado en esa
+  fila.  Un libro equivocado se rechaza en milisegundos.
+* ``validate_frames`` (en ``problem.load_problem``): las columnas
+  ``Product ID``/``Attribute`` de las hojas que ``Bus_lex.load_data`` ya
+  leyó, antes de que ``preprocess_data`` o ``lpSum`` fallen con un
+  ``KeyError``.
+
+Se comprueba lo mismo que asume ``Bus_lex.load_data``/``preprocess_data``:
+
+* hojas ``Supply_Demand`` (encabezados en la fila 3) y ``Boundary Conditions``
+  (encabezados en la fila 2);
+* columnas ``Product ID`` y ``Attribute`` en ``Supply_Demand``;
+* al menos una columna de periodo y que todas tengan formato ``MM-DD-YY`` como
+  texto (``preprocess_data`` toma por periodo toda columna con dos guiones);
+* que cada SKU tenga las filas de demanda, stock de seguridad y exceso;
+* ``Attribute`` y la fila ``Available Capacity`` en ``Boundary Conditions``
+  cuando esa hoja tiene columnas de periodo (si no, la capacidad se estima).
+
+Los errores se devuelven todos juntos como lista de diccionarios
+(``code``, ``sheet``, ``message`` y, según el caso, ``column``/``row``/``products``).
+"""
+
+# ---------------------------------------------------------------------------
+# 1. IMPORTACIONES
+# ---------------------------------------------------------------------------
+import datetime
+import re
+from typing import Dict, List, Optional
+
+import openpyxl
+import pandas as pd
+
+
+# ---------------------------------------------------------------------------
+# 2. PARÁMETROS
+# ---------------------------------------------------------------------------
+SD_SHEET = "Supply_Demand"
+BC_SHEET = "Boundary Conditions"
+SD_HEADER_ROW = 3        # skiprows=2 en Bus_lex.load_data
+BC_HEADER_ROW = 2        # skiprows=1
+
+KEY_COLUMNS = ("Product ID", "Attribute")
+REQUIRED_ATTRIBUTES = ("EffectiveDemand", "Safety Stock Target", "Inventory Balance in excess of SST")
+CAPACITY_ATTRIBUTE = "Available Capacity"
+
+PERIOD_PATTERN = re.compile(r"\d{1,2}-\d{1,2}-\d{2}")
+MAX_LISTED: int = 20     # SKUs/columnas que se enumeran como máximo en un error
+
+
+# ---------------------------------------------------------------------------
+# 3. ERRORES
+# ---------------------------------------------------------------------------
+
+class WorkbookValidationError(ValueError):
+    """Libro de entrada inválido; ``errors`` lleva el detalle estructurado."""
+
+    def __init__(self, errors: List[dict]):
+        self.errors = errors
+        summary = "; ".join(e["message"] for e in errors[:3])
+        more = f" (+{len(errors) - 3} más)" if len(errors) > 3 else ""
+        super().__init__(f"Libro de entrada inválido: {summary}{more}")
+
+
+def _error(code: str, sheet: str, message: str, **extra) -> dict:
+    return {"code": code, "sheet": sheet, "message": message, **extra}
+
+
+def _listed(values: List[str]) -> List[str]:
+    return values[:MAX_LISTED] + ([f"... (+{len(values) - MAX_LISTED})"] if len(values) > MAX_LISTED else [])
+
+
+# ---------------------------------------------------------------------------
+# 4. LECTURA MÍNIMA
+# ---------------------------------------------------------------------------
+
+def _headers_openpyxl(excel_file, sheets: Dict[str, int]) -> Dict[str, Optional[list]]:
+    wb = openpyxl.load_workbook(excel_file, read_only=True, data_only=True)
+    try:
+        out = {}
+        for name, header_row in sheets.items():
+            if name not in wb.sheetnames:
+                out[name] = None
+                continue
+            # En modo de solo lectura ``max_row`` corta el análisis de la hoja tras el encabezado
+            rows = wb[name].iter_rows(min_row=header_row, max_row=header_row, values_only=True)
+            out[name] = list(next(rows, ()))
+        return out
+    finally:
+        wb.close()
+
+
+def _headers_pandas(excel_file, sheets: Dict[str, int]) -> Dict[str, Optional[list]]:
+    """Formatos que openpyxl no abre (``.xls``): mismos encabezados vía pandas."""
+    with pd.ExcelFile(excel_file) as xl:
+        return {name: list(xl.parse(name, skiprows=header_row - 1, nrows=0).columns)
+                if name in xl.sheet_names else None
+                for name, header_row in sheets.items()}
+
+
+def _read_headers(excel_file) -> Dict[str, Optional[list]]:
+    sheets = {SD_SHEET: SD_HEADER_ROW, BC_SHEET: BC_HEADER_ROW}
+    name = str(getattr(excel_file, "name", excel_file)).lower()
+    if hasattr(excel_file, "seek"):
+        excel_file.seek(0)
+    try:
+        if name.endswith(".xls"):
+            return _headers_pandas(excel_file, sheets)
+        return _headers_openpyxl(excel_file, sheets)
+    finally:
+        # Las lecturas posteriores (pandas) empiezan desde el principio del archivo
+        if hasattr(excel_file, "seek"):
+            excel_file.seek(0)
+
+
+def _values(column: pd.Series) -> list:
+    """Columna clave con las celdas vacías (NaN) como ``None``."""
+    return [None if pd.isna(v) else v for v in column.tolist()]
+
+
+# ---------------------------------------------------------------------------
+# 5. VALIDACIÓN
+# ---------------------------------------------------------------------------
+
+def _period_columns(header: list) -> List:
+    """Columnas que ``preprocess_data`` tomaría como periodo, más las fechas con tipo fecha."""
+    return [c for c in header
+            if (isinstance(c, str) and c.count("-") == 2) or isinstance(c, (datetime.date, pd.Timestamp))]
+
+
+def _check_headers(headers: Dict[str, Optional[list]]) -> List[dict]:
+    """Hojas y encabezados: lo que se comprueba sin leer ninguna fila de datos."""
+    errors = [_error("missing_sheet", name, f"Falta la hoja '{name}'")
+              for name, header in headers.items() if header is None]
+    sd, bc = headers[SD_SHEET], headers[BC_SHEET]
+    if sd is None:
+        return errors
+
+    for col in KEY_COLUMNS:
+        if col not in sd:
+            errors.append(_error("missing_column", SD_SHEET,
+                                 f"Falta la columna '{col}' en la fila {SD_HEADER_ROW} de '{SD_SHEET}'",
+                                 column=col, row=SD_HEADER_ROW))
+    periods = _period_columns(sd)
+    if not periods:
+        errors.append(_error("no_periods", SD_SHEET,
+                             f"'{SD_SHEET}' no tiene columnas de periodo con formato MM-DD-YY"))
+    bad = [c for c in periods if not (isinstance(c, str) and PERIOD_PATTERN.fullmatch(c.strip()))]
+    if bad:
+        errors.append(_error("bad_period", SD_SHEET,
+                             f"Columnas de periodo sin formato MM-DD-YY (texto) en '{SD_SHEET}'",
+                             columns=_listed([str(c) for c in bad])))
+
+    # preprocess_data solo lee Boundary Conditions para los periodos que también son columnas suyas
+    if bc is not None and set(periods) & set(bc) and "Attribute" not in bc:
+        errors.append(_error("missing_column", BC_SHEET,
+                             f"Falta la columna 'Attribute' en la fila {BC_HEADER_ROW} de '{BC_SHEET}'",
+                             column="Attribute", row=BC_HEADER_ROW))
+    return errors
+
+
+def _check_keys(df_sd: pd.DataFrame, df_bc: pd.DataFrame) -> List[dict]:
+    """Columnas clave de las hojas ya leídas (encabezados válidos)."""
+    errors = []
+    attributes: Dict[str, set] = {}
+    orphans = []
+    products, names = _values(df_sd["Product ID"]), _values(df_sd["Attribute"])
+    for n, (product, attribute) in enumerate(zip(products, names)):
+        if product in (None, ""):
+            if attribute not in (None, ""):
+                orphans.append(SD_HEADER_ROW + 1 + n)
+            continue
+        attributes.setdefault(str(product), set()).add(attribute)
+    if orphans:
+        errors.append(_error("missing_product_id", SD_SHEET,
+                             f"Filas con 'Attribute' pero sin 'Product ID' en '{SD_SHEET}'",
+                             rows=orphans[:MAX_LISTED]))
+    if not attributes:
+        errors.append(_error("no_products", SD_SHEET, f"'{SD_SHEET}' no tiene SKUs"))
+    for attribute in REQUIRED_ATTRIBUTES:
+        lacking = [p for p, attrs in attributes.items() if attribute not in attrs]
+        if lacking:
+            errors.append(_error("missing_attribute", SD_SHEET,
+                                 f"Falta la fila '{attribute}' para {len(lacking)} SKU(s)",
+                                 attribute=attribute, products=_listed(lacking)))
+
+    if set(_period_columns(list(df_sd.columns))) & set(df_bc.columns) \
+            and CAPACITY_ATTRIBUTE not in _values(df_bc["Attribute"]):
+        errors.append(_error("missing_attribute", BC_SHEET,
+                             f"Falta la fila '{CAPACITY_ATTRIBUTE}' en '{BC_SHEET}'",
+                             attribute=CAPACITY_ATTRIBUTE))
+    return errors
+
+
+def validate_workbook(excel_file) -> None:
+    """
+    Comprueba las hojas y los encabezados sin leer ninguna fila de datos.
+
+    Lanza ``WorkbookValidationError`` con todos los errores encontrados; el
+    archivo queda posicionado al principio para las lecturas posteriores.
+    """
+    try:
+        headers = _read_headers(excel_file)
+    except Exception as e:
+        raise WorkbookValidationError([_error("unreadable", None, f"No se pudo leer el libro: {e}")])
+    errors = _check_headers(headers)
+    if errors:
+        raise WorkbookValidationError(errors)
+
+
+def validate_frames(df_sd: pd.DataFrame, df_bc: pd.DataFrame) -> None:
+    """
+    Validación completa sobre las hojas que ya leyó ``Bus_lex.load_data``:
+    los encabezados y, si son válidos, las columnas clave.  Lanza
+    ``WorkbookValidationError`` antes de que ``preprocess_data`` falle.
+    """
+    errors = _check_headers({SD_SHEET: list(df_sd.columns), BC_SHEET: list(df_bc.columns)})
+    if not errors:
+        errors = _check_keys(df_sd, df_bc)
+    if errors:
+        raise WorkbookValidationError(errors)
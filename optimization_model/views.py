@@ -1,38 +1,735 @@
 from rest_framework.decorators import api_view
 from rest_framework.response import Response
 from .utils.optimize import optimize_data
-from django.http import JsonResponse
+from django.conf import settings
+from django.http import FileResponse, HttpResponse, JsonResponse, StreamingHttpResponse
+from django.urls import reverse
+from django.views.decorators.csrf import csrf_exempt
+from django.views.decorators.http import require_GET, require_POST
+from asgiref.sync import sync_to_async
 
+import asyncio
+import json
+import uuid
+from functools import lru_cache, partial, wraps
+from urllib.parse import urlencode
 import pandas as pd
 import numpy as np
 
-from .utils import Script_Maestro, optimize, Suma_ponderada_funciones, Bus_lex
+from . import distributed
+from .utils import Script_Maestro, optimize, Suma_ponderada_funciones, Bus_lex, charts, stochastic, streaming
 
 from .utils.Script_Maestro import optimize_from_excel
+from .utils.admission import Admission, Saturated
+from .utils.comparison import ComparisonParams, compare_models
+from .utils.costs import read_cost_table
+from .utils.encoding import check_encoding, encode_plan, plan_columns
+from .utils.goals import parse_goals, solve_goals
+from .utils.lexicographic import parse_objectives, solve_lexicographic
+from .utils.plan_store import PlanFilter, PlanStore
+from .utils.problem import load_problem
+from .utils.scenarios import parse_scenarios, read_scenario_sheets, solve_scenarios
+from .utils.solver import BudgetExhausted, SolveBudget, parse_budget
+from .utils.stochastic import solve_stochastic
+from .utils.streaming import RUNS, Cancelled, RunProgress
+from .utils.sweep import parse_alphas, sweep_alpha
+from .utils.telemetry import METRICS, RunTelemetry
+from .utils.validation import WorkbookValidationError, validate_workbook
+
+
+def _inputs(request):
+    """(query string, formulario) de una petición de DRF o de una vista de Django sin api_view."""
+    return getattr(request, "query_params", request.GET), getattr(request, "data", request.POST)
+
+
+def _flag(request, name):
+    """Lee un parámetro booleano opcional de la query string o del formulario."""
+    query, data = _inputs(request)
+    value = query.get(name, data.get(name, ""))
+    return str(value).lower() in ("1", "true", "yes")
+
+
+def _param(request, name, default, cast=float):
+    """Lee un parámetro opcional de la query string o del formulario."""
+    query, data = _inputs(request)
+    value = query.get(name, data.get(name))
+    return default if value in (None, "") else cast(value)
+
+
+def _upload_problem(excel_file):
+    """
+    Cuerpo del error 400 si el libro subido no sirve (falta, extensión o
+    estructura); ``None`` si se puede optimizar.  No lee los datos de periodo.
+    """
+    if not excel_file:
+        return {"error": "No file uploaded"}
+    if excel_file.name.split('.')[-1].lower() not in ['xlsx', 'xls']:
+        return {"error": "Invalid file type. Please upload an Excel file."}
+    try:
+        validate_workbook(excel_file)
+    except WorkbookValidationError as e:
+        return {"error": str(e), "errors": e.errors}
+    return None
+
+
+def _upload_error(excel_file):
+    """Respuesta 400 de ``_upload_problem``; ``None`` si se puede optimizar."""
+    problem = _upload_problem(excel_file)
+    return None if problem is None else Response(problem, status=400)
+
+
+def _dispatch(request):
+    """
+    ``distributed.dispatch`` si la petición pide ``distributed``: las
+    resoluciones independientes se reparten entre los nodos ``solve_worker``.
+    """
+    return distributed.dispatch if _flag(request, "distributed") else None
+
+
+def _budget(request):
+    """
+    Presupuesto de CBC de la petición: objeto JSON ``budget`` (con ``models``
+    por etiqueta) y/o los campos sueltos ``time_limit``, ``gap_rel`` y
+    ``max_nodes``.  Sin ellos rige ``settings.SOLVE_TIME_LIMIT``.
+    """
+    query, data = _inputs(request)
+    spec = query.get("budget", data.get("budget")) or {}
+    if isinstance(spec, str):
+        spec = json.loads(spec)
+    if not isinstance(spec, dict):
+        raise ValueError("budget debe ser un objeto JSON")
+    for name in ("time_limit", "gap_rel", "max_nodes"):
+        value = query.get(name, data.get(name))
+        if value not in (None, ""):
+            spec = {**spec, name: value}
+    return parse_budget(spec, SolveBudget(time_limit=getattr(settings, "SOLVE_TIME_LIMIT", None)))
+
+
+def _plan_store():
+    return PlanStore(settings.PLAN_STORE_DIR, getattr(settings, "PLAN_STORE_MAX_RUNS", 100))
+
+
+@lru_cache(maxsize=1)
+def _chart_service():
+    # Un único servicio por proceso: su hilo de dibujo se comparte entre peticiones
+    return charts.ChartService(settings.CHART_DIR, getattr(settings, "CHART_MAX_RUNS", 100))
+
+
+def _chart_params(request, prefix=""):
+    """Formato (``fmt``), ``dpi``, ``width`` y ``height`` de una gráfica (``chart_fmt``, ... con ``prefix``)."""
+    query, data = _inputs(request)
+    return charts.parse_params(*(query.get(prefix + name, data.get(prefix + name))
+                                 for name in ("fmt", "dpi", "width", "height")))
+
+
+@lru_cache(maxsize=1)
+def _admission():
+    # Un único ejecutor por proceso: la concurrencia y la cola son de todo el servidor
+    return Admission(getattr(settings, "OPTIMIZE_CONCURRENCY", None),
+                     getattr(settings, "OPTIMIZE_QUEUE_DEPTH", None),
+                     getattr(settings, "OPTIMIZE_QUEUE_TIMEOUT", 60.0))
+
+
+def _saturated(e):
+    """Respuesta 429/503 con ``Retry-After`` de un rechazo por saturación."""
+    response = JsonResponse({"error": str(e), "retryAfter": e.retry_after}, status=e.status)
+    response["Retry-After"] = str(e.retry_after)
+    return response
+
+
+def _render(view, request, *args, **kwargs):
+    response = view(request, *args, **kwargs)
+    # Las respuestas de DRF se serializan en el hilo del ejecutor, no en el bucle de eventos
+    if hasattr(response, "render") and callable(response.render):
+        response.render()
+    return response
+
+
+def admitted(view):
+    """
+    Versión asíncrona de una vista síncrona: la lectura de la petición, la
+    resolución y la serialización corren en el ejecutor acotado
+    (``utils.admission``).  Con el servidor saturado responde 429 (cola
+    llena) o 503 (sin turno a tiempo) con ``Retry-After``.
+    """
+    @wraps(view)
+    async def wrapper(request, *args, **kwargs):
+        try:
+            return await _admission().run(partial(_render, view, request, *args, **kwargs))
+        except Saturated as e:
+            return _saturated(e)
+    return wrapper
+
+
+def _split(table):
+    """Tabla como ``orient='split'`` con NaN, inf y -inf como null."""
+    return table.replace([np.nan, np.inf, -np.inf], None).to_dict(orient='split', index=False)
+
+
+def _load_problem(request, excel_file, telemetry):
+    """``load_problem`` del libro subido con la tabla de costos ``cost_file`` opcional."""
+    cost_file = request.FILES.get("cost_file")
+    return load_problem(excel_file, read_cost_table(cost_file) if cost_file else None, telemetry)
+
+
+def workbook_view(view):
+    """
+    Vista sobre un libro subido (``excel_file``): lo valida (400), crea la
+    telemetría y llama a ``view(request, excel_file, telemetry)``, que
+    devuelve el cuerpo de la respuesta o una ``Response`` ya hecha.  Añade
+    ``timings`` si la petición lo pide y traduce los errores: presupuesto
+    agotado → 422, datos inválidos → 400, el resto → 500.
+    """
+    @wraps(view)
+    def wrapper(request):
+        excel_file = request.FILES.get("excel_file")
+        error = _upload_error(excel_file)
+        if error is not None:
+            return error
+
+        telemetry = RunTelemetry()
+        try:
+            payload = view(request, excel_file, telemetry)
+            if isinstance(payload, Response):
+                return payload
+            if _flag(request, "timings"):
+                payload["timings"] = telemetry.as_dict()
+            return Response(payload)
+        except BudgetExhausted as e:
+            return Response({"error": str(e), "model": e.label, "result": e.result}, status=422)
+        except WorkbookValidationError as e:
+            return Response({"error": str(e), "errors": e.errors}, status=400)
+        except (ValueError, json.JSONDecodeError) as e:
+            return Response({"error": str(e)}, status=400)
+        except Exception as e:
+            return Response({"error": str(e)}, status=500)
+    return wrapper
+
+
+def _submit_chart(request, run_id, kind, data, params):
+    """Encola la gráfica (no espera a dibujarla) y devuelve su URL."""
+    _chart_service().submit(run_id, kind, data, params)
+    query = urlencode({"fmt": params.fmt, "dpi": params.dpi, "width": params.width, "height": params.height})
+    return request.build_absolute_uri(reverse("chart", args=[run_id, kind])) + "?" + query
 
 @api_view(['POST'])
 def optimizeScript(request):
 
     excel_file = request.FILES.get("excel_file")
-    df = pd.read_excel(excel_file)
+    # Archivo, extensión y estructura del libro antes de cualquier resolución
+    error = _upload_error(excel_file)
+    if error is not None:
+        METRICS.inc("optimization_requests_total", 1, {"status": "invalid"})
+        return error
 
-    if not excel_file:
-        return Response({"error": "No file uploaded"}, status=400)
+    telemetry = RunTelemetry()
+    try:
+        # Codificación de la respuesta (ver utils.encoding); se valida antes de optimizar
+        encoding = _param(request, "encoding", "default", str)
+        check_encoding(encoding)
+        # gzip solo se aplica al cuerpo de ``encode_plan`` (DRF y ``store`` no lo comprimen)
+        compress = _flag(request, "gzip")
+        if compress and (encoding == "default" or _flag(request, "store")):
+            raise ValueError("gzip solo se aplica con encoding=json, columnar o arrow y sin store")
 
-    # Validate the file extension
-    file_extension = excel_file.name.split('.')[-1].lower()
-    if file_extension not in ['xlsx', 'xls']:
-        return JsonResponse({"error": "Invalid file type. Please upload an Excel file."}, status=400)
+        # Tabla de costos por SKU opcional (CSV/Excel); si no llega se usa la hoja 'Costs'
+        cost_file = request.FILES.get("cost_file")
+        cost_table = read_cost_table(cost_file) if cost_file else None
+        # Duales, costos reducidos y rangos de cada resolución (utils.sensitivity)
+        sensitivity = [] if _flag(request, "sensitivity") else None
+        # Límites de tiempo, gap y nodos por modelo (utils.solver.SolveBudget)
+        budget = _budget(request)
+        # Gráfica de Pareto en segundo plano (utils.charts); se valida antes de optimizar
+        chart_params = _chart_params(request, "chart_") if _flag(request, "charts") else None
+        optimized_data, pareto_df = optimize_from_excel(excel_file, telemetry=telemetry, cost_table=cost_table,
+                                                        sensitivity=sensitivity, budget=budget,
+                                                        dispatch=_dispatch(request))
+        proven_optimal = bool(pareto_df["proven_optimal"].all())
 
-    try:
-        optimized_data, pareto_df = optimize_from_excel(excel_file)
+        run_id = None
+        if _flag(request, "store"):
+            # El plan queda en el servidor y se consulta por bloques en api/v1/plans/<runId>/
+            with telemetry.stage("store_plan"):
+                run_id = _plan_store().save(optimized_data, pareto_df)
+        chart_urls = None
+        if chart_params is not None:
+            chart_urls = {"pareto": _submit_chart(request, run_id or uuid.uuid4().hex, charts.PARETO,
+                                                  pareto_df, chart_params)}
+
+        if run_id is not None:
+            payload = {
+                "runId": run_id,
+                "rows": len(optimized_data),
+                "planUrl": request.build_absolute_uri(reverse("plan-rows", args=[run_id])),
+                "pareto": pareto_df.replace([np.nan, np.inf, -np.inf], None).to_dict(orient='records'),
+                "provenOptimal": proven_optimal,
+            }
+            if sensitivity is not None:
+                payload["sensitivity"] = sensitivity
+            if chart_urls is not None:
+                payload["charts"] = chart_urls
+            if _flag(request, "timings"):
+                payload["timings"] = telemetry.as_dict()
+            METRICS.inc("optimization_requests_total", 1, {"status": "ok"})
+            return Response(payload)
+
+        if encoding != "default":
+            extra = {"timings": telemetry.as_dict()} if _flag(request, "timings") else {}
+            extra["provenOptimal"] = proven_optimal
+            if chart_urls is not None:
+                extra["charts"] = chart_urls
+            if sensitivity is not None:
+                extra["sensitivity"] = sensitivity
+            with telemetry.stage("encode"):
+                body, content_type = encode_plan(optimized_data, pareto_df, encoding, compress, extra)
+            response = HttpResponse(body, content_type=content_type)
+            if compress:
+                response["Content-Encoding"] = "gzip"
+            METRICS.inc("optimization_requests_total", 1, {"status": "ok"})
+            return response
 
         # Reemplaza NaN, inf y -inf por None (null en JSON)
         cleaned_pareto_df = pareto_df.replace([np.nan, np.inf, -np.inf], None)
 
-        return Response({
+        payload = {
             "optimizedData": optimized_data,
-            "pareto": cleaned_pareto_df.to_dict(orient='records')
-        })
+            "pareto": cleaned_pareto_df.to_dict(orient='records'),
+            "provenOptimal": proven_optimal,
+        }
+        if sensitivity is not None:
+            payload["sensitivity"] = sensitivity
+        if chart_urls is not None:
+            payload["charts"] = chart_urls
+        if _flag(request, "timings"):
+            payload["timings"] = telemetry.as_dict()
+        METRICS.inc("optimization_requests_total", 1, {"status": "ok"})
+        return Response(payload)
+    except BudgetExhausted as e:
+        # El presupuesto se agotó sin ninguna solución factible que devolver
+        METRICS.inc("optimization_requests_total", 1, {"status": "budget_exhausted"})
+        return Response({"error": str(e), "model": e.label, "result": e.result}, status=422)
+    except WorkbookValidationError as e:
+        # Columnas clave del libro (ver utils.validation.validate_frames)
+        METRICS.inc("optimization_requests_total", 1, {"status": "invalid"})
+        return Response({"error": str(e), "errors": e.errors}, status=400)
+    except ValueError as e:
+        # Datos de entrada inválidos (p. ej. costos faltantes para algún SKU)
+        METRICS.inc("optimization_requests_total", 1, {"status": "invalid"})
+        return Response({"error": str(e)}, status=400)
+    except Exception as e:
+        METRICS.inc("optimization_requests_total", 1, {"status": "error"})
+        return Response({"error": str(e)}, status=500)
+    finally:
+        METRICS.inc("optimization_request_seconds_total", telemetry.as_dict()["total_seconds"])
+
+
+@require_GET
+def metrics(request):
+    """Expone las métricas del proceso en formato de texto de Prometheus."""
+    return HttpResponse(METRICS.render(), content_type="text/plain; version=0.0.4; charset=utf-8")
+
+
+@api_view(['POST'])
+@workbook_view
+def optimizeScenarios(request, excel_file, telemetry):
+    """
+    Resuelve muchos escenarios de demanda sobre un mismo libro base.
+
+    Campos: ``excel_file`` (obligatorio), ``scenarios`` (lista JSON, ver
+    ``utils.scenarios``), ``model`` ("lex" | "weighted"), ``alpha``, ``w_c``,
+    ``w_s``, ``workers``, ``distributed`` y ``cost_file`` (opcional).  Las
+    hojas ``Scenario*`` del libro también se incluyen como escenarios.
+    """
+    specs = request.data.get("scenarios", "[]")
+    specs = json.loads(specs) if isinstance(specs, str) else specs
+    problem = _load_problem(request, excel_file, telemetry)
+    scenarios = parse_scenarios(problem, specs) + read_scenario_sheets(excel_file, problem)
+    if not scenarios:
+        return Response({"error": "No scenarios given"}, status=400)
+
+    with telemetry.stage("solve_scenarios"):
+        table = solve_scenarios(
+            problem, scenarios,
+            model=_param(request, "model", "lex", str),
+            alpha=_param(request, "alpha", Script_Maestro.ALPHA),
+            wc=_param(request, "w_c", Script_Maestro.WC),
+            ws=_param(request, "w_s", 10.0),
+            max_workers=_param(request, "workers", None, int),
+            telemetry=telemetry,
+            dispatch=_dispatch(request),
+        )
+
+    return {
+        "products": len(problem.products),
+        "periods": len(problem.periods),
+        "scenarios": _split(table),
+    }
+
+
+@api_view(['POST'])
+@workbook_view
+def optimizeStochastic(request, excel_file, telemetry):
+    """
+    Plan de producción único frente a muchos escenarios de demanda (dos etapas).
+
+    Campos: ``excel_file`` (obligatorio), ``scenarios`` (lista JSON, ver
+    ``utils.scenarios``; por defecto ``samples`` muestras lognormales con
+    ``cv`` y ``seed``), ``model`` ("lex" | "weighted"), ``method``
+    ("benders" | "extensive"), ``multicut``, ``alpha``, ``w_c``, ``w_s``,
+    ``tol``, ``workers`` y ``cost_file`` (opcional).
+    """
+    specs = request.data.get("scenarios")
+    if specs in (None, ""):
+        specs = [{"name": "mc", "samples": _param(request, "samples", 100, int),
+                  "cv": _param(request, "cv", 0.1), "seed": _param(request, "seed", None, int)}]
+    specs = json.loads(specs) if isinstance(specs, str) else specs
+    problem = _load_problem(request, excel_file, telemetry)
+    scenarios = parse_scenarios(problem, specs) + read_scenario_sheets(excel_file, problem)
+
+    with telemetry.stage("solve_stochastic"):
+        result = solve_stochastic(
+            problem, scenarios,
+            model=_param(request, "model", "lex", str),
+            method=_param(request, "method", "benders", str),
+            alpha=_param(request, "alpha", Script_Maestro.ALPHA),
+            wc=_param(request, "w_c", Script_Maestro.WC),
+            ws=_param(request, "w_s", 10.0),
+            multicut=_flag(request, "multicut"),
+            max_workers=_param(request, "workers", None, int),
+            tol=_param(request, "tol", stochastic.TOL),
+            telemetry=telemetry,
+        )
+
+    payload = {
+        "status": result.status,
+        "model": result.model,
+        "method": result.method,
+        "iterations": result.iterations,
+        "gap": result.gap,
+        "expectedCost": result.expected_cost,
+        "expectedShortfall": result.expected_shortfall,
+        "serviceLevel": result.service_level,
+        "plan": result.plan_records(problem),
+    }
+    if result.scenarios is not None:
+        payload["scenarios"] = _split(result.scenarios)
+    return payload
+
+
+@api_view(['POST'])
+@workbook_view
+def optimizeSweep(request, excel_file, telemetry):
+    """
+    Curva servicio/coste del modelo lexicográfico para muchos valores de alpha.
+
+    Campos: ``excel_file`` (obligatorio), ``alphas`` (lista JSON, texto
+    ``"0.8,0.9"``, rango ``"inicio:fin:paso"`` u objeto ``{start, stop, step}``,
+    ver ``utils.sweep``), ``workers``, ``distributed`` y ``cost_file``
+    (opcional).  La fase 1 se resuelve una sola vez para todo el barrido.
+    """
+    spec = request.data.get("alphas")
+    if spec in (None, ""):
+        return Response({"error": "No alphas given"}, status=400)
+    if isinstance(spec, str) and spec.lstrip().startswith(("[", "{")):
+        spec = json.loads(spec)
+    try:
+        alphas = parse_alphas(spec)
+    except KeyError as e:
+        # Objeto {start, stop, step} incompleto
+        raise ValueError(f"Falta el campo {e} en alphas") from e
+    problem = _load_problem(request, excel_file, telemetry)
+
+    with telemetry.stage("sweep_alpha"):
+        result = sweep_alpha(problem, alphas, max_workers=_param(request, "workers", None, int),
+                             telemetry=telemetry, dispatch=_dispatch(request))
+
+    return {
+        "status": result.status,
+        "fStar": result.f_star,
+        "curve": _split(result.curve),
+    }
+
+
+@api_view(['POST'])
+@workbook_view
+def optimizeLexicographic(request, excel_file, telemetry):
+    """
+    Modelo lexicográfico con una lista ordenada de objetivos sobre un único
+    modelo (ver ``utils.lexicographic``).
+
+    Campos: ``excel_file`` (obligatorio), ``objectives`` (lista JSON o texto
+    ``"cost,shortfall,smoothing,excess"``; por defecto ``cost,shortfall``),
+    ``alpha``, ``integer``, ``cost_file`` (opcional) y el presupuesto de CBC
+    (``budget``, ``time_limit``, ...).  Devuelve la tabla de etapas, el valor
+    final de cada objetivo y el plan; si el libro trae hojas de recursos,
+    también el uso de cada línea (``resourceUsage``).
+    """
+    spec = request.data.get("objectives")
+    if isinstance(spec, str) and spec.lstrip().startswith("["):
+        spec = json.loads(spec)
+    objectives = parse_objectives(spec)
+    budget = _budget(request)
+    problem = _load_problem(request, excel_file, telemetry)
+
+    with telemetry.stage("solve_lexicographic"):
+        result = solve_lexicographic(problem, objectives, alpha=_param(request, "alpha", Script_Maestro.ALPHA),
+                                     integer=_flag(request, "integer"), telemetry=telemetry, budget=budget)
+
+    payload = {
+        "status": result.status,
+        "objectives": objectives,
+        "stages": _split(result.stages),
+        "values": result.values,
+        "serviceLevel": result.service_level,
+        "plan": plan_columns(result.plan),
+    }
+    if problem.resources is not None:
+        payload["resourceUsage"] = _split(result.usage)
+    return payload
+
+
+@api_view(['POST'])
+@workbook_view
+def optimizeGoals(request, excel_file, telemetry):
+    """
+    Goal programming por prioridades (ver ``utils.goals``).
+
+    Campos: ``excel_file`` (obligatorio), ``goals`` (lista JSON de
+    ``{metric, target, priority, sense, weight}``), ``integer``,
+    ``cost_file`` (opcional) y el presupuesto de CBC (``budget``,
+    ``time_limit``, ...).  Devuelve el logro y el tiempo de cada nivel de
+    prioridad, el detalle de cada meta y el plan (y ``resourceUsage`` si el
+    libro trae hojas de recursos).
+    """
+    specs = request.data.get("goals")
+    if specs in (None, ""):
+        return Response({"error": "No goals given"}, status=400)
+    goals = parse_goals(json.loads(specs) if isinstance(specs, str) else specs)
+    budget = _budget(request)
+    problem = _load_problem(request, excel_file, telemetry)
+
+    with telemetry.stage("solve_goals"):
+        result = solve_goals(problem, goals, integer=_flag(request, "integer"), telemetry=telemetry,
+                             budget=budget)
+
+    payload = {
+        "status": result.status,
+        "priorities": _split(result.priorities),
+        "goals": _split(result.goals),
+        "serviceLevel": result.service_level,
+        "plan": plan_columns(result.plan),
+    }
+    if problem.resources is not None:
+        payload["resourceUsage"] = _split(result.usage)
+    return payload
+
+
+@api_view(['POST'])
+@workbook_view
+def optimizeCompare(request, excel_file, telemetry):
+    """
+    Compara los modelos lexicográfico, goal programming, restricción funcional
+    y weighted‑sum sobre un mismo libro (ver ``utils.comparison``).
+
+    Campos: ``excel_file`` (obligatorio), ``alpha``, ``w_c``, ``w_s``,
+    ``cost_factor``, ``cost_file`` (opcional) y el presupuesto de CBC
+    (``budget``, ``time_limit``, ...).  Devuelve la tabla de métricas con el
+    tiempo y el error (si lo hubo) de cada modelo.  Con ``charts`` añade la
+    URL de la gráfica coste/servicio (``chart_fmt``, ``chart_dpi``, ...).
+    """
+    defaults = ComparisonParams()
+    params = ComparisonParams(
+        alpha=_param(request, "alpha", defaults.alpha),
+        w_c=_param(request, "w_c", defaults.w_c),
+        w_s=_param(request, "w_s", defaults.w_s),
+        cost_factor=_param(request, "cost_factor", defaults.cost_factor),
+    )
+    budget = _budget(request)
+    chart_params = _chart_params(request, "chart_") if _flag(request, "charts") else None
+    problem = _load_problem(request, excel_file, telemetry)
+
+    with telemetry.stage("compare_models"):
+        table = compare_models(problem, params, telemetry=telemetry, budget=budget)
+
+    payload = {
+        "params": params._asdict(),
+        "comparison": _split(table),
+    }
+    if chart_params is not None:
+        payload["charts"] = {"comparison": _submit_chart(request, uuid.uuid4().hex, charts.COMPARISON,
+                                                         table, chart_params)}
+    return payload
+
+
+def _stream_run(progress, excel_file, cost_file, budget, alphas, workers, dispatch, telemetry):
+    """Optimización de ``optimizeStream`` en un hilo: publica cada resultado en ``progress``."""
+    try:
+        # Cancelada mientras esperaba turno en el ejecutor
+        progress.check()
+        cost_table = read_cost_table(cost_file) if cost_file else None
+        plan_df, pareto_df = optimize_from_excel(excel_file, telemetry=telemetry, cost_table=cost_table,
+                                                 budget=budget, progress=progress, dispatch=dispatch)
+        progress("plan", {"plan": plan_columns(plan_df),
+                          "provenOptimal": bool(pareto_df["proven_optimal"].all())})
+        if alphas:
+            problem = load_problem(excel_file, cost_table, telemetry)
+            with telemetry.stage("sweep_alpha"):
+                result = sweep_alpha(problem, alphas, max_workers=workers, telemetry=telemetry,
+                                     on_point=progress.point("alpha"), dispatch=dispatch)
+            progress("sweep", {"status": result.status, "fStar": result.f_star})
+        progress.finish(streaming.DONE, {"timings": telemetry.as_dict()})
+    except Cancelled:
+        progress.finish(streaming.CANCELLED, {"timings": telemetry.as_dict()})
+    except BudgetExhausted as e:
+        progress.finish(streaming.ERROR, {"status": 422, "error": str(e), "model": e.label})
+    except ValueError as e:
+        progress.finish(streaming.ERROR, {"status": 400, "error": str(e)})
     except Exception as e:
-        return Response({"error": str(e)}, status=500)
\ No newline at end of file
+        progress.finish(streaming.ERROR, {"status": 500, "error": str(e)})
+
+
+def _stream_rejected(progress, worker):
+    """Cierra el flujo con un evento de error si el trabajo no llegó a empezar (503)."""
+    if not worker.cancelled() and isinstance(worker.exception(), Saturated):
+        e = worker.exception()
+        progress.finish(streaming.ERROR, {"status": e.status, "error": str(e), "retryAfter": e.retry_after})
+
+
+@csrf_exempt
+@require_POST
+async def optimizeStream(request):
+    """
+    Optimización de ``optimizeScript`` con los resultados en vivo (Server‑Sent Events).
+
+    Campos: ``excel_file`` (obligatorio), ``cost_file``, el presupuesto de CBC
+    (``budget``, ``time_limit``, ...) y, opcionalmente, ``alphas`` (como en
+    ``optimizeSweep``), ``workers`` y ``distributed`` para barrer alpha al
+    final.  Eventos, en
+    orden: ``start`` (``runId`` y ``cancelUrl``), un ``point`` por punto de
+    Pareto (primero el lexicográfico), ``frontier``, ``plan``, un ``alpha``
+    por punto del barrido y ``sweep``; termina con ``done``, ``cancelled`` o
+    ``error``.  Desconectarse o hacer POST a ``cancelUrl`` cancela la ejecución.
+    """
+    excel_file = request.FILES.get("excel_file")
+    error = await sync_to_async(_upload_problem, thread_sensitive=False)(excel_file)
+    if error is not None:
+        return JsonResponse(error, status=400)
+    try:
+        budget = _budget(request)
+        spec = request.POST.get("alphas")
+        if isinstance(spec, str) and spec.lstrip().startswith(("[", "{")):
+            spec = json.loads(spec)
+        alphas = parse_alphas(spec) if spec not in (None, "") else None
+        workers = _param(request, "workers", None, int)
+        dispatch = _dispatch(request)
+    except (ValueError, KeyError, json.JSONDecodeError) as e:
+        return JsonResponse({"error": str(e)}, status=400)
+
+    progress = RunProgress(asyncio.get_running_loop())
+    run_id = RUNS.add(progress)
+    cancel_url = request.build_absolute_uri(reverse("optimize-stream-cancel", args=[run_id]))
+    try:
+        worker = _admission().submit(_stream_run, progress, excel_file, request.FILES.get("cost_file"),
+                                     budget, alphas, workers, dispatch, RunTelemetry())
+    except Saturated as e:
+        RUNS.remove(run_id)
+        return _saturated(e)
+    worker.add_done_callback(partial(_stream_rejected, progress))
+
+    async def events():
+        try:
+            yield streaming.sse("start", {"runId": run_id, "cancelUrl": cancel_url})
+            async for chunk in progress.events():
+                yield chunk
+        finally:
+            # Fin normal, cancelación o cliente desconectado: no se lanzan más resoluciones
+            progress.cancel()
+            RUNS.remove(run_id)
+            # El libro subido se cierra al terminar la petición: se espera a que el hilo lo suelte
+            await asyncio.wait([worker])
+
+    response = StreamingHttpResponse(events(), content_type=streaming.CONTENT_TYPE)
+    response["Cache-Control"] = "no-cache"
+    response["X-Accel-Buffering"] = "no"
+    return response
+
+
+@api_view(['POST'])
+def optimizeStreamCancel(request, run_id):
+    """Cancela una ejecución en curso de ``optimizeStream``."""
+    if not RUNS.cancel(run_id):
+        return Response({"error": f"Run '{run_id}' not found"}, status=404)
+    return Response({"runId": run_id, "cancelled": True})
+
+
+@require_GET
+def chartImage(request, run_id, kind):
+    """
+    Imagen de una gráfica dibujada en segundo plano (``utils.charts``).
+
+    Parámetros: ``fmt`` ("png" | "svg"), ``dpi``, ``width`` y ``height`` (en
+    pulgadas); deben coincidir con los de la URL devuelta al optimizar.  202
+    con ``Retry-After`` mientras se dibuja.  La frontera de Pareto de una
+    ejecución guardada (``store``) se vuelve a dibujar si no está en caché.
+    """
+    service = _chart_service()
+    try:
+        params = _chart_params(request)
+        state, detail = service.status(run_id, kind, params)
+    except ValueError as e:
+        return JsonResponse({"error": str(e)}, status=400)
+    except KeyError:
+        return JsonResponse({"error": f"Chart '{kind}' for run '{run_id}' not found"}, status=404)
+
+    if state == charts.MISSING and kind == charts.PARETO:
+        try:
+            pareto = _plan_store().open(run_id).meta.get("pareto")
+        except KeyError:
+            pareto = None
+        if pareto:
+            service.submit(run_id, kind, pd.DataFrame(pareto), params)
+            state = charts.PENDING
+
+    if state == charts.READY:
+        return FileResponse(open(detail, "rb"), content_type=params.content_type)
+    if state == charts.PENDING:
+        response = JsonResponse({"status": state}, status=202)
+        response["Retry-After"] = "1"
+        return response
+    if state == charts.FAILED:
+        return JsonResponse({"error": detail}, status=500)
+    return JsonResponse({"error": f"Chart '{kind}' for run '{run_id}' not found"}, status=404)
+
+
+@api_view(['GET'])
+def planRows(request, run_id):
+    """
+    Plan almacenado de una ejecución (``store=1`` en ``optimizeScript``) como NDJSON.
+
+    Una línea ``{"Product", "Period", "Production"}`` por fila, transmitida por
+    bloques.  Filtros opcionales: ``product`` (repetible o separado por comas),
+    ``period_from``/``period_to`` (inclusivos, en el orden del libro) y
+    ``offset``/``limit`` para paginar.  Cabecera ``X-Total-Rows``: filas del plan
+    sin filtrar.
+    """
+    try:
+        plan = _plan_store().open(run_id)
+    except KeyError:
+        return Response({"error": f"Run '{run_id}' not found"}, status=404)
+
+    try:
+        products = [p for value in request.query_params.getlist("product") for p in value.split(",") if p]
+        flt = PlanFilter(
+            products=products or None,
+            period_from=request.query_params.get("period_from") or None,
+            period_to=request.query_params.get("period_to") or None,
+            offset=max(0, _param(request, "offset", 0, int)),
+            limit=_param(request, "limit", None, int),
+        )
+        lines = plan.iter_ndjson(flt)
+    except ValueError as e:
+        return Response({"error": str(e)}, status=400)
+
+    response = StreamingHttpResponse(lines, content_type="application/x-ndjson")
+    response["X-Total-Rows"] = str(plan.rows)
+    return response